@@ -3,6 +3,7 @@ import {
   loadContract,
   deployContract,
   sendOperation,
+  verifyCompiledContract,
 } from './utils'
 import { initOracleLib, Utils } from '@tacoinfra/harbinger-lib'
 import { TezosNodeReader } from 'conseiljs'
@@ -53,6 +54,9 @@ export type DeployParams = {
   upperQuorumCap: BigNumber
   lowerQuorumCap: BigNumber
 
+  // The maximum number of polls which may be underway at once.
+  maxActivePolls: BigNumber
+
   // The maximum drip size from the faucet.
   maxFaucetDripSize: BigNumber
 
@@ -117,6 +121,7 @@ export const deploy = async (params: DeployParams): Promise<void> => {
   console.log(
     `Quorum Caps: [${params.lowerQuorumCap.toFixed()}, ${params.upperQuorumCap.toFixed()}]`,
   )
+  console.log(`Max Active Polls: ${params.maxActivePolls.toFixed()}`)
   console.log(`Faucet Max Drip Size: ${params.maxFaucetDripSize.toFixed()}`)
   console.log(``)
 
@@ -163,6 +168,31 @@ export const deploy = async (params: DeployParams): Promise<void> => {
     `${__dirname}/../../smart_contracts/vesting-vault.tz`,
   )
 
+  verifyCompiledContract(
+    tokenContract,
+    'token',
+    [
+      'mint',
+      'disableMinting',
+      'setSnapshotter',
+      'setAdministrator',
+      'transferBatch',
+    ],
+    [
+      'getNextSnapshot',
+      'getSnapshotVotes',
+      'getPriorVotes',
+      'getPriorTotalSupply',
+    ],
+  )
+  verifyCompiledContract(
+    communityFundContract,
+    'community fund',
+    ['setGovernorContract'],
+    [],
+  )
+  verifyCompiledContract(daoContract, 'dao', ['onTokenTransfer'], [])
+
   console.log('Contracts loaded.')
   console.log('')
 
@@ -182,7 +212,7 @@ export const deploy = async (params: DeployParams): Promise<void> => {
 
   console.log('>>> [1/4] Deploying Token Contract')
   counter++
-  const tokenContractStorage = `(Pair (Pair (Pair (Some "${keystore.publicKeyHash}") {}) (Pair {} (Pair {} {Elt "" 0x74657a6f732d73746f726167653a64617461; Elt "data" 0x7b20226e616d65223a20226b44414f20546f6b656e222c20226465736372697074696f6e223a2022546865204641312e3220476f7665726e616e636520546f6b656e20466f72204b6f6c69627269222c2022617574686f7273223a205b22486f766572204c616273203c68656c6c6f40686f7665722e656e67696e656572696e673e225d2c2022686f6d6570616765223a20202268747470733a2f2f6b6f6c696272692e66696e616e6365222c2022696e7465726661636573223a205b2022545a49502d3030372d323032312d30312d3239225d207d}))) (Pair (Pair False {}) (Pair False (Pair {Elt 0 (Pair 0 {Elt "decimals" 0x3138; Elt "icon" 0x68747470733a2f2f6b6f6c696272692d646174612e73332e616d617a6f6e6177732e636f6d2f6b64616f2d6c6f676f2e706e67; Elt "name" 0x4b6f6c696272692044414f20546f6b656e; Elt "symbol" 0x6b44414f})} 0))))`
+  const tokenContractStorage = `(Pair (Pair (Pair (Pair (Some "${keystore.publicKeyHash}") (Pair {} {})) (Pair {} (Pair ${params.voteDelayBlocks.plus(params.voteLengthBlocks).toFixed()} {}))) (Pair (Pair {} (Pair {} {})) (Pair {} (Pair {Elt "" 0x74657a6f732d73746f726167653a64617461; Elt "data" 0x7b20226e616d65223a20226b44414f20546f6b656e222c20226465736372697074696f6e223a2022546865204641312e3220476f7665726e616e636520546f6b656e20466f72204b6f6c69627269222c2022617574686f7273223a205b22486f766572204c616273203c68656c6c6f40686f7665722e656e67696e656572696e673e225d2c2022686f6d6570616765223a20202268747470733a2f2f6b6f6c696272692e66696e616e6365222c2022696e7465726661636573223a205b2022545a49502d3030372d323032312d30312d3239225d207d} False)))) (Pair (Pair (Pair 0 (Pair False 0)) (Pair 86400 (Pair {} {}))) (Pair (Pair {} (Pair None {})) (Pair (Pair {Elt 0 (Pair 0 {Elt "decimals" 0x3138; Elt "icon" 0x68747470733a2f2f6b6f6c696272692d646174612e73332e616d617a6f6e6177732e636f6d2f6b64616f2d6c6f676f2e706e67; Elt "name" 0x4b6f6c696272692044414f20546f6b656e; Elt "symbol" 0x6b44414f})} 0) (Pair {} {})))))`
   const tokenDeployResult = await deployContract(
     tokenContract,
     tokenContractStorage,
@@ -206,7 +236,7 @@ export const deploy = async (params: DeployParams): Promise<void> => {
 
   console.log('>>> [3/4] Deploying DAO')
   counter++
-  const daoStorage = `(Pair (Pair (Pair "${communityFundDeployResult.contractAddress}" (Pair ${params.escrowAmount.toFixed()} (Pair ${params.voteDelayBlocks.toFixed()} (Pair ${params.voteLengthBlocks.toFixed()} (Pair ${params.minYayVotesPercentForEscrowReturn.toFixed()} (Pair ${params.blocksInTimelockForExecution.toFixed()} (Pair ${params.blocksInTimelockForCancellation.toFixed()} (Pair ${params.percentageForSuperMajority.toFixed()} (Pair ${params.lowerQuorumCap.toFixed()} ${params.upperQuorumCap.toFixed()}))))))))) (Pair {Elt "" 0x74657a6f732d73746f726167653a64617461; Elt "data" 0x7b20226e616d65223a20224b6f6c6962726920476f7665726e616e63652044414f222c2022617574686f7273223a205b22486f766572204c616273203c68656c6c6f40686f7665722e656e67696e656572696e673e225d2c2022686f6d6570616765223a20202268747470733a2f2f6b6f6c696272692e66696e616e636522207d}                                                                                   (Pair 0 {}))) (Pair (Pair None (Pair ${params.quorum.toFixed()} 0)) (Pair None (Pair "${tokenDeployResult.contractAddress}" None))))`
+  const daoStorage = `(Pair (Pair (Pair (Pair {} "${communityFundDeployResult.contractAddress}") (Pair {} (Pair ${params.escrowAmount.toFixed()} (Pair ${params.voteDelayBlocks.toFixed()} (Pair ${params.voteLengthBlocks.toFixed()} (Pair ${params.minYayVotesPercentForEscrowReturn.toFixed()} (Pair ${params.blocksInTimelockForExecution.toFixed()} (Pair ${params.blocksInTimelockForCancellation.toFixed()} (Pair ${params.percentageForSuperMajority.toFixed()} (Pair ${params.lowerQuorumCap.toFixed()} ${params.upperQuorumCap.toFixed()})))))))))) (Pair (Pair ${params.maxActivePolls.toFixed()} {Elt "" 0x74657a6f732d73746f726167653a64617461; Elt "data" 0x7b20226e616d65223a20224b6f6c6962726920476f7665726e616e63652044414f222c2022617574686f7273223a205b22486f766572204c616273203c68656c6c6f40686f7665722e656e67696e656572696e673e225d2c2022686f6d6570616765223a20202268747470733a2f2f6b6f6c696272692e66696e616e636522207d}) (Pair 0 {}))) (Pair (Pair (Pair {} {}) (Pair ${params.quorum.toFixed()} 0)) (Pair (Pair {} "${tokenDeployResult.contractAddress}") (Pair False (Pair {} None)))))`
   const daoDeployResult = await deployContract(
     daoContract,
     daoStorage,
@@ -234,7 +264,7 @@ export const deploy = async (params: DeployParams): Promise<void> => {
   console.log('------------------------------------------------------')
   console.log('')
 
-  console.log('>>> [1/3] Minting Tokens')
+  console.log('>>> [1/4] Minting Tokens')
   counter++
   const mintParam = `Pair "${keystore.publicKeyHash
     }" ${CONFIG.TOKENS_TO_MINT.toFixed()}`
@@ -248,7 +278,7 @@ export const deploy = async (params: DeployParams): Promise<void> => {
   )
   console.log('')
 
-  console.log('>>> [2/3] Locking Minting')
+  console.log('>>> [2/4] Locking Minting')
   counter++
   await sendOperation(
     tokenDeployResult.contractAddress,
@@ -260,7 +290,19 @@ export const deploy = async (params: DeployParams): Promise<void> => {
   )
   console.log('')
 
-  console.log('>>> [3/3] Revoking Administration Rights')
+  console.log('>>> [3/4] Setting DAO as Snapshotter')
+  counter++
+  await sendOperation(
+    tokenDeployResult.contractAddress,
+    'setSnapshotter',
+    `(Some "${daoDeployResult.contractAddress}")`,
+    keystore,
+    counter,
+    params.nodeAddress,
+  )
+  console.log('')
+
+  console.log('>>> [4/4] Revoking Administration Rights')
   counter++
   await sendOperation(
     tokenDeployResult.contractAddress,
@@ -298,7 +340,7 @@ export const deploy = async (params: DeployParams): Promise<void> => {
   console.log('')
 
   const vestingVaultDeployResults = []
-  const steps = params.vestingContracts.length * 2
+  const steps = params.vestingContracts.length
   let step = 0
   for (let i = 0; i < params.vestingContracts.length; i++) {
     const vestingContract = params.vestingContracts[i]
@@ -317,27 +359,10 @@ export const deploy = async (params: DeployParams): Promise<void> => {
     )
     vestingVaultDeployResults.push(vestingVaultDeployResult)
     console.log('')
-
-    counter++
-    console.log(
-      `>>> [${++step}/${steps}] Transferring Vesting Contract for ${vestingContract.owner
-      }`,
-    )
-    const transferParam = `Pair "${keystore.publicKeyHash}" (Pair "${vestingVaultDeployResult.contractAddress
-      }" ${vestingContract.amount.toFixed()})`
-    await sendOperation(
-      tokenDeployResult.contractAddress,
-      'transfer',
-      transferParam,
-      keystore,
-      counter,
-      params.nodeAddress,
-    )
-    console.log(``)
   }
 
   console.log('------------------------------------------------------')
-  console.log('>> Vesting Contracts Deployed and Configured')
+  console.log('>> Vesting Contracts Deployed')
   console.log('>> Distributing Tokens')
   console.log('------------------------------------------------------')
   console.log('')
@@ -351,48 +376,46 @@ export const deploy = async (params: DeployParams): Promise<void> => {
   console.log(`Total In Vesting Vaults: ${totalInVaults.toFixed()}`)
   console.log('')
 
+  const remainder = CONFIG.TOKENS_TO_MINT.minus(totalInVaults)
+    .minus(params.faucetAmount)
+    .minus(params.airdropAmount)
+
+  // Distribute all tokens in a single batched transfer.
+  const distribution: Array<[string, BigNumber]> = []
+  for (let i = 0; i < params.vestingContracts.length; i++) {
+    const vestingContract = params.vestingContracts[i]
+    console.log(
+      `Moving ${vestingContract.amount.toFixed()} Tokens to Vesting Contract for ${vestingContract.owner
+      }`,
+    )
+    distribution.push([
+      vestingVaultDeployResults[i].contractAddress,
+      vestingContract.amount,
+    ])
+  }
+
   console.log(`Moving ${params.faucetAmount.toFixed()} Tokens to Faucet`)
-  counter++
-  const faucetTransferParam = `Pair "${keystore.publicKeyHash}" (Pair "${faucetDeployResult.contractAddress
-    }" ${params.faucetAmount.toFixed()})`
-  await sendOperation(
-    tokenDeployResult.contractAddress,
-    'transfer',
-    faucetTransferParam,
-    keystore,
-    counter,
-    params.nodeAddress,
-  )
-  console.log('')
+  distribution.push([faucetDeployResult.contractAddress, params.faucetAmount])
 
   console.log(
     `Moving ${params.airdropAmount.toFixed()} Tokens to ${params.airdropAddress
     }`,
   )
-  counter++
-  const airdropTransferParam = `Pair "${keystore.publicKeyHash}" (Pair "${params.airdropAddress
-    }" ${params.airdropAmount.toFixed()})`
-  await sendOperation(
-    tokenDeployResult.contractAddress,
-    'transfer',
-    airdropTransferParam,
-    keystore,
-    counter,
-    params.nodeAddress,
-  )
-  console.log('')
+  distribution.push([params.airdropAddress, params.airdropAmount])
 
-  const remainder = CONFIG.TOKENS_TO_MINT.minus(totalInVaults)
-    .minus(params.faucetAmount)
-    .minus(params.airdropAmount)
   console.log(`Moving remaining ${remainder.toFixed()} to Community Fund`)
+  distribution.push([communityFundDeployResult.contractAddress, remainder])
   counter++
-  const communityFundTransferParam = `Pair "${keystore.publicKeyHash}" (Pair "${communityFundDeployResult.contractAddress
-    }" ${remainder.toFixed()})`
+  const transferBatchParam = `{ ${distribution
+    .map(
+      ([destination, amount]) =>
+        `Pair "${keystore.publicKeyHash}" (Pair "${destination}" ${amount.toFixed()})`,
+    )
+    .join(' ; ')} }`
   await sendOperation(
     tokenDeployResult.contractAddress,
-    'transfer',
-    communityFundTransferParam,
+    'transferBatch',
+    transferBatchParam,
     keystore,
     counter,
     params.nodeAddress,
@@ -47,6 +47,8 @@ const params: DeployParams = {
   upperQuorumCap: scaleTokenAmount(new BigNumber('900000')),
   lowerQuorumCap: scaleTokenAmount(new BigNumber('10000')),
 
+  maxActivePolls: new BigNumber('3'),
+
   governorAddress: 'tz1hoverof3f2F8NAavUyTjbFBstZXTqnUMS',
 }
 
@@ -32,6 +32,29 @@ export function loadContract(filename: string): string {
   return contract
 }
 
+// Verify a compiled contract has the given entrypoints and on-chain views, so that a .tz file which is older
+// than its source fails before anything is originated.
+export function verifyCompiledContract(
+  contract: string,
+  contractName: string,
+  entrypoints: Array<string>,
+  views: Array<string>,
+): void {
+  const missing = [
+    ...entrypoints.filter(
+      (entrypoint) => !contract.includes(`%${entrypoint}`),
+    ),
+    ...views.filter((view) => !contract.includes(`view "${view}"`)),
+  ]
+  if (missing.length > 0) {
+    throw new Error(
+      `Compiled ${contractName} contract is missing ${missing.join(
+        ', ',
+      )}. Run compile.sh and commit the .tz files.`,
+    )
+  }
+}
+
 export function initConseil(conseilLogLevel: LogLevelDesc): void {
   const logger = getLogger('conseiljs')
   logger.setLevel(conseilLogLevel, false)
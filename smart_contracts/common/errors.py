@@ -12,8 +12,11 @@ ERROR_POLL_UNDERWAY = "POLL_UNDERWAY"
 # There is not a poll available.
 ERROR_NO_POLL = "NO_POLL"
 
-# There is already a item in the timelock.
-ERROR_ITEM_IN_TIMELOCK = "ITEM_IN_TIMELOCK"
+# The escrow sent with a proposal is not the required amount.
+ERROR_BAD_ESCROW_AMOUNT = "BAD_ESCROW_AMOUNT"
+
+# The data sent with a proposal's escrow is not a proposal.
+ERROR_BAD_PROPOSAL = "BAD_PROPOSAL"
 
 # There is no item in the timelock.
 ERROR_NO_ITEM_IN_TIMELOCK = "NO_ITEM_IN_TIMELOCK"
@@ -24,12 +27,21 @@ ERROR_VOTING_FINISHED = "VOTING_FINISHED"
 # Voting is not finished
 ERROR_VOTING_NOT_FINISHED = "VOTING_NOT_FINISHED"
 
+# A poll must be finalized in at least one step.
+ERROR_BAD_MAX_STEPS = "BAD_MAX_STEPS"
+
 # The address has already voted.
 ERROR_ALREADY_VOTED = "ALREADY_VOTED"
 
 # The given vote value was invalid.
 ERROR_BAD_VOTE_VALUE = "BAD_VOTE_VALUE"
 
+# The votes cast exceed the voter's voting power.
+ERROR_TOO_MANY_VOTES = "TOO_MANY_VOTES"
+
+# The signature did not match the signed payload.
+ERROR_BAD_SIGNATURE = "BAD_SIGNATURE"
+
 # The entry point may only be called by the proposal's author.
 ERROR_NOT_AUTHOR = "NOT_AUTHOR"
 
@@ -48,12 +60,27 @@ ERROR_UNKNOWN = "UNKNOWN"
 # The sender was not the token contract.
 ERROR_NOT_TOKEN_CONTRACT = "NOT_TOKEN_CONTRACT"
 
+# The token contract does not provide a `getPriorVotes` on-chain view.
+ERROR_NO_VOTES_VIEW = "NO_VOTES_VIEW"
+
 # The operation requested too many tokens from the faucet
 ERROR_TOO_MANY_TOKENS = "TOO_MANY_TOKENS"
 
 # The requested block level hasn't occured.
 ERROR_BLOCK_LEVEL_TOO_SOON = "BLOCK_LEVEL_TOO_SOON"
 
+# The requested window of block levels is empty.
+ERROR_BAD_WINDOW = "BAD_WINDOW"
+
+# The requested block levels are not in ascending order.
+ERROR_LEVELS_NOT_SORTED = "LEVELS_NOT_SORTED"
+
+# The requested block level is before the history which was kept when checkpoints were compacted.
+ERROR_CHECKPOINTS_COMPACTED = "CHECKPOINTS_COMPACTED"
+
+# Checkpoints may not be compacted at a block level within the retention horizon.
+ERROR_WITHIN_RETENTION = "WITHIN_RETENTION"
+
 # The transaction tried to spend more tokens than were available
 ERROR_LOW_BALANCE = "LOW_BALANCE"
 
@@ -66,6 +93,9 @@ ERROR_PAUSED = "PAUSED"
 # The allowance change was unsafe. Please reset it to zero first.
 ERROR_UNSAFE_ALLOWANCE_CHANGE = "UNSAFE_ALLOWANCE_CHANGE"
 
+# The receiver of a `transferAndCall` does not have an `onTokenTransfer` entrypoint.
+ERROR_NO_TRANSFER_RECEIVER = "NO_TRANSFER_RECEIVER"
+
 # The operation must be completed via the withdraw entrypoint.
 ERROR_USE_WITHDRAW = "USE_WITHDRAW_INSTEAD"
 
@@ -79,4 +109,25 @@ ERROR_NOT_ADMINISTRATOR = "NOT_ADMINISTRATOR"
 ERROR_NOT_OWNER = "NOT_OWNER"
 
 # The requested operation could not be completed because not enough value is vested
-ERROR_NOT_VESTED = "NOT_VESTED"
\ No newline at end of file
+ERROR_NOT_VESTED = "NOT_VESTED"
+
+# The sender must be the snapshotter.
+ERROR_NOT_SNAPSHOTTER = "NOT_SNAPSHOTTER"
+
+# The requested snapshot does not exist.
+ERROR_NO_SNAPSHOT = "NO_SNAPSHOT"
+
+# The requested snapshot has expired.
+ERROR_SNAPSHOT_EXPIRED = "SNAPSHOT_EXPIRED"
+
+# The requested snapshot level is before the current level or the level of the previous snapshot.
+ERROR_SNAPSHOT_LEVEL_TOO_LOW = "SNAPSHOT_LEVEL_TOO_LOW"
+
+# The token contract does not provide snapshot views.
+ERROR_NO_SNAPSHOT_VIEW = "NO_SNAPSHOT_VIEW"
+
+# The dao contract does not provide a `getVotingPower` on-chain view.
+ERROR_NO_VOTING_POWER_VIEW = "NO_VOTING_POWER_VIEW"
+
+# The token contract does not provide a `getPriorTotalSupply` on-chain view.
+ERROR_NO_SUPPLY_VIEW = "NO_SUPPLY_VIEW"
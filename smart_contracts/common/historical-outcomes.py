@@ -1,12 +1,24 @@
 import smartpy as sp
 
-Poll = sp.import_script_from_url("file:common/poll.py")
-
 # A historical result of a vote.
 # Params:
 # - outcome (nat): The outcome of the poll
-# - poll (Poll.POLL_TYPE): The poll and the results.
+# - title (string): The title of the proposal.
+# - descriptionHash (string): A digest of the proposal's description.
+# - author (address): The author of the proposal.
+# - yayVotes (nat): The number of yay votes.
+# - nayVotes (nat): The number of nay votes.
+# - abstainVotes (nat): The number of abstain votes.
+# - totalVotes (nat): The total number of votes.
+# - quorum (nat): The quorum the poll needed to achieve.
 HISTORICAL_OUTCOME_TYPE = sp.TRecord(
   outcome = sp.TNat,
-  poll = Poll.POLL_TYPE
-).layout(("outcome", "poll"))
\ No newline at end of file
+  title = sp.TString,
+  descriptionHash = sp.TString,
+  author = sp.TAddress,
+  yayVotes = sp.TNat,
+  nayVotes = sp.TNat,
+  abstainVotes = sp.TNat,
+  totalVotes = sp.TNat,
+  quorum = sp.TNat
+).layout(("outcome", ("title", ("descriptionHash", ("author", ("yayVotes", ("nayVotes", ("abstainVotes", ("totalVotes", "quorum")))))))))
@@ -0,0 +1,16 @@
+import smartpy as sp
+
+# Constants for permits, which are modeled on TZIP-17.
+
+# The type of a permit, as submitted to the token contract.
+# Params:
+# - publicKey (key): The key of the owner who signed the permit.
+# - signature (signature): A signature of the chain ID, the token contract address, the token's permit counter and
+#   the parameter hash.
+# - paramHash (bytes): The blake2b hash of the packed pair of the spender the permit allows and the parameters of
+#   its call.
+PERMIT_TYPE = sp.TRecord(
+  publicKey = sp.TKey,
+  signature = sp.TSignature,
+  paramHash = sp.TBytes
+).layout(("publicKey", ("signature", "paramHash")))
@@ -1,36 +1,42 @@
 import smartpy as sp
 
-Proposal = sp.import_script_from_url("file:common/proposal.py")
 QuorumCap = sp.import_script_from_url("file:common/quorum-cap.py")
-VoteRecord = sp.import_script_from_url("file:common/vote-record.py")
 
 # A poll for a proposal.
 # Params:
 # - id (nat): An automatically assigned identifier for the poll.
-# - proposal (Proposal.PROPOSAL_TYPE): The proposal
+# - proposalHash (bytes): The blake2b hash of the packed proposal. The proposal itself is stored separately, keyed by the poll's ID.
+# - title (string): The title of the proposal, kept so that finalizing the poll does not load the proposal.
+# - descriptionHash (string): The description hash of the proposal, kept for the same reason.
 # - votingStart (nat): The first block of voting.
 # - votingEnd (nat): The last block of voting.
 # - yayVotes (nat): The number of yay votes.
 # - nayVotes (nat): The number of nay votes.
 # - abstainVotes (nat): The number of abstain votes.
 # - totalVotes (nat): The total number of votes.
-# - voters (set<nat>): The addresses which have voted.
 # - author (address): The author of the proposal.
 # - escrowAmount (nat): The amount of tokens escrowed for the proposal.
 # - quorum (nat): The quorum the poll needs to achieve. 
 # - quorumCap (nat): The quorum caps of the proposal.
+# - minYayVotesPercentForEscrowReturn (nat): The minimum percent of yay votes needed to receive the escrow back, as it was when the poll was proposed.
+# - percentageForSuperMajority (nat): The percentage of votes needed for a super majority, as it was when the poll was proposed.
+# - snapshotId (option(nat)): The token snapshot of balances at votingStartBlock, if one was taken.
 POLL_TYPE = sp.TRecord(
   id = sp.TNat,
-  proposal = Proposal.PROPOSAL_TYPE,
+  proposalHash = sp.TBytes,
+  title = sp.TString,
+  descriptionHash = sp.TString,
   votingStartBlock = sp.TNat,
   votingEndBlock = sp.TNat,
   yayVotes = sp.TNat,
   nayVotes = sp.TNat,
   abstainVotes = sp.TNat,
   totalVotes = sp.TNat,
-  voters = sp.TMap(sp.TAddress, VoteRecord.VOTE_RECORD_TYPE),
   author = sp.TAddress,
   escrowAmount = sp.TNat,
   quorum = sp.TNat,
-  quorumCap = QuorumCap.QUORUM_CAP_TYPE
-).layout(("id", ("proposal", ("votingStartBlock", ("votingEndBlock", ("yayVotes", ("nayVotes", ("abstainVotes", ("totalVotes", ("voters", ("author", ("escrowAmount", ("quorum", "quorumCap")))))))))))))
+  quorumCap = QuorumCap.QUORUM_CAP_TYPE,
+  minYayVotesPercentForEscrowReturn = sp.TNat,
+  percentageForSuperMajority = sp.TNat,
+  snapshotId = sp.TOption(sp.TNat)
+).layout(("id", ("proposalHash", ("title", ("descriptionHash", ("votingStartBlock", ("votingEndBlock", ("yayVotes", ("nayVotes", ("abstainVotes", ("totalVotes", ("author", ("escrowAmount", ("quorum", ("quorumCap", ("minYayVotesPercentForEscrowReturn", ("percentageForSuperMajority", "snapshotId")))))))))))))))))
@@ -10,10 +10,11 @@ PROPOSAL_LAMBDA_TYPE = sp.TLambda(sp.TUnit, sp.TList(sp.TOperation))
 # - title (string): The title of the proposal
 # - descriptionLink (string): A link to the proposals description.
 # - descriptionHash (string): A digest of the content at subscription link.
-# - proposal (PROPOSAL_LAMBDA_TYPE): The code to execute.
+# - proposalLambdas (list(PROPOSAL_LAMBDA_TYPE)): The code to execute. Lambdas are run in order and their
+#   operations are emitted in order, so a single proposal can carry several coordinated actions.
 PROPOSAL_TYPE = sp.TRecord(
   title = sp.TString,
   descriptionLink = sp.TString,
   descriptionHash = sp.TString,
-  proposalLambda = PROPOSAL_LAMBDA_TYPE
-).layout(("title", ("descriptionLink", ("descriptionHash", "proposalLambda"))))
+  proposalLambdas = sp.TList(PROPOSAL_LAMBDA_TYPE)
+).layout(("title", ("descriptionLink", ("descriptionHash", "proposalLambdas"))))
@@ -2,11 +2,15 @@ import smartpy as sp
 
 # A type recording the way an address voted.
 # Params:
-# - voteValue (nat): The Vote value
 # - level (nat): The block level the vote was cast on.
 # - votes (nat): The number of tokens voted with. 
+# - yayVotes (nat): The number of votes for yay.
+# - nayVotes (nat): The number of votes for nay.
+# - abstainVotes (nat): The number of votes to abstain with.
 VOTE_RECORD_TYPE = sp.TRecord(
-  voteValue = sp.TNat,
   level = sp.TNat,
   votes = sp.TNat,
-).layout(("voteValue", ("level", "votes")))
\ No newline at end of file
+  yayVotes = sp.TNat,
+  nayVotes = sp.TNat,
+  abstainVotes = sp.TNat,
+).layout(("level", ("votes", ("yayVotes", ("nayVotes", "abstainVotes")))))
\ No newline at end of file
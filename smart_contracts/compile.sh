@@ -17,7 +17,7 @@ CONTRACTS_ARRAY=(community-fund dao faucet token vesting-vault)
 
 # Ensure we have a SmartPy binary.
 if [ ! -f "$SMART_PY_CLI" ]; then
-    echo "Fatal: Please install SmartPy CLI at $SMART_PY_CLI" && exit
+    echo "Fatal: Please install SmartPy CLI at $SMART_PY_CLI" && exit 1
 fi
 
 # Compile a contract.
@@ -33,7 +33,7 @@ function processContract {
 
     # Ensure file exists.
     if [ ! -f "$CONTRACT_IN" ]; then
-        echo "Fatal: $CONTRACT_IN not found. Running from wrong dir?" && exit
+        echo "Fatal: $CONTRACT_IN not found. Running from wrong dir?" && exit 1
     fi
 
     # Test
@@ -5,6 +5,7 @@ Errors = sp.import_script_from_url("file:common/errors.py")
 HistoricalOutcomes = sp.import_script_from_url("file:common/historical-outcomes.py")
 Poll = sp.import_script_from_url("file:common/poll.py")
 PollOutcomes = sp.import_script_from_url("file:common/poll-outcomes.py")
+Permit = sp.import_script_from_url("file:common/permit.py")
 Proposal = sp.import_script_from_url("file:common/proposal.py")
 QuorumCap = sp.import_script_from_url("file:common/quorum-cap.py")
 VoteRecord = sp.import_script_from_url("file:common/vote-record.py")
@@ -30,6 +31,21 @@ SCALE = 100
 STATE_MACHINE_IDLE = 0
 STATE_MACHINE_WAITING_FOR_BALANCE = 1
 
+################################################################
+################################################################
+# Finalization Steps
+################################################################
+################################################################
+
+# Polls are finalized in steps. A poll whose finalization has not started has no entry in `finalizations`,
+# and is tallied first.
+FINALIZATION_STEP_RELEASE_ESCROW = 1
+FINALIZATION_STEP_RECORD_OUTCOME = 2
+FINALIZATION_STEP_QUEUE_TIMELOCK = 3
+
+# The number of steps needed to finalize a poll.
+FINALIZATION_STEPS = 4
+
 ################################################################
 ################################################################
 # Types
@@ -39,17 +55,17 @@ STATE_MACHINE_WAITING_FOR_BALANCE = 1
 # A item in the timelock
 # Params:
 # - id (nat): An automatically assigned identifier for the timelock item. This is the same ID that is used in polls.
-# - proposal (Proposal.PROPOSAL_TYPE): The proposal
+# - proposalHash (bytes): The blake2b hash of the packed proposal.
 # - endBlock (nat): The block where the item can be executed.
 # - cancelBlock (nat): The block where the item can be cancelled.
 # - author (address): The author of the proposal.
 TIMELOCK_ITEM_TYPE = sp.TRecord(
   id = sp.TNat,
-  proposal = Proposal.PROPOSAL_TYPE,
+  proposalHash = sp.TBytes,
   endBlock = sp.TNat,
   cancelBlock = sp.TNat,
   author = sp.TAddress
-).layout(("id", ("proposal", ("endBlock", ("cancelBlock", "author")))))
+).layout(("id", ("proposalHash", ("endBlock", ("cancelBlock", "author")))))
 
 # Governance parameters.
 # Params:
@@ -97,14 +113,71 @@ GOVERNANCE_PARAMETERS_TYPE = sp.TRecord(
 
 # A voting state.
 # Params:
+# - pollId (nat): The poll being voted on.
 # - voteValue (nat): The value of the vote.
 # - address (address): The address casting the vote.
 # - level (nat): The block level data was requested at.
 VOTING_STATE = sp.TRecord(
+  pollId = sp.TNat,
   voteValue = sp.TNat,
   address = sp.TAddress,
   level = sp.TNat
-).layout(("voteValue", ("address", "level")))
+).layout(("pollId", ("voteValue", ("address", "level"))))
+
+# The progress of a poll's finalization.
+# Params:
+# - step (nat): The next step to run.
+# - escrowRecipient (address): The address the escrow is released to.
+# - passed (bool): Whether the poll achieved quorum and a super majority.
+FINALIZATION_TYPE = sp.TRecord(
+  step = sp.TNat,
+  escrowRecipient = sp.TAddress,
+  passed = sp.TBool
+).layout(("step", ("escrowRecipient", "passed")))
+
+# A request to finalize a poll.
+# Params:
+# - pollId (nat): The poll to finalize.
+# - maxSteps (nat): The maximum number of finalization steps to run.
+FINALIZE_TYPE = sp.TRecord(
+  pollId = sp.TNat,
+  maxSteps = sp.TNat
+).layout(("pollId", "maxSteps"))
+
+# A vote.
+# Params:
+# - pollId (nat): The poll to vote on.
+# - voteValue (nat): The value of the vote.
+VOTE_TYPE = sp.TRecord(
+  pollId = sp.TNat,
+  voteValue = sp.TNat
+).layout(("pollId", "voteValue"))
+
+# A vote which is split between the vote values.
+# Params:
+# - pollId (nat): The poll to vote on.
+# - yayVotes (nat): The number of votes for yay.
+# - nayVotes (nat): The number of votes for nay.
+# - abstainVotes (nat): The number of votes to abstain with.
+SPLIT_VOTE_TYPE = sp.TRecord(
+  pollId = sp.TNat,
+  yayVotes = sp.TNat,
+  nayVotes = sp.TNat,
+  abstainVotes = sp.TNat
+).layout(("pollId", ("yayVotes", ("nayVotes", "abstainVotes"))))
+
+# A vote signed off-chain.
+# Params:
+# - publicKey (key): The key of the voter. The vote is cast by the key's implicit account.
+# - pollId (nat): The poll to vote on.
+# - voteValue (nat): The value of the vote.
+# - signature (signature): A signature by the key over the packed (chain id, (DAO address, (pollId, voteValue))).
+SIGNED_VOTE_TYPE = sp.TRecord(
+  publicKey = sp.TKey,
+  pollId = sp.TNat,
+  voteValue = sp.TNat,
+  signature = sp.TSignature
+).layout(("publicKey", ("pollId", ("voteValue", "signature"))))
 
 ################################################################
 # Contract
@@ -127,14 +200,19 @@ class DaoContract(sp.Contract):
       percentageForSuperMajority = sp.nat(80),
       quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(2)),
     ),
-    poll = sp.none,
-    timelockItem = sp.none,
+    polls = sp.big_map(l = {}, tkey = sp.TNat, tvalue = Poll.POLL_TYPE),
+    activePolls = sp.set(l = [], t = sp.TNat),
+    maxActivePolls = sp.nat(1),
+    timelockItems = sp.big_map(l = {}, tkey = sp.TNat, tvalue = TIMELOCK_ITEM_TYPE),
     tokenContractAddress = Addresses.TOKEN_CONTRACT_ADDRESS,
     quorum = sp.nat(100),
     communityFundAddress = Addresses.COMMUNITY_FUND_ADDRESS,
     state = STATE_MACHINE_IDLE,
     votingState = sp.none,
+    useBalanceCallback = False,
     outcomes = sp.big_map(l = {}, tkey = sp.TNat, tvalue = HistoricalOutcomes.HISTORICAL_OUTCOME_TYPE),
+    proposals = sp.big_map(l = {}, tkey = sp.TNat, tvalue = Proposal.PROPOSAL_TYPE),
+    voters = sp.big_map(l = {}, tkey = sp.TPair(sp.TNat, sp.TAddress), tvalue = VoteRecord.VOTE_RECORD_TYPE),
   ):
     metadata_data = sp.bytes_of_string('{ "name": "Kolibri Governance DAO", "authors": ["Hover Labs <hello@hover.engineering>"], "homepage":  "https://kolibri.finance" }')
 
@@ -153,13 +231,19 @@ class DaoContract(sp.Contract):
         communityFundAddress = sp.TAddress,
         governanceParameters = GOVERNANCE_PARAMETERS_TYPE,
         quorum = sp.TNat,
-        poll = sp.TOption(Poll.POLL_TYPE),
-        timelockItem = sp.TOption(TIMELOCK_ITEM_TYPE),
+        polls = sp.TBigMap(sp.TNat, Poll.POLL_TYPE),
+        activePolls = sp.TSet(sp.TNat),
+        maxActivePolls = sp.TNat,
+        timelockItems = sp.TBigMap(sp.TNat, TIMELOCK_ITEM_TYPE),
         nextProposalId = sp.TNat,
         state = sp.TNat,
         votingState = sp.TOption(VOTING_STATE),
+        useBalanceCallback = sp.TBool,
         metadata = sp.TBigMap(sp.TString, sp.TBytes),
-        outcomes = sp.TBigMap(sp.TNat, HistoricalOutcomes.HISTORICAL_OUTCOME_TYPE)
+        outcomes = sp.TBigMap(sp.TNat, HistoricalOutcomes.HISTORICAL_OUTCOME_TYPE),
+        proposals = sp.TBigMap(sp.TNat, Proposal.PROPOSAL_TYPE),
+        voters = sp.TBigMap(sp.TPair(sp.TNat, sp.TAddress), VoteRecord.VOTE_RECORD_TYPE),
+        finalizations = sp.TBigMap(sp.TNat, FINALIZATION_TYPE)
       )
     )
 
@@ -173,18 +257,33 @@ class DaoContract(sp.Contract):
       governanceParameters = governanceParameters,
       # The quorum.
       quorum = quorum,
-      # The poll which is underway.
-      poll = poll,
-      # The item in the timelock.
-      timelockItem = timelockItem,
+      # The polls which are underway, keyed by poll id.
+      polls = polls,
+      # The ids of the polls which are underway.
+      activePolls = activePolls,
+      # The maximum number of polls which may be underway at once.
+      maxActivePolls = maxActivePolls,
+      # The items in the timelock, keyed by poll id.
+      timelockItems = timelockItems,
 
       # Internal state
       nextProposalId = sp.nat(0),
       outcomes = outcomes,
+      # Proposals, keyed by poll id. These are kept out of the poll so that voting does not
+      # load the proposal's code.
+      proposals = proposals,
+      # Vote records, keyed by (poll id, voter address). These are kept out of the poll
+      # so that the cost of a vote does not grow with the number of voters.
+      voters = voters,
+      # The progress of polls whose finalization has started but not completed, keyed by poll id.
+      finalizations = sp.big_map(l = {}, tkey = sp.TNat, tvalue = FINALIZATION_TYPE),
 
       # State machine
       state = state,
       votingState = votingState,
+      # If true, votes read balances through the `getPriorBalance` callback and the
+      # state machine above, rather than through the token's on-chain view.
+      useBalanceCallback = useBalanceCallback,
 
       # Contract metadata.
       metadata = metadata,
@@ -199,9 +298,32 @@ class DaoContract(sp.Contract):
   @sp.entry_point
   def propose(self, proposal):
     sp.set_type(proposal, Proposal.PROPOSAL_TYPE)
-    
-    # Verify a poll is not under vote.
-    sp.verify(~self.data.poll.is_some(), Errors.ERROR_POLL_UNDERWAY)
+
+    self.escrowAndCreatePoll(proposal)
+
+  # Add a governance proposal, escrowing governance tokens with a permit signed by the sender rather than an
+  # approval. The permit must allow the dao to transfer the escrow amount from the sender to the dao.
+  @sp.entry_point
+  def proposeWithPermit(self, params):
+    sp.set_type(params, sp.TRecord(
+      permit = Permit.PERMIT_TYPE,
+      proposal = Proposal.PROPOSAL_TYPE
+    ).layout(("permit", "proposal")))
+
+    # Submit the permit, so that the escrow transfer which follows it may use it.
+    permitHandle = sp.contract(
+      sp.TList(Permit.PERMIT_TYPE),
+      self.data.tokenContractAddress,
+      "submitPermits"
+    ).open_some()
+    sp.transfer(sp.list([params.permit]), sp.mutez(0), permitHandle)
+
+    self.escrowAndCreatePoll(params.proposal)
+
+  # Escrow tokens from the sender and create a poll for their proposal.
+  def escrowAndCreatePoll(self, proposal):
+    # Verify the maximum number of polls are not under vote.
+    sp.verify(sp.len(self.data.activePolls) < self.data.maxActivePolls, Errors.ERROR_POLL_UNDERWAY)
 
     # Escrow tokens.
     tokenContractHandle = sp.contract(
@@ -216,159 +338,317 @@ class DaoContract(sp.Contract):
     )
     sp.transfer(tokenContractArg, sp.mutez(0), tokenContractHandle)
 
+    self.createPoll(sp.sender, proposal)
+
+  # Add a governance proposal whose escrow was sent along with it by the token contract's `transferAndCall`
+  # entrypoint. The escrow arrives before this call, so no approval is needed and the proposal takes a single
+  # operation from the author.
+  @sp.entry_point
+  def onTokenTransfer(self, params):
+    sp.set_type(params, sp.TRecord(
+      from_ = sp.TAddress,
+      value = sp.TNat,
+      data = sp.TBytes
+    ).layout(("from_ as from", ("value", "data"))))
+
+    # Verify sender is the token contract.
+    sp.verify(sp.sender == self.data.tokenContractAddress, Errors.ERROR_NOT_TOKEN_CONTRACT)
+
+    # Verify the maximum number of polls are not under vote.
+    sp.verify(sp.len(self.data.activePolls) < self.data.maxActivePolls, Errors.ERROR_POLL_UNDERWAY)
+
+    # Verify the escrow is exactly the required amount, so no tokens are left in the dao.
+    sp.verify(params.value == self.data.governanceParameters.escrowAmount, Errors.ERROR_BAD_ESCROW_AMOUNT)
+
+    proposal = sp.local('proposal', sp.unpack(params.data, Proposal.PROPOSAL_TYPE).open_some(Errors.ERROR_BAD_PROPOSAL))
+    self.createPoll(params.from_, proposal.value)
+
+  # Create a poll for a proposal whose escrow has been taken from the author.
+  def createPoll(self, author, proposal):
     # Create a new contract under vote.
     startBlock = sp.level + self.data.governanceParameters.voteDelayBlocks
     endBlock = startBlock + self.data.governanceParameters.voteLengthBlocks
-    self.data.poll = sp.some(
-      sp.record(
-        id = self.data.nextProposalId,
-        proposal = proposal,
-        votingStartBlock = startBlock,
-        votingEndBlock = endBlock,
-        yayVotes = sp.nat(0),
-        nayVotes = sp.nat(0),
-        abstainVotes = sp.nat(0),
-        totalVotes = sp.nat(0),
-        voters = sp.map(l = {}, tkey = sp.TAddress, tvalue = VoteRecord.VOTE_RECORD_TYPE),
-        author = sp.sender,
-        escrowAmount = self.data.governanceParameters.escrowAmount,
-        quorum = self.data.quorum,
-        quorumCap = self.data.governanceParameters.quorumCap
-      )
+
+    # Snapshot token balances at the start of voting, unless balances are read through callbacks. Snapshot levels
+    # never decrease, so if voteDelayBlocks was shortened and voting starts before the previous snapshot's level,
+    # the poll is created without a snapshot and votes read from the token's checkpoints instead.
+    snapshotId = sp.local('snapshotId', sp.none)
+    sp.if ~self.data.useBalanceCallback:
+      nextSnapshot = sp.local('nextSnapshot', sp.view(
+        "getNextSnapshot",
+        self.data.tokenContractAddress,
+        sp.unit,
+        t = sp.TRecord(id = sp.TNat, minLevel = sp.TNat).layout(("id", "minLevel"))
+      ).open_some(Errors.ERROR_NO_SNAPSHOT_VIEW))
+
+      sp.if nextSnapshot.value.minLevel <= startBlock:
+        snapshotId.value = sp.some(nextSnapshot.value.id)
+
+        snapshotHandle = sp.contract(
+          sp.TRecord(level = sp.TNat, expiry = sp.TNat).layout(("level", "expiry")),
+          self.data.tokenContractAddress,
+          "snapshot"
+        ).open_some()
+        sp.transfer(sp.record(level = startBlock, expiry = endBlock), sp.mutez(0), snapshotHandle)
+
+    # Store the proposal, and keep only its hash and the metadata its outcome records in the poll.
+    self.data.proposals[self.data.nextProposalId] = proposal
+
+    self.data.polls[self.data.nextProposalId] = sp.record(
+      id = self.data.nextProposalId,
+      proposalHash = sp.blake2b(sp.pack(proposal)),
+      title = proposal.title,
+      descriptionHash = proposal.descriptionHash,
+      votingStartBlock = startBlock,
+      votingEndBlock = endBlock,
+      yayVotes = sp.nat(0),
+      nayVotes = sp.nat(0),
+      abstainVotes = sp.nat(0),
+      totalVotes = sp.nat(0),
+      author = author,
+      escrowAmount = self.data.governanceParameters.escrowAmount,
+      quorum = self.data.quorum,
+      quorumCap = self.data.governanceParameters.quorumCap,
+      minYayVotesPercentForEscrowReturn = self.data.governanceParameters.minYayVotesPercentForEscrowReturn,
+      percentageForSuperMajority = self.data.governanceParameters.percentageForSuperMajority,
+      snapshotId = snapshotId.value
     )
+    self.data.activePolls.add(self.data.nextProposalId)
 
     self.data.nextProposalId = self.data.nextProposalId + 1
 
-  # End voting for a poll.
+  # End voting for a poll, finalizing it in a single operation.
+  @sp.entry_point
+  def endVoting(self, pollId):
+    sp.set_type(pollId, sp.TNat)
+
+    self.finalize(pollId, FINALIZATION_STEPS)
+
+  # Finalize a poll over several operations, running at most `maxSteps` steps in each. Progress is kept in
+  # `finalizations`, so anyone may call this repeatedly until the poll is removed. No step loads the proposal,
+  # so the size of its lambdas does not add to the cost of any step.
   @sp.entry_point
-  def endVoting(self, unit):
-    sp.set_type(unit, sp.TUnit)
+  def finalizePoll(self, params):
+    sp.set_type(params, FINALIZE_TYPE)
 
-    # Verify a poll is underway.
-    sp.verify(self.data.poll.is_some(), Errors.ERROR_NO_POLL)
+    # Verify at least one step is run, so every call makes progress.
+    sp.verify(params.maxSteps > 0, Errors.ERROR_BAD_MAX_STEPS)
 
-    # Verify the timelock is empty.
-    sp.verify(~self.data.timelockItem.is_some(), Errors.ERROR_ITEM_IN_TIMELOCK)
+    self.finalize(params.pollId, params.maxSteps)
+
+  # Run up to the given number of finalization steps for a poll.
+  def finalize(self, pollId, maxSteps):
+    # Verify the poll is underway.
+    sp.verify(self.data.polls.contains(pollId), Errors.ERROR_NO_POLL)
 
     # Verify voting has ended.
-    poll = sp.local('poll', self.data.poll.open_some())
+    poll = sp.local('poll', self.data.polls[pollId])
     sp.verify(sp.level > poll.value.votingEndBlock, Errors.ERROR_VOTING_NOT_FINISHED)
 
-    # Calculate whether voting thresholds were met.
-    totalOpinionatedVotes = poll.value.yayVotes + poll.value.nayVotes
-    yayVotesNeededForEscrowReturn = (totalOpinionatedVotes * self.data.governanceParameters.minYayVotesPercentForEscrowReturn) // SCALE
-    yayVotesNeededForSuperMajority = (totalOpinionatedVotes * self.data.governanceParameters.percentageForSuperMajority) // SCALE
+    # The poll is removed by the last step.
+    steps = sp.local('steps', sp.nat(0))
+    sp.while (steps.value < maxSteps) & self.data.polls.contains(pollId):
+      sp.if ~self.data.finalizations.contains(pollId):
+        # Calculate whether voting thresholds were met. The thresholds are the ones the poll was proposed with, since
+        # the governance parameters may have changed since.
+        totalOpinionatedVotes = poll.value.yayVotes + poll.value.nayVotes
+        yayVotesNeededForEscrowReturn = (totalOpinionatedVotes * poll.value.minYayVotesPercentForEscrowReturn) // SCALE
+        yayVotesNeededForSuperMajority = (totalOpinionatedVotes * poll.value.percentageForSuperMajority) // SCALE
+
+        # Determine where the escrow is released to.
+        escrowRecipient = sp.local('escrowRecipient', poll.value.author)
+        sp.if poll.value.yayVotes <= yayVotesNeededForEscrowReturn:
+          escrowRecipient.value = self.data.communityFundAddress
+
+        # The poll is judged on the quorum it was proposed with, since other polls may have changed the quorum since.
+        self.data.finalizations[pollId] = sp.record(
+          step = FINALIZATION_STEP_RELEASE_ESCROW,
+          escrowRecipient = escrowRecipient.value,
+          passed = (poll.value.yayVotes >= yayVotesNeededForSuperMajority) & (poll.value.totalVotes >= poll.value.quorum)
+        )
 
-    # Determine where the escrow is released to.
-    escrowRecipient = sp.local('escrowRecipient', poll.value.author)
-    sp.if poll.value.yayVotes <= yayVotesNeededForEscrowReturn:
-      escrowRecipient.value = self.data.communityFundAddress
-    
-    # Release escrow.
-    tokenContractHandle = sp.contract(
-      sp.TRecord(from_ = sp.TAddress, to_ = sp.TAddress, value = sp.TNat).layout(("from_ as from", ("to_ as to", "value"))),
-      self.data.tokenContractAddress,
-      "transfer"
-    ).open_some()
-    tokenContractArg = sp.record(
-      from_ = sp.self_address, 
-      to_ = escrowRecipient.value, 
-      value = self.data.governanceParameters.escrowAmount
-    )
-    sp.transfer(tokenContractArg, sp.mutez(0), tokenContractHandle)
+        # The poll is no longer active, so another poll may be proposed while this one is finalized.
+        self.data.activePolls.remove(pollId)
 
-    # Transfer proposal to timelock and update outcome if it passed
-    sp.if (poll.value.yayVotes >= yayVotesNeededForSuperMajority) & (poll.value.totalVotes >= self.data.quorum): 
-      self.data.timelockItem = sp.some(
-        sp.record(
-          id = poll.value.id,
-          proposal = poll.value.proposal,
-          endBlock = sp.level + self.data.governanceParameters.blocksInTimelockForExecution,
-          cancelBlock = sp.level + self.data.governanceParameters.blocksInTimelockForCancellation,
-          author = poll.value.author
-        )
-      )
+        # Calculate a new quorum from the current quorum, so that the updates of polls which ended since this poll
+        # was proposed are kept.
+        lastWeight = (self.data.quorum * 80) // SCALE # 80% weight
+        newParticipation = (poll.value.totalVotes * 20) // SCALE # 20% weight
+        newQuorum = sp.local('newQuorum', newParticipation + lastWeight)
 
-      self.data.outcomes[poll.value.id] = sp.record(
-        outcome = PollOutcomes.POLL_OUTCOME_IN_TIMELOCK,
-        poll = poll.value
-      )
-    # Otherwise update the outcomes to show a failure.  
-    sp.else:
-      self.data.outcomes[poll.value.id] = sp.record(
-        outcome = PollOutcomes.POLL_OUTCOME_FAILED,
-        poll = poll.value
-      )
+        # Bound upper and lower quorum.
+        sp.if newQuorum.value < poll.value.quorumCap.lower:
+          newQuorum.value = poll.value.quorumCap.lower
+
+        sp.if newQuorum.value > poll.value.quorumCap.upper:
+          newQuorum.value = poll.value.quorumCap.upper
 
-    # Remove poll.
-    self.data.poll = sp.none
+        # Update quorum.
+        self.data.quorum = newQuorum.value
+      sp.else:
+        finalization = sp.local('finalization', self.data.finalizations[pollId])
+        sp.if finalization.value.step == FINALIZATION_STEP_RELEASE_ESCROW:
+          # Release escrow.
+          tokenContractHandle = sp.contract(
+            sp.TRecord(from_ = sp.TAddress, to_ = sp.TAddress, value = sp.TNat).layout(("from_ as from", ("to_ as to", "value"))),
+            self.data.tokenContractAddress,
+            "transfer"
+          ).open_some()
+          # Release the amount escrowed with this poll, which may differ from the current escrow amount.
+          tokenContractArg = sp.record(
+            from_ = sp.self_address, 
+            to_ = finalization.value.escrowRecipient, 
+            value = poll.value.escrowAmount
+          )
+          sp.transfer(tokenContractArg, sp.mutez(0), tokenContractHandle)
 
-    # Calculate a new quorum
-    lastWeight = (poll.value.quorum * 80) // SCALE # 80% weight
-    newParticipation = (poll.value.totalVotes * 20) // SCALE # 20% weight
-    newQuorum = sp.local('newQuorum', newParticipation + lastWeight)
+          self.data.finalizations[pollId].step = FINALIZATION_STEP_RECORD_OUTCOME
+        sp.else:
+          sp.if finalization.value.step == FINALIZATION_STEP_RECORD_OUTCOME:
+            # Record the outcome of the poll. Only the proposal's metadata is kept, rather than a copy of the poll.
+            # The metadata was copied into the poll when it was created, so no step loads the proposal.
+            outcome = sp.local('outcome', PollOutcomes.POLL_OUTCOME_FAILED)
+            sp.if finalization.value.passed:
+              outcome.value = PollOutcomes.POLL_OUTCOME_IN_TIMELOCK
+
+            self.data.outcomes[poll.value.id] = sp.record(
+              outcome = outcome.value,
+              title = poll.value.title,
+              descriptionHash = poll.value.descriptionHash,
+              author = poll.value.author,
+              yayVotes = poll.value.yayVotes,
+              nayVotes = poll.value.nayVotes,
+              abstainVotes = poll.value.abstainVotes,
+              totalVotes = poll.value.totalVotes,
+              quorum = poll.value.quorum
+            )
 
-    # Bound upper and lower quorum.
-    sp.if newQuorum.value < poll.value.quorumCap.lower:
-      newQuorum.value = poll.value.quorumCap.lower
+            self.data.finalizations[pollId].step = FINALIZATION_STEP_QUEUE_TIMELOCK
+          sp.else:
+            # Queue proposal in the timelock if it passed. Each item carries its own windows, so it does not
+            # wait on, or block, any other item.
+            sp.if finalization.value.passed:
+              self.data.timelockItems[poll.value.id] = sp.record(
+                id = poll.value.id,
+                proposalHash = poll.value.proposalHash,
+                endBlock = sp.level + self.data.governanceParameters.blocksInTimelockForExecution,
+                cancelBlock = sp.level + self.data.governanceParameters.blocksInTimelockForCancellation,
+                author = poll.value.author
+              )
 
-    sp.if newQuorum.value > poll.value.quorumCap.upper:
-      newQuorum.value = poll.value.quorumCap.upper
+            # Remove poll.
+            del self.data.polls[pollId]
+            del self.data.finalizations[pollId]
 
-    # Update quorum.
-    self.data.quorum = newQuorum.value
+      steps.value += 1
 
   ################################################################
   # Voting
   ################################################################
 
   @sp.entry_point
-  def vote(self, voteValue):
-    sp.set_type(voteValue, sp.TNat)
+  def vote(self, params):
+    sp.set_type(params, VOTE_TYPE)
 
     # Verify contract is in the correct state.
     sp.verify(self.data.state == STATE_MACHINE_IDLE, Errors.ERROR_BAD_STATE)
 
-    # Verify a poll is underway.
-    sp.verify(self.data.poll.is_some(), Errors.ERROR_NO_POLL)
+    # Verify the poll is underway.
+    sp.verify(self.data.polls.contains(params.pollId), Errors.ERROR_NO_POLL)
+    poll = sp.local('poll', self.data.polls[params.pollId])
 
-    # Save state.
-    self.data.state = STATE_MACHINE_WAITING_FOR_BALANCE
-    self.data.votingState = sp.some(
-      sp.record(
-        voteValue = voteValue,
-        address = sp.sender,
-        level = self.data.poll.open_some().votingStartBlock
+    sp.if self.data.useBalanceCallback:
+      # Save state.
+      self.data.state = STATE_MACHINE_WAITING_FOR_BALANCE
+      self.data.votingState = sp.some(
+        sp.record(
+          pollId = params.pollId,
+          voteValue = params.voteValue,
+          address = sp.sender,
+          level = poll.value.votingStartBlock
+        )
       )
-    )
 
-    # Call token contract.
-    tokenContractHandle = sp.contract(
-      sp.TPair(
-        sp.TRecord(
-          address = sp.TAddress,
-          level = sp.TNat,
-        ),
-        sp.TContract(
+      # Call token contract.
+      tokenContractHandle = sp.contract(
+        sp.TPair(
           sp.TRecord(
             address = sp.TAddress,
             level = sp.TNat,
-            result = sp.TNat
+          ),
+          sp.TContract(
+            sp.TRecord(
+              address = sp.TAddress,
+              level = sp.TNat,
+              result = sp.TNat
+            )
           )
-        )
-      ),
-      self.data.tokenContractAddress,
-      "getPriorBalance"
-    ).open_some()
-    tokenContractArg = (
-      sp.record(
-        address = sp.sender,
-        level = self.data.poll.open_some().votingStartBlock,
-      ),
-      sp.self_entry_point(entry_point = "voteCallback")
-    )
-    sp.transfer(tokenContractArg, sp.mutez(0), tokenContractHandle)
-  
+        ),
+        self.data.tokenContractAddress,
+        "getPriorBalance"
+      ).open_some()
+      tokenContractArg = (
+        sp.record(
+          address = sp.sender,
+          level = poll.value.votingStartBlock,
+        ),
+        sp.self_entry_point(entry_point = "voteCallback")
+      )
+      sp.transfer(tokenContractArg, sp.mutez(0), tokenContractHandle)
+    sp.else:
+      self.recordVote(sp.sender, poll.value, params.voteValue, self.readVotes(sp.sender, poll.value))
+
+  # Vote in a poll with an amount for each vote value. The amounts may add up to at most the sender's voting power,
+  # so that an account which holds tokens for many beneficiaries can express all of their preferences in one vote.
+  @sp.entry_point
+  def splitVote(self, params):
+    sp.set_type(params, SPLIT_VOTE_TYPE)
+
+    # Verify contract is in the correct state.
+    sp.verify(self.data.state == STATE_MACHINE_IDLE, Errors.ERROR_BAD_STATE)
+
+    # Split votes are tallied synchronously, so balances must be read from on-chain views.
+    sp.verify(~self.data.useBalanceCallback, Errors.ERROR_BAD_STATE)
+
+    # Verify the poll is underway.
+    sp.verify(self.data.polls.contains(params.pollId), Errors.ERROR_NO_POLL)
+    poll = sp.local('poll', self.data.polls[params.pollId])
+
+    # Verify the amounts do not exceed the sender's voting power.
+    votes = self.readVotes(sp.sender, poll.value)
+    sp.verify(params.yayVotes + params.nayVotes + params.abstainVotes <= votes, Errors.ERROR_TOO_MANY_VOTES)
+
+    self.recordSplitVote(sp.sender, poll.value, params)
+
+  # Tally a batch of votes which were signed off-chain, so that a relayer can submit many votes in one operation.
+  # Each ballot is counted for the implicit account of its public key. The signature covers the chain ID and the
+  # address of this contract as well as the vote, so a ballot can not be replayed on another chain or DAO. Signed
+  # votes can not change an earlier vote, so a stale ballot can not be replayed over a vote the voter has since
+  # changed, and can not be counted twice in the same poll.
+  @sp.entry_point
+  def voteBySig(self, ballots):
+    sp.set_type(ballots, sp.TList(SIGNED_VOTE_TYPE))
+
+    # Verify contract is in the correct state.
+    sp.verify(self.data.state == STATE_MACHINE_IDLE, Errors.ERROR_BAD_STATE)
+
+    # Signed votes are tallied synchronously, so balances must be read from on-chain views.
+    sp.verify(~self.data.useBalanceCallback, Errors.ERROR_BAD_STATE)
+
+    sp.for ballot in ballots:
+      # Verify the signature.
+      payload = sp.pack((sp.chain_id, (sp.self_address, (ballot.pollId, ballot.voteValue))))
+      sp.verify(sp.check_signature(ballot.publicKey, ballot.signature, payload), Errors.ERROR_BAD_SIGNATURE)
+
+      # Skip ballots which can no longer be counted: the poll has ended, or the voter has already voted in it.
+      # Otherwise, a single voter could fail a relayer's whole batch by voting directly before it lands.
+      voter = sp.local('voter', sp.to_address(sp.implicit_account(sp.hash_key(ballot.publicKey))))
+      sp.if self.data.polls.contains(ballot.pollId):
+        poll = sp.local('poll', self.data.polls[ballot.pollId])
+        sp.if (sp.level <= poll.value.votingEndBlock) & (~self.data.voters.contains((ballot.pollId, voter.value))):
+          self.recordVote(voter.value, poll.value, ballot.voteValue, self.readVotes(voter.value, poll.value), allowChange = False)
+
+  # Receives a balance from the token contract when `useBalanceCallback` is set.
   @sp.entry_point
   def voteCallback(self, returnedData):
     sp.set_type(returnedData, sp.TRecord(result = sp.TNat, address = sp.TAddress, level = sp.TNat))
@@ -384,42 +664,132 @@ class DaoContract(sp.Contract):
     sp.verify(savedState.address == returnedData.address, Errors.ERROR_UNKNOWN)
     sp.verify(savedState.level == returnedData.level, Errors.ERROR_UNKNOWN)
 
-    # Verify that the address has not already voted.
-    sp.verify(~self.data.poll.open_some().voters.contains(savedState.address), Errors.ERROR_ALREADY_VOTED)
-    
-    # Verify voting has not ended.
-    poll = sp.local('poll', self.data.poll.open_some())
-    sp.verify(sp.level <= self.data.poll.open_some().votingEndBlock, Errors.ERROR_VOTING_FINISHED)
+    # Verify the poll is still underway.
+    sp.verify(self.data.polls.contains(savedState.pollId), Errors.ERROR_NO_POLL)
 
-    # Retrieve old poll for mutation. 
-    newPoll = sp.local('newPoll', self.data.poll.open_some())
+    self.recordVote(savedState.address, self.data.polls[savedState.pollId], savedState.voteValue, returnedData.result)
 
-    # Add to voters and increment total.
-    newPoll.value.voters[savedState.address] = sp.record(
-      voteValue = savedState.voteValue,
-      level = sp.level,
-      votes = returnedData.result
-    )
-    newPoll.value.totalVotes += returnedData.result
+    # Clear state.
+    self.data.state = STATE_MACHINE_IDLE
+    self.data.votingState = sp.none
 
-    # Increment the given vote value. Fail if none matched.
-    sp.if savedState.voteValue == VoteValue.YAY:
-      newPoll.value.yayVotes += returnedData.result
+  # An on-chain view of an address's voting power in a poll. The view reads through to the token contract's
+  # views, so contracts which vote on behalf of others can read voting power without a callback.
+  @sp.onchain_view()
+  def getVotingPower(self, params):
+    sp.set_type(params, sp.TRecord(
+      address = sp.TAddress,
+      pollId = sp.TNat,
+    ).layout(("address", "pollId")))
+
+    sp.verify(self.data.polls.contains(params.pollId), Errors.ERROR_NO_POLL)
+    sp.result(self.readVotes(params.address, self.data.polls[params.pollId]))
+
+  # An on-chain view of the participation in a poll, as a share of the total supply of tokens when voting
+  # began, scaled by SCALE. The supply is a single lookup in the token contract's supply checkpoints.
+  @sp.onchain_view()
+  def getPollParticipation(self, pollId):
+    sp.set_type(pollId, sp.TNat)
+
+    sp.verify(self.data.polls.contains(pollId), Errors.ERROR_NO_POLL)
+    poll = sp.local('poll', self.data.polls[pollId])
+
+    totalSupply = sp.local('totalSupply', sp.view(
+      "getPriorTotalSupply",
+      self.data.tokenContractAddress,
+      poll.value.votingStartBlock,
+      t = sp.TNat
+    ).open_some(Errors.ERROR_NO_SUPPLY_VIEW))
+
+    participation = sp.local('participation', sp.nat(0))
+    sp.if totalSupply.value > 0:
+      participation.value = (poll.value.totalVotes * SCALE) // totalSupply.value
+    sp.result(participation.value)
+
+  # Read an address's voting power in the given poll synchronously from the token contract's on-chain views.
+  # Voting power includes balances delegated to the address. Use the poll's snapshot if it has one, since it
+  # is a single lookup.
+  def readVotes(self, address, poll):
+    votes = sp.local('votes', sp.nat(0))
+    sp.if poll.snapshotId.is_some():
+      votes.value = sp.view(
+        "getSnapshotVotes",
+        self.data.tokenContractAddress,
+        sp.record(
+          address = address,
+          snapshotId = poll.snapshotId.open_some(),
+        ),
+        t = sp.TNat
+      ).open_some(Errors.ERROR_NO_SNAPSHOT_VIEW)
+    sp.else:
+      votes.value = sp.view(
+        "getPriorVotes",
+        self.data.tokenContractAddress,
+        sp.record(
+          address = address,
+          level = poll.votingStartBlock,
+        ),
+        t = sp.TNat
+      ).open_some(Errors.ERROR_NO_VOTES_VIEW)
+    return votes.value
+
+  # Record a vote of the given weight for a single vote value in the given poll.
+  # If allowChange is set, the vote replaces any earlier vote by the address.
+  def recordVote(self, address, poll, voteValue, votes, allowChange = True):
+    # Assign every vote to the given vote value. Fail if none matched.
+    split = sp.local('split', sp.record(yayVotes = sp.nat(0), nayVotes = sp.nat(0), abstainVotes = sp.nat(0)))
+    sp.if voteValue == VoteValue.YAY:
+      split.value.yayVotes = votes
     sp.else:
-      sp.if savedState.voteValue == VoteValue.NAY:
-        newPoll.value.nayVotes += returnedData.result
+      sp.if voteValue == VoteValue.NAY:
+        split.value.nayVotes = votes
       sp.else:
-        sp.if savedState.voteValue == VoteValue.ABSTAIN:
-          newPoll.value.abstainVotes += returnedData.result
+        sp.if voteValue == VoteValue.ABSTAIN:
+          split.value.abstainVotes = votes
         sp.else:
           sp.failwith(Errors.ERROR_BAD_VOTE_VALUE)
 
-    # Update to new poll
-    self.data.poll = sp.some(newPoll.value)
+    self.recordSplitVote(address, poll, split.value, allowChange)
 
-    # Clear state.
-    self.data.state = STATE_MACHINE_IDLE
-    self.data.votingState = sp.none
+  # Record a vote which is split between the vote values in the given poll.
+  # If allowChange is set, the vote replaces any earlier vote by the address.
+  def recordSplitVote(self, address, poll, split, allowChange = True):
+    # Copy the poll for mutation. 
+    newPoll = sp.local('newPoll', poll)
+
+    # Verify voting has not ended.
+    sp.verify(sp.level <= newPoll.value.votingEndBlock, Errors.ERROR_VOTING_FINISHED)
+
+    voterKey = sp.local('voterKey', (newPoll.value.id, address))
+    if allowChange:
+      # If the address has already voted, take its earlier vote out of the tallies. The vote record holds
+      # the amount in each tally, so this is constant time.
+      sp.if self.data.voters.contains(voterKey.value):
+        previousVote = sp.local('previousVote', self.data.voters[voterKey.value])
+        newPoll.value.yayVotes = sp.as_nat(newPoll.value.yayVotes - previousVote.value.yayVotes)
+        newPoll.value.nayVotes = sp.as_nat(newPoll.value.nayVotes - previousVote.value.nayVotes)
+        newPoll.value.abstainVotes = sp.as_nat(newPoll.value.abstainVotes - previousVote.value.abstainVotes)
+        newPoll.value.totalVotes = sp.as_nat(newPoll.value.totalVotes - previousVote.value.votes)
+    else:
+      # Verify that the address has not already voted.
+      sp.verify(~self.data.voters.contains(voterKey.value), Errors.ERROR_ALREADY_VOTED)
+
+    # Record the vote and increment the tallies.
+    votes = sp.local('votes', split.yayVotes + split.nayVotes + split.abstainVotes)
+    self.data.voters[voterKey.value] = sp.record(
+      level = sp.level,
+      votes = votes.value,
+      yayVotes = split.yayVotes,
+      nayVotes = split.nayVotes,
+      abstainVotes = split.abstainVotes
+    )
+    newPoll.value.yayVotes += split.yayVotes
+    newPoll.value.nayVotes += split.nayVotes
+    newPoll.value.abstainVotes += split.abstainVotes
+    newPoll.value.totalVotes += votes.value
+
+    # Update to new poll
+    self.data.polls[newPoll.value.id] = newPoll.value
 
   ################################################################
   # Timelock management
@@ -427,54 +797,49 @@ class DaoContract(sp.Contract):
 
   # Execute a timelock item.
   @sp.entry_point
-  def executeTimelock(self, unit):
-    sp.set_type(unit, sp.TUnit)
+  def executeTimelock(self, pollId):
+    sp.set_type(pollId, sp.TNat)
 
-    # Verify an item is in the timelock
-    sp.verify(self.data.timelockItem.is_some(), Errors.ERROR_NO_ITEM_IN_TIMELOCK)
+    # Verify the poll's item is in the timelock
+    sp.verify(self.data.timelockItems.contains(pollId), Errors.ERROR_NO_ITEM_IN_TIMELOCK)
+    timelockItem = sp.local('timelockItem', self.data.timelockItems[pollId])
 
     # Verify the sender is the author.
-    sp.verify(sp.sender == self.data.timelockItem.open_some().author, Errors.ERROR_NOT_AUTHOR)
+    sp.verify(sp.sender == timelockItem.value.author, Errors.ERROR_NOT_AUTHOR)
 
     # Verify the length of blocks have passed.
-    sp.verify(sp.level > self.data.timelockItem.open_some().endBlock, Errors.ERROR_TOO_SOON)
+    sp.verify(sp.level > timelockItem.value.endBlock, Errors.ERROR_TOO_SOON)
 
-    # Execute the timelock
-    operations = self.data.timelockItem.open_some().proposal.proposalLambda(sp.unit)
-    sp.set_type(operations, sp.TList(sp.TOperation))
-    sp.add_operations(operations)
+    # Load the proposal and execute its lambdas in order, emitting their operations in order.
+    operations = sp.local('operations', sp.list(l = [], t = sp.TOperation))
+    sp.for proposalLambda in self.data.proposals[pollId].proposalLambdas:
+      sp.for operation in proposalLambda(sp.unit):
+        operations.value.push(operation)
+    sp.add_operations(operations.value.rev())
 
     # Update the historical outcomes.
-    pollId = sp.local('pollId', self.data.timelockItem.open_some().id)
-    historicalOutcome = sp.local('historicalOutcome', self.data.outcomes[pollId.value])
-    self.data.outcomes[pollId.value] = sp.record(
-      poll = historicalOutcome.value.poll, 
-      outcome = PollOutcomes.POLL_OUTCOME_EXECUTED
-    )
+    self.data.outcomes[pollId].outcome = PollOutcomes.POLL_OUTCOME_EXECUTED
 
-    # Clear the timelock
-    self.data.timelockItem = sp.none
+    # Remove the item from the timelock
+    del self.data.timelockItems[pollId]
 
   # Cancel a timelock item.
   @sp.entry_point
-  def cancelTimelock(self, unit):
-    sp.set_type(unit, sp.TUnit)
+  def cancelTimelock(self, pollId):
+    sp.set_type(pollId, sp.TNat)
 
-    # Verify an item is in the timelock
-    sp.verify(self.data.timelockItem.is_some(), Errors.ERROR_NO_ITEM_IN_TIMELOCK)
+    # Verify the poll's item is in the timelock
+    sp.verify(self.data.timelockItems.contains(pollId), Errors.ERROR_NO_ITEM_IN_TIMELOCK)
+    timelockItem = sp.local('timelockItem', self.data.timelockItems[pollId])
 
     # Verify the length of blocks have passed.
-    sp.verify(sp.level >= self.data.timelockItem.open_some().cancelBlock, Errors.ERROR_TOO_SOON)
+    sp.verify(sp.level >= timelockItem.value.cancelBlock, Errors.ERROR_TOO_SOON)
 
     # Update the historical outcomes.
-    pollId = sp.local('pollId', self.data.timelockItem.open_some().id)
-    historicalOutcome = sp.local('historicalOutcome', self.data.outcomes[pollId.value])
-    self.data.outcomes[pollId.value] = sp.record(
-      poll = historicalOutcome.value.poll, 
-      outcome = PollOutcomes.POLL_OUTCOME_CANCELLED
-    )
-    # Clear the timelock
-    self.data.timelockItem = sp.none
+    self.data.outcomes[pollId].outcome = PollOutcomes.POLL_OUTCOME_CANCELLED
+
+    # Remove the item from the timelock
+    del self.data.timelockItems[pollId]
 
   ################################################################
   # Governance
@@ -492,6 +857,29 @@ class DaoContract(sp.Contract):
     # Update parameters.
     self.data.governanceParameters = newGovernanceParameters
 
+  # A method to change the maximum number of polls which may be underway at once. This
+  # method can only be called by this contract.
+  @sp.entry_point
+  def setMaxActivePolls(self, maxActivePolls):
+    sp.set_type(maxActivePolls, sp.TNat)
+
+    # Only the DAO can change the number of concurrent polls.
+    sp.verify(sp.sender == sp.self_address, Errors.ERROR_NOT_DAO)
+
+    self.data.maxActivePolls = maxActivePolls
+
+  # A method to switch between reading balances through the token's on-chain view
+  # and through the `getPriorBalance` callback. This method can only be called by
+  # this contract.
+  @sp.entry_point
+  def setUseBalanceCallback(self, useBalanceCallback):
+    sp.set_type(useBalanceCallback, sp.TBool)
+
+    # Only the DAO can change how it reads balances.
+    sp.verify(sp.sender == sp.self_address, Errors.ERROR_NOT_DAO)
+
+    self.data.useBalanceCallback = useBalanceCallback
+
 ################################################################
 ################################################################
 # Tests
@@ -501,6 +889,7 @@ class DaoContract(sp.Contract):
 # Only run tests if this file is main.
 if __name__ == "__main__":
 
+  CheckpointProbes = sp.import_script_from_url("file:test-helpers/checkpoint-probes.py")
   FakeToken = sp.import_script_from_url("file:test-helpers/fake-token.py")
   Store = sp.import_script_from_url("file:test-helpers/store.py")
   Token = sp.import_script_from_url("file:token.py")
@@ -546,6 +935,11 @@ if __name__ == "__main__":
     )
     scenario += dao
 
+    # AND the dao takes snapshots of the token.
+    scenario += token.setSnapshotter(sp.some(dao.address)).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+
     # AND an Alice has tokens
     totalTokens = sp.nat(100)
     scenario += token.mint(
@@ -583,7 +977,7 @@ if __name__ == "__main__":
       title = title,
       descriptionLink = descriptionLink,
       descriptionHash = descriptionHash,
-      proposalLambda = updateLambda
+      proposalLambdas = sp.list([updateLambda])
     )
     
     level = 1
@@ -594,13 +988,20 @@ if __name__ == "__main__":
     )
 
     # THEN a poll is loaded into the dao.
-    scenario.verify(dao.data.poll.is_some())
-    poll = dao.data.poll.open_some()
+    scenario.verify(dao.data.polls.contains(sp.nat(0)))
+    poll = dao.data.polls[sp.nat(0)]
 
-    # AND the proposal matches the input data.
-    scenario.verify(poll.proposal.title == title)
-    scenario.verify(poll.proposal.descriptionLink == descriptionLink)
-    scenario.verify(poll.proposal.descriptionHash == descriptionHash)
+    # AND the proposal is stored under the poll's ID.
+    scenario.verify(dao.data.proposals[poll.id].title == title)
+    scenario.verify(dao.data.proposals[poll.id].descriptionLink == descriptionLink)
+    scenario.verify(dao.data.proposals[poll.id].descriptionHash == descriptionHash)
+
+    # AND the poll holds the hash of the proposal.
+    scenario.verify(poll.proposalHash == sp.blake2b(sp.pack(dao.data.proposals[poll.id])))
+
+    # AND the poll keeps the proposal's title and description hash.
+    scenario.verify(poll.title == title)
+    scenario.verify(poll.descriptionHash == descriptionHash)
 
     # AND voting totals are zero-ed
     scenario.verify(poll.yayVotes == 0)
@@ -620,8 +1021,8 @@ if __name__ == "__main__":
     # AND the escrow amount is correct.
     scenario.verify(poll.escrowAmount == escrowAmount)
 
-    # AND no voters are listed
-    scenario.verify(sp.len(poll.voters) == 0)
+    # AND Alice is not listed as a voter
+    scenario.verify(~dao.data.voters.contains((poll.id, Addresses.ALICE_ADDRESS)))
 
     # AND the start and end blocks are set correctly
     expectedStartBlock = level + governanceParameters.voteDelayBlocks
@@ -629,6 +1030,11 @@ if __name__ == "__main__":
     scenario.verify(poll.votingStartBlock == expectedStartBlock)
     scenario.verify(poll.votingEndBlock == expectedEndBlock)
 
+    # AND a token snapshot was taken for the voting period.
+    scenario.verify(poll.snapshotId == sp.some(sp.nat(0)))
+    scenario.verify(token.data.snapshots[0].level == expectedStartBlock)
+    scenario.verify(token.data.snapshots[0].expiry == expectedEndBlock)
+
     # AND the quorum is set correctly. 
     scenario.verify(poll.quorum == dao.data.quorum)
 
@@ -636,6 +1042,10 @@ if __name__ == "__main__":
     scenario.verify(poll.quorumCap.lower == governanceParameters.quorumCap.lower)
     scenario.verify(poll.quorumCap.upper == governanceParameters.quorumCap.upper)
 
+    # AND the voting thresholds are set correctly.
+    scenario.verify(poll.minYayVotesPercentForEscrowReturn == minYayVotesPercentForEscrowReturn)
+    scenario.verify(poll.percentageForSuperMajority == percentageForSuperMajority)
+
     # AND the dao received the tokens in escrow.
     scenario.verify(token.data.balances[dao.address] == escrowAmount)
 
@@ -676,6 +1086,11 @@ if __name__ == "__main__":
     )
     scenario += dao
 
+    # AND the dao takes snapshots of the token.
+    scenario += token.setSnapshotter(sp.some(dao.address)).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+
     # AND an Alice and bob have tokens
     numTokens = sp.nat(100)
     scenario += token.mint(
@@ -727,7 +1142,7 @@ if __name__ == "__main__":
       title = title,
       descriptionLink = descriptionLink,
       descriptionHash = descriptionHash,
-      proposalLambda = updateLambda
+      proposalLambdas = sp.list([updateLambda])
     )
     
     level = 1
@@ -751,7 +1166,7 @@ if __name__ == "__main__":
       title = title,
       descriptionLink = descriptionLink,
       descriptionHash = descriptionHash,
-      proposalLambda = updateLambda
+      proposalLambdas = sp.list([updateLambda])
     )
     
     level = 2
@@ -763,7 +1178,7 @@ if __name__ == "__main__":
       valid = False
     )
 
-  @sp.add_test(name="propose - cannot propose if proposer does not have collateral")
+  @sp.add_test(name="propose - polls run concurrently up to the maximum number of active polls")
   def test():
     scenario = sp.test_scenario()
 
@@ -772,203 +1187,230 @@ if __name__ == "__main__":
       admin = Addresses.TOKEN_ADMIN_ADDRESS,
     )
     scenario += token
-    
-    # AND some governance parameters
+
+    # AND a dao contract which allows two polls at once.
     escrowAmount = sp.nat(10)
-    voteDelayBlocks = sp.nat(1)
     voteLengthBlocks = sp.nat(10)
-    minYayVotesPercentForEscrowReturn = sp.nat(20)
-    blocksInTimelockForExecution = sp.nat(30)
-    blocksInTimelockForCancellation = sp.nat(40)
-    percentageForSuperMajority = sp.nat(80)
-    quorumCap = sp.record(lower = 1, upper = 99)
     governanceParameters = sp.record(
       escrowAmount = escrowAmount,
-      voteDelayBlocks = voteDelayBlocks,
+      voteDelayBlocks = sp.nat(1),
       voteLengthBlocks = voteLengthBlocks,
-      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
-      blocksInTimelockForExecution = blocksInTimelockForExecution,
-      blocksInTimelockForCancellation = blocksInTimelockForCancellation,
-      percentageForSuperMajority = percentageForSuperMajority,
-      quorumCap = quorumCap
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      blocksInTimelockForExecution = sp.nat(30),
+      blocksInTimelockForCancellation = sp.nat(40),
+      percentageForSuperMajority = sp.nat(80),
+      quorumCap = sp.record(lower = 1, upper = 99)
     )
-
-    # AND a dao contract.
     dao = DaoContract(
       tokenContractAddress = token.address,
       governanceParameters = governanceParameters,
+      maxActivePolls = sp.nat(2),
     )
     scenario += dao
 
-    # AND an Alice has fewer tokens than the escrow amount
-    totalTokens = sp.as_nat(escrowAmount - 1)
-    scenario += token.mint(
-      sp.record(
-        address = Addresses.ALICE_ADDRESS,
-        value = totalTokens
-      )
-    ).run(
+    # AND the dao takes snapshots of the token.
+    scenario += token.setSnapshotter(sp.some(dao.address)).run(
       sender = Addresses.TOKEN_ADMIN_ADDRESS
     )
 
-    # AND Alice has approved the DAO to spend the tokens.
-    scenario += token.approve(
-      spender = dao.address,
-      value = totalTokens
-    ).run(
-      sender = Addresses.ALICE_ADDRESS
-    )
-
-    # AND a store value contract with the dao as the admin.
-    storeContract = Store.StoreValueContract(value = 0, admin = dao.address)
-    scenario += storeContract
-
-    # WHEN Alice makes a proposal. 
-    newValue = sp.nat(3)
-    def updateLambda(unitParam):
-      sp.set_type(unitParam, sp.TUnit)
-      storeContractHandle = sp.contract(sp.TNat, storeContract.address, 'replace').open_some()
-      sp.result([sp.transfer_operation(newValue, sp.mutez(0), storeContractHandle)])
+    # AND Alice and Bob have tokens and have approved the DAO to spend them.
+    numTokens = sp.nat(100)
+    for holder in [Addresses.ALICE_ADDRESS, Addresses.BOB_ADDRESS]:
+      scenario += token.mint(
+        sp.record(
+          address = holder,
+          value = numTokens
+        )
+      ).run(
+        sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        level = 0
+      )
+      scenario += token.approve(
+        spender = dao.address,
+        value = numTokens
+      ).run(
+        sender = holder
+      )
 
-    title = "Prop 1"
-    descriptionLink = "ipfs://xyz"
-    descriptionHash = "xyz123"
     proposal = sp.record(
-      title = title,
-      descriptionLink = descriptionLink,
-      descriptionHash = descriptionHash,
-      proposalLambda = updateLambda
+      title = "Prop",
+      descriptionLink = "ipfs://xyz",
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))])
     )
-    
-    level = 1
 
-    # THEN the call fails.
+    # WHEN Alice and Bob each make a proposal
     scenario += dao.propose(proposal).run(
       sender = Addresses.ALICE_ADDRESS,
-      level = 1,
+      level = 1
+    )
+    scenario += dao.propose(proposal).run(
+      sender = Addresses.BOB_ADDRESS,
+      level = 2
+    )
+
+    # THEN both polls are underway.
+    scenario.verify(dao.data.activePolls.contains(sp.nat(0)))
+    scenario.verify(dao.data.activePolls.contains(sp.nat(1)))
+
+    # AND a third proposal fails.
+    scenario += dao.propose(proposal).run(
+      sender = Addresses.ALICE_ADDRESS,
+      level = 2,
       valid = False
     )
 
-  ################################################################
-  # endVoting
-  ################################################################
+    # WHEN Alice votes on the first poll and Bob votes on the second poll
+    scenario += dao.vote(pollId = sp.nat(0), voteValue = VoteValue.NAY).run(
+      sender = Addresses.ALICE_ADDRESS,
+      level = 5
+    )
+    scenario += dao.vote(pollId = sp.nat(1), voteValue = VoteValue.YAY).run(
+      sender = Addresses.BOB_ADDRESS,
+      level = 5
+    )
 
-  @sp.add_test(name="endVoting - fails if no poll underway")
+    # THEN each vote is only counted in its poll.
+    votingPower = sp.as_nat(numTokens - escrowAmount)
+    scenario.verify(dao.data.polls[sp.nat(0)].nayVotes == votingPower)
+    scenario.verify(dao.data.polls[sp.nat(0)].yayVotes == sp.nat(0))
+    scenario.verify(dao.data.polls[sp.nat(1)].yayVotes == votingPower)
+    scenario.verify(dao.data.polls[sp.nat(1)].nayVotes == sp.nat(0))
+
+    # WHEN the first poll ends
+    scenario += dao.endVoting(sp.nat(0)).run(
+      level = 13
+    )
+
+    # THEN only the second poll is underway.
+    scenario.verify(~dao.data.polls.contains(sp.nat(0)))
+    scenario.verify(~dao.data.activePolls.contains(sp.nat(0)))
+    scenario.verify(dao.data.activePolls.contains(sp.nat(1)))
+    scenario.verify(dao.data.outcomes[sp.nat(0)].outcome == PollOutcomes.POLL_OUTCOME_FAILED)
+
+    # AND a new proposal may be made.
+    scenario += dao.propose(proposal).run(
+      sender = Addresses.ALICE_ADDRESS,
+      level = 13
+    )
+    scenario.verify(dao.data.activePolls.contains(sp.nat(2)))
+
+  @sp.add_test(name="propose - creates a poll without a snapshot if voting starts before the previous snapshot")
   def test():
     scenario = sp.test_scenario()
-    
-    # Given some governance parameters
+
+    # GIVEN a token contract
+    token = Token.FA12(
+      admin = Addresses.TOKEN_ADMIN_ADDRESS,
+    )
+    scenario += token
+
+    # AND a dao contract which allows two polls at once and delays voting by 10 blocks.
     escrowAmount = sp.nat(10)
-    voteDelayBlocks = sp.nat(1)
-    voteLengthBlocks = sp.nat(10)
-    minYayVotesPercentForEscrowReturn = sp.nat(20)
-    blocksInTimelockForExecution = sp.nat(30)
-    blocksInTimelockForCancellation = sp.nat(40)
-    percentageForSuperMajority = sp.nat(80)
-    quorumCap = sp.record(lower = 1, upper = 99)
     governanceParameters = sp.record(
       escrowAmount = escrowAmount,
-      voteDelayBlocks = voteDelayBlocks,
-      voteLengthBlocks = voteLengthBlocks,
-      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
-      blocksInTimelockForExecution = blocksInTimelockForExecution,
-      blocksInTimelockForCancellation = blocksInTimelockForCancellation,
-      percentageForSuperMajority = percentageForSuperMajority,
-      quorumCap = quorumCap
+      voteDelayBlocks = sp.nat(10),
+      voteLengthBlocks = sp.nat(10),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      blocksInTimelockForExecution = sp.nat(30),
+      blocksInTimelockForCancellation = sp.nat(40),
+      percentageForSuperMajority = sp.nat(80),
+      quorumCap = sp.record(lower = 1, upper = 99)
     )
-
-    # AND a dao contract.
     dao = DaoContract(
+      tokenContractAddress = token.address,
       governanceParameters = governanceParameters,
+      maxActivePolls = sp.nat(2),
     )
     scenario += dao
 
-    # WHEN end voting is called before a poll is submitted
-    # THEN the call fails.
-    scenario += dao.endVoting(sp.unit).run(
-      valid = False
+    # AND the dao takes snapshots of the token.
+    scenario += token.setSnapshotter(sp.some(dao.address)).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS
     )
 
-  @sp.add_test(name="endVoting - fails if timelock is occupied")
-  def test():
-    scenario = sp.test_scenario()
-    
-    # Given some governance parameters
-    escrowAmount = sp.nat(10)
-    voteDelayBlocks = sp.nat(1)
-    voteLengthBlocks = sp.nat(10)
-    minYayVotesPercentForEscrowReturn = sp.nat(20)
-    blocksInTimelockForExecution = sp.nat(30)
-    blocksInTimelockForCancellation = sp.nat(40)
-    percentageForSuperMajority = sp.nat(80)
-    quorumCap = sp.record(lower = 1, upper = 99)
-    governanceParameters = sp.record(
-      escrowAmount = escrowAmount,
-      voteDelayBlocks = voteDelayBlocks,
-      voteLengthBlocks = voteLengthBlocks,
-      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
-      blocksInTimelockForExecution = blocksInTimelockForExecution,
-      blocksInTimelockForCancellation = blocksInTimelockForCancellation,
-      percentageForSuperMajority = percentageForSuperMajority,
-      quorumCap = quorumCap
+    # AND Alice and Bob have tokens and have approved the DAO to spend them.
+    numTokens = sp.nat(100)
+    for holder in [Addresses.ALICE_ADDRESS, Addresses.BOB_ADDRESS]:
+      scenario += token.mint(
+        sp.record(
+          address = holder,
+          value = numTokens
+        )
+      ).run(
+        sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        level = 0
+      )
+      scenario += token.approve(
+        spender = dao.address,
+        value = numTokens
+      ).run(
+        sender = holder
+      )
+
+    proposal = sp.record(
+      title = "Prop",
+      descriptionLink = "ipfs://xyz",
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))])
     )
 
-    # AND a poll under is unerway with an item in the timelock
-    votingEndBlock = sp.nat(21)
-    poll = sp.record(
-      id = sp.nat(0),
-      proposal = sp.record(
-        title = 'timelocked prop',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
-      votingStartBlock = sp.nat(11),
-      votingEndBlock = votingEndBlock,
-      yayVotes = sp.nat(0),
-      nayVotes = sp.nat(0),
-      abstainVotes = sp.nat(0),
-      totalVotes = sp.nat(0),
-      voters = {},
-      author = Addresses.ALICE_ADDRESS,
-      escrowAmount = escrowAmount,
-      quorum = sp.nat(100),
-      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99))
+    # AND Alice made a proposal at level 1, whose snapshot is of level 11
+    scenario += dao.propose(proposal).run(
+      sender = Addresses.ALICE_ADDRESS,
+      level = 1
     )
+    scenario.verify(dao.data.polls[sp.nat(0)].snapshotId == sp.some(sp.nat(0)))
+    scenario.verify(token.data.snapshots[sp.nat(0)].level == sp.nat(11))
 
-    timelockItem = sp.record(
-      id = sp.nat(0),
-      proposal = sp.record(
-        title = 'timelocked prop',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
-      endBlock = sp.nat(10),
-      cancelBlock = sp.nat(20),
-      author = Addresses.ALICE_ADDRESS
+    # AND the voting delay has since been shortened to 1 block.
+    scenario += dao.setParameters(sp.record(
+      escrowAmount = escrowAmount,
+      voteDelayBlocks = sp.nat(1),
+      voteLengthBlocks = sp.nat(10),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      blocksInTimelockForExecution = sp.nat(30),
+      blocksInTimelockForCancellation = sp.nat(40),
+      percentageForSuperMajority = sp.nat(80),
+      quorumCap = sp.record(lower = 1, upper = 99)
+    )).run(
+      sender = dao.address,
+      level = 2
     )
 
-    # AND a dao contract with the parameters above.
-    dao = DaoContract(
-      governanceParameters = governanceParameters,
-      poll = sp.some(poll),
-      timelockItem = sp.some(timelockItem)
+    # WHEN Bob makes a proposal at level 2, whose voting starts at level 3
+    scenario += dao.propose(proposal).run(
+      sender = Addresses.BOB_ADDRESS,
+      level = 2
     )
-    scenario += dao
 
-    # WHEN end voting is called after voting has ended
-    # THEN the call fails.
-    scenario += dao.endVoting(sp.unit).run(
-      level = votingEndBlock + 1,
-      valid = False
+    # THEN the poll is created without a snapshot
+    scenario.verify(dao.data.polls[sp.nat(1)].votingStartBlock == sp.nat(3))
+    scenario.verify(dao.data.polls[sp.nat(1)].snapshotId == sp.none)
+
+    # AND no snapshot was taken.
+    scenario.verify(token.data.nextSnapshotId == sp.nat(1))
+
+    # WHEN Bob votes on the poll
+    scenario += dao.vote(pollId = sp.nat(1), voteValue = VoteValue.YAY).run(
+      sender = Addresses.BOB_ADDRESS,
+      level = 5
     )
 
-  @sp.add_test(name="endVoting - fails if voting is not yet complete")
+    # THEN his voting power is read from his checkpoints at the start of voting.
+    scenario.verify(dao.data.polls[sp.nat(1)].yayVotes == sp.as_nat(numTokens - escrowAmount))
+
+  @sp.add_test(name="propose - cannot propose if proposer does not have collateral")
   def test():
     scenario = sp.test_scenario()
+
+    # GIVEN a token contract
+    token = Token.FA12(
+      admin = Addresses.TOKEN_ADMIN_ADDRESS,
+    )
+    scenario += token
     
-    # Given some governance parameters
+    # AND some governance parameters
     escrowAmount = sp.nat(10)
     voteDelayBlocks = sp.nat(1)
     voteLengthBlocks = sp.nat(10)
@@ -988,180 +1430,332 @@ if __name__ == "__main__":
       quorumCap = quorumCap
     )
 
-    # AND a poll is underway
-    votingEndBlock = sp.nat(21)
-    poll = sp.record(
-      id = sp.nat(0),
-      proposal = sp.record(
-        title = 'timelocked prop',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
-      votingStartBlock = sp.nat(11),
-      votingEndBlock = votingEndBlock,
-      yayVotes = sp.nat(0),
-      nayVotes = sp.nat(0),
-      abstainVotes = sp.nat(0),
-      totalVotes = sp.nat(0),
-      voters = {},
-      author = Addresses.ALICE_ADDRESS,
-      escrowAmount = escrowAmount,
-      quorum = sp.nat(100),
-      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99))
-    )
-
-    # AND a dao contract with the parameters above.
+    # AND a dao contract.
     dao = DaoContract(
+      tokenContractAddress = token.address,
       governanceParameters = governanceParameters,
-      poll = sp.some(poll),
     )
     scenario += dao
 
-    # WHEN end voting is called before voting has ended
+    # AND the dao takes snapshots of the token.
+    scenario += token.setSnapshotter(sp.some(dao.address)).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+
+    # AND an Alice has fewer tokens than the escrow amount
+    totalTokens = sp.as_nat(escrowAmount - 1)
+    scenario += token.mint(
+      sp.record(
+        address = Addresses.ALICE_ADDRESS,
+        value = totalTokens
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+
+    # AND Alice has approved the DAO to spend the tokens.
+    scenario += token.approve(
+      spender = dao.address,
+      value = totalTokens
+    ).run(
+      sender = Addresses.ALICE_ADDRESS
+    )
+
+    # AND a store value contract with the dao as the admin.
+    storeContract = Store.StoreValueContract(value = 0, admin = dao.address)
+    scenario += storeContract
+
+    # WHEN Alice makes a proposal. 
+    newValue = sp.nat(3)
+    def updateLambda(unitParam):
+      sp.set_type(unitParam, sp.TUnit)
+      storeContractHandle = sp.contract(sp.TNat, storeContract.address, 'replace').open_some()
+      sp.result([sp.transfer_operation(newValue, sp.mutez(0), storeContractHandle)])
+
+    title = "Prop 1"
+    descriptionLink = "ipfs://xyz"
+    descriptionHash = "xyz123"
+    proposal = sp.record(
+      title = title,
+      descriptionLink = descriptionLink,
+      descriptionHash = descriptionHash,
+      proposalLambdas = sp.list([updateLambda])
+    )
+    
+    level = 1
+
     # THEN the call fails.
-    scenario += dao.endVoting(sp.unit).run(
-      level = sp.as_nat(votingEndBlock - 1),
+    scenario += dao.propose(proposal).run(
+      sender = Addresses.ALICE_ADDRESS,
+      level = 1,
       valid = False
     )
 
-  @sp.add_test(name="endVoting - adjusts quorum upwards")
+  ################################################################
+  # proposeWithPermit
+  ################################################################
+
+  @sp.add_test(name="proposeWithPermit - escrows with a permit instead of an approval")
   def test():
     scenario = sp.test_scenario()
-    
-    # Given some governance parameters
-    escrowAmount = sp.nat(10)
-    voteDelayBlocks = sp.nat(1)
-    voteLengthBlocks = sp.nat(10)
-    minYayVotesPercentForEscrowReturn = sp.nat(20)
-    blocksInTimelockForExecution = sp.nat(30)
-    blocksInTimelockForCancellation = sp.nat(40)
-    percentageForSuperMajority = sp.nat(80)
-    quorumCap = sp.record(lower = 1, upper = 99)
-    governanceParameters = sp.record(
-      escrowAmount = escrowAmount,
-      voteDelayBlocks = voteDelayBlocks,
-      voteLengthBlocks = voteLengthBlocks,
-      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
-      blocksInTimelockForExecution = blocksInTimelockForExecution,
-      blocksInTimelockForCancellation = blocksInTimelockForCancellation,
-      percentageForSuperMajority = percentageForSuperMajority,
-      quorumCap = quorumCap
-    )
 
-    # AND a poll is underway
-    quorum = 45
-    votingEndBlock = sp.nat(21)
-    totalVotes = 65
-    poll = sp.record(
-      id = sp.nat(0),
-      proposal = sp.record(
-        title = 'timelocked prop',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
-      votingStartBlock = sp.nat(11),
-      votingEndBlock = votingEndBlock,
-      yayVotes = sp.nat(0),
-      nayVotes = sp.nat(0),
-      abstainVotes = sp.nat(0),
-      totalVotes = totalVotes,
-      voters = {},
-      author = Addresses.ALICE_ADDRESS,
-      escrowAmount = escrowAmount,
-      quorum = quorum,
-      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99))
+    # GIVEN a token contract
+    token = Token.FA12(
+      admin = Addresses.TOKEN_ADMIN_ADDRESS,
     )
+    scenario += token
 
-    # AND a dao contract with the parameters above.
+    # AND a dao contract.
     dao = DaoContract(
-      governanceParameters = governanceParameters,
-      poll = sp.some(poll),
-      quorum = quorum
+      tokenContractAddress = token.address,
     )
     scenario += dao
 
-    # WHEN end voting is called
-    scenario += dao.endVoting(sp.unit).run(
-      level = votingEndBlock + 1,
-    )    
-
-    # THEN quorum is adjusted upwards
-    expectedQuorum = 49 # (.8 * lastQuorum) + (.2 * participation) = (.8 * 45) + (.2 * 65) = 36 + 13 = 49
-    scenario.verify(dao.data.quorum == expectedQuorum)
-
-  @sp.add_test(name="endVoting - adjusts quorum downwards")
-  def test():
-    scenario = sp.test_scenario()
-    
-    # Given some governance parameters
-    escrowAmount = sp.nat(10)
-    voteDelayBlocks = sp.nat(1)
-    voteLengthBlocks = sp.nat(10)
-    minYayVotesPercentForEscrowReturn = sp.nat(20)
-    blocksInTimelockForExecution = sp.nat(30)
-    blocksInTimelockForCancellation = sp.nat(40)
-    percentageForSuperMajority = sp.nat(80)
-    quorumCap = sp.record(lower = 1, upper = 99)
-    governanceParameters = sp.record(
-      escrowAmount = escrowAmount,
-      voteDelayBlocks = voteDelayBlocks,
-      voteLengthBlocks = voteLengthBlocks,
-      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
-      blocksInTimelockForExecution = blocksInTimelockForExecution,
-      blocksInTimelockForCancellation = blocksInTimelockForCancellation,
-      percentageForSuperMajority = percentageForSuperMajority,
-      quorumCap = quorumCap
+    # AND the dao takes snapshots of the token.
+    scenario += token.setSnapshotter(sp.some(dao.address)).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS
     )
 
-    # AND a poll is underway
-    quorum = 65
-    votingEndBlock = sp.nat(21)
-    totalVotes = 45
-    poll = sp.record(
-      id = sp.nat(0),
-      proposal = sp.record(
-        title = 'timelocked prop',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
-      votingStartBlock = sp.nat(11),
-      votingEndBlock = votingEndBlock,
-      yayVotes = sp.nat(0),
-      nayVotes = sp.nat(0),
-      abstainVotes = sp.nat(0),
-      totalVotes = totalVotes,
-      voters = {},
-      author = Addresses.ALICE_ADDRESS,
-      escrowAmount = escrowAmount,
-      quorum = quorum,
-      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99))
+    # AND Alice has tokens
+    alice = sp.test_account("Alice")
+    totalTokens = sp.nat(100)
+    scenario += token.mint(
+      sp.record(
+        address = alice.address,
+        value = totalTokens
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS
     )
 
-    # AND a dao contract with the parameters above.
+    # AND Alice has signed a permit for the dao to escrow tokens from her
+    chainId = sp.chain_id_cst("0x9caecab9")
+    escrowAmount = dao.data.governanceParameters.escrowAmount
+    transferParams = sp.set_type_expr(
+      sp.record(from_ = alice.address, to_ = dao.address, value = escrowAmount),
+      sp.TRecord(from_ = sp.TAddress, to_ = sp.TAddress, value = sp.TNat).layout(("from_ as from", ("to_ as to", "value")))
+    )
+    paramHash = scenario.compute(sp.blake2b(sp.pack((dao.address, transferParams))))
+    payload = scenario.compute(sp.pack(((chainId, token.address), (sp.nat(0), paramHash))))
+    permit = sp.record(
+      publicKey = alice.public_key,
+      signature = sp.make_signature(alice.secret_key, payload, message_format = 'Raw'),
+      paramHash = paramHash
+    )
+
+    # AND a proposal
+    def updateLambda(unitParam):
+      sp.set_type(unitParam, sp.TUnit)
+      sp.result(sp.list(l = [], t = sp.TOperation))
+
+    proposal = sp.record(
+      title = "Prop 1",
+      descriptionLink = "ipfs://xyz",
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([updateLambda])
+    )
+
+    # WHEN Alice proposes with the permit, without approving the dao
+    scenario += dao.proposeWithPermit(permit = permit, proposal = proposal).run(
+      sender = alice.address,
+      level = 1,
+      now = sp.timestamp(0),
+      chain_id = chainId
+    )
+
+    # THEN a poll is loaded into the dao with Alice as the author.
+    scenario.verify(dao.data.polls.contains(sp.nat(0)))
+    scenario.verify(dao.data.polls[sp.nat(0)].author == alice.address)
+
+    # AND the escrow is held by the dao.
+    scenario.verify(token.data.balances[dao.address] == escrowAmount)
+    scenario.verify(token.data.balances[alice.address] == sp.as_nat(totalTokens - escrowAmount))
+
+    # AND neither the permit nor an approval is left behind.
+    scenario.verify(~token.data.permits.contains((alice.address, paramHash)))
+    scenario.verify(~token.data.approvals.contains((alice.address, dao.address)))
+
+  ################################################################
+  # onTokenTransfer
+  ################################################################
+
+  @sp.add_test(name="onTokenTransfer - proposes with the escrow sent by transferAndCall")
+  def test():
+    scenario = sp.test_scenario()
+
+    # GIVEN a token contract
+    token = Token.FA12(
+      admin = Addresses.TOKEN_ADMIN_ADDRESS,
+    )
+    scenario += token
+
+    # AND a dao contract.
     dao = DaoContract(
-      governanceParameters = governanceParameters,
-      poll = sp.some(poll),
-      quorum = quorum
+      tokenContractAddress = token.address,
     )
     scenario += dao
 
-    # WHEN end voting is called
-    scenario += dao.endVoting(sp.unit).run(
-      level = votingEndBlock + 1,
-    )    
+    # AND the dao takes snapshots of the token.
+    scenario += token.setSnapshotter(sp.some(dao.address)).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS
+    )
 
-    # THEN quorum is adjusted upwards
-    expectedQuorum = 61 # (.8 * lastQuorum) + (.2 * participation) = (.8 * 65) + (.2 * 45) = 52 + 9 = 61
-    scenario.verify(dao.data.quorum == expectedQuorum)    
+    # AND Alice has tokens
+    totalTokens = sp.nat(100)
+    scenario += token.mint(
+      sp.record(
+        address = Addresses.ALICE_ADDRESS,
+        value = totalTokens
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS
+    )
 
-  @sp.add_test(name="endVoting - caps maximum quorum")
+    # AND a store value contract with the dao as the admin.
+    storeContract = Store.StoreValueContract(value = 0, admin = dao.address)
+    scenario += storeContract
+
+    # AND a proposal
+    newValue = sp.nat(3)
+    def updateLambda(unitParam):
+      sp.set_type(unitParam, sp.TUnit)
+      storeContractHandle = sp.contract(sp.TNat, storeContract.address, 'replace').open_some()
+      sp.result([sp.transfer_operation(newValue, sp.mutez(0), storeContractHandle)])
+
+    title = "Prop 1"
+    proposal = sp.record(
+      title = title,
+      descriptionLink = "ipfs://xyz",
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([updateLambda])
+    )
+
+    # WHEN Alice sends the escrow to the dao along with the proposal, without approving the dao
+    escrowAmount = dao.data.governanceParameters.escrowAmount
+    scenario += token.transferAndCall(
+      from_ = Addresses.ALICE_ADDRESS,
+      to_ = dao.address,
+      value = escrowAmount,
+      data = sp.pack(sp.set_type_expr(proposal, Proposal.PROPOSAL_TYPE))
+    ).run(
+      sender = Addresses.ALICE_ADDRESS,
+      level = 1
+    )
+
+    # THEN a poll is loaded into the dao.
+    scenario.verify(dao.data.polls.contains(sp.nat(0)))
+    poll = dao.data.polls[sp.nat(0)]
+    scenario.verify(dao.data.proposals[poll.id].title == title)
+
+    # AND alice is listed as the author.
+    scenario.verify(poll.author == Addresses.ALICE_ADDRESS)
+
+    # AND the escrow is held by the dao.
+    scenario.verify(token.data.balances[dao.address] == escrowAmount)
+    scenario.verify(token.data.balances[Addresses.ALICE_ADDRESS] == sp.as_nat(totalTokens - escrowAmount))
+
+    # AND a token snapshot was taken for the voting period.
+    scenario.verify(poll.snapshotId == sp.some(sp.nat(0)))
+
+  @sp.add_test(name="onTokenTransfer - fails if the escrow is not the required amount")
+  def test():
+    scenario = sp.test_scenario()
+
+    # GIVEN a token contract
+    token = Token.FA12(
+      admin = Addresses.TOKEN_ADMIN_ADDRESS,
+    )
+    scenario += token
+
+    # AND a dao contract.
+    dao = DaoContract(
+      tokenContractAddress = token.address,
+    )
+    scenario += dao
+
+    # AND the dao takes snapshots of the token.
+    scenario += token.setSnapshotter(sp.some(dao.address)).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+
+    # AND Alice has tokens
+    scenario += token.mint(
+      sp.record(
+        address = Addresses.ALICE_ADDRESS,
+        value = sp.nat(100)
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+
+    # AND a proposal
+    def updateLambda(unitParam):
+      sp.set_type(unitParam, sp.TUnit)
+      sp.result(sp.list(l = [], t = sp.TOperation))
+
+    proposal = sp.record(
+      title = "Prop 1",
+      descriptionLink = "ipfs://xyz",
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([updateLambda])
+    )
+
+    # WHEN Alice sends more than the escrow along with the proposal
+    # THEN the call fails.
+    scenario += token.transferAndCall(
+      from_ = Addresses.ALICE_ADDRESS,
+      to_ = dao.address,
+      value = dao.data.governanceParameters.escrowAmount + 1,
+      data = sp.pack(sp.set_type_expr(proposal, Proposal.PROPOSAL_TYPE))
+    ).run(
+      sender = Addresses.ALICE_ADDRESS,
+      level = 1,
+      valid = False
+    )
+
+  @sp.add_test(name="onTokenTransfer - fails if not called by the token contract")
+  def test():
+    scenario = sp.test_scenario()
+
+    # GIVEN a dao contract.
+    dao = DaoContract(
+      tokenContractAddress = Addresses.TOKEN_CONTRACT_ADDRESS,
+    )
+    scenario += dao
+
+    # AND a proposal
+    def updateLambda(unitParam):
+      sp.set_type(unitParam, sp.TUnit)
+      sp.result(sp.list(l = [], t = sp.TOperation))
+
+    proposal = sp.record(
+      title = "Prop 1",
+      descriptionLink = "ipfs://xyz",
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([updateLambda])
+    )
+
+    # WHEN onTokenTransfer is called by someone other than the token contract
+    # THEN the call fails.
+    scenario += dao.onTokenTransfer(
+      from_ = Addresses.ALICE_ADDRESS,
+      value = dao.data.governanceParameters.escrowAmount,
+      data = sp.pack(sp.set_type_expr(proposal, Proposal.PROPOSAL_TYPE))
+    ).run(
+      sender = Addresses.ALICE_ADDRESS,
+      level = 1,
+      valid = False
+    )
+
+  ################################################################
+  # endVoting
+  ################################################################
+
+  @sp.add_test(name="endVoting - fails if no poll underway")
   def test():
     scenario = sp.test_scenario()
     
-    # Given some governance parameters with a conservative upper cap
+    # Given some governance parameters
     escrowAmount = sp.nat(10)
     voteDelayBlocks = sp.nat(1)
     voteLengthBlocks = sp.nat(10)
@@ -1169,8 +1763,7 @@ if __name__ == "__main__":
     blocksInTimelockForExecution = sp.nat(30)
     blocksInTimelockForCancellation = sp.nat(40)
     percentageForSuperMajority = sp.nat(80)
-    quorumUpperCap = sp.nat(48)
-    quorumCap = sp.record(lower = 1, upper = quorumUpperCap)
+    quorumCap = sp.record(lower = 1, upper = 99)
     governanceParameters = sp.record(
       escrowAmount = escrowAmount,
       voteDelayBlocks = voteDelayBlocks,
@@ -1182,54 +1775,24 @@ if __name__ == "__main__":
       quorumCap = quorumCap
     )
 
-    # AND a poll is under vote
-    quorum = 45
-    votingEndBlock = sp.nat(21)
-    totalVotes = 65
-    poll = sp.record(
-      id = sp.nat(0),
-      proposal = sp.record(
-        title = 'timelocked prop',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
-      votingStartBlock = sp.nat(11),
-      votingEndBlock = votingEndBlock,
-      yayVotes = sp.nat(0),
-      nayVotes = sp.nat(0),
-      abstainVotes = sp.nat(0),
-      totalVotes = totalVotes,
-      voters = {},
-      author = Addresses.ALICE_ADDRESS,
-      escrowAmount = escrowAmount,
-      quorum = quorum,
-      quorumCap = quorumCap,
-    )
-
-    # AND a dao contract with the parameters above.
+    # AND a dao contract.
     dao = DaoContract(
       governanceParameters = governanceParameters,
-      poll = sp.some(poll),
-      quorum = quorum
     )
     scenario += dao
 
-    # WHEN end voting is called
-    scenario += dao.endVoting(sp.unit).run(
-      level = votingEndBlock + 1,
-    )    
-
-    # THEN quorum is adjusted upwards and capped at the upper bound
-    # Expected = (.8 * lastQuorum) + (.2 * participation) = (.8 * 45) + (.2 * 65) = 36 + 13 = 49
-    # Cap = 48
-    scenario.verify(dao.data.quorum == quorumUpperCap)
+    # WHEN end voting is called before a poll is submitted
+    # THEN the call fails.
+    scenario += dao.endVoting(sp.nat(0)).run(
+      valid = False
+    )
 
-  @sp.add_test(name="endVoting - caps minimum quorum")
+  @sp.add_test(name="endVoting - queues proposal in the timelock while another item is in the timelock")
   def test():
     scenario = sp.test_scenario()
     
-    # Given some governance parameters with a conservative lower cap
+    # Given some governance parameters
+    quorum = 200
     escrowAmount = sp.nat(10)
     voteDelayBlocks = sp.nat(1)
     voteLengthBlocks = sp.nat(10)
@@ -1237,8 +1800,7 @@ if __name__ == "__main__":
     blocksInTimelockForExecution = sp.nat(30)
     blocksInTimelockForCancellation = sp.nat(40)
     percentageForSuperMajority = sp.nat(80)
-    quorumLowerCap = 62
-    quorumCap = sp.record(lower = quorumLowerCap, upper = 99)
+    quorumCap = sp.record(lower = 1, upper = 99)
     governanceParameters = sp.record(
       escrowAmount = escrowAmount,
       voteDelayBlocks = voteDelayBlocks,
@@ -1250,54 +1812,98 @@ if __name__ == "__main__":
       quorumCap = quorumCap
     )
 
-    # AND a poll is underway
-    quorum = 65
+    # AND an earlier proposal which is waiting in the timelock
+    timelockedPollId = sp.nat(0)
+    timelockedEndBlock = sp.nat(25)
+    timelockedCancelBlock = sp.nat(35)
+    timelockItem = sp.record(
+      id = timelockedPollId,
+      proposalHash = sp.bytes("0x00"),
+      endBlock = timelockedEndBlock,
+      cancelBlock = timelockedCancelBlock,
+      author = Addresses.BOB_ADDRESS
+    )
+
+    # AND a poll by Alice which achieves quorum and a super majority
     votingEndBlock = sp.nat(21)
-    totalVotes = 45
+    proposalHash = sp.blake2b(sp.bytes_of_string("proposal which will succeed"))
+    pollId = sp.nat(1)
+    proposal = sp.record(
+      title = "Prop 2",
+      descriptionLink = "ipfs://xyz",
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))])
+    )
     poll = sp.record(
-      id = sp.nat(0),
-      proposal = sp.record(
-        title = 'timelocked prop',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      id = pollId,
+      proposalHash = proposalHash,
+      title = "Prop 2",
+      descriptionHash = "xyz123",
       votingStartBlock = sp.nat(11),
       votingEndBlock = votingEndBlock,
-      yayVotes = sp.nat(0),
-      nayVotes = sp.nat(0),
+      yayVotes = sp.nat(160),
+      nayVotes = sp.nat(40),
       abstainVotes = sp.nat(0),
-      totalVotes = totalVotes,
-      voters = {},
+      totalVotes = sp.nat(200),
       author = Addresses.ALICE_ADDRESS,
       escrowAmount = escrowAmount,
-      quorum = quorum,
-      quorumCap = quorumCap
+      quorum = sp.nat(100),
+      quorumCap = quorumCap,
+      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
+      percentageForSuperMajority = percentageForSuperMajority,
+      snapshotId = sp.none
     )
 
     # AND a dao contract with the parameters above.
     dao = DaoContract(
       governanceParameters = governanceParameters,
-      poll = sp.some(poll),
-      quorum = quorum
+      polls = sp.big_map(
+        l = {
+          pollId: poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([pollId]),
+      proposals = sp.big_map(
+        l = {
+          pollId: proposal
+        },
+        tkey = sp.TNat,
+        tvalue = Proposal.PROPOSAL_TYPE,
+      ),
+      timelockItems = sp.big_map(
+        l = {
+          timelockedPollId: timelockItem
+        },
+        tkey = sp.TNat,
+        tvalue = TIMELOCK_ITEM_TYPE,
+      ),
+      quorum = quorum,
     )
     scenario += dao
 
-    # WHEN end voting is called
-    scenario += dao.endVoting(sp.unit).run(
-      level = votingEndBlock + 1,
-    )    
+    # WHEN end voting is called after voting has ended
+    endVotingBlock = votingEndBlock + 1
+    scenario += dao.endVoting(pollId).run(
+      level = endVotingBlock,
+    )
 
-    # THEN quorum is adjusted downwards and capped at the lower bound
-    # Expected = (.8 * lastQuorum) + (.2 * participation) = (.8 * 65) + (.2 * 45) = 52 + 9 = 61
-    # Cap = 62
-    scenario.verify(dao.data.quorum == quorumLowerCap)
+    # THEN the proposal is queued in the timelock with its own windows
+    scenario.verify(dao.data.outcomes[pollId].outcome == PollOutcomes.POLL_OUTCOME_IN_TIMELOCK)
+    scenario.verify(dao.data.timelockItems[pollId].proposalHash == proposalHash)
+    scenario.verify(dao.data.timelockItems[pollId].endBlock == endVotingBlock + blocksInTimelockForExecution)
+    scenario.verify(dao.data.timelockItems[pollId].cancelBlock == endVotingBlock + blocksInTimelockForCancellation)
 
-  @sp.add_test(name="endVoting - returns escrow to author")
+    # AND the earlier item is untouched.
+    scenario.verify(dao.data.timelockItems[timelockedPollId].endBlock == timelockedEndBlock)
+    scenario.verify(dao.data.timelockItems[timelockedPollId].cancelBlock == timelockedCancelBlock)
+
+  @sp.add_test(name="endVoting - fails if voting is not yet complete")
   def test():
     scenario = sp.test_scenario()
     
-    # Given some governance parameters 
+    # Given some governance parameters
     escrowAmount = sp.nat(10)
     voteDelayBlocks = sp.nat(1)
     voteLengthBlocks = sp.nat(10)
@@ -1305,8 +1911,7 @@ if __name__ == "__main__":
     blocksInTimelockForExecution = sp.nat(30)
     blocksInTimelockForCancellation = sp.nat(40)
     percentageForSuperMajority = sp.nat(80)
-    quorumLowerCap = 62
-    quorumCap = sp.record(lower = quorumLowerCap, upper = 99)
+    quorumCap = sp.record(lower = 1, upper = 99)
     governanceParameters = sp.record(
       escrowAmount = escrowAmount,
       voteDelayBlocks = voteDelayBlocks,
@@ -1318,72 +1923,54 @@ if __name__ == "__main__":
       quorumCap = quorumCap
     )
 
-    # AND a poll by Alice which achieves the minimum for escrow return
+    # AND a poll is underway
     votingEndBlock = sp.nat(21)
-    totalVotes = 100
-    yayVotes = 40
-    nayVotes = 60
     poll = sp.record(
       id = sp.nat(0),
-      proposal = sp.record(
-        title = 'timelocked prop',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
       votingStartBlock = sp.nat(11),
       votingEndBlock = votingEndBlock,
-      yayVotes = yayVotes,
-      nayVotes = nayVotes,
+      yayVotes = sp.nat(0),
+      nayVotes = sp.nat(0),
       abstainVotes = sp.nat(0),
-      totalVotes = totalVotes,
-      voters = {},
+      totalVotes = sp.nat(0),
       author = Addresses.ALICE_ADDRESS,
       escrowAmount = escrowAmount,
       quorum = sp.nat(100),
-      quorumCap = quorumCap
-    )
-
-    # AND a token contract.
-    token = Token.FA12(
-      admin = Addresses.TOKEN_ADMIN_ADDRESS,
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
+      percentageForSuperMajority = percentageForSuperMajority,
+      snapshotId = sp.none
     )
-    scenario += token
 
     # AND a dao contract with the parameters above.
-    quorum = 65
     dao = DaoContract(
       governanceParameters = governanceParameters,
-      poll = sp.some(poll),
-      quorum = quorum,
-      tokenContractAddress = token.address,
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
     )
     scenario += dao
 
-    # AND the dao has tokens escrowed
-    scenario += token.mint(
-      sp.record(
-        address = dao.address,
-        value = escrowAmount
-      )
-    ).run(
-      sender = Addresses.TOKEN_ADMIN_ADDRESS
+    # WHEN end voting is called before voting has ended
+    # THEN the call fails.
+    scenario += dao.endVoting(sp.nat(0)).run(
+      level = sp.as_nat(votingEndBlock - 1),
+      valid = False
     )
 
-    # WHEN end voting is called
-    scenario += dao.endVoting(sp.unit).run(
-      level = votingEndBlock + 1,
-    )    
-
-    # THEN alice receives the escrow.
-    scenario.verify(token.data.balances[Addresses.ALICE_ADDRESS] == escrowAmount)
-    scenario.verify(token.data.balances[dao.address] == 0)
-    
-  @sp.add_test(name="endVoting - gives escrow to community fund on failure")
+  @sp.add_test(name="endVoting - adjusts quorum upwards")
   def test():
     scenario = sp.test_scenario()
     
-    # Given some governance parameters 
+    # Given some governance parameters
     escrowAmount = sp.nat(10)
     voteDelayBlocks = sp.nat(1)
     voteLengthBlocks = sp.nat(10)
@@ -1391,8 +1978,7 @@ if __name__ == "__main__":
     blocksInTimelockForExecution = sp.nat(30)
     blocksInTimelockForCancellation = sp.nat(40)
     percentageForSuperMajority = sp.nat(80)
-    quorumLowerCap = 62
-    quorumCap = sp.record(lower = quorumLowerCap, upper = 99)
+    quorumCap = sp.record(lower = 1, upper = 99)
     governanceParameters = sp.record(
       escrowAmount = escrowAmount,
       voteDelayBlocks = voteDelayBlocks,
@@ -1404,74 +1990,72 @@ if __name__ == "__main__":
       quorumCap = quorumCap
     )
 
-    # AND a poll by Alice which fails to achieve the minimum for escrow return
+    # AND a poll is underway
+    quorum = 45
     votingEndBlock = sp.nat(21)
-    totalVotes = 100
-    yayVotes = 19
-    nayVotes = 81
+    totalVotes = 65
+    proposal = sp.record(
+      title = "Prop 1",
+      descriptionLink = "ipfs://xyz",
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))])
+    )
     poll = sp.record(
       id = sp.nat(0),
-      proposal = sp.record(
-        title = 'timelocked prop',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
       votingStartBlock = sp.nat(11),
       votingEndBlock = votingEndBlock,
-      yayVotes = yayVotes,
-      nayVotes = nayVotes,
+      yayVotes = sp.nat(0),
+      nayVotes = sp.nat(0),
       abstainVotes = sp.nat(0),
       totalVotes = totalVotes,
-      voters = {},
       author = Addresses.ALICE_ADDRESS,
       escrowAmount = escrowAmount,
-      quorum = sp.nat(100),
-      quorumCap = quorumCap
-    )
-
-    # AND a token contract.
-    token = Token.FA12(
-      admin = Addresses.TOKEN_ADMIN_ADDRESS,
+      quorum = quorum,
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
+      percentageForSuperMajority = percentageForSuperMajority,
+      snapshotId = sp.none
     )
-    scenario += token
 
     # AND a dao contract with the parameters above.
-    quorum = 65
     dao = DaoContract(
-      communityFundAddress = Addresses.COMMUNITY_FUND_ADDRESS,
       governanceParameters = governanceParameters,
-      poll = sp.some(poll),
-      quorum = quorum,
-      tokenContractAddress = token.address,
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
+      proposals = sp.big_map(
+        l = {
+          sp.nat(0): proposal
+        },
+        tkey = sp.TNat,
+        tvalue = Proposal.PROPOSAL_TYPE,
+      ),
+      quorum = quorum
     )
     scenario += dao
 
-    # AND the dao has tokens escrowed
-    scenario += token.mint(
-      sp.record(
-        address = dao.address,
-        value = escrowAmount
-      )
-    ).run(
-      sender = Addresses.TOKEN_ADMIN_ADDRESS
-    )
-
     # WHEN end voting is called
-    scenario += dao.endVoting(sp.unit).run(
+    scenario += dao.endVoting(sp.nat(0)).run(
       level = votingEndBlock + 1,
     )    
 
-    # THEN the community fund receives the escrow.
-    scenario.verify(token.data.balances[Addresses.COMMUNITY_FUND_ADDRESS] == escrowAmount)
-    scenario.verify(token.data.balances[dao.address] == 0)
+    # THEN quorum is adjusted upwards
+    expectedQuorum = 49 # (.8 * lastQuorum) + (.2 * participation) = (.8 * 45) + (.2 * 65) = 36 + 13 = 49
+    scenario.verify(dao.data.quorum == expectedQuorum)
 
-  @sp.add_test(name="endVoting - removes poll if quorum and super majority not met")
+  @sp.add_test(name="endVoting - adjusts quorum downwards")
   def test():
     scenario = sp.test_scenario()
     
-    # Given some governance parameters 
-    quorum = 100
+    # Given some governance parameters
     escrowAmount = sp.nat(10)
     voteDelayBlocks = sp.nat(1)
     voteLengthBlocks = sp.nat(10)
@@ -1479,8 +2063,7 @@ if __name__ == "__main__":
     blocksInTimelockForExecution = sp.nat(30)
     blocksInTimelockForCancellation = sp.nat(40)
     percentageForSuperMajority = sp.nat(80)
-    quorumLowerCap = 62
-    quorumCap = sp.record(lower = quorumLowerCap, upper = 99)
+    quorumCap = sp.record(lower = 1, upper = 99)
     governanceParameters = sp.record(
       escrowAmount = escrowAmount,
       voteDelayBlocks = voteDelayBlocks,
@@ -1492,61 +2075,72 @@ if __name__ == "__main__":
       quorumCap = quorumCap
     )
 
-    # AND a poll by Alice which fails to achieve quorum and fails to achieve a super majority
+    # AND a poll is underway
+    quorum = 65
     votingEndBlock = sp.nat(21)
-    totalVotes = quorum // 2
-    yayVotes = totalVotes // 2
-    nayVotes = totalVotes // 2
-    pollId = sp.nat(0)
+    totalVotes = 45
+    proposal = sp.record(
+      title = "Prop 1",
+      descriptionLink = "ipfs://xyz",
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))])
+    )
     poll = sp.record(
-      id = pollId,
-      proposal = sp.record(
-        title = 'timelocked prop',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      id = sp.nat(0),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
       votingStartBlock = sp.nat(11),
       votingEndBlock = votingEndBlock,
-      yayVotes = yayVotes,
-      nayVotes = nayVotes,
+      yayVotes = sp.nat(0),
+      nayVotes = sp.nat(0),
       abstainVotes = sp.nat(0),
       totalVotes = totalVotes,
-      voters = {},
       author = Addresses.ALICE_ADDRESS,
       escrowAmount = escrowAmount,
-      quorum = sp.nat(100),
-      quorumCap = quorumCap
+      quorum = quorum,
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
+      percentageForSuperMajority = percentageForSuperMajority,
+      snapshotId = sp.none
     )
 
     # AND a dao contract with the parameters above.
     dao = DaoContract(
       governanceParameters = governanceParameters,
-      poll = sp.some(poll),
-      quorum = quorum,
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
+      proposals = sp.big_map(
+        l = {
+          sp.nat(0): proposal
+        },
+        tkey = sp.TNat,
+        tvalue = Proposal.PROPOSAL_TYPE,
+      ),
+      quorum = quorum
     )
     scenario += dao
 
     # WHEN end voting is called
-    scenario += dao.endVoting(sp.unit).run(
+    scenario += dao.endVoting(sp.nat(0)).run(
       level = votingEndBlock + 1,
     )    
 
-    # THEN the poll is removed 
-    scenario.verify(~dao.data.poll.is_some())
-
-    # AND the outcome for the poll is FAILED
-    scenario.verify(dao.data.outcomes[pollId].outcome == PollOutcomes.POLL_OUTCOME_FAILED)
-
-    # AND it was not moved to the timelock
-    scenario.verify(~dao.data.timelockItem.is_some())
+    # THEN quorum is adjusted upwards
+    expectedQuorum = 61 # (.8 * lastQuorum) + (.2 * participation) = (.8 * 65) + (.2 * 45) = 52 + 9 = 61
+    scenario.verify(dao.data.quorum == expectedQuorum)    
 
-  @sp.add_test(name="endVoting - removes poll if super majority achieved but quorum not met")
+  @sp.add_test(name="endVoting - caps maximum quorum")
   def test():
     scenario = sp.test_scenario()
     
-    # Given some governance parameters 
-    quorum = 100
+    # Given some governance parameters with a conservative upper cap
     escrowAmount = sp.nat(10)
     voteDelayBlocks = sp.nat(1)
     voteLengthBlocks = sp.nat(10)
@@ -1554,8 +2148,8 @@ if __name__ == "__main__":
     blocksInTimelockForExecution = sp.nat(30)
     blocksInTimelockForCancellation = sp.nat(40)
     percentageForSuperMajority = sp.nat(80)
-    quorumLowerCap = 62
-    quorumCap = sp.record(lower = quorumLowerCap, upper = 99)
+    quorumUpperCap = sp.nat(48)
+    quorumCap = sp.record(lower = 1, upper = quorumUpperCap)
     governanceParameters = sp.record(
       escrowAmount = escrowAmount,
       voteDelayBlocks = voteDelayBlocks,
@@ -1567,61 +2161,73 @@ if __name__ == "__main__":
       quorumCap = quorumCap
     )
 
-    # AND a poll by Alice which fails to achieve quorum and but achieved a super majority
+    # AND a poll is under vote
+    quorum = 45
     votingEndBlock = sp.nat(21)
-    totalVotes = quorum // 2
-    yayVotes = totalVotes
-    nayVotes = 0
-    pollId = sp.nat(0)
+    totalVotes = 65
+    proposal = sp.record(
+      title = "Prop 1",
+      descriptionLink = "ipfs://xyz",
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))])
+    )
     poll = sp.record(
-      id = pollId,
-      proposal = sp.record(
-        title = 'timelocked prop',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      id = sp.nat(0),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
       votingStartBlock = sp.nat(11),
       votingEndBlock = votingEndBlock,
-      yayVotes = yayVotes,
-      nayVotes = nayVotes,
+      yayVotes = sp.nat(0),
+      nayVotes = sp.nat(0),
       abstainVotes = sp.nat(0),
       totalVotes = totalVotes,
-      voters = {},
       author = Addresses.ALICE_ADDRESS,
       escrowAmount = escrowAmount,
-      quorum = sp.nat(100),
-      quorumCap = quorumCap
+      quorum = quorum,
+      quorumCap = quorumCap,
+      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
+      percentageForSuperMajority = percentageForSuperMajority,
+      snapshotId = sp.none
     )
 
     # AND a dao contract with the parameters above.
     dao = DaoContract(
       governanceParameters = governanceParameters,
-      poll = sp.some(poll),
-      quorum = quorum,
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
+      proposals = sp.big_map(
+        l = {
+          sp.nat(0): proposal
+        },
+        tkey = sp.TNat,
+        tvalue = Proposal.PROPOSAL_TYPE,
+      ),
+      quorum = quorum
     )
     scenario += dao
 
     # WHEN end voting is called
-    scenario += dao.endVoting(sp.unit).run(
+    scenario += dao.endVoting(sp.nat(0)).run(
       level = votingEndBlock + 1,
     )    
 
-    # THEN the poll under vote is removed 
-    scenario.verify(~dao.data.poll.is_some())
-
-    # AND the outcome for the poll is FAILED
-    scenario.verify(dao.data.outcomes[pollId].outcome == PollOutcomes.POLL_OUTCOME_FAILED)
-
-    # AND it was not moved to the timelock
-    scenario.verify(~dao.data.timelockItem.is_some())    
+    # THEN quorum is adjusted upwards and capped at the upper bound
+    # Expected = (.8 * lastQuorum) + (.2 * participation) = (.8 * 45) + (.2 * 65) = 36 + 13 = 49
+    # Cap = 48
+    scenario.verify(dao.data.quorum == quorumUpperCap)
 
-  @sp.add_test(name="endVoting - removes poll if quorum met and super majority not achieved")
+  @sp.add_test(name="endVoting - caps minimum quorum")
   def test():
     scenario = sp.test_scenario()
     
-    # Given some governance parameters 
-    quorum = 100
+    # Given some governance parameters with a conservative lower cap
     escrowAmount = sp.nat(10)
     voteDelayBlocks = sp.nat(1)
     voteLengthBlocks = sp.nat(10)
@@ -1642,61 +2248,378 @@ if __name__ == "__main__":
       quorumCap = quorumCap
     )
 
-    # AND a poll by Alice which achieves quorum and but failed to achieved a super majority
+    # AND a poll is underway
+    quorum = 65
     votingEndBlock = sp.nat(21)
-    totalVotes = quorum * 2
-    yayVotes = sp.nat(10)
-    nayVotes = sp.as_nat(totalVotes - yayVotes)
-    pollId = sp.nat(0)
+    totalVotes = 45
+    proposal = sp.record(
+      title = "Prop 1",
+      descriptionLink = "ipfs://xyz",
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))])
+    )
     poll = sp.record(
-      id = pollId,
-      proposal = sp.record(
-        title = 'timelocked prop',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      id = sp.nat(0),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
       votingStartBlock = sp.nat(11),
       votingEndBlock = votingEndBlock,
-      yayVotes = yayVotes,
-      nayVotes = nayVotes,
+      yayVotes = sp.nat(0),
+      nayVotes = sp.nat(0),
       abstainVotes = sp.nat(0),
       totalVotes = totalVotes,
-      voters = {},
       author = Addresses.ALICE_ADDRESS,
       escrowAmount = escrowAmount,
-      quorum = sp.nat(100),
-      quorumCap = quorumCap
-    )
+      quorum = quorum,
+      quorumCap = quorumCap,
+      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
+      percentageForSuperMajority = percentageForSuperMajority,
+      snapshotId = sp.none
+    )
+
+    # AND a dao contract with the parameters above.
+    dao = DaoContract(
+      governanceParameters = governanceParameters,
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
+      proposals = sp.big_map(
+        l = {
+          sp.nat(0): proposal
+        },
+        tkey = sp.TNat,
+        tvalue = Proposal.PROPOSAL_TYPE,
+      ),
+      quorum = quorum
+    )
+    scenario += dao
+
+    # WHEN end voting is called
+    scenario += dao.endVoting(sp.nat(0)).run(
+      level = votingEndBlock + 1,
+    )    
+
+    # THEN quorum is adjusted downwards and capped at the lower bound
+    # Expected = (.8 * lastQuorum) + (.2 * participation) = (.8 * 65) + (.2 * 45) = 52 + 9 = 61
+    # Cap = 62
+    scenario.verify(dao.data.quorum == quorumLowerCap)
+
+  @sp.add_test(name="endVoting - returns escrow to author")
+  def test():
+    scenario = sp.test_scenario()
+    
+    # Given some governance parameters 
+    escrowAmount = sp.nat(10)
+    voteDelayBlocks = sp.nat(1)
+    voteLengthBlocks = sp.nat(10)
+    minYayVotesPercentForEscrowReturn = sp.nat(20)
+    blocksInTimelockForExecution = sp.nat(30)
+    blocksInTimelockForCancellation = sp.nat(40)
+    percentageForSuperMajority = sp.nat(80)
+    quorumLowerCap = 62
+    quorumCap = sp.record(lower = quorumLowerCap, upper = 99)
+    governanceParameters = sp.record(
+      escrowAmount = escrowAmount,
+      voteDelayBlocks = voteDelayBlocks,
+      voteLengthBlocks = voteLengthBlocks,
+      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
+      blocksInTimelockForExecution = blocksInTimelockForExecution,
+      blocksInTimelockForCancellation = blocksInTimelockForCancellation,
+      percentageForSuperMajority = percentageForSuperMajority,
+      quorumCap = quorumCap
+    )
+
+    # AND a poll by Alice which achieves the minimum for escrow return
+    votingEndBlock = sp.nat(21)
+    totalVotes = 100
+    yayVotes = 40
+    nayVotes = 60
+    proposal = sp.record(
+      title = "Prop 1",
+      descriptionLink = "ipfs://xyz",
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))])
+    )
+    poll = sp.record(
+      id = sp.nat(0),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
+      votingStartBlock = sp.nat(11),
+      votingEndBlock = votingEndBlock,
+      yayVotes = yayVotes,
+      nayVotes = nayVotes,
+      abstainVotes = sp.nat(0),
+      totalVotes = totalVotes,
+      author = Addresses.ALICE_ADDRESS,
+      escrowAmount = escrowAmount,
+      quorum = sp.nat(100),
+      quorumCap = quorumCap,
+      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
+      percentageForSuperMajority = percentageForSuperMajority,
+      snapshotId = sp.none
+    )
+
+    # AND a token contract.
+    token = Token.FA12(
+      admin = Addresses.TOKEN_ADMIN_ADDRESS,
+    )
+    scenario += token
 
     # AND a dao contract with the parameters above.
+    quorum = 65
     dao = DaoContract(
       governanceParameters = governanceParameters,
-      poll = sp.some(poll),
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
+      proposals = sp.big_map(
+        l = {
+          sp.nat(0): proposal
+        },
+        tkey = sp.TNat,
+        tvalue = Proposal.PROPOSAL_TYPE,
+      ),
       quorum = quorum,
+      tokenContractAddress = token.address,
     )
     scenario += dao
 
+    # AND the dao has tokens escrowed
+    scenario += token.mint(
+      sp.record(
+        address = dao.address,
+        value = escrowAmount
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+
     # WHEN end voting is called
-    scenario += dao.endVoting(sp.unit).run(
+    scenario += dao.endVoting(sp.nat(0)).run(
       level = votingEndBlock + 1,
     )    
 
-    # THEN the poll under vote is removed 
-    scenario.verify(~dao.data.poll.is_some())
+    # THEN alice receives the escrow.
+    scenario.verify(token.data.balances[Addresses.ALICE_ADDRESS] == escrowAmount)
+    scenario.verify(token.data.balances[dao.address] == 0)
+    
+  @sp.add_test(name="endVoting - judges a poll by its own quorum and escrow after they change")
+  def test():
+    scenario = sp.test_scenario()
+    
+    # Given governance parameters whose escrow amount has been raised since a poll was proposed
+    escrowAmount = sp.nat(10)
+    newEscrowAmount = sp.nat(25)
+    quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(300))
+    governanceParameters = sp.record(
+      escrowAmount = newEscrowAmount,
+      voteDelayBlocks = sp.nat(1),
+      voteLengthBlocks = sp.nat(10),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      blocksInTimelockForExecution = sp.nat(30),
+      blocksInTimelockForCancellation = sp.nat(40),
+      percentageForSuperMajority = sp.nat(80),
+      quorumCap = quorumCap
+    )
 
-    # AND the outcome for the poll is FAILED
-    scenario.verify(dao.data.outcomes[pollId].outcome == PollOutcomes.POLL_OUTCOME_FAILED)
+    # AND a poll by Alice which met the quorum it was proposed with
+    votingEndBlock = sp.nat(21)
+    totalVotes = sp.nat(150)
+    proposal = sp.record(
+      title = "Prop 1",
+      descriptionLink = "ipfs://xyz",
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))])
+    )
+    poll = sp.record(
+      id = sp.nat(0),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
+      votingStartBlock = sp.nat(11),
+      votingEndBlock = votingEndBlock,
+      yayVotes = totalVotes,
+      nayVotes = sp.nat(0),
+      abstainVotes = sp.nat(0),
+      totalVotes = totalVotes,
+      author = Addresses.ALICE_ADDRESS,
+      escrowAmount = escrowAmount,
+      quorum = sp.nat(100),
+      quorumCap = quorumCap,
+      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
+      percentageForSuperMajority = percentageForSuperMajority,
+      snapshotId = sp.none
+    )
 
-    # AND it was not moved to the timelock
-    scenario.verify(~dao.data.timelockItem.is_some())    
+    # AND a token contract.
+    token = Token.FA12(
+      admin = Addresses.TOKEN_ADMIN_ADDRESS,
+    )
+    scenario += token
 
-  @sp.add_test(name="endVoting - moves proposal to timelock if super majority and quorum are achieved")
+    # AND a dao contract whose quorum has been raised by other polls since.
+    quorum = sp.nat(200)
+    dao = DaoContract(
+      governanceParameters = governanceParameters,
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
+      proposals = sp.big_map(
+        l = {
+          sp.nat(0): proposal
+        },
+        tkey = sp.TNat,
+        tvalue = Proposal.PROPOSAL_TYPE,
+      ),
+      quorum = quorum,
+      tokenContractAddress = token.address,
+    )
+    scenario += dao
+
+    # AND the dao holds this poll's escrow and the escrow of another poll
+    scenario += token.mint(
+      sp.record(
+        address = dao.address,
+        value = escrowAmount + newEscrowAmount
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+
+    # WHEN end voting is called
+    scenario += dao.endVoting(sp.nat(0)).run(
+      level = votingEndBlock + 1,
+    )    
+
+    # THEN the poll passes on its own quorum
+    scenario.verify(dao.data.outcomes[sp.nat(0)].outcome == PollOutcomes.POLL_OUTCOME_IN_TIMELOCK)
+
+    # AND only this poll's escrow is returned to alice
+    scenario.verify(token.data.balances[Addresses.ALICE_ADDRESS] == escrowAmount)
+    scenario.verify(token.data.balances[dao.address] == newEscrowAmount)
+
+    # AND quorum is adjusted from the current quorum.
+    expectedQuorum = 190 # (.8 * currentQuorum) + (.2 * participation) = (.8 * 200) + (.2 * 150) = 160 + 30 = 190
+    scenario.verify(dao.data.quorum == expectedQuorum)
+
+  @sp.add_test(name="endVoting - judges a poll by the thresholds it was proposed with after they change")
+  def test():
+    scenario = sp.test_scenario()
+    
+    # Given governance parameters whose thresholds have been raised since a poll was proposed
+    escrowAmount = sp.nat(10)
+    quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99))
+    governanceParameters = sp.record(
+      escrowAmount = escrowAmount,
+      voteDelayBlocks = sp.nat(1),
+      voteLengthBlocks = sp.nat(10),
+      minYayVotesPercentForEscrowReturn = sp.nat(75),
+      blocksInTimelockForExecution = sp.nat(30),
+      blocksInTimelockForCancellation = sp.nat(40),
+      percentageForSuperMajority = sp.nat(80),
+      quorumCap = quorumCap
+    )
+
+    # AND a poll by Alice proposed with lower thresholds, with 70 yay votes and 30 nay votes
+    votingEndBlock = sp.nat(21)
+    proposal = sp.record(
+      title = "Prop 1",
+      descriptionLink = "ipfs://xyz",
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))])
+    )
+    poll = sp.record(
+      id = sp.nat(0),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
+      votingStartBlock = sp.nat(11),
+      votingEndBlock = votingEndBlock,
+      yayVotes = sp.nat(70),
+      nayVotes = sp.nat(30),
+      abstainVotes = sp.nat(0),
+      totalVotes = sp.nat(100),
+      author = Addresses.ALICE_ADDRESS,
+      escrowAmount = escrowAmount,
+      quorum = sp.nat(100),
+      quorumCap = quorumCap,
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(60),
+      snapshotId = sp.none
+    )
+
+    # AND a token contract.
+    token = Token.FA12(
+      admin = Addresses.TOKEN_ADMIN_ADDRESS,
+    )
+    scenario += token
+
+    # AND a dao contract holding the poll
+    dao = DaoContract(
+      governanceParameters = governanceParameters,
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
+      proposals = sp.big_map(
+        l = {
+          sp.nat(0): proposal
+        },
+        tkey = sp.TNat,
+        tvalue = Proposal.PROPOSAL_TYPE,
+      ),
+      tokenContractAddress = token.address,
+    )
+    scenario += dao
+
+    # AND the dao holds the poll's escrow
+    scenario += token.mint(
+      sp.record(
+        address = dao.address,
+        value = escrowAmount
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+
+    # WHEN end voting is called
+    scenario += dao.endVoting(sp.nat(0)).run(
+      level = votingEndBlock + 1,
+    )    
+
+    # THEN the poll reaches a super majority of its own 60%, although it falls short of the current 80%
+    scenario.verify(dao.data.outcomes[sp.nat(0)].outcome == PollOutcomes.POLL_OUTCOME_IN_TIMELOCK)
+
+    # AND the escrow is returned to alice, although 70% is below the current 75% needed for its return.
+    scenario.verify(token.data.balances[Addresses.ALICE_ADDRESS] == escrowAmount)
+    scenario.verify(~token.data.balances.contains(Addresses.COMMUNITY_FUND_ADDRESS))
+
+  @sp.add_test(name="endVoting - gives escrow to community fund on failure")
   def test():
     scenario = sp.test_scenario()
     
     # Given some governance parameters 
-    quorum = 200
     escrowAmount = sp.nat(10)
     voteDelayBlocks = sp.nat(1)
     voteLengthBlocks = sp.nat(10)
@@ -1717,192 +2640,1911 @@ if __name__ == "__main__":
       quorumCap = quorumCap
     )
 
-    # AND a poll by Alice which achieves quorum and but failed to achieved a super majority
-    votingEndBlock = sp.nat(21)
-    totalVotes = quorum # 200
-    yayVotes = 160 # 80% of 200
-    nayVotes = 40
-    proposalTitle = "proposal which will succeed"
+    # AND a poll by Alice which fails to achieve the minimum for escrow return
+    votingEndBlock = sp.nat(21)
+    totalVotes = 100
+    yayVotes = 19
+    nayVotes = 81
+    proposal = sp.record(
+      title = "Prop 1",
+      descriptionLink = "ipfs://xyz",
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))])
+    )
+    poll = sp.record(
+      id = sp.nat(0),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
+      votingStartBlock = sp.nat(11),
+      votingEndBlock = votingEndBlock,
+      yayVotes = yayVotes,
+      nayVotes = nayVotes,
+      abstainVotes = sp.nat(0),
+      totalVotes = totalVotes,
+      author = Addresses.ALICE_ADDRESS,
+      escrowAmount = escrowAmount,
+      quorum = sp.nat(100),
+      quorumCap = quorumCap,
+      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
+      percentageForSuperMajority = percentageForSuperMajority,
+      snapshotId = sp.none
+    )
+
+    # AND a token contract.
+    token = Token.FA12(
+      admin = Addresses.TOKEN_ADMIN_ADDRESS,
+    )
+    scenario += token
+
+    # AND a dao contract with the parameters above.
+    quorum = 65
+    dao = DaoContract(
+      communityFundAddress = Addresses.COMMUNITY_FUND_ADDRESS,
+      governanceParameters = governanceParameters,
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
+      proposals = sp.big_map(
+        l = {
+          sp.nat(0): proposal
+        },
+        tkey = sp.TNat,
+        tvalue = Proposal.PROPOSAL_TYPE,
+      ),
+      quorum = quorum,
+      tokenContractAddress = token.address,
+    )
+    scenario += dao
+
+    # AND the dao has tokens escrowed
+    scenario += token.mint(
+      sp.record(
+        address = dao.address,
+        value = escrowAmount
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+
+    # WHEN end voting is called
+    scenario += dao.endVoting(sp.nat(0)).run(
+      level = votingEndBlock + 1,
+    )    
+
+    # THEN the community fund receives the escrow.
+    scenario.verify(token.data.balances[Addresses.COMMUNITY_FUND_ADDRESS] == escrowAmount)
+    scenario.verify(token.data.balances[dao.address] == 0)
+
+  @sp.add_test(name="endVoting - removes poll if quorum and super majority not met")
+  def test():
+    scenario = sp.test_scenario()
+    
+    # Given some governance parameters 
+    quorum = 100
+    escrowAmount = sp.nat(10)
+    voteDelayBlocks = sp.nat(1)
+    voteLengthBlocks = sp.nat(10)
+    minYayVotesPercentForEscrowReturn = sp.nat(20)
+    blocksInTimelockForExecution = sp.nat(30)
+    blocksInTimelockForCancellation = sp.nat(40)
+    percentageForSuperMajority = sp.nat(80)
+    quorumLowerCap = 62
+    quorumCap = sp.record(lower = quorumLowerCap, upper = 99)
+    governanceParameters = sp.record(
+      escrowAmount = escrowAmount,
+      voteDelayBlocks = voteDelayBlocks,
+      voteLengthBlocks = voteLengthBlocks,
+      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
+      blocksInTimelockForExecution = blocksInTimelockForExecution,
+      blocksInTimelockForCancellation = blocksInTimelockForCancellation,
+      percentageForSuperMajority = percentageForSuperMajority,
+      quorumCap = quorumCap
+    )
+
+    # AND a poll by Alice which fails to achieve quorum and fails to achieve a super majority
+    votingEndBlock = sp.nat(21)
+    totalVotes = quorum // 2
+    yayVotes = totalVotes // 2
+    nayVotes = totalVotes // 2
+    pollId = sp.nat(0)
+    proposal = sp.record(
+      title = "Prop 1",
+      descriptionLink = "ipfs://xyz",
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))])
+    )
+    poll = sp.record(
+      id = pollId,
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
+      votingStartBlock = sp.nat(11),
+      votingEndBlock = votingEndBlock,
+      yayVotes = yayVotes,
+      nayVotes = nayVotes,
+      abstainVotes = sp.nat(0),
+      totalVotes = totalVotes,
+      author = Addresses.ALICE_ADDRESS,
+      escrowAmount = escrowAmount,
+      quorum = sp.nat(100),
+      quorumCap = quorumCap,
+      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
+      percentageForSuperMajority = percentageForSuperMajority,
+      snapshotId = sp.none
+    )
+
+    # AND a dao contract with the parameters above.
+    dao = DaoContract(
+      governanceParameters = governanceParameters,
+      polls = sp.big_map(
+        l = {
+          pollId: poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([pollId]),
+      proposals = sp.big_map(
+        l = {
+          pollId: proposal
+        },
+        tkey = sp.TNat,
+        tvalue = Proposal.PROPOSAL_TYPE,
+      ),
+      quorum = quorum,
+    )
+    scenario += dao
+
+    # WHEN end voting is called
+    scenario += dao.endVoting(pollId).run(
+      level = votingEndBlock + 1,
+    )    
+
+    # THEN the poll is removed 
+    scenario.verify(~dao.data.polls.contains(pollId))
+
+    # AND the outcome for the poll is FAILED
+    scenario.verify(dao.data.outcomes[pollId].outcome == PollOutcomes.POLL_OUTCOME_FAILED)
+
+    # AND it was not moved to the timelock
+    scenario.verify(~dao.data.timelockItems.contains(pollId))
+
+  @sp.add_test(name="endVoting - removes poll if super majority achieved but quorum not met")
+  def test():
+    scenario = sp.test_scenario()
+    
+    # Given some governance parameters 
+    quorum = 100
+    escrowAmount = sp.nat(10)
+    voteDelayBlocks = sp.nat(1)
+    voteLengthBlocks = sp.nat(10)
+    minYayVotesPercentForEscrowReturn = sp.nat(20)
+    blocksInTimelockForExecution = sp.nat(30)
+    blocksInTimelockForCancellation = sp.nat(40)
+    percentageForSuperMajority = sp.nat(80)
+    quorumLowerCap = 62
+    quorumCap = sp.record(lower = quorumLowerCap, upper = 99)
+    governanceParameters = sp.record(
+      escrowAmount = escrowAmount,
+      voteDelayBlocks = voteDelayBlocks,
+      voteLengthBlocks = voteLengthBlocks,
+      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
+      blocksInTimelockForExecution = blocksInTimelockForExecution,
+      blocksInTimelockForCancellation = blocksInTimelockForCancellation,
+      percentageForSuperMajority = percentageForSuperMajority,
+      quorumCap = quorumCap
+    )
+
+    # AND a poll by Alice which fails to achieve quorum and but achieved a super majority
+    votingEndBlock = sp.nat(21)
+    totalVotes = quorum // 2
+    yayVotes = totalVotes
+    nayVotes = 0
+    pollId = sp.nat(0)
+    proposal = sp.record(
+      title = "Prop 1",
+      descriptionLink = "ipfs://xyz",
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))])
+    )
+    poll = sp.record(
+      id = pollId,
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
+      votingStartBlock = sp.nat(11),
+      votingEndBlock = votingEndBlock,
+      yayVotes = yayVotes,
+      nayVotes = nayVotes,
+      abstainVotes = sp.nat(0),
+      totalVotes = totalVotes,
+      author = Addresses.ALICE_ADDRESS,
+      escrowAmount = escrowAmount,
+      quorum = sp.nat(100),
+      quorumCap = quorumCap,
+      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
+      percentageForSuperMajority = percentageForSuperMajority,
+      snapshotId = sp.none
+    )
+
+    # AND a dao contract with the parameters above.
+    dao = DaoContract(
+      governanceParameters = governanceParameters,
+      polls = sp.big_map(
+        l = {
+          pollId: poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([pollId]),
+      proposals = sp.big_map(
+        l = {
+          pollId: proposal
+        },
+        tkey = sp.TNat,
+        tvalue = Proposal.PROPOSAL_TYPE,
+      ),
+      quorum = quorum,
+    )
+    scenario += dao
+
+    # WHEN end voting is called
+    scenario += dao.endVoting(pollId).run(
+      level = votingEndBlock + 1,
+    )    
+
+    # THEN the poll under vote is removed 
+    scenario.verify(~dao.data.polls.contains(pollId))
+
+    # AND the outcome for the poll is FAILED
+    scenario.verify(dao.data.outcomes[pollId].outcome == PollOutcomes.POLL_OUTCOME_FAILED)
+
+    # AND it was not moved to the timelock
+    scenario.verify(~dao.data.timelockItems.contains(pollId))    
+
+  @sp.add_test(name="endVoting - removes poll if quorum met and super majority not achieved")
+  def test():
+    scenario = sp.test_scenario()
+    
+    # Given some governance parameters 
+    quorum = 100
+    escrowAmount = sp.nat(10)
+    voteDelayBlocks = sp.nat(1)
+    voteLengthBlocks = sp.nat(10)
+    minYayVotesPercentForEscrowReturn = sp.nat(20)
+    blocksInTimelockForExecution = sp.nat(30)
+    blocksInTimelockForCancellation = sp.nat(40)
+    percentageForSuperMajority = sp.nat(80)
+    quorumLowerCap = 62
+    quorumCap = sp.record(lower = quorumLowerCap, upper = 99)
+    governanceParameters = sp.record(
+      escrowAmount = escrowAmount,
+      voteDelayBlocks = voteDelayBlocks,
+      voteLengthBlocks = voteLengthBlocks,
+      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
+      blocksInTimelockForExecution = blocksInTimelockForExecution,
+      blocksInTimelockForCancellation = blocksInTimelockForCancellation,
+      percentageForSuperMajority = percentageForSuperMajority,
+      quorumCap = quorumCap
+    )
+
+    # AND a poll by Alice which achieves quorum and but failed to achieved a super majority
+    votingEndBlock = sp.nat(21)
+    totalVotes = quorum * 2
+    yayVotes = sp.nat(10)
+    nayVotes = sp.as_nat(totalVotes - yayVotes)
+    pollId = sp.nat(0)
+    proposal = sp.record(
+      title = "Prop 1",
+      descriptionLink = "ipfs://xyz",
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))])
+    )
+    poll = sp.record(
+      id = pollId,
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
+      votingStartBlock = sp.nat(11),
+      votingEndBlock = votingEndBlock,
+      yayVotes = yayVotes,
+      nayVotes = nayVotes,
+      abstainVotes = sp.nat(0),
+      totalVotes = totalVotes,
+      author = Addresses.ALICE_ADDRESS,
+      escrowAmount = escrowAmount,
+      quorum = sp.nat(100),
+      quorumCap = quorumCap,
+      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
+      percentageForSuperMajority = percentageForSuperMajority,
+      snapshotId = sp.none
+    )
+
+    # AND a dao contract with the parameters above.
+    dao = DaoContract(
+      governanceParameters = governanceParameters,
+      polls = sp.big_map(
+        l = {
+          pollId: poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([pollId]),
+      proposals = sp.big_map(
+        l = {
+          pollId: proposal
+        },
+        tkey = sp.TNat,
+        tvalue = Proposal.PROPOSAL_TYPE,
+      ),
+      quorum = quorum,
+    )
+    scenario += dao
+
+    # WHEN end voting is called
+    scenario += dao.endVoting(pollId).run(
+      level = votingEndBlock + 1,
+    )    
+
+    # THEN the poll under vote is removed 
+    scenario.verify(~dao.data.polls.contains(pollId))
+
+    # AND the outcome for the poll is FAILED
+    scenario.verify(dao.data.outcomes[pollId].outcome == PollOutcomes.POLL_OUTCOME_FAILED)
+
+    # AND it was not moved to the timelock
+    scenario.verify(~dao.data.timelockItems.contains(pollId))    
+
+  @sp.add_test(name="endVoting - moves proposal to timelock if super majority and quorum are achieved")
+  def test():
+    scenario = sp.test_scenario()
+    
+    # Given some governance parameters 
+    quorum = 200
+    escrowAmount = sp.nat(10)
+    voteDelayBlocks = sp.nat(1)
+    voteLengthBlocks = sp.nat(10)
+    minYayVotesPercentForEscrowReturn = sp.nat(20)
+    blocksInTimelockForExecution = sp.nat(30)
+    blocksInTimelockForCancellation = sp.nat(40)
+    percentageForSuperMajority = sp.nat(80)
+    quorumLowerCap = 62
+    quorumCap = sp.record(lower = quorumLowerCap, upper = 99)
+    governanceParameters = sp.record(
+      escrowAmount = escrowAmount,
+      voteDelayBlocks = voteDelayBlocks,
+      voteLengthBlocks = voteLengthBlocks,
+      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
+      blocksInTimelockForExecution = blocksInTimelockForExecution,
+      blocksInTimelockForCancellation = blocksInTimelockForCancellation,
+      percentageForSuperMajority = percentageForSuperMajority,
+      quorumCap = quorumCap
+    )
+
+    # AND a poll by Alice which achieves quorum and but failed to achieved a super majority
+    votingEndBlock = sp.nat(21)
+    totalVotes = quorum # 200
+    yayVotes = 160 # 80% of 200
+    nayVotes = 40
+    proposalHash = sp.blake2b(sp.bytes_of_string("proposal which will succeed"))
+    pollId = sp.nat(0)
+    proposal = sp.record(
+      title = "Prop 1",
+      descriptionLink = "ipfs://xyz",
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))])
+    )
+    poll = sp.record(
+      id = pollId,
+      proposalHash = proposalHash,
+      title = "Prop 1",
+      descriptionHash = "xyz123",
+      votingStartBlock = sp.nat(11),
+      votingEndBlock = votingEndBlock,
+      yayVotes = yayVotes,
+      nayVotes = nayVotes,
+      abstainVotes = sp.nat(0),
+      totalVotes = totalVotes,
+      author = Addresses.ALICE_ADDRESS,
+      escrowAmount = escrowAmount,
+      quorum = sp.nat(100),
+      quorumCap = quorumCap,
+      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
+      percentageForSuperMajority = percentageForSuperMajority,
+      snapshotId = sp.none
+    )
+
+    # AND a dao contract with the parameters above.
+    dao = DaoContract(
+      governanceParameters = governanceParameters,
+      polls = sp.big_map(
+        l = {
+          pollId: poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([pollId]),
+      proposals = sp.big_map(
+        l = {
+          pollId: proposal
+        },
+        tkey = sp.TNat,
+        tvalue = Proposal.PROPOSAL_TYPE,
+      ),
+      quorum = quorum,
+    )
+    scenario += dao
+
+    # WHEN end voting is called
+    scenario += dao.endVoting(pollId).run(
+      level = votingEndBlock + 1,
+    )    
+
+    # THEN the poll is removed 
+    scenario.verify(~dao.data.polls.contains(pollId))
+
+    # AND the outcome for the poll is IN_TIMELOCK
+    scenario.verify(dao.data.outcomes[pollId].outcome == PollOutcomes.POLL_OUTCOME_IN_TIMELOCK)
+
+    # AND the outcome records the proposal's metadata and the tallies.
+    scenario.verify(dao.data.outcomes[pollId].title == "Prop 1")
+    scenario.verify(dao.data.outcomes[pollId].descriptionHash == "xyz123")
+    scenario.verify(dao.data.outcomes[pollId].author == Addresses.ALICE_ADDRESS)
+    scenario.verify(dao.data.outcomes[pollId].yayVotes == yayVotes)
+    scenario.verify(dao.data.outcomes[pollId].nayVotes == nayVotes)
+    scenario.verify(dao.data.outcomes[pollId].totalVotes == totalVotes)
+
+    # AND the proposal was moved to the timelock
+    scenario.verify(dao.data.timelockItems.contains(pollId))
+    scenario.verify(dao.data.timelockItems[pollId].proposalHash == proposalHash)
+
+  ################################################################
+  # finalizePoll
+  ################################################################
+
+  @sp.add_test(name="finalizePoll - finalizes a poll over several operations")
+  def test():
+    scenario = sp.test_scenario()
+    
+    # Given some governance parameters 
+    quorum = 200
+    escrowAmount = sp.nat(10)
+    blocksInTimelockForExecution = sp.nat(30)
+    blocksInTimelockForCancellation = sp.nat(40)
+    quorumCap = sp.record(lower = 62, upper = 99)
+    governanceParameters = sp.record(
+      escrowAmount = escrowAmount,
+      voteDelayBlocks = sp.nat(1),
+      voteLengthBlocks = sp.nat(10),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      blocksInTimelockForExecution = blocksInTimelockForExecution,
+      blocksInTimelockForCancellation = blocksInTimelockForCancellation,
+      percentageForSuperMajority = sp.nat(80),
+      quorumCap = quorumCap
+    )
+
+    # AND a poll by Alice which achieves quorum and a super majority
+    votingEndBlock = sp.nat(21)
+    proposalHash = sp.blake2b(sp.bytes_of_string("proposal which will succeed"))
+    pollId = sp.nat(0)
+    poll = sp.record(
+      id = pollId,
+      proposalHash = proposalHash,
+      title = "Prop 1",
+      descriptionHash = "xyz123",
+      votingStartBlock = sp.nat(11),
+      votingEndBlock = votingEndBlock,
+      yayVotes = sp.nat(160),
+      nayVotes = sp.nat(40),
+      abstainVotes = sp.nat(0),
+      totalVotes = sp.nat(200),
+      author = Addresses.ALICE_ADDRESS,
+      escrowAmount = escrowAmount,
+      quorum = sp.nat(100),
+      quorumCap = quorumCap,
+      minYayVotesPercentForEscrowReturn = minYayVotesPercentForEscrowReturn,
+      percentageForSuperMajority = percentageForSuperMajority,
+      snapshotId = sp.none
+    )
+
+    # AND a dao contract with the parameters above, which does not hold the proposal, so finalizing must not load it.
+    dao = DaoContract(
+      governanceParameters = governanceParameters,
+      polls = sp.big_map(
+        l = {
+          pollId: poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([pollId]),
+      quorum = quorum,
+    )
+    scenario += dao
+
+    # WHEN no finalization steps are asked for
+    # THEN the call fails.
+    scenario += dao.finalizePoll(sp.record(pollId = pollId, maxSteps = sp.nat(0))).run(
+      level = votingEndBlock + 1,
+      valid = False
+    )
+
+    # WHEN a single finalization step is run
+    scenario += dao.finalizePoll(sp.record(pollId = pollId, maxSteps = sp.nat(1))).run(
+      level = votingEndBlock + 1,
+    )
+
+    # THEN the poll is tallied and is no longer active
+    scenario.verify(dao.data.finalizations[pollId].step == FINALIZATION_STEP_RELEASE_ESCROW)
+    scenario.verify(dao.data.finalizations[pollId].passed)
+    scenario.verify(~dao.data.activePolls.contains(pollId))
+
+    # AND the quorum is updated
+    scenario.verify(dao.data.quorum == quorumCap.upper)
+
+    # AND the poll has not been removed.
+    scenario.verify(dao.data.polls.contains(pollId))
+    scenario.verify(~dao.data.outcomes.contains(pollId))
+
+    # WHEN two more steps are run
+    scenario += dao.finalizePoll(sp.record(pollId = pollId, maxSteps = sp.nat(2))).run(
+      level = votingEndBlock + 2,
+    )
+
+    # THEN the escrow is released and the outcome is recorded with the metadata kept in the poll
+    scenario.verify(dao.data.finalizations[pollId].step == FINALIZATION_STEP_QUEUE_TIMELOCK)
+    scenario.verify(dao.data.outcomes[pollId].outcome == PollOutcomes.POLL_OUTCOME_IN_TIMELOCK)
+    scenario.verify(dao.data.outcomes[pollId].title == "Prop 1")
+    scenario.verify(dao.data.outcomes[pollId].descriptionHash == "xyz123")
+
+    # AND the proposal is not yet in the timelock.
+    scenario.verify(~dao.data.timelockItems.contains(pollId))
+
+    # WHEN end voting is called
+    scenario += dao.endVoting(pollId).run(
+      level = votingEndBlock + 3,
+    )
+
+    # THEN the remaining step is run, and the proposal is moved to the timelock
+    scenario.verify(dao.data.timelockItems[pollId].proposalHash == proposalHash)
+    scenario.verify(dao.data.timelockItems[pollId].endBlock == votingEndBlock + 3 + blocksInTimelockForExecution)
+
+    # AND the poll and its finalization are removed
+    scenario.verify(~dao.data.polls.contains(pollId))
+    scenario.verify(~dao.data.finalizations.contains(pollId))
+
+    # AND the poll can not be finalized again.
+    scenario += dao.finalizePoll(sp.record(pollId = pollId, maxSteps = sp.nat(1))).run(
+      level = votingEndBlock + 4,
+      valid = False
+    )
+
+  ################################################################
+  # vote
+  ################################################################
+
+  @sp.add_test(name="vote - fails if in bad state")
+  def test():
+    scenario = sp.test_scenario()
+    
+    # GIVEN a poll.
+    votingStartBlock = sp.nat(11)
+    poll = sp.record(
+      id = sp.nat(0),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
+      votingStartBlock = votingStartBlock,
+      votingEndBlock = sp.nat(20),
+      yayVotes = sp.nat(0),
+      nayVotes = sp.nat(0),
+      abstainVotes = sp.nat(0),
+      totalVotes = sp.nat(0),
+      author = Addresses.ALICE_ADDRESS,
+      escrowAmount = sp.nat(50),
+      quorum = sp.nat(100),
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
+    )    
+
+    # AND a dao contract in the STATE_MACHINE_WAITING_FOR_BALANCE state
+    votingState = sp.record(
+      pollId = sp.nat(0),
+      address = Addresses.VOTER_ADDRESS,
+      level = votingStartBlock,
+      voteValue = VoteValue.YAY
+    )
+    dao = DaoContract(
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
+      state = STATE_MACHINE_WAITING_FOR_BALANCE,
+      tokenContractAddress = Addresses.TOKEN_CONTRACT_ADDRESS,
+      votingState = sp.some(votingState)
+    )
+    scenario += dao
+
+    # WHEN vote is called
+    # THEN the call fails.
+    scenario += dao.vote(pollId = sp.nat(0), voteValue = VoteValue.YAY).run(
+      sender = Addresses.VOTER_ADDRESS,
+      valid = False
+    )
+
+  @sp.add_test(name="vote - fails if no poll under vote")
+  def test():
+    scenario = sp.test_scenario()
+  
+    # GIVEN a dao contract with no poll.
+    dao = DaoContract(
+      state = STATE_MACHINE_IDLE,
+      votingState = sp.none
+    )
+    scenario += dao
+
+    # WHEN vote is called
+    # THEN the call fails.
+    result = sp.record(
+      address = Addresses.VOTER_ADDRESS,
+      level = sp.nat(1),
+      result = sp.nat(50)
+    )
+    scenario += dao.vote(pollId = sp.nat(0), voteValue = VoteValue.YAY).run(
+      sender = Addresses.VOTER_ADDRESS,
+      valid = False
+    )
+
+  @sp.add_test(name="vote - succeeds at casting a vote")
+  def test():
+    scenario = sp.test_scenario()
+  
+    # GIVEN a poll.
+    votingStartBlock = sp.nat(11)
+    poll = sp.record(
+      id = sp.nat(0),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
+      votingStartBlock = votingStartBlock,
+      votingEndBlock = sp.nat(20),
+      yayVotes = sp.nat(0),
+      nayVotes = sp.nat(0),
+      abstainVotes = sp.nat(0),
+      totalVotes = sp.nat(0),
+      author = Addresses.ALICE_ADDRESS,
+      escrowAmount = sp.nat(50),
+      quorum = sp.nat(100),
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
+    )
+
+    # AND a fake token contract
+    votingPower = sp.nat(50)
+    token = FakeToken.FakeTokenContract(result = votingPower)
+    scenario += token
+
+    # AND and a dao contract holding the poll.
+    dao = DaoContract(
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
+      state = STATE_MACHINE_IDLE,
+      tokenContractAddress = token.address,
+      votingState = sp.none
+    )
+    scenario += dao
+
+    # WHEN vote is called
+    scenario += dao.vote(pollId = sp.nat(0), voteValue = VoteValue.YAY).run(
+      sender = Addresses.VOTER_ADDRESS,
+      level = votingStartBlock + 1,
+    )
+
+    # THEN the vote tallies are incremented.
+    scenario.verify(dao.data.polls[sp.nat(0)].yayVotes == votingPower)
+    scenario.verify(dao.data.polls[sp.nat(0)].nayVotes == sp.nat(0))
+    scenario.verify(dao.data.polls[sp.nat(0)].abstainVotes == sp.nat(0))
+    scenario.verify(dao.data.polls[sp.nat(0)].totalVotes == votingPower)
+
+    # AND the VOTER_ADDRESS was recorded
+    scenario.verify(dao.data.voters.contains((sp.nat(0), Addresses.VOTER_ADDRESS)))
+
+    # AND the state machine is reset
+    scenario.verify(dao.data.state == STATE_MACHINE_IDLE)
+    scenario.verify(~dao.data.votingState.is_some())
+
+  @sp.add_test(name="vote - requests a balance callback if enabled")
+  def test():
+    scenario = sp.test_scenario()
+  
+    # GIVEN a poll.
+    votingStartBlock = sp.nat(11)
+    poll = sp.record(
+      id = sp.nat(0),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
+      votingStartBlock = votingStartBlock,
+      votingEndBlock = sp.nat(20),
+      yayVotes = sp.nat(0),
+      nayVotes = sp.nat(0),
+      abstainVotes = sp.nat(0),
+      totalVotes = sp.nat(0),
+      author = Addresses.ALICE_ADDRESS,
+      escrowAmount = sp.nat(50),
+      quorum = sp.nat(100),
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
+    )
+
+    # AND a fake token contract
+    token = FakeToken.FakeTokenContract(result = sp.nat(50))
+    scenario += token
+
+    # AND and a dao contract holding the poll which reads balances through callbacks.
+    dao = DaoContract(
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
+      state = STATE_MACHINE_IDLE,
+      tokenContractAddress = token.address,
+      votingState = sp.none,
+      useBalanceCallback = True
+    )
+    scenario += dao
+
+    # WHEN vote is called
+    scenario += dao.vote(pollId = sp.nat(0), voteValue = VoteValue.YAY).run(
+      sender = Addresses.VOTER_ADDRESS,
+      level = votingStartBlock + 1,
+    )
+
+    # THEN the vote is tallied once the token contract calls back.
+    scenario.verify(dao.data.polls[sp.nat(0)].yayVotes == sp.nat(50))
+    scenario.verify(dao.data.polls[sp.nat(0)].totalVotes == sp.nat(50))
+    scenario.verify(dao.data.voters.contains((sp.nat(0), Addresses.VOTER_ADDRESS)))
+
+    # AND the state machine is reset
+    scenario.verify(dao.data.state == STATE_MACHINE_IDLE)
+    scenario.verify(~dao.data.votingState.is_some())
+
+  @sp.add_test(name="vote - fails if token contract has no on-chain view")
+  def test():
+    scenario = sp.test_scenario()
+  
+    # GIVEN a poll.
+    votingStartBlock = sp.nat(11)
+    poll = sp.record(
+      id = sp.nat(0),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
+      votingStartBlock = votingStartBlock,
+      votingEndBlock = sp.nat(20),
+      yayVotes = sp.nat(0),
+      nayVotes = sp.nat(0),
+      abstainVotes = sp.nat(0),
+      totalVotes = sp.nat(0),
+      author = Addresses.ALICE_ADDRESS,
+      escrowAmount = sp.nat(50),
+      quorum = sp.nat(100),
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
+    )
+
+    # AND a contract which does not provide a getPriorVotes view
+    store = Store.StoreValueContract(value = sp.nat(0), admin = Addresses.NULL_ADDRESS)
+    scenario += store
+
+    # AND and a dao contract holding the poll.
+    dao = DaoContract(
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
+      tokenContractAddress = store.address,
+    )
+    scenario += dao
+
+    # WHEN vote is called
+    # THEN the call fails.
+    scenario += dao.vote(pollId = sp.nat(0), voteValue = VoteValue.YAY).run(
+      sender = Addresses.VOTER_ADDRESS,
+      level = votingStartBlock + 1,
+      valid = False
+    )
+
+  @sp.add_test(name="vote - reads voting power from the token contract")
+  def test():
+    scenario = sp.test_scenario()
+
+    # GIVEN a token contract
+    token = Token.FA12(
+      admin = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+    scenario += token
+
+    # AND the voter holds tokens at level 1
+    voterBalance = sp.nat(30)
+    scenario += token.mint(
+      sp.record(
+        address = Addresses.VOTER_ADDRESS,
+        value = voterBalance
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS,
+      level = sp.nat(1)
+    )
+
+    # AND a poll which started at level 11
+    votingStartBlock = sp.nat(11)
+    poll = sp.record(
+      id = sp.nat(0),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
+      votingStartBlock = votingStartBlock,
+      votingEndBlock = sp.nat(20),
+      yayVotes = sp.nat(0),
+      nayVotes = sp.nat(0),
+      abstainVotes = sp.nat(0),
+      totalVotes = sp.nat(0),
+      author = Addresses.ALICE_ADDRESS,
+      escrowAmount = sp.nat(50),
+      quorum = sp.nat(100),
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
+    )
+
+    # AND and a dao contract holding the poll.
+    dao = DaoContract(
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
+      tokenContractAddress = token.address,
+    )
+    scenario += dao
+
+    # AND the voter receives more tokens after the poll started
+    scenario += token.mint(
+      sp.record(
+        address = Addresses.VOTER_ADDRESS,
+        value = sp.nat(100)
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS,
+      level = votingStartBlock + 1
+    )
+
+    # WHEN vote is called
+    scenario += dao.vote(pollId = sp.nat(0), voteValue = VoteValue.NAY).run(
+      sender = Addresses.VOTER_ADDRESS,
+      level = votingStartBlock + 2,
+    )
+
+    # THEN the vote is weighted by the balance at the start of the poll.
+    scenario.verify(dao.data.polls[sp.nat(0)].nayVotes == voterBalance)
+    scenario.verify(dao.data.polls[sp.nat(0)].totalVotes == voterBalance)
+    scenario.verify(dao.data.voters[(sp.nat(0), Addresses.VOTER_ADDRESS)].votes == voterBalance)
+
+  @sp.add_test(name="vote - changes an earlier vote")
+  def test():
+    scenario = sp.test_scenario()
+
+    # GIVEN a token contract
+    token = Token.FA12(
+      admin = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+    scenario += token
+
+    # AND the voter and Alice hold tokens at level 1
+    voterBalance = sp.nat(30)
+    aliceBalance = sp.nat(20)
+    scenario += token.mint(
+      sp.record(
+        address = Addresses.VOTER_ADDRESS,
+        value = voterBalance
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS,
+      level = sp.nat(1)
+    )
+    scenario += token.mint(
+      sp.record(
+        address = Addresses.ALICE_ADDRESS,
+        value = aliceBalance
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS,
+      level = sp.nat(1)
+    )
+
+    # AND a poll which started at level 11
+    votingStartBlock = sp.nat(11)
+    poll = sp.record(
+      id = sp.nat(0),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
+      votingStartBlock = votingStartBlock,
+      votingEndBlock = sp.nat(20),
+      yayVotes = sp.nat(0),
+      nayVotes = sp.nat(0),
+      abstainVotes = sp.nat(0),
+      totalVotes = sp.nat(0),
+      author = Addresses.ALICE_ADDRESS,
+      escrowAmount = sp.nat(50),
+      quorum = sp.nat(100),
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
+    )
+
+    # AND and a dao contract holding the poll.
+    dao = DaoContract(
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
+      tokenContractAddress = token.address,
+    )
+    scenario += dao
+
+    # AND the voter has voted nay and Alice has voted yay
+    scenario += dao.vote(pollId = sp.nat(0), voteValue = VoteValue.NAY).run(
+      sender = Addresses.VOTER_ADDRESS,
+      level = votingStartBlock + 1,
+    )
+    scenario += dao.vote(pollId = sp.nat(0), voteValue = VoteValue.YAY).run(
+      sender = Addresses.ALICE_ADDRESS,
+      level = votingStartBlock + 1,
+    )
+
+    # WHEN the voter votes again with a different value
+    scenario += dao.vote(pollId = sp.nat(0), voteValue = VoteValue.ABSTAIN).run(
+      sender = Addresses.VOTER_ADDRESS,
+      level = votingStartBlock + 2,
+    )
+
+    # THEN the voter's earlier vote is moved to the new value rather than counted twice
+    scenario.verify(dao.data.polls[sp.nat(0)].yayVotes == aliceBalance)
+    scenario.verify(dao.data.polls[sp.nat(0)].nayVotes == sp.nat(0))
+    scenario.verify(dao.data.polls[sp.nat(0)].abstainVotes == voterBalance)
+    scenario.verify(dao.data.polls[sp.nat(0)].totalVotes == aliceBalance + voterBalance)
+
+    # AND the voter's record holds the new vote.
+    scenario.verify(dao.data.voters[(sp.nat(0), Addresses.VOTER_ADDRESS)].votes == voterBalance)
+    scenario.verify(dao.data.voters[(sp.nat(0), Addresses.VOTER_ADDRESS)].abstainVotes == voterBalance)
+    scenario.verify(dao.data.voters[(sp.nat(0), Addresses.VOTER_ADDRESS)].nayVotes == sp.nat(0))
+
+  @sp.add_test(name="vote - a delegate votes with the balances delegated to it")
+  def test():
+    scenario = sp.test_scenario()
+
+    # GIVEN a token contract
+    token = Token.FA12(
+      admin = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+    scenario += token
+
+    # AND the voter and two other holders hold tokens at level 1
+    voterBalance = sp.nat(30)
+    aliceBalance = sp.nat(40)
+    bobBalance = sp.nat(50)
+    for (address, balance) in [(Addresses.VOTER_ADDRESS, voterBalance), (Addresses.ALICE_ADDRESS, aliceBalance), (Addresses.BOB_ADDRESS, bobBalance)]:
+      scenario += token.mint(
+        sp.record(
+          address = address,
+          value = balance
+        )
+      ).run(
+        sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        level = sp.nat(1)
+      )
+
+    # AND the other holders delegate to the voter
+    for address in [Addresses.ALICE_ADDRESS, Addresses.BOB_ADDRESS]:
+      scenario += token.delegate(Addresses.VOTER_ADDRESS).run(
+        sender = address,
+        level = sp.nat(2)
+      )
+
+    # AND a poll which started at level 11
+    votingStartBlock = sp.nat(11)
+    poll = sp.record(
+      id = sp.nat(0),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
+      votingStartBlock = votingStartBlock,
+      votingEndBlock = sp.nat(20),
+      yayVotes = sp.nat(0),
+      nayVotes = sp.nat(0),
+      abstainVotes = sp.nat(0),
+      totalVotes = sp.nat(0),
+      author = Addresses.ALICE_ADDRESS,
+      escrowAmount = sp.nat(50),
+      quorum = sp.nat(100),
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
+    )
+
+    # AND and a dao contract holding the poll.
+    dao = DaoContract(
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
+      tokenContractAddress = token.address,
+    )
+    scenario += dao
+
+    # WHEN the voter votes
+    scenario += dao.vote(pollId = sp.nat(0), voteValue = VoteValue.YAY).run(
+      sender = Addresses.VOTER_ADDRESS,
+      level = votingStartBlock + 1,
+    )
+
+    # THEN the vote carries the voter's balance and the delegated balances.
+    delegatedVotes = voterBalance + aliceBalance + bobBalance
+    scenario.verify(dao.data.polls[sp.nat(0)].yayVotes == delegatedVotes)
+    scenario.verify(dao.data.voters[(sp.nat(0), Addresses.VOTER_ADDRESS)].votes == delegatedVotes)
+
+    # AND a holder who delegated has no votes of their own.
+    scenario += dao.vote(pollId = sp.nat(0), voteValue = VoteValue.NAY).run(
+      sender = Addresses.ALICE_ADDRESS,
+      level = votingStartBlock + 1,
+    )
+    scenario.verify(dao.data.polls[sp.nat(0)].nayVotes == 0)
+
+  @sp.add_test(name="vote - reads voting power from the snapshot taken by propose")
+  def test():
+    scenario = sp.test_scenario()
+
+    # GIVEN a token contract
+    token = Token.FA12(
+      admin = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+    scenario += token
+
+    # AND a dao contract which takes snapshots of the token.
+    dao = DaoContract(
+      tokenContractAddress = token.address,
+    )
+    scenario += dao
+    scenario += token.setSnapshotter(sp.some(dao.address)).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+
+    # AND Alice has tokens and has approved the DAO to escrow them.
+    scenario += token.mint(
+      sp.record(
+        address = Addresses.ALICE_ADDRESS,
+        value = sp.nat(1000)
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS,
+      level = sp.nat(1)
+    )
+    scenario += token.approve(
+      spender = dao.address,
+      value = sp.nat(1000)
+    ).run(
+      sender = Addresses.ALICE_ADDRESS,
+      level = sp.nat(1)
+    )
+
+    # AND the voter holds tokens.
+    voterBalance = sp.nat(30)
+    scenario += token.mint(
+      sp.record(
+        address = Addresses.VOTER_ADDRESS,
+        value = voterBalance
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS,
+      level = sp.nat(1)
+    )
+
+    # AND Alice has made a proposal.
+    proposal = sp.record(
+      title = 'title',
+      descriptionLink = 'ipfs://xyz',
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))])
+    )
+    proposalLevel = sp.nat(2)
+    scenario += dao.propose(proposal).run(
+      sender = Addresses.ALICE_ADDRESS,
+      level = proposalLevel
+    )
+    votingStartBlock = proposalLevel + sp.nat(1) # Default voteDelayBlocks
+
+    # AND the voter receives more tokens after voting started, and then some more.
+    scenario += token.mint(
+      sp.record(
+        address = Addresses.VOTER_ADDRESS,
+        value = sp.nat(100)
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS,
+      level = votingStartBlock + 1
+    )
+    scenario += token.mint(
+      sp.record(
+        address = Addresses.VOTER_ADDRESS,
+        value = sp.nat(100)
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS,
+      level = votingStartBlock + 2
+    )
+
+    # WHEN vote is called
+    scenario += dao.vote(pollId = sp.nat(0), voteValue = VoteValue.YAY).run(
+      sender = Addresses.VOTER_ADDRESS,
+      level = votingStartBlock + 3,
+    )
+
+    # THEN the vote is weighted by the balance recorded in the snapshot.
+    scenario.verify(token.data.snapshotVotes[(Addresses.VOTER_ADDRESS, sp.nat(0))] == voterBalance)
+    scenario.verify(dao.data.polls[sp.nat(0)].yayVotes == voterBalance)
+    scenario.verify(dao.data.voters[(sp.nat(0), Addresses.VOTER_ADDRESS)].votes == voterBalance)
+
+  @sp.add_test(name="vote - snapshot lookups read the same entries however long the checkpoint history")
+  def test():
+    scenario = sp.test_scenario()
+
+    # A snapshot lookup reads the snapshot, the latest checkpoint and at most one written snapshot value, whereas
+    # a checkpoint lookup searches the history. Compare both lookups over increasingly long checkpoint histories.
+    # Only the checkpoints the searches read are seeded, so a search which read any other checkpoint would fail.
+    for numCheckpoints in [10, 1000, 100000]:
+      # GIVEN a voter whose voting power changed every other block, from 1 at level 2 to numCheckpoints at
+      # level 2 * numCheckpoints
+      # AND a snapshot of the next level, after which a mint of 1 token brings the history to numCheckpoints + 1
+      # checkpoints.
+      snapshotLevel = 2 * numCheckpoints + 1
+      mintLevel = 2 * numCheckpoints + 2
+      votingEndBlock = sp.nat(2 * numCheckpoints + 20)
+
+      # AND a poll which starts at the snapshot, and a poll which starts in the middle of the history.
+      middleLevel = 2 * (numCheckpoints // 2) + 1
+      recentProbes = CheckpointProbes.gallopingProbes(numCheckpoints + 1, snapshotLevel)
+      middleProbes = CheckpointProbes.gallopingProbes(numCheckpoints + 1, middleLevel)
+      binaryProbes = CheckpointProbes.binarySearchProbes(numCheckpoints + 1, middleLevel)
+      scenario.h2("%d checkpoints: the snapshot reads no checkpoints, a search at the snapshot level reads %d and a search from the middle reads %d, against %d for a binary search" % (numCheckpoints, len(recentProbes), len(middleProbes), len(binaryProbes)))
+
+      # The most recent checkpoint before the mint is kept in latestVoteCheckpoint, and moved to voteCheckpoints
+      # by the mint.
+      checkpoints = {}
+      for i in (recentProbes | middleProbes):
+        if i < numCheckpoints - 1:
+          checkpoints[(Addresses.VOTER_ADDRESS, i)] = sp.record(fromBlock = 2 * (i + 1), balance = i + 1, cumulative = i * (i + 1))
+      latestCheckpoint = sp.record(index = numCheckpoints - 1, fromBlock = 2 * numCheckpoints, balance = numCheckpoints, cumulative = (numCheckpoints - 1) * numCheckpoints)
+
+      # AND a token contract holding that history, whose administrator takes snapshots.
+      token = Token.FA12(
+        admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        voteCheckpoints = sp.big_map(
+          l = checkpoints,
+          tkey = sp.TPair(sp.TAddress, sp.TNat),
+          tvalue = Token.CHECKPOINT_TYPE
+        ),
+        latestVoteCheckpoint = sp.big_map(
+          l = { Addresses.VOTER_ADDRESS: latestCheckpoint },
+          tkey = sp.TAddress,
+          tvalue = Token.LATEST_CHECKPOINT_TYPE
+        ),
+        snapshotter = sp.some(Addresses.TOKEN_ADMIN_ADDRESS)
+      )
+      scenario += token
+
+      # AND dao contracts holding a poll with the snapshot, a poll without it, and a poll from the middle.
+      daos = []
+      for (votingStartBlock, snapshotId) in [(snapshotLevel, sp.some(sp.nat(0))), (snapshotLevel, sp.none), (middleLevel, sp.none)]:
+        poll = sp.record(
+          id = sp.nat(0),
+          proposalHash = sp.bytes("0x00"),
+          title = "Prop 1",
+          descriptionHash = "xyz123",
+          votingStartBlock = sp.nat(votingStartBlock),
+          votingEndBlock = votingEndBlock,
+          yayVotes = sp.nat(0),
+          nayVotes = sp.nat(0),
+          abstainVotes = sp.nat(0),
+          totalVotes = sp.nat(0),
+          author = Addresses.ALICE_ADDRESS,
+          escrowAmount = sp.nat(50),
+          quorum = sp.nat(100),
+          quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+          minYayVotesPercentForEscrowReturn = sp.nat(20),
+          percentageForSuperMajority = sp.nat(80),
+          snapshotId = snapshotId
+        )
+        dao = DaoContract(
+          polls = sp.big_map(
+            l = {
+              sp.nat(0): poll
+            },
+            tkey = sp.TNat,
+            tvalue = Poll.POLL_TYPE,
+          ),
+          activePolls = sp.set([sp.nat(0)]),
+          tokenContractAddress = token.address,
+        )
+        scenario += dao
+        daos.append(dao)
+
+      # AND the snapshot is taken
+      scenario += token.snapshot(sp.record(level = snapshotLevel, expiry = votingEndBlock)).run(
+        sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        level = snapshotLevel
+      )
+
+      # AND the voter receives 1 token after the snapshot, which writes their voting power at the snapshot.
+      scenario += token.mint(
+        sp.record(
+          address = Addresses.VOTER_ADDRESS,
+          value = sp.nat(1)
+        )
+      ).run(
+        sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        level = mintLevel
+      )
+      scenario.verify(token.data.snapshotVotes[(Addresses.VOTER_ADDRESS, sp.nat(0))] == numCheckpoints)
+
+      # WHEN the voter votes in each poll
+      # THEN the snapshot and the search at the snapshot level agree on the voting power at the snapshot
+      # AND the search from the middle finds the voting power in the middle of the history.
+      expectedVotes = [numCheckpoints, numCheckpoints, numCheckpoints // 2]
+      for i in range(len(daos)):
+        scenario += daos[i].vote(pollId = sp.nat(0), voteValue = VoteValue.YAY).run(
+          sender = Addresses.VOTER_ADDRESS,
+          level = mintLevel + 1,
+        )
+        scenario.verify(daos[i].data.polls[sp.nat(0)].yayVotes == expectedVotes[i])
+
+  @sp.add_test(name="vote - each vote writes a single voter record, and endVoting reads none, however many voters")
+  def test():
+    scenario = sp.test_scenario()
+
+    # Voter records live in a lazily loaded big_map, keyed by poll and voter. Each vote reads and writes only the
+    # poll and its own record, and finalizing never reads voter records, so neither depends on the number of voters.
+    for numVoters in [10, 100, 1000, 5000]:
+      scenario.h2("%d voters" % numVoters)
+      voters = [sp.test_account("Voter %d" % i).address for i in range(numVoters)]
+
+      # GIVEN a token contract where each voter has had 1 vote since level 1
+      token = Token.FA12(
+        admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        latestVoteCheckpoint = sp.big_map(
+          l = {
+            voter: sp.record(index = sp.nat(0), fromBlock = sp.nat(1), balance = sp.nat(1), cumulative = sp.nat(0)) for voter in voters
+          },
+          tkey = sp.TAddress,
+          tvalue = Token.LATEST_CHECKPOINT_TYPE
+        )
+      )
+      scenario += token
+
+      # AND a poll which started at level 11
+      pollId = sp.nat(0)
+      votingEndBlock = sp.nat(20)
+      poll = sp.record(
+        id = pollId,
+        proposalHash = sp.bytes("0x00"),
+        title = "Prop 1",
+        descriptionHash = "xyz123",
+        votingStartBlock = sp.nat(11),
+        votingEndBlock = votingEndBlock,
+        yayVotes = sp.nat(0),
+        nayVotes = sp.nat(0),
+        abstainVotes = sp.nat(0),
+        totalVotes = sp.nat(0),
+        author = Addresses.ALICE_ADDRESS,
+        escrowAmount = sp.nat(50),
+        quorum = sp.nat(100),
+        quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+        minYayVotesPercentForEscrowReturn = sp.nat(20),
+        percentageForSuperMajority = sp.nat(80),
+        snapshotId = sp.none
+      )
+
+      # AND a dao contract holding the poll and its escrow.
+      dao = DaoContract(
+        polls = sp.big_map(
+          l = {
+            pollId: poll
+          },
+          tkey = sp.TNat,
+          tvalue = Poll.POLL_TYPE,
+        ),
+        activePolls = sp.set([pollId]),
+        tokenContractAddress = token.address,
+      )
+      scenario += dao
+      scenario += token.mint(
+        sp.record(
+          address = dao.address,
+          value = sp.nat(50)
+        )
+      ).run(
+        sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        level = sp.nat(1)
+      )
+
+      # WHEN every voter votes yay
+      for voter in voters:
+        scenario += dao.vote(pollId = pollId, voteValue = VoteValue.YAY).run(
+          sender = voter,
+          level = sp.nat(15),
+        )
+
+      # THEN every vote is tallied
+      scenario.verify(dao.data.polls[pollId].yayVotes == numVoters)
+      scenario.verify(dao.data.polls[pollId].totalVotes == numVoters)
+
+      # AND each voter has exactly one record, which no later vote rewrote.
+      for voter in voters:
+        scenario.verify(dao.data.voters[(pollId, voter)].votes == sp.nat(1))
+        scenario.verify(dao.data.voters[(pollId, voter)].yayVotes == sp.nat(1))
+
+      # WHEN voting is ended
+      scenario += dao.endVoting(pollId).run(
+        level = votingEndBlock + 1
+      )
+
+      # THEN the poll is finalized in a single call
+      scenario.verify(~dao.data.polls.contains(pollId))
+      scenario.verify(dao.data.outcomes[pollId].totalVotes == numVoters)
+
+      # AND the voter records are left in place, since finalizing does not read them.
+      scenario.verify(dao.data.voters[(pollId, voters[0])].votes == sp.nat(1))
+      scenario.verify(dao.data.voters[(pollId, voters[-1])].votes == sp.nat(1))
+
+  ################################################################
+  # splitVote
+  ################################################################
+
+  @sp.add_test(name="splitVote - tallies each amount in a single vote, which vote can change")
+  def test():
+    scenario = sp.test_scenario()
+
+    # GIVEN a token contract
+    token = Token.FA12(
+      admin = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+    scenario += token
+
+    # AND a custodian which holds tokens at level 1
+    custodianBalance = sp.nat(100)
+    scenario += token.mint(
+      sp.record(
+        address = Addresses.VOTER_ADDRESS,
+        value = custodianBalance
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS,
+      level = sp.nat(1)
+    )
+
+    # AND a poll which started at level 11
+    pollId = sp.nat(0)
+    votingStartBlock = sp.nat(11)
+    poll = sp.record(
+      id = pollId,
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
+      votingStartBlock = votingStartBlock,
+      votingEndBlock = sp.nat(20),
+      yayVotes = sp.nat(0),
+      nayVotes = sp.nat(0),
+      abstainVotes = sp.nat(0),
+      totalVotes = sp.nat(0),
+      author = Addresses.ALICE_ADDRESS,
+      escrowAmount = sp.nat(50),
+      quorum = sp.nat(100),
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
+    )
+
+    # AND and a dao contract holding the poll.
+    dao = DaoContract(
+      polls = sp.big_map(
+        l = {
+          pollId: poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([pollId]),
+      tokenContractAddress = token.address,
+    )
+    scenario += dao
+
+    # WHEN the custodian splits part of its voting power between the vote values
+    yayVotes = sp.nat(50)
+    nayVotes = sp.nat(30)
+    abstainVotes = sp.nat(10)
+    scenario += dao.splitVote(
+      pollId = pollId,
+      yayVotes = yayVotes,
+      nayVotes = nayVotes,
+      abstainVotes = abstainVotes
+    ).run(
+      sender = Addresses.VOTER_ADDRESS,
+      level = votingStartBlock + 1,
+    )
+
+    # THEN each tally is incremented by its amount.
+    scenario.verify(dao.data.polls[pollId].yayVotes == yayVotes)
+    scenario.verify(dao.data.polls[pollId].nayVotes == nayVotes)
+    scenario.verify(dao.data.polls[pollId].abstainVotes == abstainVotes)
+    scenario.verify(dao.data.polls[pollId].totalVotes == yayVotes + nayVotes + abstainVotes)
+
+    # AND the split is recorded for the custodian.
+    voterKey = (pollId, Addresses.VOTER_ADDRESS)
+    scenario.verify(dao.data.voters[voterKey].votes == yayVotes + nayVotes + abstainVotes)
+    scenario.verify(dao.data.voters[voterKey].yayVotes == yayVotes)
+    scenario.verify(dao.data.voters[voterKey].nayVotes == nayVotes)
+    scenario.verify(dao.data.voters[voterKey].abstainVotes == abstainVotes)
+
+    # WHEN the custodian changes its vote to put all of its voting power behind yay
+    scenario += dao.vote(pollId = pollId, voteValue = VoteValue.YAY).run(
+      sender = Addresses.VOTER_ADDRESS,
+      level = votingStartBlock + 2,
+    )
+
+    # THEN the split is moved out of the tallies and replaced by the new vote.
+    scenario.verify(dao.data.polls[pollId].yayVotes == custodianBalance)
+    scenario.verify(dao.data.polls[pollId].nayVotes == sp.nat(0))
+    scenario.verify(dao.data.polls[pollId].abstainVotes == sp.nat(0))
+    scenario.verify(dao.data.polls[pollId].totalVotes == custodianBalance)
+    scenario.verify(dao.data.voters[voterKey].votes == custodianBalance)
+    scenario.verify(dao.data.voters[voterKey].yayVotes == custodianBalance)
+    scenario.verify(dao.data.voters[voterKey].nayVotes == sp.nat(0))
+    scenario.verify(dao.data.voters[voterKey].abstainVotes == sp.nat(0))
+
+  @sp.add_test(name="splitVote - fails if the amounts exceed the voting power")
+  def test():
+    scenario = sp.test_scenario()
+
+    # GIVEN a token contract
+    token = Token.FA12(
+      admin = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+    scenario += token
+
+    # AND a custodian which holds tokens at level 1
+    custodianBalance = sp.nat(100)
+    scenario += token.mint(
+      sp.record(
+        address = Addresses.VOTER_ADDRESS,
+        value = custodianBalance
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS,
+      level = sp.nat(1)
+    )
+
+    # AND a poll which started at level 11
+    pollId = sp.nat(0)
+    votingStartBlock = sp.nat(11)
+    poll = sp.record(
+      id = pollId,
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
+      votingStartBlock = votingStartBlock,
+      votingEndBlock = sp.nat(20),
+      yayVotes = sp.nat(0),
+      nayVotes = sp.nat(0),
+      abstainVotes = sp.nat(0),
+      totalVotes = sp.nat(0),
+      author = Addresses.ALICE_ADDRESS,
+      escrowAmount = sp.nat(50),
+      quorum = sp.nat(100),
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
+    )
+
+    # AND and a dao contract holding the poll.
+    dao = DaoContract(
+      polls = sp.big_map(
+        l = {
+          pollId: poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([pollId]),
+      tokenContractAddress = token.address,
+    )
+    scenario += dao
+
+    # WHEN the custodian splits more than its voting power
+    # THEN the call fails.
+    scenario += dao.splitVote(
+      pollId = pollId,
+      yayVotes = sp.nat(60),
+      nayVotes = sp.nat(40),
+      abstainVotes = sp.nat(1)
+    ).run(
+      sender = Addresses.VOTER_ADDRESS,
+      level = votingStartBlock + 1,
+      valid = False
+    )
+
+  ################################################################
+  # voteBySig
+  ################################################################
+
+  @sp.add_test(name="voteBySig - tallies a batch of signed votes")
+  def test():
+    scenario = sp.test_scenario()
+
+    # GIVEN a token contract
+    token = Token.FA12(
+      admin = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+    scenario += token
+
+    # AND two voters who hold tokens at level 1
+    alice = sp.test_account("Alice")
+    bob = sp.test_account("Bob")
+    aliceBalance = sp.nat(30)
+    bobBalance = sp.nat(50)
+    scenario += token.mint(
+      sp.record(
+        address = alice.address,
+        value = aliceBalance
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS,
+      level = sp.nat(1)
+    )
+    scenario += token.mint(
+      sp.record(
+        address = bob.address,
+        value = bobBalance
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS,
+      level = sp.nat(1)
+    )
+
+    # AND a poll which started at level 11
     pollId = sp.nat(0)
+    votingStartBlock = sp.nat(11)
     poll = sp.record(
       id = pollId,
-      proposal = sp.record(
-        title = proposalTitle,
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
-      votingStartBlock = sp.nat(11),
-      votingEndBlock = votingEndBlock,
-      yayVotes = yayVotes,
-      nayVotes = nayVotes,
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
+      votingStartBlock = votingStartBlock,
+      votingEndBlock = sp.nat(20),
+      yayVotes = sp.nat(0),
+      nayVotes = sp.nat(0),
       abstainVotes = sp.nat(0),
-      totalVotes = totalVotes,
-      voters = {},
+      totalVotes = sp.nat(0),
       author = Addresses.ALICE_ADDRESS,
-      escrowAmount = escrowAmount,
+      escrowAmount = sp.nat(50),
       quorum = sp.nat(100),
-      quorumCap = quorumCap
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
     )
 
-    # AND a dao contract with the parameters above.
+    # AND and a dao contract holding the poll.
     dao = DaoContract(
-      governanceParameters = governanceParameters,
-      poll = sp.some(poll),
-      quorum = quorum,
+      polls = sp.big_map(
+        l = {
+          pollId: poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([pollId]),
+      tokenContractAddress = token.address,
     )
     scenario += dao
 
-    # WHEN end voting is called
-    scenario += dao.endVoting(sp.unit).run(
-      level = votingEndBlock + 1,
-    )    
-
-    # THEN the poll is removed 
-    scenario.verify(~dao.data.poll.is_some())
-
-    # AND the outcome for the poll is IN_TIMELOCK
-    scenario.verify(dao.data.outcomes[pollId].outcome == PollOutcomes.POLL_OUTCOME_IN_TIMELOCK)
+    chainId = sp.chain_id_cst("0x9caecab9")
+    def signBallot(account, voteValue):
+      payload = scenario.compute(sp.pack((chainId, (dao.address, (pollId, voteValue)))))
+      return sp.record(
+        publicKey = account.public_key,
+        pollId = pollId,
+        voteValue = voteValue,
+        signature = sp.make_signature(account.secret_key, payload, message_format = 'Raw')
+      )
 
-    # AND the proposal was moved to the timelock
-    scenario.verify(dao.data.timelockItem.is_some())    
-    scenario.verify(dao.data.timelockItem.open_some().proposal.title == proposalTitle)
+    # WHEN a relayer submits ballots signed by both voters
+    scenario += dao.voteBySig([
+      signBallot(alice, VoteValue.YAY),
+      signBallot(bob, VoteValue.NAY)
+    ]).run(
+      sender = Addresses.NULL_ADDRESS,
+      level = votingStartBlock + 1,
+      chain_id = chainId
+    )
 
-  ################################################################
-  # vote
-  ################################################################
+    # THEN each vote is counted for the signer, weighted by their balance at the start of the poll.
+    scenario.verify(dao.data.polls[pollId].yayVotes == aliceBalance)
+    scenario.verify(dao.data.polls[pollId].nayVotes == bobBalance)
+    scenario.verify(dao.data.polls[pollId].totalVotes == aliceBalance + bobBalance)
+    scenario.verify(dao.data.voters[(pollId, alice.address)].votes == aliceBalance)
+    scenario.verify(dao.data.voters[(pollId, bob.address)].votes == bobBalance)
 
-  @sp.add_test(name="vote - fails if in bad state")
+  @sp.add_test(name="voteBySig - fails if a ballot does not match its signature")
   def test():
     scenario = sp.test_scenario()
-    
-    # GIVEN a poll.
+
+    # GIVEN a token contract
+    token = Token.FA12(
+      admin = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+    scenario += token
+
+    # AND two voters who hold tokens at level 1
+    alice = sp.test_account("Alice")
+    bob = sp.test_account("Bob")
+    aliceBalance = sp.nat(30)
+    bobBalance = sp.nat(50)
+    scenario += token.mint(
+      sp.record(
+        address = alice.address,
+        value = aliceBalance
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS,
+      level = sp.nat(1)
+    )
+    scenario += token.mint(
+      sp.record(
+        address = bob.address,
+        value = bobBalance
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS,
+      level = sp.nat(1)
+    )
+
+    # AND a poll which started at level 11
+    pollId = sp.nat(0)
     votingStartBlock = sp.nat(11)
     poll = sp.record(
-      id = sp.nat(0),
-      proposal = sp.record(
-        title = 'title',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      id = pollId,
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
       votingStartBlock = votingStartBlock,
       votingEndBlock = sp.nat(20),
       yayVotes = sp.nat(0),
       nayVotes = sp.nat(0),
       abstainVotes = sp.nat(0),
       totalVotes = sp.nat(0),
-      voters = {},
       author = Addresses.ALICE_ADDRESS,
       escrowAmount = sp.nat(50),
       quorum = sp.nat(100),
-      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99))
-    )    
-
-    # AND a dao contract in the STATE_MACHINE_WAITING_FOR_BALANCE state
-    votingState = sp.record(
-      address = Addresses.VOTER_ADDRESS,
-      level = votingStartBlock,
-      voteValue = VoteValue.YAY
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
     )
+
+    # AND and a dao contract holding the poll.
     dao = DaoContract(
-      poll = sp.some(poll),
-      state = STATE_MACHINE_WAITING_FOR_BALANCE,
-      tokenContractAddress = Addresses.TOKEN_CONTRACT_ADDRESS,
-      votingState = sp.some(votingState)
+      polls = sp.big_map(
+        l = {
+          pollId: poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([pollId]),
+      tokenContractAddress = token.address,
     )
     scenario += dao
 
-    # WHEN vote is called
+    chainId = sp.chain_id_cst("0x9caecab9")
+    def signBallot(account, voteValue):
+      payload = scenario.compute(sp.pack((chainId, (dao.address, (pollId, voteValue)))))
+      return sp.record(
+        publicKey = account.public_key,
+        pollId = pollId,
+        voteValue = voteValue,
+        signature = sp.make_signature(account.secret_key, payload, message_format = 'Raw')
+      )
+
+    # WHEN a relayer submits a ballot whose vote value differs from the one that was signed
+    ballot = signBallot(alice, VoteValue.YAY)
+    tamperedBallot = sp.record(
+      publicKey = ballot.publicKey,
+      pollId = ballot.pollId,
+      voteValue = VoteValue.NAY,
+      signature = ballot.signature
+    )
+
     # THEN the call fails.
-    scenario += dao.vote(VoteValue.YAY).run(
-      sender = Addresses.VOTER_ADDRESS,
+    scenario += dao.voteBySig([tamperedBallot]).run(
+      sender = Addresses.NULL_ADDRESS,
+      level = votingStartBlock + 1,
+      chain_id = chainId,
       valid = False
     )
 
-  @sp.add_test(name="vote - fails if no poll under vote")
+  @sp.add_test(name="voteBySig - skips ballots which were already counted")
   def test():
     scenario = sp.test_scenario()
-  
-    # GIVEN a dao contract with no poll.
-    dao = DaoContract(
-      poll = sp.none,
-      state = STATE_MACHINE_IDLE,
-      votingState = sp.none
+
+    # GIVEN a token contract
+    token = Token.FA12(
+      admin = Addresses.TOKEN_ADMIN_ADDRESS
     )
-    scenario += dao
+    scenario += token
 
-    # WHEN vote is called
-    # THEN the call fails.
-    result = sp.record(
-      address = Addresses.VOTER_ADDRESS,
-      level = sp.nat(1),
-      result = sp.nat(50)
+    # AND two voters who hold tokens at level 1
+    alice = sp.test_account("Alice")
+    bob = sp.test_account("Bob")
+    aliceBalance = sp.nat(30)
+    bobBalance = sp.nat(50)
+    scenario += token.mint(
+      sp.record(
+        address = alice.address,
+        value = aliceBalance
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS,
+      level = sp.nat(1)
     )
-    scenario += dao.vote(VoteValue.YAY).run(
-      sender = Addresses.VOTER_ADDRESS,
-      valid = False
+    scenario += token.mint(
+      sp.record(
+        address = bob.address,
+        value = bobBalance
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS,
+      level = sp.nat(1)
     )
 
-  @sp.add_test(name="vote - succeeds at casting a vote")
-  def test():
-    scenario = sp.test_scenario()
-  
-    # GIVEN a poll.
+    # AND a poll which started at level 11
+    pollId = sp.nat(0)
     votingStartBlock = sp.nat(11)
     poll = sp.record(
-      id = sp.nat(0),
-      proposal = sp.record(
-        title = 'title',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      id = pollId,
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
       votingStartBlock = votingStartBlock,
       votingEndBlock = sp.nat(20),
       yayVotes = sp.nat(0),
       nayVotes = sp.nat(0),
       abstainVotes = sp.nat(0),
       totalVotes = sp.nat(0),
-      voters = {},
       author = Addresses.ALICE_ADDRESS,
       escrowAmount = sp.nat(50),
       quorum = sp.nat(100),
-      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99))
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
     )
 
-    # AND a fake token contract
-    votingPower = sp.nat(50)
-    token = FakeToken.FakeTokenContract(result = votingPower)
-    scenario += token
-
     # AND and a dao contract holding the poll.
     dao = DaoContract(
-      poll = sp.some(poll),
-      state = STATE_MACHINE_IDLE,
+      polls = sp.big_map(
+        l = {
+          pollId: poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([pollId]),
       tokenContractAddress = token.address,
-      votingState = sp.none
     )
     scenario += dao
 
-    # WHEN vote is called
-    scenario += dao.vote(VoteValue.YAY).run(
-      sender = Addresses.VOTER_ADDRESS,
+    chainId = sp.chain_id_cst("0x9caecab9")
+    def signBallot(account, voteValue):
+      payload = scenario.compute(sp.pack((chainId, (dao.address, (pollId, voteValue)))))
+      return sp.record(
+        publicKey = account.public_key,
+        pollId = pollId,
+        voteValue = voteValue,
+        signature = sp.make_signature(account.secret_key, payload, message_format = 'Raw')
+      )
+
+    # AND Bob has signed a ballot, but votes directly before it is submitted
+    bobBallot = signBallot(bob, VoteValue.YAY)
+    scenario += dao.vote(sp.record(pollId = pollId, voteValue = VoteValue.NAY)).run(
+      sender = bob.address,
       level = votingStartBlock + 1,
+      chain_id = chainId
     )
 
-    # THEN the vote tallies are incremented.
-    scenario.verify(dao.data.poll.open_some().yayVotes == votingPower)
-    scenario.verify(dao.data.poll.open_some().nayVotes == sp.nat(0))
-    scenario.verify(dao.data.poll.open_some().abstainVotes == sp.nat(0))
-    scenario.verify(dao.data.poll.open_some().totalVotes == votingPower)
+    # WHEN a relayer submits Alice's and Bob's signed ballots
+    aliceBallot = signBallot(alice, VoteValue.YAY)
+    scenario += dao.voteBySig([aliceBallot, bobBallot]).run(
+      sender = Addresses.NULL_ADDRESS,
+      level = votingStartBlock + 2,
+      chain_id = chainId
+    )
 
-    # AND the VOTER_ADDRESS was recorded
-    scenario.verify(dao.data.poll.open_some().voters.contains(Addresses.VOTER_ADDRESS))
+    # THEN Alice's vote is counted, and Bob's direct vote stands.
+    scenario.verify(dao.data.polls[pollId].yayVotes == aliceBalance)
+    scenario.verify(dao.data.polls[pollId].nayVotes == bobBalance)
 
-    # AND the state machine is reset
-    scenario.verify(dao.data.state == STATE_MACHINE_IDLE)
-    scenario.verify(~dao.data.votingState.is_some())
+    # WHEN Alice's ballot is submitted again
+    scenario += dao.voteBySig([aliceBallot]).run(
+      sender = Addresses.NULL_ADDRESS,
+      level = votingStartBlock + 3,
+      chain_id = chainId
+    )
+
+    # THEN the vote was only counted once.
+    scenario.verify(dao.data.polls[pollId].yayVotes == aliceBalance)
+    scenario.verify(dao.data.polls[pollId].totalVotes == aliceBalance + bobBalance)
 
   ################################################################
   # voteCallback
@@ -1915,28 +4557,34 @@ if __name__ == "__main__":
     # GIVEN a poll
     poll = sp.record(
       id = sp.nat(0),
-      proposal = sp.record(
-        title = 'title',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
       votingStartBlock = sp.nat(11),
       votingEndBlock = sp.nat(20),
       yayVotes = sp.nat(0),
       nayVotes = sp.nat(0),
       abstainVotes = sp.nat(0),
       totalVotes = sp.nat(0),
-      voters = {},
       author = Addresses.ALICE_ADDRESS,
       escrowAmount = sp.nat(50),
       quorum = sp.nat(100),
-      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99))
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
     )    
 
     # AND a dao contract in the STATE_MACHINE_IDLE state
     dao = DaoContract(
-      poll = sp.some(poll),
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
       state = STATE_MACHINE_IDLE,
       tokenContractAddress = Addresses.TOKEN_CONTRACT_ADDRESS,
       votingState = sp.none
@@ -1962,33 +4610,40 @@ if __name__ == "__main__":
     # GIVEN a poll
     poll = sp.record(
       id = sp.nat(0),
-      proposal = sp.record(
-        title = 'title',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
       votingStartBlock = sp.nat(11),
       votingEndBlock = sp.nat(20),
       yayVotes = sp.nat(0),
       nayVotes = sp.nat(0),
       abstainVotes = sp.nat(0),
       totalVotes = sp.nat(0),
-      voters = {},
       author = Addresses.ALICE_ADDRESS,
       escrowAmount = sp.nat(50),
       quorum = sp.nat(100),
-      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99))
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
     )    
 
     # AND a dao contract
     votingState = sp.record(
+      pollId = sp.nat(0),
       address = Addresses.VOTER_ADDRESS,
       level = sp.nat(1),
       voteValue = VoteValue.YAY
     )
     dao = DaoContract(
-      poll = sp.some(poll),
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
       state = STATE_MACHINE_WAITING_FOR_BALANCE,
       tokenContractAddress = Addresses.TOKEN_CONTRACT_ADDRESS,
       votingState = sp.some(votingState)
@@ -2015,34 +4670,41 @@ if __name__ == "__main__":
     # GIVEN a poll
     poll = sp.record(
       id = sp.nat(0),
-      proposal = sp.record(
-        title = 'title',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
       votingStartBlock = sp.nat(11),
       votingEndBlock = sp.nat(20),
       yayVotes = sp.nat(0),
       nayVotes = sp.nat(0),
       abstainVotes = sp.nat(0),
       totalVotes = sp.nat(0),
-      voters = {},
       author = Addresses.ALICE_ADDRESS,
       escrowAmount = sp.nat(50),
       quorum = sp.nat(100),
-      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99))
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
     )    
 
     # AND a dao contract
     voteRequestLevel = sp.nat(1)
     votingState = sp.record(
+      pollId = sp.nat(0),
       address = Addresses.VOTER_ADDRESS,
       level = voteRequestLevel,
       voteValue = VoteValue.YAY
     )
     dao = DaoContract(
-      poll = sp.some(poll),
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
       state = STATE_MACHINE_WAITING_FOR_BALANCE,
       tokenContractAddress = Addresses.TOKEN_CONTRACT_ADDRESS,
       votingState = sp.some(votingState)
@@ -2068,34 +4730,41 @@ if __name__ == "__main__":
     # GIVEN a poll
     poll = sp.record(
       id = sp.nat(0),
-      proposal = sp.record(
-        title = 'title',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
       votingStartBlock = sp.nat(11),
       votingEndBlock = sp.nat(20),
       yayVotes = sp.nat(0),
       nayVotes = sp.nat(0),
       abstainVotes = sp.nat(0),
       totalVotes = sp.nat(0),
-      voters = {},
       author = Addresses.ALICE_ADDRESS,
       escrowAmount = sp.nat(50),
       quorum = sp.nat(100),
-      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99))
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
     )    
 
     # AND a dao contract
     voteRequestLevel = sp.nat(1)
     votingState = sp.record(
+      pollId = sp.nat(0),
       address = Addresses.VOTER_ADDRESS,
       level = voteRequestLevel,
       voteValue = VoteValue.YAY
     )
     dao = DaoContract(
-      poll = sp.some(poll),
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
       state = STATE_MACHINE_WAITING_FOR_BALANCE,
       tokenContractAddress = Addresses.TOKEN_CONTRACT_ADDRESS,
       votingState = sp.some(votingState)
@@ -2114,57 +4783,69 @@ if __name__ == "__main__":
       valid = False
     )
 
-  @sp.add_test(name="voteCallback - fails if already voted")
+  @sp.add_test(name="voteCallback - changes an earlier vote")
   def test():
     scenario = sp.test_scenario()
     
-    # GIVEN a poll where the VOTER_ADDRESS has voted
+    # GIVEN a poll where the VOTER_ADDRESS has voted yay with 200 tokens
     poll = sp.record(
       id = sp.nat(0),
-      proposal = sp.record(
-        title = 'title',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
       votingStartBlock = sp.nat(11),
       votingEndBlock = sp.nat(20),
-      yayVotes = sp.nat(0),
+      yayVotes = sp.nat(200),
       nayVotes = sp.nat(0),
       abstainVotes = sp.nat(0),
-      totalVotes = sp.nat(0),
-      voters = sp.map(
-        l = {
-          Addresses.VOTER_ADDRESS: sp.record(
-            voteValue = VoteValue.YAY,
-            level = sp.nat(12),
-            votes = sp.nat(200),
-          )
-        }
-      ),
+      totalVotes = sp.nat(200),
       author = Addresses.ALICE_ADDRESS,
       escrowAmount = sp.nat(50),
       quorum = sp.nat(100),
-      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99))
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
     )    
+    voters = sp.big_map(
+      l = {
+        (sp.nat(0), Addresses.VOTER_ADDRESS): sp.record(
+          level = sp.nat(12),
+          votes = sp.nat(200),
+          yayVotes = sp.nat(200),
+          nayVotes = sp.nat(0),
+          abstainVotes = sp.nat(0),
+        )
+      },
+      tkey = sp.TPair(sp.TNat, sp.TAddress),
+      tvalue = VoteRecord.VOTE_RECORD_TYPE
+    )
 
     # AND a dao contract
     voteRequestLevel = sp.nat(1)
     votingState = sp.record(
+      pollId = sp.nat(0),
       address = Addresses.VOTER_ADDRESS,
       level = voteRequestLevel,
-      voteValue = VoteValue.YAY
+      voteValue = VoteValue.NAY
     )
     dao = DaoContract(
-      poll = sp.some(poll),
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
       state = STATE_MACHINE_WAITING_FOR_BALANCE,
       tokenContractAddress = Addresses.TOKEN_CONTRACT_ADDRESS,
-      votingState = sp.some(votingState)
+      votingState = sp.some(votingState),
+      voters = voters
     )
     scenario += dao
 
-    # WHEN voteCallback is called by the VOTER_ADDRESS
-    # THEN the call fails.
+    # WHEN voteCallback is called with a nay vote of 50 tokens for the VOTER_ADDRESS
     result = sp.record(
       address = Addresses.VOTER_ADDRESS,
       level = voteRequestLevel,
@@ -2172,9 +4853,25 @@ if __name__ == "__main__":
     )
     scenario += dao.voteCallback(result).run(
       sender = Addresses.TOKEN_CONTRACT_ADDRESS,
-      valid = False
+      level = sp.nat(13)
     )
 
+    # THEN the earlier vote is moved out of the yay tally and the new vote is added to the nay tally.
+    scenario.verify(dao.data.polls[sp.nat(0)].yayVotes == sp.nat(0))
+    scenario.verify(dao.data.polls[sp.nat(0)].nayVotes == sp.nat(50))
+    scenario.verify(dao.data.polls[sp.nat(0)].abstainVotes == sp.nat(0))
+    scenario.verify(dao.data.polls[sp.nat(0)].totalVotes == sp.nat(50))
+
+    # AND the vote record is replaced.
+    voterKey = (sp.nat(0), Addresses.VOTER_ADDRESS)
+    scenario.verify(dao.data.voters[voterKey].votes == sp.nat(50))
+    scenario.verify(dao.data.voters[voterKey].yayVotes == sp.nat(0))
+    scenario.verify(dao.data.voters[voterKey].nayVotes == sp.nat(50))
+    scenario.verify(dao.data.voters[voterKey].level == sp.nat(13))
+
+    # AND the dao is back in the idle state.
+    scenario.verify(dao.data.state == STATE_MACHINE_IDLE)
+
   @sp.add_test(name="voteCallback - fails if voting finished")
   def test():
     scenario = sp.test_scenario()
@@ -2183,34 +4880,41 @@ if __name__ == "__main__":
     votingEndBlock = sp.nat(30)
     poll = sp.record(
       id = sp.nat(0),
-      proposal = sp.record(
-        title = 'title',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
       votingStartBlock = sp.nat(11),
       votingEndBlock = votingEndBlock,
       yayVotes = sp.nat(0),
       nayVotes = sp.nat(0),
       abstainVotes = sp.nat(0),
       totalVotes = sp.nat(0),
-      voters = {},
       author = Addresses.ALICE_ADDRESS,
       escrowAmount = sp.nat(50),
       quorum = sp.nat(100),
-      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99))
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
     )    
 
     # AND a dao contract
     voteRequestLevel = sp.nat(1)
     votingState = sp.record(
+      pollId = sp.nat(0),
       address = Addresses.VOTER_ADDRESS,
       level = voteRequestLevel,
       voteValue = VoteValue.YAY
     )
     dao = DaoContract(
-      poll = sp.some(poll),
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
       state = STATE_MACHINE_WAITING_FOR_BALANCE,
       tokenContractAddress = Addresses.TOKEN_CONTRACT_ADDRESS,
       votingState = sp.some(votingState)
@@ -2237,35 +4941,42 @@ if __name__ == "__main__":
     # GIVEN a poll where the VOTER_ADDRESS has voted
     poll = sp.record(
       id = sp.nat(0),
-      proposal = sp.record(
-        title = 'title',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
       votingStartBlock = sp.nat(11),
       votingEndBlock = sp.nat(20),
       yayVotes = sp.nat(0),
       nayVotes = sp.nat(0),
       abstainVotes = sp.nat(0),
       totalVotes = sp.nat(0),
-      voters = {},
       author = Addresses.ALICE_ADDRESS,
       escrowAmount = sp.nat(50),
       quorum = sp.nat(100),
-      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99))
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
     )    
 
     # AND a dao contract with a yay vote
     voteRequestLevel = sp.nat(1)
     voteValue = VoteValue.YAY
     votingState = sp.record(
+      pollId = sp.nat(0),
       address = Addresses.VOTER_ADDRESS,
       level = voteRequestLevel,
       voteValue = voteValue
     )
     dao = DaoContract(
-      poll = sp.some(poll),
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
       state = STATE_MACHINE_WAITING_FOR_BALANCE,
       tokenContractAddress = Addresses.TOKEN_CONTRACT_ADDRESS,
       votingState = sp.some(votingState)
@@ -2286,16 +4997,17 @@ if __name__ == "__main__":
     )
 
     # THEN the vote tallies are incremented.
-    scenario.verify(dao.data.poll.open_some().yayVotes == votingPower)
-    scenario.verify(dao.data.poll.open_some().nayVotes == sp.nat(0))
-    scenario.verify(dao.data.poll.open_some().abstainVotes == sp.nat(0))
-    scenario.verify(dao.data.poll.open_some().totalVotes == votingPower)
+    scenario.verify(dao.data.polls[sp.nat(0)].yayVotes == votingPower)
+    scenario.verify(dao.data.polls[sp.nat(0)].nayVotes == sp.nat(0))
+    scenario.verify(dao.data.polls[sp.nat(0)].abstainVotes == sp.nat(0))
+    scenario.verify(dao.data.polls[sp.nat(0)].totalVotes == votingPower)
 
     # AND the VOTER_ADDRESS was recorded with the correct metadata.
-    scenario.verify(dao.data.poll.open_some().voters.contains(Addresses.VOTER_ADDRESS))
-    scenario.verify(dao.data.poll.open_some().voters[Addresses.VOTER_ADDRESS].voteValue == voteValue)
-    scenario.verify(dao.data.poll.open_some().voters[Addresses.VOTER_ADDRESS].level == voteLevel)
-    scenario.verify(dao.data.poll.open_some().voters[Addresses.VOTER_ADDRESS].votes == votingPower)
+    voterKey = (sp.nat(0), Addresses.VOTER_ADDRESS)
+    scenario.verify(dao.data.voters.contains(voterKey))
+    scenario.verify(dao.data.voters[voterKey].yayVotes == votingPower)
+    scenario.verify(dao.data.voters[voterKey].level == voteLevel)
+    scenario.verify(dao.data.voters[voterKey].votes == votingPower)
 
     # AND the state machine is reset
     scenario.verify(dao.data.state == STATE_MACHINE_IDLE)
@@ -2308,35 +5020,42 @@ if __name__ == "__main__":
     # GIVEN a poll where the VOTER_ADDRESS has voted
     poll = sp.record(
       id = sp.nat(0),
-      proposal = sp.record(
-        title = 'title',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
       votingStartBlock = sp.nat(11),
       votingEndBlock = sp.nat(20),
       yayVotes = sp.nat(0),
       nayVotes = sp.nat(0),
       abstainVotes = sp.nat(0),
       totalVotes = sp.nat(0),
-      voters = {},
       author = Addresses.ALICE_ADDRESS,
       escrowAmount = sp.nat(50),
       quorum = sp.nat(100),
-      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99))
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
     )    
 
     # AND a dao contract with a nay vote
     voteRequestLevel = sp.nat(1)
     voteValue = VoteValue.NAY
     votingState = sp.record(
+      pollId = sp.nat(0),
       address = Addresses.VOTER_ADDRESS,
       level = voteRequestLevel,
       voteValue = voteValue
     )
     dao = DaoContract(
-      poll = sp.some(poll),
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
       state = STATE_MACHINE_WAITING_FOR_BALANCE,
       tokenContractAddress = Addresses.TOKEN_CONTRACT_ADDRESS,
       votingState = sp.some(votingState)
@@ -2357,16 +5076,17 @@ if __name__ == "__main__":
     )
 
     # THEN the vote tallies are incremented.
-    scenario.verify(dao.data.poll.open_some().yayVotes == sp.nat(0))
-    scenario.verify(dao.data.poll.open_some().nayVotes == votingPower)
-    scenario.verify(dao.data.poll.open_some().abstainVotes == sp.nat(0))
-    scenario.verify(dao.data.poll.open_some().totalVotes == votingPower)
+    scenario.verify(dao.data.polls[sp.nat(0)].yayVotes == sp.nat(0))
+    scenario.verify(dao.data.polls[sp.nat(0)].nayVotes == votingPower)
+    scenario.verify(dao.data.polls[sp.nat(0)].abstainVotes == sp.nat(0))
+    scenario.verify(dao.data.polls[sp.nat(0)].totalVotes == votingPower)
 
     # AND the VOTER_ADDRESS was recorded with the correct metadata.
-    scenario.verify(dao.data.poll.open_some().voters.contains(Addresses.VOTER_ADDRESS))
-    scenario.verify(dao.data.poll.open_some().voters[Addresses.VOTER_ADDRESS].voteValue == voteValue)
-    scenario.verify(dao.data.poll.open_some().voters[Addresses.VOTER_ADDRESS].level == voteLevel)
-    scenario.verify(dao.data.poll.open_some().voters[Addresses.VOTER_ADDRESS].votes == votingPower)
+    voterKey = (sp.nat(0), Addresses.VOTER_ADDRESS)
+    scenario.verify(dao.data.voters.contains(voterKey))
+    scenario.verify(dao.data.voters[voterKey].nayVotes == votingPower)
+    scenario.verify(dao.data.voters[voterKey].level == voteLevel)
+    scenario.verify(dao.data.voters[voterKey].votes == votingPower)
 
     # AND the state machine is reset
     scenario.verify(dao.data.state == STATE_MACHINE_IDLE)
@@ -2379,35 +5099,42 @@ if __name__ == "__main__":
     # GIVEN a poll where the VOTER_ADDRESS has voted
     poll = sp.record(
       id = sp.nat(0),
-      proposal = sp.record(
-        title = 'title',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
       votingStartBlock = sp.nat(11),
       votingEndBlock = sp.nat(20),
       yayVotes = sp.nat(0),
       nayVotes = sp.nat(0),
       abstainVotes = sp.nat(0),
       totalVotes = sp.nat(0),
-      voters = {},
       author = Addresses.ALICE_ADDRESS,
       escrowAmount = sp.nat(50),
       quorum = sp.nat(100),
-      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99))
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
     )    
 
     # AND a dao contract with an abstain vote
     voteRequestLevel = sp.nat(1)
     voteValue = VoteValue.ABSTAIN
     votingState = sp.record(
+      pollId = sp.nat(0),
       address = Addresses.VOTER_ADDRESS,
       level = voteRequestLevel,
       voteValue = voteValue
     )
     dao = DaoContract(
-      poll = sp.some(poll),
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
       state = STATE_MACHINE_WAITING_FOR_BALANCE,
       tokenContractAddress = Addresses.TOKEN_CONTRACT_ADDRESS,
       votingState = sp.some(votingState)
@@ -2428,21 +5155,102 @@ if __name__ == "__main__":
     )
 
     # THEN the vote tallies are incremented.
-    scenario.verify(dao.data.poll.open_some().yayVotes == sp.nat(0))
-    scenario.verify(dao.data.poll.open_some().nayVotes == sp.nat(0))
-    scenario.verify(dao.data.poll.open_some().abstainVotes == votingPower)
-    scenario.verify(dao.data.poll.open_some().totalVotes == votingPower)
+    scenario.verify(dao.data.polls[sp.nat(0)].yayVotes == sp.nat(0))
+    scenario.verify(dao.data.polls[sp.nat(0)].nayVotes == sp.nat(0))
+    scenario.verify(dao.data.polls[sp.nat(0)].abstainVotes == votingPower)
+    scenario.verify(dao.data.polls[sp.nat(0)].totalVotes == votingPower)
 
     # AND the VOTER_ADDRESS was recorded with the correct metadata.
-    scenario.verify(dao.data.poll.open_some().voters.contains(Addresses.VOTER_ADDRESS))
-    scenario.verify(dao.data.poll.open_some().voters[Addresses.VOTER_ADDRESS].voteValue == voteValue)
-    scenario.verify(dao.data.poll.open_some().voters[Addresses.VOTER_ADDRESS].level == voteLevel)
-    scenario.verify(dao.data.poll.open_some().voters[Addresses.VOTER_ADDRESS].votes == votingPower)
+    voterKey = (sp.nat(0), Addresses.VOTER_ADDRESS)
+    scenario.verify(dao.data.voters.contains(voterKey))
+    scenario.verify(dao.data.voters[voterKey].abstainVotes == votingPower)
+    scenario.verify(dao.data.voters[voterKey].level == voteLevel)
+    scenario.verify(dao.data.voters[voterKey].votes == votingPower)
 
     # AND the state machine is reset
     scenario.verify(dao.data.state == STATE_MACHINE_IDLE)
     scenario.verify(~dao.data.votingState.is_some())
 
+  ###############################################################
+  # getPollParticipation
+  ###############################################################
+
+  @sp.add_test(name="getPollParticipation - divides the votes by the supply when voting began")
+  def test():
+    scenario = sp.test_scenario()
+
+    # GIVEN a token contract
+    token = Token.FA12(
+      admin = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+    scenario += token
+
+    # AND 100 tokens are minted at level 2, 300 tokens at level 6 and 600 tokens at level 10
+    for (level, value) in [(2, 100), (6, 300), (10, 600)]:
+      scenario += token.mint(
+        sp.record(
+          address = Addresses.VOTER_ADDRESS,
+          value = sp.nat(value)
+        )
+      ).run(
+        sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        level = sp.nat(level)
+      )
+
+    # AND polls with 50 votes each, which started before the first mint, between mints and after the last mint
+    votingStartBlocks = [sp.nat(1), sp.nat(4), sp.nat(8), sp.nat(12)]
+    polls = {}
+    for pollId in range(len(votingStartBlocks)):
+      polls[sp.nat(pollId)] = sp.record(
+        id = sp.nat(pollId),
+        proposalHash = sp.bytes("0x00"),
+        title = "Prop 1",
+        descriptionHash = "xyz123",
+        votingStartBlock = votingStartBlocks[pollId],
+        votingEndBlock = votingStartBlocks[pollId] + 10,
+        yayVotes = sp.nat(50),
+        nayVotes = sp.nat(0),
+        abstainVotes = sp.nat(0),
+        totalVotes = sp.nat(50),
+        author = Addresses.ALICE_ADDRESS,
+        escrowAmount = sp.nat(50),
+        quorum = sp.nat(100),
+        quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+        minYayVotesPercentForEscrowReturn = sp.nat(20),
+        percentageForSuperMajority = sp.nat(80),
+        snapshotId = sp.none
+      )
+
+    # AND a dao contract holding the polls
+    dao = DaoContract(
+      polls = sp.big_map(
+        l = polls,
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set(list(polls.keys())),
+      tokenContractAddress = token.address,
+    )
+    scenario += dao
+
+    # AND the chain has moved past the start of every poll.
+    scenario += token.mint(
+      sp.record(
+        address = Addresses.ALICE_ADDRESS,
+        value = sp.nat(1)
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS,
+      level = sp.nat(20)
+    )
+
+    # WHEN participation is requested for each poll
+    # THEN a poll which started before any supply has no participation
+    # AND the other polls divide their votes by the supply at the level voting began, scaled by SCALE.
+    expected = [0, 50, 12, 5]
+    for pollId in range(len(expected)):
+      scenario.verify(sp.view("getPollParticipation", dao.address, sp.nat(pollId), t = sp.TNat).open_some() == expected[pollId])
+
   ###############################################################
   # executeTimelock
   ###############################################################
@@ -2453,13 +5261,13 @@ if __name__ == "__main__":
     
     # GIVEN a dao contract without an item in the timelock
     dao = DaoContract(
-      timelockItem = sp.none
+      timelockItems = sp.big_map(l = {}, tkey = sp.TNat, tvalue = TIMELOCK_ITEM_TYPE)
     )
     scenario += dao
 
     # WHEN executeTimelock is called
     # THEN the call fails.
-    scenario += dao.executeTimelock(sp.unit).run(
+    scenario += dao.executeTimelock(sp.nat(0)).run(
       valid = False
     )
   
@@ -2472,12 +5280,7 @@ if __name__ == "__main__":
     cancelBlock = sp.nat(20)
     timelockItem = sp.record(
       id = sp.nat(0),
-      proposal = sp.record(
-        title = 'timelocked prop',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      proposalHash = sp.bytes("0x00"),
       endBlock = endBlock,
       cancelBlock = cancelBlock,
       author = Addresses.ALICE_ADDRESS
@@ -2485,13 +5288,19 @@ if __name__ == "__main__":
 
     # AND a dao contract with the item.
     dao = DaoContract(
-      timelockItem = sp.some(timelockItem)
+      timelockItems = sp.big_map(
+        l = {
+          sp.nat(0): timelockItem
+        },
+        tkey = sp.TNat,
+        tvalue = TIMELOCK_ITEM_TYPE,
+      )
     )
     scenario += dao
 
     # WHEN executeTimelock is called before the endblock
     # THEN the call fails.
-    scenario += dao.executeTimelock(sp.unit).run(
+    scenario += dao.executeTimelock(sp.nat(0)).run(
       level = sp.as_nat(endBlock - 1),
       sender = Addresses.ALICE_ADDRESS,
       valid = False
@@ -2506,12 +5315,7 @@ if __name__ == "__main__":
     cancelBlock = sp.nat(20)
     timelockItem = sp.record(
       id = sp.nat(0),
-      proposal = sp.record(
-        title = 'timelocked prop',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      proposalHash = sp.bytes("0x00"),
       endBlock = endBlock,
       cancelBlock = cancelBlock,
       author = Addresses.ALICE_ADDRESS
@@ -2519,14 +5323,20 @@ if __name__ == "__main__":
 
     # AND a dao contract with the item.
     dao = DaoContract(
-      timelockItem = sp.some(timelockItem)
+      timelockItems = sp.big_map(
+        l = {
+          sp.nat(0): timelockItem
+        },
+        tkey = sp.TNat,
+        tvalue = TIMELOCK_ITEM_TYPE,
+      )
     )
     scenario += dao
 
     # WHEN executeTimelock is called by someone other than the author
     # THEN the call fails.
     notAuthor = Addresses.NULL_ADDRESS
-    scenario += dao.executeTimelock(sp.unit).run(
+    scenario += dao.executeTimelock(sp.nat(0)).run(
       level = endBlock + 1,
       sender = notAuthor,
       valid = False
@@ -2550,48 +5360,48 @@ if __name__ == "__main__":
     pollId = sp.nat(0)
     endBlock = sp.nat(10)
     cancelBlock = sp.nat(20)
+    proposal = sp.record(
+      title = 'timelocked prop',
+      descriptionLink = 'ipfs://xyz',
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([updateLambda])
+    )
     timelockItem = sp.record(
       id = pollId,
-      proposal = sp.record(
-        title = 'timelocked prop',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = updateLambda
-      ),
+      proposalHash = sp.bytes("0x00"),
       endBlock = endBlock,
       cancelBlock = cancelBlock,
       author = Addresses.ALICE_ADDRESS
     )
 
-    poll = sp.record(
-      id = pollId,
-      proposal = sp.record(
-        title = "timelocked prop",
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
-      votingStartBlock = sp.nat(1),
-      votingEndBlock = sp.nat(5),
-      yayVotes = sp.nat(100),
-      nayVotes = sp.nat(0),
-      abstainVotes = sp.nat(0),
-      totalVotes = sp.nat(100),
-      voters = {},
-      author = Addresses.ALICE_ADDRESS,
-      escrowAmount = sp.nat(2),
-      quorum = sp.nat(100),
-      quorumCap = sp.record(lower = sp.nat(0), upper = sp.nat(1000))
-    )
-
     # AND a dao contract with the item.
     dao = DaoContract(
-      timelockItem = sp.some(timelockItem),
+      timelockItems = sp.big_map(
+        l = {
+          pollId: timelockItem
+        },
+        tkey = sp.TNat,
+        tvalue = TIMELOCK_ITEM_TYPE,
+      ),
+      proposals = sp.big_map(
+        l = {
+          pollId: proposal
+        },
+        tkey = sp.TNat,
+        tvalue = Proposal.PROPOSAL_TYPE,
+      ),
       outcomes = sp.big_map(
         l = {
             pollId: sp.record(
               outcome = PollOutcomes.POLL_OUTCOME_IN_TIMELOCK,
-              poll = poll
+              title = "timelocked prop",
+              descriptionHash = "xyz123",
+              author = Addresses.ALICE_ADDRESS,
+              yayVotes = sp.nat(100),
+              nayVotes = sp.nat(0),
+              abstainVotes = sp.nat(0),
+              totalVotes = sp.nat(100),
+              quorum = sp.nat(100)
             )
         },
         tkey = sp.TNat,
@@ -2605,7 +5415,7 @@ if __name__ == "__main__":
 
     # WHEN executeTimelock is called by the author after the endBlock
     notAuthor = Addresses.NULL_ADDRESS
-    scenario += dao.executeTimelock(sp.unit).run(
+    scenario += dao.executeTimelock(pollId).run(
       level = endBlock + 1,
       sender = Addresses.ALICE_ADDRESS,
     )
@@ -2615,9 +5425,206 @@ if __name__ == "__main__":
 
     # AND the historical outcome is updated.
     scenario.verify(dao.data.outcomes[pollId].outcome == PollOutcomes.POLL_OUTCOME_EXECUTED)
+    scenario.verify(dao.data.outcomes[pollId].title == "timelocked prop")
 
     # AND the timelock is empty.
-    scenario.verify(~dao.data.timelockItem.is_some())
+    scenario.verify(~dao.data.timelockItems.contains(pollId))
+
+  @sp.add_test(name="executeTimelock - executes every action of a proposal in order")
+  def test():
+    scenario = sp.test_scenario()
+  
+    # GIVEN a store value contract.
+    storeContract = Store.StoreValueContract(value = 0, admin = Addresses.TOKEN_ADMIN_ADDRESS)
+    scenario += storeContract
+
+    # AND an item in the timelock whose proposal carries two actions
+    firstValue = sp.nat(5)
+    secondValue = sp.nat(7)
+    def firstLambda(unitParam):
+      sp.set_type(unitParam, sp.TUnit)
+      storeContractHandle = sp.contract(sp.TNat, storeContract.address, 'replace').open_some()
+      sp.result([sp.transfer_operation(firstValue, sp.mutez(0), storeContractHandle)])
+    def secondLambda(unitParam):
+      sp.set_type(unitParam, sp.TUnit)
+      storeContractHandle = sp.contract(sp.TNat, storeContract.address, 'replace').open_some()
+      sp.result([sp.transfer_operation(secondValue, sp.mutez(0), storeContractHandle)])
+
+    pollId = sp.nat(0)
+    endBlock = sp.nat(10)
+    proposal = sp.record(
+      title = 'timelocked prop',
+      descriptionLink = 'ipfs://xyz',
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([firstLambda, secondLambda])
+    )
+    timelockItem = sp.record(
+      id = pollId,
+      proposalHash = sp.bytes("0x00"),
+      endBlock = endBlock,
+      cancelBlock = sp.nat(20),
+      author = Addresses.ALICE_ADDRESS
+    )
+
+    # AND a dao contract with the item.
+    dao = DaoContract(
+      timelockItems = sp.big_map(
+        l = {
+          pollId: timelockItem
+        },
+        tkey = sp.TNat,
+        tvalue = TIMELOCK_ITEM_TYPE,
+      ),
+      proposals = sp.big_map(
+        l = {
+          pollId: proposal
+        },
+        tkey = sp.TNat,
+        tvalue = Proposal.PROPOSAL_TYPE,
+      ),
+      outcomes = sp.big_map(
+        l = {
+            pollId: sp.record(
+              outcome = PollOutcomes.POLL_OUTCOME_IN_TIMELOCK,
+              title = "timelocked prop",
+              descriptionHash = "xyz123",
+              author = Addresses.ALICE_ADDRESS,
+              yayVotes = sp.nat(100),
+              nayVotes = sp.nat(0),
+              abstainVotes = sp.nat(0),
+              totalVotes = sp.nat(100),
+              quorum = sp.nat(100)
+            )
+        },
+        tkey = sp.TNat,
+        tvalue = HistoricalOutcomes.HISTORICAL_OUTCOME_TYPE,
+      )
+    )
+    scenario += dao
+
+    # AND the store contract has the dao as the admin.
+    scenario += storeContract.setAdmin(dao.address)
+
+    # WHEN executeTimelock is called by the author after the endBlock
+    scenario += dao.executeTimelock(pollId).run(
+      level = endBlock + 1,
+      sender = Addresses.ALICE_ADDRESS,
+    )
+
+    # THEN both actions ran, in the order they were proposed.
+    scenario.verify(storeContract.data.storedValue == secondValue)
+    scenario.verify(dao.data.outcomes[pollId].outcome == PollOutcomes.POLL_OUTCOME_EXECUTED)
+
+  @sp.add_test(name="executeTimelock - items in the timelock are executed independently")
+  def test():
+    scenario = sp.test_scenario()
+  
+    # GIVEN a store value contract.
+    storeContract = Store.StoreValueContract(value = 0, admin = Addresses.TOKEN_ADMIN_ADDRESS)
+    scenario += storeContract
+
+    # AND two proposals in the timelock, where the later poll has the earlier endBlock
+    def makeProposal(title, newValue):
+      def updateLambda(unitParam):
+        sp.set_type(unitParam, sp.TUnit)
+        storeContractHandle = sp.contract(sp.TNat, storeContract.address, 'replace').open_some()
+        sp.result([sp.transfer_operation(newValue, sp.mutez(0), storeContractHandle)])
+      return sp.record(
+        title = title,
+        descriptionLink = 'ipfs://xyz',
+        descriptionHash = "xyz123",
+        proposalLambdas = sp.list([updateLambda])
+      )
+
+    def makeOutcome(title):
+      return sp.record(
+        outcome = PollOutcomes.POLL_OUTCOME_IN_TIMELOCK,
+        title = title,
+        descriptionHash = "xyz123",
+        author = Addresses.ALICE_ADDRESS,
+        yayVotes = sp.nat(100),
+        nayVotes = sp.nat(0),
+        abstainVotes = sp.nat(0),
+        totalVotes = sp.nat(100),
+        quorum = sp.nat(100)
+      )
+
+    firstPollId = sp.nat(0)
+    firstEndBlock = sp.nat(20)
+    secondPollId = sp.nat(1)
+    secondEndBlock = sp.nat(10)
+    dao = DaoContract(
+      timelockItems = sp.big_map(
+        l = {
+          firstPollId: sp.record(
+            id = firstPollId,
+            proposalHash = sp.bytes("0x00"),
+            endBlock = firstEndBlock,
+            cancelBlock = sp.nat(30),
+            author = Addresses.ALICE_ADDRESS
+          ),
+          secondPollId: sp.record(
+            id = secondPollId,
+            proposalHash = sp.bytes("0x01"),
+            endBlock = secondEndBlock,
+            cancelBlock = sp.nat(30),
+            author = Addresses.ALICE_ADDRESS
+          ),
+        },
+        tkey = sp.TNat,
+        tvalue = TIMELOCK_ITEM_TYPE,
+      ),
+      proposals = sp.big_map(
+        l = {
+          firstPollId: makeProposal("first prop", sp.nat(1)),
+          secondPollId: makeProposal("second prop", sp.nat(2)),
+        },
+        tkey = sp.TNat,
+        tvalue = Proposal.PROPOSAL_TYPE,
+      ),
+      outcomes = sp.big_map(
+        l = {
+          firstPollId: makeOutcome("first prop"),
+          secondPollId: makeOutcome("second prop"),
+        },
+        tkey = sp.TNat,
+        tvalue = HistoricalOutcomes.HISTORICAL_OUTCOME_TYPE,
+      )
+    )
+    scenario += dao
+
+    # AND the store contract has the dao as the admin.
+    scenario += storeContract.setAdmin(dao.address)
+
+    # WHEN the second item is executed before the first item's endBlock
+    scenario += dao.executeTimelock(secondPollId).run(
+      level = secondEndBlock + 1,
+      sender = Addresses.ALICE_ADDRESS,
+    )
+
+    # THEN the second proposal executed and left the timelock
+    scenario.verify(storeContract.data.storedValue == 2)
+    scenario.verify(dao.data.outcomes[secondPollId].outcome == PollOutcomes.POLL_OUTCOME_EXECUTED)
+    scenario.verify(~dao.data.timelockItems.contains(secondPollId))
+
+    # AND the first item is still waiting out its own window.
+    scenario.verify(dao.data.timelockItems.contains(firstPollId))
+    scenario += dao.executeTimelock(firstPollId).run(
+      level = secondEndBlock + 1,
+      sender = Addresses.ALICE_ADDRESS,
+      valid = False
+    )
+
+    # WHEN the first item is executed after its endBlock
+    scenario += dao.executeTimelock(firstPollId).run(
+      level = firstEndBlock + 1,
+      sender = Addresses.ALICE_ADDRESS,
+    )
+
+    # THEN the first proposal executed and the timelock is empty.
+    scenario.verify(storeContract.data.storedValue == 1)
+    scenario.verify(dao.data.outcomes[firstPollId].outcome == PollOutcomes.POLL_OUTCOME_EXECUTED)
+    scenario.verify(~dao.data.timelockItems.contains(firstPollId))
 
   ################################################################
   # cancelTimelock
@@ -2629,13 +5636,13 @@ if __name__ == "__main__":
     
     # GIVEN a dao contract without an item in the timelock
     dao = DaoContract(
-      timelockItem = sp.none
+      timelockItems = sp.big_map(l = {}, tkey = sp.TNat, tvalue = TIMELOCK_ITEM_TYPE)
     )
     scenario += dao
 
     # WHEN cancelTimelock is called
     # THEN the call fails.
-    scenario += dao.cancelTimelock(sp.unit).run(
+    scenario += dao.cancelTimelock(sp.nat(0)).run(
       valid = False
     )
   
@@ -2648,12 +5655,7 @@ if __name__ == "__main__":
     cancelBlock = sp.nat(20)
     timelockItem = sp.record(
       id = sp.nat(0), 
-      proposal = sp.record(
-        title = 'timelocked prop',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      proposalHash = sp.bytes("0x00"),
       endBlock = endBlock,
       cancelBlock = cancelBlock,
       author = Addresses.ALICE_ADDRESS
@@ -2661,13 +5663,19 @@ if __name__ == "__main__":
 
     # AND a dao contract with the item.
     dao = DaoContract(
-      timelockItem = sp.some(timelockItem)
+      timelockItems = sp.big_map(
+        l = {
+          sp.nat(0): timelockItem
+        },
+        tkey = sp.TNat,
+        tvalue = TIMELOCK_ITEM_TYPE,
+      )
     )
     scenario += dao
 
     # WHEN cancelTimelock is called before the cancelBlock
     # THEN the call fails.
-    scenario += dao.cancelTimelock(sp.unit).run(
+    scenario += dao.cancelTimelock(sp.nat(0)).run(
       level = sp.as_nat(cancelBlock - 1),
       valid = False
     )
@@ -2682,46 +5690,33 @@ if __name__ == "__main__":
     pollId = sp.nat(0)
     timelockItem = sp.record(
       id = pollId,
-      proposal = sp.record(
-        title = 'timelocked prop',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      proposalHash = sp.bytes("0x00"),
       endBlock = endBlock,
       cancelBlock = cancelBlock,
       author = Addresses.ALICE_ADDRESS
     )
 
-    poll = sp.record(
-      id = pollId,
-      proposal = sp.record(
-        title = "timelocked prop",
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
-      votingStartBlock = sp.nat(1),
-      votingEndBlock = sp.nat(5),
-      yayVotes = sp.nat(100),
-      nayVotes = sp.nat(0),
-      abstainVotes = sp.nat(0),
-      totalVotes = sp.nat(100),
-      voters = {},
-      author = Addresses.ALICE_ADDRESS,
-      escrowAmount = sp.nat(2),
-      quorum = sp.nat(100),
-      quorumCap = sp.record(lower = sp.nat(0), upper = sp.nat(1000))
-    )
-
     # AND a dao contract with the item.
     dao = DaoContract(
-      timelockItem = sp.some(timelockItem),
+      timelockItems = sp.big_map(
+        l = {
+          pollId: timelockItem
+        },
+        tkey = sp.TNat,
+        tvalue = TIMELOCK_ITEM_TYPE,
+      ),
       outcomes = sp.big_map(
         l = {
             pollId: sp.record(
               outcome = PollOutcomes.POLL_OUTCOME_IN_TIMELOCK,
-              poll = poll
+              title = "timelocked prop",
+              descriptionHash = "xyz123",
+              author = Addresses.ALICE_ADDRESS,
+              yayVotes = sp.nat(100),
+              nayVotes = sp.nat(0),
+              abstainVotes = sp.nat(0),
+              totalVotes = sp.nat(100),
+              quorum = sp.nat(100)
             )
         },
         tkey = sp.TNat,
@@ -2731,7 +5726,7 @@ if __name__ == "__main__":
     scenario += dao
 
     # WHEN cancelTimelock is called at the cancelBlock
-    scenario += dao.cancelTimelock(sp.unit).run(
+    scenario += dao.cancelTimelock(pollId).run(
       level = cancelBlock
     )    
 
@@ -2739,7 +5734,7 @@ if __name__ == "__main__":
     scenario.verify(dao.data.outcomes[pollId].outcome == PollOutcomes.POLL_OUTCOME_CANCELLED)
 
     # THEN the item is removed.
-    scenario.verify(~dao.data.timelockItem.is_some())
+    scenario.verify(~dao.data.timelockItems.contains(pollId))
 
   ################################################################
   # setParameters
@@ -2867,4 +5862,81 @@ if __name__ == "__main__":
       valid = False
     )
 
+  ################################################################
+  # setMaxActivePolls
+  ################################################################
+
+  @sp.add_test(name="setMaxActivePolls - can set the maximum number of active polls")
+  def test():
+    scenario = sp.test_scenario()
+
+    # GIVEN a dao contract which allows one poll at a time.
+    dao = DaoContract(
+      maxActivePolls = sp.nat(1)
+    )
+    scenario += dao
+
+    # WHEN the DAO allows more polls
+    newMaxActivePolls = sp.nat(3)
+    scenario += dao.setMaxActivePolls(newMaxActivePolls).run(
+      sender = dao.address
+    )
+
+    # THEN the maximum is set.
+    scenario.verify(dao.data.maxActivePolls == newMaxActivePolls)
+
+  @sp.add_test(name="setMaxActivePolls - fails if not called by dao")
+  def test():
+    scenario = sp.test_scenario()
+
+    # GIVEN a dao contract.
+    dao = DaoContract()
+    scenario += dao
+
+    # WHEN someone other than the DAO sets the maximum
+    # THEN the call fails.
+    notDao = Addresses.NULL_ADDRESS
+    scenario += dao.setMaxActivePolls(sp.nat(3)).run(
+      sender = notDao,
+      valid = False
+    )
+
+  ################################################################
+  # setUseBalanceCallback
+  ################################################################
+
+  @sp.add_test(name="setUseBalanceCallback - can enable balance callbacks")
+  def test():
+    scenario = sp.test_scenario()
+
+    # GIVEN a dao contract which reads balances through on-chain views.
+    dao = DaoContract(
+      useBalanceCallback = False
+    )
+    scenario += dao
+
+    # WHEN the DAO enables balance callbacks
+    scenario += dao.setUseBalanceCallback(True).run(
+      sender = dao.address
+    )
+
+    # THEN the flag is set.
+    scenario.verify(dao.data.useBalanceCallback == True)
+
+  @sp.add_test(name="setUseBalanceCallback - fails if not called by dao")
+  def test():
+    scenario = sp.test_scenario()
+
+    # GIVEN a dao contract.
+    dao = DaoContract()
+    scenario += dao
+
+    # WHEN someone other than the DAO sets the flag
+    # THEN the call fails.
+    notDao = Addresses.NULL_ADDRESS
+    scenario += dao.setUseBalanceCallback(True).run(
+      sender = notDao,
+      valid = False
+    )
+
   sp.add_compilation_target("dao", DaoContract())
@@ -0,0 +1,58 @@
+import smartpy as sp
+
+# Helpers which count the checkpoints a lookup reads in a seeded history, where the checkpoint at index i is from
+# level 2 * (i + 1). Tests seed only these checkpoints, so a lookup which reads any other checkpoint fails.
+
+# Returns the indices of the checkpoints which findPriorCheckpoint reads to find the level in a seeded history,
+# stepping backwards from the most recent checkpoint, or forwards from the hint if one is given.
+def gallopingProbes(numCheckpoints, level, hint = None):
+  fromBlock = lambda i: 2 * (i + 1)
+  probes = set()
+  upper = numCheckpoints - 1
+  lower = 0
+  stride = 1
+  if hint is None:
+    while upper > stride:
+      probes.add(upper - stride)
+      if fromBlock(upper - stride) <= level:
+        lower = upper - stride
+        break
+      upper = upper - stride
+      stride = stride * 2
+    if lower == 0 and upper > 0:
+      probes.add(0)
+      if fromBlock(0) > level:
+        return probes
+  else:
+    lower = hint
+    while upper > lower + stride:
+      probes.add(lower + stride)
+      if fromBlock(lower + stride) <= level:
+        lower = lower + stride
+        stride = stride * 2
+      else:
+        upper = lower + stride
+        break
+  return probes | bisectionProbes(fromBlock, lower, upper - 1, level)
+
+# Returns the indices of the checkpoints which a plain binary search over the whole history reads to find the
+# level in a seeded history, after checking the first checkpoint.
+def binarySearchProbes(numCheckpoints, level):
+  fromBlock = lambda i: 2 * (i + 1)
+  return set([0]) | bisectionProbes(fromBlock, 0, numCheckpoints - 2, level)
+
+# Returns the indices a bisection of [lower, upper] reads, including the read of the checkpoint it returns.
+def bisectionProbes(fromBlock, lower, upper, level):
+  probes = set()
+  while upper > lower:
+    center = upper - (upper - lower) // 2
+    probes.add(center)
+    if fromBlock(center) == level:
+      lower = center
+      break
+    elif fromBlock(center) < level:
+      lower = center
+    else:
+      upper = center - 1
+  probes.add(lower)
+  return probes
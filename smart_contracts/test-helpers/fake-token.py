@@ -9,7 +9,7 @@ class FakeTokenContract(sp.Contract):
   def default(self, params):
     pass
 
-  @sp.view(sp.TRecord(result = sp.TNat, address = sp.TAddress, level = sp.TNat))
+  @sp.utils.view(sp.TRecord(result = sp.TNat, address = sp.TAddress, level = sp.TNat))
   def getPriorBalance(self, params):
     sp.set_type(params, sp.TRecord(
       address = sp.TAddress,
@@ -23,3 +23,21 @@ class FakeTokenContract(sp.Contract):
         level = params.level,
       )
     )
+
+  @sp.onchain_view(name = "getPriorBalance")
+  def getPriorBalanceOnChain(self, params):
+    sp.set_type(params, sp.TRecord(
+      address = sp.TAddress,
+      level = sp.TNat,
+    ).layout(("address", "level")))
+
+    sp.result(self.data.result)
+
+  @sp.onchain_view(name = "getPriorVotes")
+  def getPriorVotesOnChain(self, params):
+    sp.set_type(params, sp.TRecord(
+      address = sp.TAddress,
+      level = sp.TNat,
+    ).layout(("address", "level")))
+
+    sp.result(self.data.result)
@@ -11,13 +11,88 @@ import smartpy as sp
 
 Addresses = sp.import_script_from_url("file:test-helpers/addresses.py")
 Errors = sp.import_script_from_url("file:common/errors.py")
+Permit = sp.import_script_from_url("file:common/permit.py")
+
+# CHANGED: Add a type for checkpoints of balances and of voting power.
+# The cumulative value is the sum of the balance at the end of every block before fromBlock, so that the
+# average balance over any window can be computed from two lookups.
+CHECKPOINT_TYPE = sp.TRecord(fromBlock = sp.TNat, balance = sp.TNat, cumulative = sp.TNat).layout(("fromBlock", ("balance", "cumulative")))
+
+# CHANGED: Add a type for the most recent checkpoint of an address.
+# The index is the checkpoint's position in the address' history. 
+LATEST_CHECKPOINT_TYPE = sp.TRecord(index = sp.TNat, fromBlock = sp.TNat, balance = sp.TNat, cumulative = sp.TNat).layout(("index", ("fromBlock", ("balance", "cumulative"))))
+
+# CHANGED: Add a snapshot type.
+# A snapshot of balances at the end of a block level, which may be read until the expiry level (inclusive).
+SNAPSHOT_TYPE = sp.TRecord(level = sp.TNat, expiry = sp.TNat).layout(("level", "expiry"))
+
+# CHANGED: Add a type for requests to compact the checkpoints of an address before a block level.
+COMPACT_TYPE = sp.TRecord(address = sp.TAddress, beforeLevel = sp.TNat).layout(("address", "beforeLevel"))
 
 # CHANGED: Compress the contract into a single entity, rather than using inheritance.
 class FA12(sp.Contract):
     def __init__(
         self, 
         # CHANGED: Give admin a default value
-        admin = Addresses.TOKEN_ADMIN_ADDRESS
+        admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        # CHANGED: Allow checkpoint and snapshot storage to be overridden in tests.
+        checkpoints = sp.big_map(
+            l = {},
+            tkey = sp.TPair(sp.TAddress, sp.TNat),
+            tvalue = CHECKPOINT_TYPE
+        ),
+        latestCheckpoint = sp.big_map(
+            l = {},
+            tkey = sp.TAddress,
+            tvalue = LATEST_CHECKPOINT_TYPE
+        ),
+        voteCheckpoints = sp.big_map(
+            l = {},
+            tkey = sp.TPair(sp.TAddress, sp.TNat),
+            tvalue = CHECKPOINT_TYPE
+        ),
+        latestVoteCheckpoint = sp.big_map(
+            l = {},
+            tkey = sp.TAddress,
+            tvalue = LATEST_CHECKPOINT_TYPE
+        ),
+        snapshots = sp.big_map(
+            l = {},
+            tkey = sp.TNat,
+            tvalue = SNAPSHOT_TYPE
+        ),
+        snapshotVotes = sp.big_map(
+            l = {},
+            tkey = sp.TPair(sp.TAddress, sp.TNat),
+            tvalue = sp.TNat
+        ),
+        supplyCheckpoints = sp.big_map(
+            l = {},
+            tkey = sp.TPair(sp.TAddress, sp.TNat),
+            tvalue = CHECKPOINT_TYPE
+        ),
+        latestSupplyCheckpoint = sp.big_map(
+            l = {},
+            tkey = sp.TAddress,
+            tvalue = LATEST_CHECKPOINT_TYPE
+        ),
+        checkpointBases = sp.big_map(
+            l = {},
+            tkey = sp.TAddress,
+            tvalue = sp.TNat
+        ),
+        voteCheckpointBases = sp.big_map(
+            l = {},
+            tkey = sp.TAddress,
+            tvalue = sp.TNat
+        ),
+        nextSnapshotId = sp.nat(0),
+        snapshotter = sp.none,
+        # CHANGED: Allow the number of levels of history kept when checkpoints are compacted to be set. The default
+        # is about a week of blocks, which is longer than a poll reads balances for.
+        checkpointRetention = sp.nat(20160),
+        # CHANGED: Allow the lifetime of permits to be set, in seconds.
+        permitExpiry = sp.nat(86400)
     ):
         # CHANGED: Construct token metadata.
         token_id = sp.nat(0)
@@ -56,22 +131,59 @@ class FA12(sp.Contract):
                 tkey = sp.TAddress,
                 tvalue = sp.TNat,
             ),
+            # CHANGED: Key approvals by (owner, spender), so that spending an approval does not load every
+            # approval of the owner. Approvals of zero are not stored.
             approvals = sp.big_map(
-                tkey = sp.TAddress,
-                tvalue = sp.TMap(sp.TAddress, sp.TNat)
-            ),
-            # CHANGED: Add Checkpoints
-            checkpoints = sp.big_map(
-                l = {},
-                tkey = sp.TPair(sp.TAddress, sp.TNat),
-                tvalue = sp.TRecord(fromBlock = sp.TNat, balance = sp.TNat).layout(("fromBlock", "balance"))
+                tkey = sp.TPair(sp.TAddress, sp.TAddress),
+                tvalue = sp.TNat
             ),
-            # CHANGED: Add numCheckpoints
-            numCheckpoints = sp.big_map(
-                l = {},
+            # CHANGED: Add Checkpoints. The most recent checkpoint of an address is only appended here once a
+            # newer checkpoint replaces it in latestCheckpoint.
+            checkpoints = checkpoints,
+            # CHANGED: Add the most recent checkpoint of each address, so that balance changes read it once.
+            latestCheckpoint = latestCheckpoint,
+            # CHANGED: Add the delegate of each address which has delegated its voting power. Addresses which
+            # have not delegated vote with their own balance.
+            delegates = sp.big_map(
                 tkey = sp.TAddress,
-                tvalue = sp.TNat
+                tvalue = sp.TAddress
             ),
+            # CHANGED: Add checkpoints of voting power, in the same format as checkpoints. The voting power of an
+            # address is the sum of the balances of every address whose delegate it is.
+            voteCheckpoints = voteCheckpoints,
+            # CHANGED: Add the most recent checkpoint of the voting power of each address.
+            latestVoteCheckpoint = latestVoteCheckpoint,
+            # CHANGED: Add checkpoints of the total supply, in the same format as checkpoints. The supply is
+            # checkpointed under the token's own address, so it shares the write and search paths of balances.
+            supplyCheckpoints = supplyCheckpoints,
+            # CHANGED: Add the most recent checkpoint of the total supply.
+            latestSupplyCheckpoint = latestSupplyCheckpoint,
+            # CHANGED: Add the index of the first checkpoint kept for each address whose checkpoints were compacted.
+            # Checkpoints before it were removed, and addresses which were never compacted start at 0.
+            checkpointBases = checkpointBases,
+            # CHANGED: Add the index of the first checkpoint of voting power kept for each address.
+            voteCheckpointBases = voteCheckpointBases,
+            # CHANGED: Add the number of levels before the current level at which checkpoints may not be compacted.
+            checkpointRetention = checkpointRetention,
+            # CHANGED: Add snapshots, keyed by snapshot ID.
+            snapshots = snapshots,
+            # CHANGED: Add voting power at each snapshot, keyed by (address, snapshot ID). Voting power is only
+            # written on the first change to the voting power of an address after the snapshot's level.
+            snapshotVotes = snapshotVotes,
+            # CHANGED: Add the next unused snapshot ID.
+            nextSnapshotId = nextSnapshotId,
+            # CHANGED: Add the address allowed to take snapshots. 
+            snapshotter = snapshotter,
+            # CHANGED: Add permits, keyed by (owner, hash of the permitted spender and parameters). Each value is
+            # the time the permit expires.
+            permits = sp.big_map(
+                tkey = sp.TPair(sp.TAddress, sp.TBytes),
+                tvalue = sp.TTimestamp
+            ),
+            # CHANGED: Add a counter which is signed with each permit, so that a signature can only be used once.
+            permitCounter = sp.nat(0),
+            # CHANGED: Add the lifetime of a permit, in seconds.
+            permitExpiry = permitExpiry,
             # CHANGED: Allow minting to be disabled.
             mintingDisabled = False,
             # CHANGED: Include metadata and token_metadata bigmap in storage.
@@ -104,166 +216,717 @@ class FA12(sp.Contract):
 
         self.data.token_metadata[0] = params
         
-    # CHANGED: Add method to write checkpoints.
+    # CHANGED: Add method to write checkpoints of balances.
     @sp.sub_entry_point
     def writeCheckpoint(self, params):
-        sp.set_type(params, sp.TRecord(checkpointedAddress = sp.TAddress, numCheckpoints = sp.TNat, newBalance = sp.TNat).layout(("checkpointedAddress", ("numCheckpoints", "newBalance"))))
+        sp.set_type(params, sp.TRecord(checkpointedAddress = sp.TAddress, latestCheckpoint = sp.TOption(LATEST_CHECKPOINT_TYPE), newBalance = sp.TNat).layout(("checkpointedAddress", ("latestCheckpoint", "newBalance"))))
+
+        self.appendCheckpoint(self.data.checkpoints, self.data.latestCheckpoint, params)
+
+    # CHANGED: Add method to write checkpoints of voting power.
+    @sp.sub_entry_point
+    def writeVoteCheckpoint(self, params):
+        sp.set_type(params, sp.TRecord(checkpointedAddress = sp.TAddress, latestCheckpoint = sp.TOption(LATEST_CHECKPOINT_TYPE), newBalance = sp.TNat).layout(("checkpointedAddress", ("latestCheckpoint", "newBalance"))))
+
+        # CHANGED: Before the voting power changes, save it for any snapshots taken since the last change.
+        sp.if self.data.nextSnapshotId > 0:
+            oldVotes = sp.local('oldVotes', sp.nat(0))
+            sp.if params.latestCheckpoint.is_some():
+                oldVotes.value = params.latestCheckpoint.open_some().balance
+
+            # Walk snapshots from newest to oldest. Snapshot levels and expiries never decrease, so once
+            # a snapshot is found that is expired or already written, all older snapshots are as well.
+            snapshotId = sp.local('snapshotId', self.data.nextSnapshotId)
+            searching = sp.local('searching', True)
+            sp.while searching.value & (snapshotId.value > 0):
+                snapshotId.value = sp.as_nat(snapshotId.value - 1)
+                snapshot = self.data.snapshots[snapshotId.value]
+
+                # Skip snapshots whose level has not yet passed. 
+                sp.if snapshot.level < sp.level:
+                    sp.if (snapshot.expiry < sp.level) | self.data.snapshotVotes.contains((params.checkpointedAddress, snapshotId.value)):
+                        searching.value = False
+                    sp.else:
+                        self.data.snapshotVotes[(params.checkpointedAddress, snapshotId.value)] = oldVotes.value
+
+        self.appendCheckpoint(self.data.voteCheckpoints, self.data.latestVoteCheckpoint, params)
 
-        # If there are no checkpoints, write data.
-        sp.if params.numCheckpoints == 0:
-            self.data.checkpoints[(params.checkpointedAddress, 0)] = sp.record(fromBlock = sp.level, balance = params.newBalance)
-            self.data.numCheckpoints[params.checkpointedAddress] = params.numCheckpoints + 1
+    # CHANGED: Add a helper which records a new value in the given checkpoints.
+    # Shared by the checkpoints of balances, of voting power and of the total supply.
+    def appendCheckpoint(self, checkpoints, latestCheckpoints, params):
+        # If there are no checkpoints, write data. The balance was zero before the first checkpoint.
+        sp.if ~params.latestCheckpoint.is_some():
+            latestCheckpoints[params.checkpointedAddress] = sp.record(index = 0, fromBlock = sp.level, balance = params.newBalance, cumulative = 0)
         sp.else:
+            latestCheckpoint = params.latestCheckpoint.open_some()
+
             # Otherwise, if this update occurred in the same block, overwrite
-            sp.if self.data.checkpoints[(params.checkpointedAddress, sp.as_nat(params.numCheckpoints - 1))].fromBlock == sp.level: 
-                self.data.checkpoints[(params.checkpointedAddress, sp.as_nat(params.numCheckpoints - 1))] = sp.record(fromBlock = sp.level, balance = params.newBalance)
+            sp.if latestCheckpoint.fromBlock == sp.level: 
+                latestCheckpoints[params.checkpointedAddress] = sp.record(index = latestCheckpoint.index, fromBlock = sp.level, balance = params.newBalance, cumulative = latestCheckpoint.cumulative)
             sp.else:
-                # Only write an additional checkpoint if the balance has changed.
-                sp.if self.data.checkpoints[(params.checkpointedAddress, sp.as_nat(params.numCheckpoints - 1))].balance != params.newBalance:
-                    self.data.checkpoints[(params.checkpointedAddress, params.numCheckpoints)] = sp.record(fromBlock = sp.level, balance = params.newBalance)
-                    self.data.numCheckpoints[params.checkpointedAddress] = params.numCheckpoints + 1
-      
+                # Only write an additional checkpoint if the balance has changed. The previous checkpoint is final
+                # once the block changes, so it is appended to the history. The previous balance was held for
+                # every block since the previous checkpoint, so it is added to the cumulative value once.
+                sp.if latestCheckpoint.balance != params.newBalance:
+                    checkpoints[(params.checkpointedAddress, latestCheckpoint.index)] = sp.record(fromBlock = latestCheckpoint.fromBlock, balance = latestCheckpoint.balance, cumulative = latestCheckpoint.cumulative)
+                    latestCheckpoints[params.checkpointedAddress] = sp.record(
+                        index = latestCheckpoint.index + 1,
+                        fromBlock = sp.level,
+                        balance = params.newBalance,
+                        cumulative = latestCheckpoint.cumulative + latestCheckpoint.balance * sp.as_nat(sp.level - latestCheckpoint.fromBlock)
+                    )
+
+    # CHANGED: Add a helper which returns the address which votes with the balance of an address.
+    def delegateOf(self, address):
+        return self.data.delegates.get(address, address)
+
+    # CHANGED: Add a helper which moves voting power between two delegates. Each delegate's voting power is
+    # read and written once, regardless of how many addresses have delegated to it.
+    def moveVotes(self, fromDelegate, toDelegate, value):
+        sp.if (fromDelegate != toDelegate) & (value > 0):
+            self.writeVoteCheckpoint(
+                sp.record(
+                    checkpointedAddress = fromDelegate,
+                    latestCheckpoint = self.data.latestVoteCheckpoint.get_opt(fromDelegate),
+                    newBalance = sp.as_nat(self.currentVotes(fromDelegate) - value)
+                )
+            )
+            self.increaseVotes(toDelegate, value)
+
+    # CHANGED: Add a helper which adds voting power to a delegate.
+    def increaseVotes(self, delegate, value):
+        self.writeVoteCheckpoint(
+            sp.record(
+                checkpointedAddress = delegate,
+                latestCheckpoint = self.data.latestVoteCheckpoint.get_opt(delegate),
+                newBalance = self.currentVotes(delegate) + value
+            )
+        )
+
+    # CHANGED: Add a helper which returns the current voting power of an address.
+    def currentVotes(self, address):
+        return self.data.latestVoteCheckpoint.get(address, sp.record(index = 0, fromBlock = 0, balance = 0, cumulative = 0)).balance
+
+    # CHANGED: Allow an address to delegate its voting power. Delegating to oneself removes the delegation.
+    @sp.entry_point
+    def delegate(self, params):
+        sp.set_type(params, sp.TAddress)
+        sp.verify(~self.is_paused(), Errors.ERROR_PAUSED)
+
+        currentDelegate = sp.local('currentDelegate', self.delegateOf(sp.sender))
+        sp.if params == sp.sender:
+            del self.data.delegates[sp.sender]
+        sp.else:
+            self.data.delegates[sp.sender] = params
+
+        self.moveVotes(currentDelegate.value, params, self.data.balances.get(sp.sender, sp.nat(0)))
+
+    # CHANGED: Add an on-chain view of the address which votes with the balance of an address.
+    @sp.onchain_view()
+    def getDelegate(self, params):
+        sp.set_type(params, sp.TAddress)
+        sp.result(self.delegateOf(params))
+
+    # CHANGED: Add an on-chain view of the current voting power of an address.
+    @sp.onchain_view()
+    def getCurrentVotes(self, params):
+        sp.set_type(params, sp.TAddress)
+        sp.result(self.currentVotes(params))
+
+    # CHANGED: Add an on-chain view of the voting power of an address at a level.
+    @sp.onchain_view()
+    def getPriorVotes(self, params):
+        sp.set_type(params, sp.TRecord(
+            address = sp.TAddress,
+            level = sp.TNat,
+        ).layout(("address", "level")))
+
+        sp.result(self.findPriorCheckpoint(self.data.voteCheckpoints, self.data.latestVoteCheckpoint, params.address, params.level, self.data.voteCheckpointBases).balance)
+
     # CHANGED: Add view to get balance from checkpoints
-    @sp.view(sp.TRecord(result = sp.TNat, address = sp.TAddress, level = sp.TNat))
+    @sp.utils.view(sp.TRecord(result = sp.TNat, address = sp.TAddress, level = sp.TNat))
     def getPriorBalance(self, params):
         sp.set_type(params, sp.TRecord(
             address = sp.TAddress,
             level = sp.TNat,
         ).layout(("address", "level")))
 
-        sp.verify(params.level < sp.level, Errors.ERROR_BLOCK_LEVEL_TOO_SOON)
+        sp.result(sp.record(
+            result = self.findPriorCheckpoint(self.data.checkpoints, self.data.latestCheckpoint, params.address, params.level, self.data.checkpointBases).balance,
+            address = params.address,
+            level = params.level
+        ))
 
-        # If there are no checkpoints, return 0.
-        sp.if self.data.numCheckpoints.get(params.address, 0) == 0:
-            sp.result(sp.record(result = 0, address = params.address, level = params.level))
-        sp.else:
+    # CHANGED: Expose the prior balance as an on-chain view so that callers can read it synchronously.
+    @sp.onchain_view(name = "getPriorBalance")
+    def getPriorBalanceOnChain(self, params):
+        sp.set_type(params, sp.TRecord(
+            address = sp.TAddress,
+            level = sp.TNat,
+        ).layout(("address", "level")))
+
+        sp.result(self.findPriorCheckpoint(self.data.checkpoints, self.data.latestCheckpoint, params.address, params.level, self.data.checkpointBases).balance)
+
+    # CHANGED: Add an on-chain view of the balances of many addresses at a level. Balances are returned in the order
+    # of the addresses.
+    @sp.onchain_view()
+    def getPriorBalances(self, params):
+        sp.set_type(params, sp.TRecord(
+            addresses = sp.TList(sp.TAddress),
+            level = sp.TNat,
+        ).layout(("addresses", "level")))
+
+        balances = sp.local('balances', sp.list(l = [], t = sp.TNat))
+        sp.for address in params.addresses:
+            balances.value.push(self.findPriorCheckpoint(self.data.checkpoints, self.data.latestCheckpoint, address, params.level, self.data.checkpointBases).balance)
+        sp.result(balances.value.rev())
+
+    # CHANGED: Add an on-chain view of the balances of an address at a list of levels, which must be in ascending
+    # order. Balances are returned in the order of the levels.
+    @sp.onchain_view()
+    def getPriorBalanceHistory(self, params):
+        sp.set_type(params, sp.TRecord(
+            address = sp.TAddress,
+            levels = sp.TList(sp.TNat),
+        ).layout(("address", "levels")))
+
+        sp.result(self.findPriorCheckpointHistory(self.data.checkpoints, self.data.latestCheckpoint, params.address, params.levels, self.data.checkpointBases))
+
+    # CHANGED: Add an on-chain view of the total supply at a level.
+    @sp.onchain_view()
+    def getPriorTotalSupply(self, params):
+        sp.set_type(params, sp.TNat)
+
+        sp.result(self.findPriorCheckpoint(self.data.supplyCheckpoints, self.data.latestSupplyCheckpoint, sp.self_address, params).balance)
+
+    # CHANGED: Add an on-chain view of the average balance of an address at the end of each block in
+    # [startLevel, endLevel). A balance held for a single block counts for little, so the average resists flash loans.
+    @sp.onchain_view()
+    def getAverageBalance(self, params):
+        sp.set_type(params, sp.TRecord(
+            address = sp.TAddress,
+            startLevel = sp.TNat,
+            endLevel = sp.TNat,
+        ).layout(("address", ("startLevel", "endLevel"))))
+
+        sp.result(self.findAverage(self.data.checkpoints, self.data.latestCheckpoint, params, self.data.checkpointBases))
+
+    # CHANGED: Add an on-chain view of the average voting power of an address at the end of each block in
+    # [startLevel, endLevel).
+    @sp.onchain_view()
+    def getAverageVotes(self, params):
+        sp.set_type(params, sp.TRecord(
+            address = sp.TAddress,
+            startLevel = sp.TNat,
+            endLevel = sp.TNat,
+        ).layout(("address", ("startLevel", "endLevel"))))
+
+        sp.result(self.findAverage(self.data.voteCheckpoints, self.data.latestVoteCheckpoint, params, self.data.voteCheckpointBases))
+
+    # CHANGED: Add a helper which looks up the checkpoint of an address which was current at a level from the given
+    # checkpoints, along with its index. Shared by the balance views, the voting power views and the total supply view.
+    # If the level is before the first checkpoint, found is false and the balance is zero. If bases are given, the
+    # search starts at the first checkpoint kept when the address' checkpoints were compacted. If a hint is given, it
+    # is an optional index of a checkpoint at or before the level, from which the search steps forward.
+    def findPriorCheckpoint(self, checkpoints, latestCheckpoints, address, level, bases = None, hint = None):
+        sp.verify(level < sp.level, Errors.ERROR_BLOCK_LEVEL_TOO_SOON)
+
+        priorCheckpoint = sp.local('priorCheckpoint', sp.record(found = False, index = sp.nat(0), fromBlock = sp.nat(0), balance = sp.nat(0), cumulative = sp.nat(0)))
+
+        # If there are no checkpoints, return a zero balance.
+        latestCheckpoint = sp.local('latestCheckpoint', latestCheckpoints.get_opt(address))
+        sp.if latestCheckpoint.value.is_some():
             # First check most recent balance.
-            sp.if self.data.checkpoints[(params.address, sp.as_nat(self.data.numCheckpoints[params.address] - 1))].fromBlock <= params.level:
-                sp.result(sp.record(
-                    result = self.data.checkpoints[(params.address, sp.as_nat(self.data.numCheckpoints[params.address] - 1))].balance,
-                    address = params.address,
-                    level = params.level
-                ))
+            sp.if latestCheckpoint.value.open_some().fromBlock <= level:
+                priorCheckpoint.value = sp.record(
+                    found = True,
+                    index = latestCheckpoint.value.open_some().index,
+                    fromBlock = latestCheckpoint.value.open_some().fromBlock,
+                    balance = latestCheckpoint.value.open_some().balance,
+                    cumulative = latestCheckpoint.value.open_some().cumulative
+                )
             sp.else:
-                # Next, check for an implicit zero balance.
-                sp.if self.data.checkpoints[(params.address, sp.nat(0))].fromBlock > params.level:
-                    sp.result(sp.record(result = 0, address = params.address, level = params.level))
-                sp.else:
+                # Otherwise, bracket the level between a checkpoint at or before it and a checkpoint after it, by
+                # stepping in exponentially growing strides. This takes a number of reads logarithmic in the
+                # distance from the starting checkpoint, rather than in the total number of checkpoints.
+                # Invariant: the checkpoint at upper is after the level.
+                firstIndex = sp.local('firstIndex', sp.nat(0))
+                if bases is not None:
+                    firstIndex.value = bases.get(address, sp.nat(0))
+                upper = sp.local('upper', latestCheckpoint.value.open_some().index)
+                lower = sp.local('lower', firstIndex.value)
+                stride = sp.local('stride', 1)
+                galloping = sp.local('galloping', True)
+                hasBalance = sp.local('hasBalance', False)
+
+                def stepBackwards():
+                    # Step backwards from the most recent checkpoint, since most lookups are for recent levels.
+                    sp.while galloping.value:
+                        sp.if upper.value <= firstIndex.value + stride.value:
+                            # The stride passes the first checkpoint, so the bracket starts at the first checkpoint.
+                            galloping.value = False
+                        sp.else:
+                            sp.if checkpoints[(address, sp.as_nat(upper.value - stride.value))].fromBlock <= level:
+                                lower.value = sp.as_nat(upper.value - stride.value)
+                                galloping.value = False
+                            sp.else:
+                                upper.value = sp.as_nat(upper.value - stride.value)
+                                stride.value = stride.value * 2
+
+                    # Next, check for an implicit zero balance. This is only possible if the bracket starts at the
+                    # first checkpoint, since any other lower bound is a checkpoint at or before the level. If the
+                    # most recent checkpoint is the only checkpoint, the balance is zero.
+                    hasBalance.value = lower.value > firstIndex.value
+                    sp.if (~hasBalance.value) & (upper.value > firstIndex.value):
+                        hasBalance.value = checkpoints[(address, firstIndex.value)].fromBlock <= level
+
+                    # If checkpoints before the level were compacted away, the balance at the level is unknown.
+                    sp.verify(hasBalance.value | (firstIndex.value == 0), Errors.ERROR_CHECKPOINTS_COMPACTED)
+
+                if hint is None:
+                    stepBackwards()
+                else:
+                    sp.if hint.is_some():
+                        # Step forwards from the hint. The hint is at or before the level, so the balance is known.
+                        lower.value = hint.open_some()
+                        sp.while galloping.value:
+                            sp.if upper.value <= lower.value + stride.value:
+                                # The stride reaches the most recent checkpoint, which is after the level.
+                                galloping.value = False
+                            sp.else:
+                                sp.if checkpoints[(address, lower.value + stride.value)].fromBlock <= level:
+                                    lower.value = lower.value + stride.value
+                                    stride.value = stride.value * 2
+                                sp.else:
+                                    upper.value = lower.value + stride.value
+                                    galloping.value = False
+                        hasBalance.value = True
+                    sp.else:
+                        stepBackwards()
+
+                sp.if hasBalance.value:
                     # A boolean that indicates that the current center is the level we are looking for.
                     # This extra variable is required because SmartPy does not have a way to break from
                     # a while loop. 
                     centerIsNeedle = sp.local('centerIsNeedle', False)
 
-                    # Otherwise perform a binary search.
+                    # Otherwise perform a binary search within the bracket.
                     center = sp.local('center', 0)
-                    lower = sp.local('lower', 0)
-                    upper = sp.local('upper', sp.as_nat(self.data.numCheckpoints[params.address] - 1))   
+                    upper.value = sp.as_nat(upper.value - 1)
                                         
                     sp.while (upper.value > lower.value) & (centerIsNeedle.value == False):
                         # A complicated way to get the ceiling.
                         center.value = sp.as_nat(upper.value - (sp.as_nat(upper.value - lower.value) / 2))
                         
                         # Check that center is the exact block we are looking for.
-                        sp.if self.data.checkpoints[(params.address, center.value)].fromBlock == params.level:
+                        sp.if checkpoints[(address, center.value)].fromBlock == level:
                             centerIsNeedle.value = True
                         sp.else:
-                            sp.if self.data.checkpoints[(params.address, center.value)].fromBlock < params.level:
+                            sp.if checkpoints[(address, center.value)].fromBlock < level:
                                 lower.value = center.value
                             sp.else:
                                 upper.value = sp.as_nat(center.value - 1)
 
-                    # If the center is the needle, return the value at center.
-                    sp.if centerIsNeedle.value == True:
-                        sp.result(
-                            sp.record(
-                                result = self.data.checkpoints[(params.address, center.value)].balance,
-                                address = params.address, 
-                                level = params.level
-                            )
-                        )
-                    # Otherwise return the result.
-                    sp.else:
-                        sp.result(
-                            sp.record(
-                                result = self.data.checkpoints[(params.address, lower.value)].balance, 
-                                address = params.address, 
-                                level = params.level
-                            )
-                        )
+                    # If the center is the needle, return the value at center. Otherwise return the result.
+                    sp.if centerIsNeedle.value == False:
+                        center.value = lower.value
+                    found = sp.local('foundCheckpoint', checkpoints[(address, center.value)])
+                    priorCheckpoint.value = sp.record(
+                        found = True,
+                        index = center.value,
+                        fromBlock = found.value.fromBlock,
+                        balance = found.value.balance,
+                        cumulative = found.value.cumulative
+                    )
+
+        return priorCheckpoint.value
+
+    # CHANGED: Add a helper which looks up the balances of an address at a list of levels in ascending order. Each
+    # level after the first is searched for forward from the checkpoint found for the level before it, so n levels
+    # cost one search plus reads logarithmic in the number of checkpoints between consecutive levels.
+    def findPriorCheckpointHistory(self, checkpoints, latestCheckpoints, address, levels, bases = None):
+        balances = sp.local('balances', sp.list(l = [], t = sp.TNat))
+        previousLevel = sp.local('previousLevel', sp.none)
+        current = sp.local('current', sp.record(found = False, index = sp.nat(0), fromBlock = sp.nat(0), balance = sp.nat(0), cumulative = sp.nat(0)))
+        sp.for level in levels:
+            sp.if previousLevel.value.is_some():
+                sp.verify(previousLevel.value.open_some() <= level, Errors.ERROR_LEVELS_NOT_SORTED)
+
+            hint = sp.local('hint', sp.none, t = sp.TOption(sp.TNat))
+            sp.if current.value.found:
+                hint.value = sp.some(current.value.index)
+            current.value = self.findPriorCheckpoint(checkpoints, latestCheckpoints, address, level, bases, hint.value)
+
+            previousLevel.value = sp.some(level)
+            balances.value.push(current.value.balance)
+
+        return balances.value.rev()
+
+    # CHANGED: Add a helper which returns the sum of the balance at the end of every block before a level. The
+    # balance is constant since the checkpoint which was current at the level, so this needs a single lookup.
+    def findPriorCumulative(self, checkpoints, latestCheckpoints, address, level, bases = None):
+        priorCheckpoint = sp.local('priorCumulativeCheckpoint', self.findPriorCheckpoint(checkpoints, latestCheckpoints, address, level, bases))
+        return priorCheckpoint.value.cumulative + priorCheckpoint.value.balance * sp.as_nat(level - priorCheckpoint.value.fromBlock)
+
+    # CHANGED: Add a helper which returns the average balance at the end of each block in [startLevel, endLevel).
+    def findAverage(self, checkpoints, latestCheckpoints, params, bases = None):
+        sp.verify(params.startLevel < params.endLevel, Errors.ERROR_BAD_WINDOW)
+
+        # Subtract the cumulative value at the start from the one at the end. Both lookups share one loop body, so
+        # the search is only included in the contract once.
+        total = sp.local('total', sp.int(0))
+        sp.for bound in sp.list([sp.record(level = params.endLevel, sign = sp.int(1)), sp.record(level = params.startLevel, sign = sp.int(-1))]):
+            total.value += bound.sign * sp.to_int(self.findPriorCumulative(checkpoints, latestCheckpoints, params.address, bound.level, bases))
+        return sp.as_nat(total.value) / sp.as_nat(params.endLevel - params.startLevel)
         
+    # CHANGED: Allow anyone to compact the checkpoints of an address. Every checkpoint before the one which was
+    # current at beforeLevel is removed, and that checkpoint becomes the first checkpoint of the address, so
+    # later lookups never search past it. Lookups before it fail, so beforeLevel must be further in the past
+    # than the retention horizon. Long histories can be compacted over several calls with increasing levels.
+    @sp.entry_point
+    def compactCheckpoints(self, params):
+        sp.set_type(params, COMPACT_TYPE)
+
+        sp.verify(params.beforeLevel + self.data.checkpointRetention <= sp.level, Errors.ERROR_WITHIN_RETENTION)
+
+        self.compactBalanceCheckpoints(params)
+        self.compactVoteCheckpoints(params)
+
+    # CHANGED: Add method to compact checkpoints of balances.
+    @sp.sub_entry_point
+    def compactBalanceCheckpoints(self, params):
+        sp.set_type(params, COMPACT_TYPE)
+
+        self.compactHistory(self.data.checkpoints, self.data.latestCheckpoint, self.data.checkpointBases, params)
+
+    # CHANGED: Add method to compact checkpoints of voting power.
+    @sp.sub_entry_point
+    def compactVoteCheckpoints(self, params):
+        sp.set_type(params, COMPACT_TYPE)
+
+        self.compactHistory(self.data.voteCheckpoints, self.data.latestVoteCheckpoint, self.data.voteCheckpointBases, params)
+
+    # CHANGED: Add a helper which removes the checkpoints of an address before the one which was current at a level.
+    # Shared by the checkpoints of balances and of voting power.
+    def compactHistory(self, checkpoints, latestCheckpoints, bases, params):
+        baseCheckpoint = sp.local('baseCheckpoint', self.findPriorCheckpoint(checkpoints, latestCheckpoints, params.address, params.beforeLevel, bases))
+        sp.if baseCheckpoint.value.found:
+            index = sp.local('compactIndex', bases.get(params.address, sp.nat(0)))
+            sp.if index.value < baseCheckpoint.value.index:
+                sp.while index.value < baseCheckpoint.value.index:
+                    del checkpoints[(params.address, index.value)]
+                    index.value += 1
+                bases[params.address] = index.value
+
+    # CHANGED: Allow the administrator or the snapshotter to set the number of levels of history which may not be
+    # compacted. The snapshotter is the DAO, which keeps the role after the administrator is revoked, so the
+    # horizon can follow changes to how long polls read balances for.
+    @sp.entry_point
+    def setCheckpointRetention(self, params):
+        sp.set_type(params, sp.TNat)
+        sp.verify(self.is_administrator(sp.sender) | (self.data.snapshotter == sp.some(sp.sender)), Errors.ERROR_NOT_ALLOWED)
+        self.data.checkpointRetention = params
+
+    # CHANGED: Add an entrypoint to take a snapshot of balances at a level.
+    # Levels never decrease between snapshots. Expiries are clamped so that they never decrease either.
+    @sp.entry_point
+    def snapshot(self, params):
+        sp.set_type(params, SNAPSHOT_TYPE)
+
+        sp.verify(self.data.snapshotter == sp.some(sp.sender), Errors.ERROR_NOT_SNAPSHOTTER)
+
+        # Snapshots may not be taken of past levels, since balance changes since then were not recorded. The level
+        # is not raised instead, since the snapshotter reads balances at the level it asked for.
+        sp.verify(sp.level <= params.level, Errors.ERROR_SNAPSHOT_LEVEL_TOO_LOW)
+        expiry = sp.local('expiry', sp.max(params.expiry, params.level))
+        sp.if self.data.nextSnapshotId > 0:
+            lastSnapshot = self.data.snapshots[sp.as_nat(self.data.nextSnapshotId - 1)]
+            sp.verify(lastSnapshot.level <= params.level, Errors.ERROR_SNAPSHOT_LEVEL_TOO_LOW)
+            expiry.value = sp.max(expiry.value, lastSnapshot.expiry)
+
+        self.data.snapshots[self.data.nextSnapshotId] = sp.record(level = params.level, expiry = expiry.value)
+        self.data.nextSnapshotId += 1
+
+    # CHANGED: Allow the administrator to set the address which takes snapshots.
+    @sp.entry_point
+    def setSnapshotter(self, params):
+        sp.set_type(params, sp.TOption(sp.TAddress))
+        sp.verify(self.is_administrator(sp.sender), Errors.ERROR_NOT_ADMINISTRATOR)
+        self.data.snapshotter = params
+
+    # CHANGED: Add an on-chain view of the ID the next snapshot will receive, along with the lowest level it may be
+    # taken of, so the snapshotter can tell whether a snapshot would be accepted before asking for it.
+    @sp.onchain_view()
+    def getNextSnapshot(self, params):
+        sp.set_type(params, sp.TUnit)
+
+        minLevel = sp.local('minLevel', sp.level)
+        sp.if self.data.nextSnapshotId > 0:
+            minLevel.value = sp.max(minLevel.value, self.data.snapshots[sp.as_nat(self.data.nextSnapshotId - 1)].level)
+        sp.result(sp.record(id = self.data.nextSnapshotId, minLevel = minLevel.value).layout(("id", "minLevel")))
+
+    # CHANGED: Add an on-chain view of an address' voting power at a snapshot.
+    @sp.onchain_view()
+    def getSnapshotVotes(self, params):
+        sp.set_type(params, sp.TRecord(
+            address = sp.TAddress,
+            snapshotId = sp.TNat,
+        ).layout(("address", "snapshotId")))
+
+        sp.verify(self.data.snapshots.contains(params.snapshotId), Errors.ERROR_NO_SNAPSHOT)
+        snapshot = self.data.snapshots[params.snapshotId]
+        sp.verify(snapshot.level < sp.level, Errors.ERROR_BLOCK_LEVEL_TOO_SOON)
+        sp.verify(sp.level <= snapshot.expiry, Errors.ERROR_SNAPSHOT_EXPIRED)
+
+        snapshotVotes = sp.local('snapshotVotes', sp.nat(0))
+        sp.if self.data.latestVoteCheckpoint.contains(params.address):
+            # If the voting power has not changed since the snapshot, it is the most recent voting power.
+            # Otherwise, it was written to the snapshot on the first change.
+            latestCheckpoint = self.data.latestVoteCheckpoint[params.address]
+            sp.if latestCheckpoint.fromBlock <= snapshot.level:
+                snapshotVotes.value = latestCheckpoint.balance
+            sp.else:
+                snapshotVotes.value = self.data.snapshotVotes.get((params.address, params.snapshotId), sp.nat(0))
+
+        sp.result(snapshotVotes.value)
+
     @sp.entry_point
     def transfer(self, params):
         sp.set_type(params, sp.TRecord(from_ = sp.TAddress, to_ = sp.TAddress, value = sp.TNat).layout(("from_ as from", ("to_ as to", "value"))))
+
+        # CHANGED: Allow a permit from the owner for this sender and these exact parameters in place of an approval.
+        usedPermit = sp.local('usedPermit', False)
+        sp.if (params.from_ != sp.sender) & (~self.is_administrator(sp.sender)):
+            usedPermit.value = self.consumePermit(params.from_, sp.blake2b(sp.pack((sp.sender, params))))
+
         sp.verify(self.is_administrator(sp.sender) |
             (~self.is_paused() &
                 ((params.from_ == sp.sender) |
-                 (self.data.approvals[params.from_][sp.sender] >= params.value))), Errors.ERROR_NOT_ALLOWED)
-        self.addAddressIfNecessary(params.to_)
+                 usedPermit.value |
+                 (self.data.approvals.get((params.from_, sp.sender), sp.nat(0)) >= params.value))), Errors.ERROR_NOT_ALLOWED)
+        sp.if (params.from_ != sp.sender) & (~self.is_administrator(sp.sender)) & (~usedPermit.value):
+            # CHANGED: Spend the approval by (owner, spender).
+            self.spendApproval(sp.record(owner = params.from_, spender = sp.sender, value = params.value))
+
+        # CHANGED: Move the balance in a helper shared with transferAndCall.
+        self.moveBalance(params.from_, params.to_, params.value)
+
+    # CHANGED: Add an entrypoint which transfers tokens and then notifies the receiver, passing along the given
+    # data. The receiver can act on tokens it already holds, so no approval of the receiver is needed. A sender
+    # other than the owner spends the owner's approval.
+    @sp.entry_point
+    def transferAndCall(self, params):
+        sp.set_type(params, sp.TRecord(from_ = sp.TAddress, to_ = sp.TAddress, value = sp.TNat, data = sp.TBytes).layout(("from_ as from", ("to_ as to", ("value", "data")))))
+        sp.verify(~self.is_paused(), Errors.ERROR_PAUSED)
 
-        # CHANGED: Add from address as well.
-        self.addAddressIfNecessary(params.from_)
+        sp.if params.from_ != sp.sender:
+            sp.verify(self.data.approvals.get((params.from_, sp.sender), sp.nat(0)) >= params.value, Errors.ERROR_NOT_ALLOWED)
+            self.spendApproval(sp.record(owner = params.from_, spender = sp.sender, value = params.value))
+
+        self.moveBalance(params.from_, params.to_, params.value)
+
+        # Notify the receiver.
+        receiverHandle = sp.contract(
+            sp.TRecord(from_ = sp.TAddress, value = sp.TNat, data = sp.TBytes).layout(("from_ as from", ("value", "data"))),
+            params.to_,
+            "onTokenTransfer"
+        ).open_some(Errors.ERROR_NO_TRANSFER_RECEIVER)
+        sp.transfer(sp.record(from_ = params.from_, value = params.value, data = params.data), sp.mutez(0), receiverHandle)
+
+    # CHANGED: Add a helper which moves a balance, writes checkpoints and moves voting power.
+    def moveBalance(self, from_, to_, value):
+        self.addAddressIfNecessary(to_)
+        self.addAddressIfNecessary(from_)
+
+        sp.verify(self.data.balances[from_] >= value, Errors.ERROR_LOW_BALANCE)
+        self.data.balances[from_] = sp.as_nat(self.data.balances[from_] - value)
+        self.data.balances[to_] += value
 
-        sp.verify(self.data.balances[params.from_] >= params.value, Errors.ERROR_LOW_BALANCE)
-        self.data.balances[params.from_] = sp.as_nat(self.data.balances[params.from_] - params.value)
-        self.data.balances[params.to_] += params.value
-        sp.if (params.from_ != sp.sender) & (~self.is_administrator(sp.sender)):
-            self.data.approvals[params.from_][sp.sender] = sp.as_nat(self.data.approvals[params.from_][sp.sender] - params.value)
-            
-        # CHANGED: Write checkpoints.
         # Write a checkpoint for the sender.
         self.writeCheckpoint(
             sp.record(
-                checkpointedAddress = params.from_,
-                numCheckpoints = self.data.numCheckpoints.get(params.from_, 0),
-                newBalance = self.data.balances[params.from_]
+                checkpointedAddress = from_,
+                latestCheckpoint = self.data.latestCheckpoint.get_opt(from_),
+                newBalance = self.data.balances[from_]
             )
         )
         # Write a checkpoint for the receiver
         self.writeCheckpoint(
             sp.record(
-                checkpointedAddress = params.to_,
-                numCheckpoints = self.data.numCheckpoints.get(params.to_, 0),
-                newBalance = self.data.balances[params.to_]
+                checkpointedAddress = to_,
+                latestCheckpoint = self.data.latestCheckpoint.get_opt(to_),
+                newBalance = self.data.balances[to_]
             )
         )
 
+        # Move voting power from the sender's delegate to the receiver's delegate.
+        self.moveVotes(self.delegateOf(from_), self.delegateOf(to_), value)
+
+    # CHANGED: Add an entrypoint which makes a list of transfers. Balances are accumulated in a local map, and each
+    # address is written and checkpointed once at the end rather than once per transfer.
+    @sp.entry_point
+    def transferBatch(self, params):
+        sp.set_type(params, sp.TList(sp.TRecord(from_ = sp.TAddress, to_ = sp.TAddress, value = sp.TNat).layout(("from_ as from", ("to_ as to", "value")))))
+
+        newBalances = sp.local('newBalances', sp.map(l = {}, tkey = sp.TAddress, tvalue = sp.TNat))
+        newVotes = sp.local('newVotes', sp.map(l = {}, tkey = sp.TAddress, tvalue = sp.TNat))
+        sp.for transfer in params:
+            sp.verify(self.is_administrator(sp.sender) |
+                (~self.is_paused() &
+                    ((transfer.from_ == sp.sender) |
+                     (self.data.approvals.get((transfer.from_, sp.sender), sp.nat(0)) >= transfer.value))), Errors.ERROR_NOT_ALLOWED)
+
+            # Load balances the first time an address is seen.
+            sp.if ~newBalances.value.contains(transfer.to_):
+                self.addAddressIfNecessary(transfer.to_)
+                newBalances.value[transfer.to_] = self.data.balances[transfer.to_]
+            sp.if ~newBalances.value.contains(transfer.from_):
+                self.addAddressIfNecessary(transfer.from_)
+                newBalances.value[transfer.from_] = self.data.balances[transfer.from_]
+
+            sp.verify(newBalances.value[transfer.from_] >= transfer.value, Errors.ERROR_LOW_BALANCE)
+            newBalances.value[transfer.from_] = sp.as_nat(newBalances.value[transfer.from_] - transfer.value)
+            newBalances.value[transfer.to_] += transfer.value
+            sp.if (transfer.from_ != sp.sender) & (~self.is_administrator(sp.sender)):
+                self.spendApproval(sp.record(owner = transfer.from_, spender = sp.sender, value = transfer.value))
+
+            # Move voting power between delegates, loading voting power the first time a delegate is seen.
+            fromDelegate = sp.local('fromDelegate', self.delegateOf(transfer.from_))
+            toDelegate = sp.local('toDelegate', self.delegateOf(transfer.to_))
+            sp.if fromDelegate.value != toDelegate.value:
+                sp.if ~newVotes.value.contains(fromDelegate.value):
+                    newVotes.value[fromDelegate.value] = self.currentVotes(fromDelegate.value)
+                sp.if ~newVotes.value.contains(toDelegate.value):
+                    newVotes.value[toDelegate.value] = self.currentVotes(toDelegate.value)
+                newVotes.value[fromDelegate.value] = sp.as_nat(newVotes.value[fromDelegate.value] - transfer.value)
+                newVotes.value[toDelegate.value] += transfer.value
+
+        # Write each balance and checkpoint once.
+        sp.for newBalance in newBalances.value.items():
+            self.data.balances[newBalance.key] = newBalance.value
+            self.writeCheckpoint(
+                sp.record(
+                    checkpointedAddress = newBalance.key,
+                    latestCheckpoint = self.data.latestCheckpoint.get_opt(newBalance.key),
+                    newBalance = newBalance.value
+                )
+            )
+
+        # Write each delegate's voting power once.
+        sp.for votes in newVotes.value.items():
+            self.writeVoteCheckpoint(
+                sp.record(
+                    checkpointedAddress = votes.key,
+                    latestCheckpoint = self.data.latestVoteCheckpoint.get_opt(votes.key),
+                    newBalance = votes.value
+                )
+            )
+
     @sp.entry_point
     def approve(self, params):
         sp.set_type(params, sp.TRecord(spender = sp.TAddress, value = sp.TNat).layout(("spender", "value")))
 
-        # CHANGED: Add address if needed. This fixes a bug in our tests for checkpoints where you cannot approve
-        # before you have a balance.
-        self.addAddressIfNecessary(sp.sender)
-
         sp.verify(~self.is_paused(), Errors.ERROR_PAUSED)
-        alreadyApproved = self.data.approvals[sp.sender].get(params.spender, 0)
+
+        # CHANGED: Approvals are keyed by (owner, spender), so an address can approve before it has a balance.
+        # Setting an approval to zero removes it.
+        approvalKey = sp.local('approvalKey', (sp.sender, params.spender))
+        alreadyApproved = self.data.approvals.get(approvalKey.value, sp.nat(0))
         sp.verify((alreadyApproved == 0) | (params.value == 0), Errors.ERROR_UNSAFE_ALLOWANCE_CHANGE)
-        self.data.approvals[sp.sender][params.spender] = params.value
+        sp.if params.value == 0:
+            del self.data.approvals[approvalKey.value]
+        sp.else:
+            self.data.approvals[approvalKey.value] = params.value
+
+    # CHANGED: Add permits, modeled on TZIP-17. Each permit is signed off-chain by an owner, and allows a single
+    # spender to call `transfer` once with the parameters whose hash was signed, until the permit expires. Permits may
+    # be submitted in batches.
+    @sp.entry_point
+    def submitPermits(self, params):
+        sp.set_type(params, sp.TList(Permit.PERMIT_TYPE))
+
+        sp.for permit in params:
+            # Verify the signature. The payload includes the chain, this contract and the counter, so a signature
+            # can not be replayed.
+            payload = sp.pack(((sp.chain_id, sp.self_address), (self.data.permitCounter, permit.paramHash)))
+            sp.verify(sp.check_signature(permit.publicKey, permit.signature, payload), Errors.ERROR_BAD_SIGNATURE)
+            self.data.permitCounter += 1
+
+            owner = sp.to_address(sp.implicit_account(sp.hash_key(permit.publicKey)))
+            self.data.permits[(owner, permit.paramHash)] = sp.now.add_seconds(sp.to_int(self.data.permitExpiry))
+
+    # CHANGED: Allow anyone to remove expired permits, given as (owner, parameter hash) pairs. Permits which have not
+    # expired, or which do not exist, are skipped, so a batch does not fail if one of its permits was used meanwhile.
+    @sp.entry_point
+    def removeExpiredPermits(self, params):
+        sp.set_type(params, sp.TList(sp.TPair(sp.TAddress, sp.TBytes)))
+
+        sp.for permitKey in params:
+            sp.if self.data.permits.contains(permitKey):
+                sp.if self.data.permits[permitKey] <= sp.now:
+                    del self.data.permits[permitKey]
+
+    # CHANGED: Add a helper which uses up the owner's permit for the given parameter hash. Returns whether the
+    # permit existed and had not expired.
+    def consumePermit(self, owner, paramHash):
+        permitted = sp.local('permitted', False)
+        sp.if self.data.permits.contains((owner, paramHash)):
+            permitted.value = sp.now < self.data.permits[(owner, paramHash)]
+            del self.data.permits[(owner, paramHash)]
+        return permitted.value
+
+    # CHANGED: Decrease an approval, removing it once it is fully spent.
+    @sp.sub_entry_point
+    def spendApproval(self, params):
+        sp.set_type(params, sp.TRecord(owner = sp.TAddress, spender = sp.TAddress, value = sp.TNat))
+
+        approvalKey = sp.local('approvalKey', (params.owner, params.spender))
+        remaining = sp.local('remaining', sp.as_nat(self.data.approvals.get(approvalKey.value, sp.nat(0)) - params.value))
+        sp.if remaining.value == 0:
+            del self.data.approvals[approvalKey.value]
+        sp.else:
+            self.data.approvals[approvalKey.value] = remaining.value
 
+    # CHANGED: Do not write an empty approval map for new addresses.
     def addAddressIfNecessary(self, address):
         sp.if ~ self.data.balances.contains(address):
             self.data.balances[address] = 0
-            self.data.approvals[address] = {}
 
-    @sp.view(sp.TNat)
+    # CHANGED: Return a default balance rather than writing a balance for unknown addresses.
+    @sp.utils.view(sp.TNat)
     def getBalance(self, params):
-        # CHANGED: Add address if needed.
-        self.addAddressIfNecessary(params)
+        sp.set_type(params, sp.TAddress)
+        sp.result(self.data.balances.get(params, sp.nat(0)))
 
-        sp.result(self.data.balances[params])
+    # CHANGED: Expose the balance as an on-chain view.
+    @sp.onchain_view(name = "getBalance")
+    def getBalanceOnChain(self, params):
+        sp.set_type(params, sp.TAddress)
+        sp.result(self.data.balances.get(params, sp.nat(0)))
 
-    @sp.view(sp.TNat)
+    # CHANGED: Read approvals by (owner, spender), without writing a balance for unknown owners.
+    @sp.utils.view(sp.TNat)
     def getAllowance(self, params):
-        # CHANGED: Add address if needed.
-        self.addAddressIfNecessary(params.owner)
+        sp.set_type(params, sp.TRecord(owner = sp.TAddress, spender = sp.TAddress).layout(("owner", "spender")))
+        sp.result(self.data.approvals.get((params.owner, params.spender), sp.nat(0)))
 
-        sp.result(self.data.approvals[params.owner].get(params.spender, sp.nat(0)))
+    # CHANGED: Expose the allowance as an on-chain view.
+    @sp.onchain_view(name = "getAllowance")
+    def getAllowanceOnChain(self, params):
+        sp.set_type(params, sp.TRecord(owner = sp.TAddress, spender = sp.TAddress).layout(("owner", "spender")))
+        sp.result(self.data.approvals.get((params.owner, params.spender), sp.nat(0)))
 
-    @sp.view(sp.TNat)
+    @sp.utils.view(sp.TNat)
     def getTotalSupply(self, params):
         sp.set_type(params, sp.TUnit)
         sp.result(self.data.totalSupply)
 
+    # CHANGED: Expose the total supply as an on-chain view.
+    @sp.onchain_view(name = "getTotalSupply")
+    def getTotalSupplyOnChain(self, params):
+        sp.set_type(params, sp.TUnit)
+        sp.result(self.data.totalSupply)
+
     # CHANGED: Allow minting to be disabled.
     @sp.entry_point
     def disableMinting(self, unit):
@@ -288,10 +951,24 @@ class FA12(sp.Contract):
         self.writeCheckpoint(
             sp.record(
                 checkpointedAddress = params.address,
-                numCheckpoints = self.data.numCheckpoints.get(params.address, 0),
+                latestCheckpoint = self.data.latestCheckpoint.get_opt(params.address),
                 newBalance = self.data.balances[params.address]
             )
         )
+
+        # CHANGED: Write a checkpoint of the total supply.
+        self.appendCheckpoint(
+            self.data.supplyCheckpoints,
+            self.data.latestSupplyCheckpoint,
+            sp.record(
+                checkpointedAddress = sp.self_address,
+                latestCheckpoint = self.data.latestSupplyCheckpoint.get_opt(sp.self_address),
+                newBalance = self.data.totalSupply
+            )
+        )
+
+        # CHANGED: Add voting power to the receiver's delegate.
+        self.increaseVotes(self.delegateOf(params.address), params.value)
         
     # CHANGED: Remove burning.       
 
@@ -304,7 +981,7 @@ class FA12(sp.Contract):
         sp.verify(self.is_administrator(sp.sender), Errors.ERROR_NOT_ADMINISTRATOR)
         self.data.administrator = params
 
-    @sp.view(sp.TOption(sp.TAddress))
+    @sp.utils.view(sp.TOption(sp.TAddress))
     def getAdministrator(self, params):
         sp.set_type(params, sp.TUnit)
         sp.result(self.data.administrator)
@@ -327,10 +1004,31 @@ class Viewer(sp.Contract):
     def target(self, params):
         self.data.last = sp.some(params)
 
+class TransferReceiver(sp.Contract):
+    def __init__(self):
+        self.init(last = sp.none)
+        self.init_type(sp.TRecord(last = sp.TOption(sp.TRecord(from_ = sp.TAddress, value = sp.TNat, data = sp.TBytes))))
+    @sp.entry_point
+    def onTokenTransfer(self, params):
+        sp.set_type(params, sp.TRecord(from_ = sp.TAddress, value = sp.TNat, data = sp.TBytes).layout(("from_ as from", ("value", "data"))))
+        self.data.last = sp.some(params)
+
+class AverageReader(sp.Contract):
+    def __init__(self, tokenAddress):
+        self.init(tokenAddress = tokenAddress, last = sp.none)
+        self.init_type(sp.TRecord(tokenAddress = sp.TAddress, last = sp.TOption(sp.TNat)))
+    @sp.entry_point
+    def readAverageBalance(self, params):
+        self.data.last = sp.some(sp.view("getAverageBalance", self.data.tokenAddress, params, t = sp.TNat).open_some())
+    @sp.entry_point
+    def readAverageVotes(self, params):
+        self.data.last = sp.some(sp.view("getAverageVotes", self.data.tokenAddress, params, t = sp.TNat).open_some())
+
 # Only run tests if this file is main.
 if __name__ == "__main__":
 
     Addresses = sp.import_script_from_url("file:./test-helpers/addresses.py")
+    CheckpointProbes = sp.import_script_from_url("file:./test-helpers/checkpoint-probes.py")
 
     ################################################################
     # transfer
@@ -639,7 +1337,7 @@ if __name__ == "__main__":
         # THEN the correct answer is returned.
 
         # Sanity check - there are 5 checkpoints for Bob.
-        scenario.verify(token.data.numCheckpoints.get(Addresses.BOB_ADDRESS, sp.nat(0)) == sp.nat(5))
+        scenario.verify(token.data.latestCheckpoint[Addresses.BOB_ADDRESS].index == sp.nat(4))
 
         # level = 1
         level = 12
@@ -909,7 +1607,7 @@ if __name__ == "__main__":
         # THEN the correct answer is returned.
 
         # Sanity check - there are 4 checkpoints for Bob.
-        scenario.verify(token.data.numCheckpoints.get(Addresses.BOB_ADDRESS, sp.nat(0)) == sp.nat(4))
+        scenario.verify(token.data.latestCheckpoint[Addresses.BOB_ADDRESS].index == sp.nat(3))
 
         # level = 1
         level = 12
@@ -1065,126 +1763,447 @@ if __name__ == "__main__":
         scenario.verify(viewer.data.last.open_some().result == 40)             
 
     ################################################################
-    # transfer
-    #
-    # Core transfer functionality tests are deferred to the token contract
-    # tests by SmartPy. 
-    #
-    # These tests specifically test the checkpoint functionality, and are largely
-    # based off of Compound's tests:
-    # https://github.com/compound-finance/compound-protocol/blob/master/tests/Governance/CompTest.js
+    # getPriorBalance - seeded histories
     ################################################################
 
-    @sp.add_test(name="transfer - counts checkpoints correctly on transfers from owners")
+    # Returns a Token contract holding a history where Alice's balance changed every other block, from 1 token at
+    # level 2 to numCheckpoints tokens at level 2 * numCheckpoints. The checkpoint at index i is from level 2 * (i + 1)
+    # with a balance of i + 1. If indices are given, only those checkpoints are stored, so a lookup which reads any
+    # other checkpoint fails.
+    def seededHistoryToken(numCheckpoints, indices = None, **kwargs):
+        checkpoints = {}
+        for i in (range(numCheckpoints - 1) if indices is None else indices):
+            checkpoints[(Addresses.ALICE_ADDRESS, i)] = sp.record(fromBlock = 2 * (i + 1), balance = i + 1, cumulative = i * (i + 1))
+        latestCheckpoint = sp.record(index = numCheckpoints - 1, fromBlock = 2 * numCheckpoints, balance = numCheckpoints, cumulative = (numCheckpoints - 1) * numCheckpoints)
+
+        return FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+            checkpoints = sp.big_map(
+                l = checkpoints,
+                tkey = sp.TPair(sp.TAddress, sp.TNat),
+                tvalue = CHECKPOINT_TYPE
+            ),
+            latestCheckpoint = sp.big_map(
+                l = { Addresses.ALICE_ADDRESS: latestCheckpoint },
+                tkey = sp.TAddress,
+                tvalue = LATEST_CHECKPOINT_TYPE
+            ),
+            **kwargs
+        )
+
+    @sp.add_test(name="getPriorBalance - returns the balance at every level of a seeded history")
     def test():
-        # GIVEN a Token contract
+        # GIVEN a history where Alice's balance changed every other block.
+        #
+        # +-------+---------+
+        # | Level | Balance |
+        # +-------+---------+
+        # | 2     | 1       |
+        # +-------+---------+
+        # | 4     | 2       |
+        # +-------+---------+
+        # | ...   | ...     |
+        # +-------+---------+
+        # | 34    | 17      |
+        # +-------+---------+
         scenario = sp.test_scenario()
 
-        token = FA12(
-            admin = Addresses.TOKEN_ADMIN_ADDRESS,
-        )
+        numCheckpoints = 17
+
+        # AND a Token contract holding the history
+        token = seededHistoryToken(numCheckpoints)
         scenario += token
 
-        # AND an alice has 100 tokens
-        scenario += token.mint(
-            sp.record(
-                value = 100,
-                address = Addresses.ALICE_ADDRESS
-            )
-        ).run(
-            level = sp.nat(0),
-            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        # AND a viewer contract.
+        viewer = Viewer(
+            t = sp.TRecord(result = sp.TNat, address = sp.TAddress, level = sp.TNat)
         )
+        scenario += viewer
 
-        # WHEN a series of transfers are made
-        # THEN token checkpoints are incremented properly
+        # WHEN a balance is requested for every level
+        # THEN the correct balance is returned, both on and between checkpoints.
+        for requestLevel in range(2 * numCheckpoints + 2):
+            scenario += token.getPriorBalance(
+                (
+                    sp.record(
+                        address = Addresses.ALICE_ADDRESS,
+                        level = requestLevel
+                    ),
+                    viewer.typed
+                )
+            ).run(
+                level = 2 * numCheckpoints + 2,
+            )
+            scenario.verify(viewer.data.last.open_some().result == min(requestLevel // 2, numCheckpoints))
 
-        # Alice transfers the initial tokens to Bob.
-        scenario += token.transfer(
-            from_ = Addresses.ALICE_ADDRESS, 
-            to_ = Addresses.BOB_ADDRESS, 
-            value = 10
-        ).run(
-            level = sp.nat(1),
-            sender = Addresses.ALICE_ADDRESS
-        )
-        scenario.verify(token.data.numCheckpoints.get(Addresses.ALICE_ADDRESS, sp.nat(0)) == sp.nat(2))
-        scenario.verify(token.data.numCheckpoints.get(Addresses.BOB_ADDRESS, sp.nat(0)) == sp.nat(1))
-        scenario.verify(token.data.numCheckpoints.get(Addresses.CHARLIE_ADDRESS, sp.nat(0)) == sp.nat(0))
+    @sp.add_test(name="getPriorBalance - recent lookups read fewer checkpoints than a binary search")
+    def test():
+        scenario = sp.test_scenario()
 
-        # Alice transfers tokens to Charlie
-        scenario += token.transfer(
-            from_ = Addresses.ALICE_ADDRESS, 
-            to_ = Addresses.CHARLIE_ADDRESS, 
-            value = 10
-        ).run(
-            level = sp.nat(2),
-            sender = Addresses.ALICE_ADDRESS
-        )
-        scenario.verify(token.data.numCheckpoints.get(Addresses.ALICE_ADDRESS, sp.nat(0)) == sp.nat(3))
-        scenario.verify(token.data.numCheckpoints.get(Addresses.BOB_ADDRESS, sp.nat(0)) == sp.nat(1))
-        scenario.verify(token.data.numCheckpoints.get(Addresses.CHARLIE_ADDRESS, sp.nat(0)) == sp.nat(1))
+        # GIVEN a seeded history of 100,000 checkpoints
+        numCheckpoints = 100000
 
-        # Bob transfers tokens to Charlie
-        scenario += token.transfer(
-            from_ = Addresses.BOB_ADDRESS, 
-            to_ = Addresses.CHARLIE_ADDRESS, 
-            value = 5
-        ).run(
-            level = sp.nat(3),
-            sender = Addresses.BOB_ADDRESS
-        )
-        scenario.verify(token.data.numCheckpoints.get(Addresses.ALICE_ADDRESS, sp.nat(0)) == sp.nat(3))
-        scenario.verify(token.data.numCheckpoints.get(Addresses.BOB_ADDRESS, sp.nat(0)) == sp.nat(2))
-        scenario.verify(token.data.numCheckpoints.get(Addresses.CHARLIE_ADDRESS, sp.nat(0)) == sp.nat(2))
+        # WHEN balances are requested between checkpoints at recent and ancient levels
+        for distance in [1, 10, 100, 1000, numCheckpoints - 2]:
+            index = numCheckpoints - 1 - distance
+            level = 2 * (index + 1) + 1
+            probes = CheckpointProbes.gallopingProbes(numCheckpoints, level)
+            binaryProbes = CheckpointProbes.binarySearchProbes(numCheckpoints, level)
+            scenario.h2("%d checkpoints from the most recent: %d reads, against %d for a binary search" % (distance, len(probes), len(binaryProbes)))
 
-        # AND history is recorded correctly for Alice.
-        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 0)].fromBlock == 0)
-        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 0)].balance == 100)
+            # AND the token only stores the checkpoints the search is expected to read
+            token = seededHistoryToken(numCheckpoints, indices = sorted(probes))
+            scenario += token
 
-        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 1)].fromBlock == 1)
-        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 1)].balance == 90)
+            viewer = Viewer(
+                t = sp.TRecord(result = sp.TNat, address = sp.TAddress, level = sp.TNat)
+            )
+            scenario += viewer
+
+            # THEN the correct balance is returned without reading any other checkpoint
+            scenario += token.getPriorBalance(
+                (
+                    sp.record(
+                        address = Addresses.ALICE_ADDRESS,
+                        level = level
+                    ),
+                    viewer.typed
+                )
+            ).run(
+                level = 2 * numCheckpoints + 2,
+            )
+            scenario.verify(viewer.data.last.open_some().result == index + 1)
 
-        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 2)].fromBlock == 2)
-        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 2)].balance == 80)
+            # AND recent levels are found in fewer reads than a binary search over the whole history.
+            if distance <= 100:
+                assert len(probes) < len(binaryProbes)
 
-        # AND history is recorded correctly for Bob.
-        scenario.verify(token.data.checkpoints[(Addresses.BOB_ADDRESS, 0)].fromBlock == 1)
-        scenario.verify(token.data.checkpoints[(Addresses.BOB_ADDRESS, 0)].balance == 10)
+    @sp.add_test(name="getPriorBalanceHistory - returns the balances at a sorted list of levels in one pass")
+    def test():
+        # GIVEN a history where Alice's balance changed every other block, from 1 token at level 2 to 17 tokens
+        # at level 34.
+        scenario = sp.test_scenario()
 
-        scenario.verify(token.data.checkpoints[(Addresses.BOB_ADDRESS, 1)].fromBlock == 3)
-        scenario.verify(token.data.checkpoints[(Addresses.BOB_ADDRESS, 1)].balance == 5)
+        numCheckpoints = 17
 
-        # AND history is recorded correctly for Charlie.
-        scenario.verify(token.data.checkpoints[(Addresses.CHARLIE_ADDRESS, 0)].fromBlock == 2)
-        scenario.verify(token.data.checkpoints[(Addresses.CHARLIE_ADDRESS, 0)].balance == 10)
+        # AND a Token contract holding the history
+        token = seededHistoryToken(numCheckpoints)
+        scenario += token
+
+        # AND Bob receives tokens after the history.
+        scenario += token.mint(
+            sp.record(
+                value = sp.nat(5),
+                address = Addresses.BOB_ADDRESS
+            )
+        ).run(
+            level = sp.nat(40),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
 
-        scenario.verify(token.data.checkpoints[(Addresses.CHARLIE_ADDRESS, 1)].fromBlock == 3)
-        scenario.verify(token.data.checkpoints[(Addresses.CHARLIE_ADDRESS, 1)].balance == 15)
+        # WHEN Alice's balances are requested at levels before, within and after the history
+        levels = sp.list([1, 2, 3, 10, 11, 11, 34, 35])
+        history = sp.view("getPriorBalanceHistory", token.address, sp.record(address = Addresses.ALICE_ADDRESS, levels = levels), t = sp.TList(sp.TNat)).open_some()
 
-    @sp.add_test(name="transfer - counts checkpoints correctly on transfers via approvals")
+        # THEN the balance at each level is returned in order.
+        scenario.verify_equal(history, sp.list([0, 1, 1, 5, 5, 5, 17, 17]))
+
+        # WHEN the balances of Alice and Bob are requested at a single level
+        balances = sp.view("getPriorBalances", token.address, sp.record(addresses = sp.list([Addresses.ALICE_ADDRESS, Addresses.BOB_ADDRESS]), level = sp.nat(11)), t = sp.TList(sp.TNat)).open_some()
+
+        # THEN the balance of each address is returned in order.
+        scenario.verify_equal(balances, sp.list([5, 0]))
+
+    @sp.add_test(name="getPriorBalanceHistory - steps forward from the level before rather than searching again")
     def test():
-        # GIVEN a Token contract
         scenario = sp.test_scenario()
 
-        token = FA12(
-            admin = Addresses.TOKEN_ADMIN_ADDRESS,
-        )
+        # GIVEN a seeded history of 100,000 checkpoints
+        numCheckpoints = 100000
+
+        # AND levels in the middle of the history, each a few checkpoints after the one before
+        indices = [50000, 50001, 50010, 50100]
+        levels = [2 * (index + 1) + 1 for index in indices]
+
+        # AND the token only stores the checkpoints the searches are expected to read: the first level is searched
+        # for backwards from the most recent checkpoint, and each later level forwards from the level before.
+        probes = CheckpointProbes.gallopingProbes(numCheckpoints, levels[0])
+        binaryProbes = len(CheckpointProbes.binarySearchProbes(numCheckpoints, levels[0]))
+        for i in range(1, len(levels)):
+            forwardProbes = CheckpointProbes.gallopingProbes(numCheckpoints, levels[i], hint = indices[i - 1])
+            binaryProbes += len(CheckpointProbes.binarySearchProbes(numCheckpoints, levels[i]))
+            scenario.h2("%d checkpoints after the level before: %d reads" % (indices[i] - indices[i - 1], len(forwardProbes)))
+            probes = probes | forwardProbes
+        scenario.h2("%d reads in total, against %d for a binary search per level" % (len(probes), binaryProbes))
+        assert len(probes) < binaryProbes
+
+        token = seededHistoryToken(numCheckpoints, indices = sorted(probes))
         scenario += token
 
-        # AND an alice has 100 tokens
+        # AND the chain has moved past the history.
         scenario += token.mint(
             sp.record(
-                value = 100,
-                address = Addresses.ALICE_ADDRESS
+                value = sp.nat(5),
+                address = Addresses.BOB_ADDRESS
             )
         ).run(
-            level = sp.nat(0),
+            level = sp.nat(2 * numCheckpoints + 2),
             sender = Addresses.TOKEN_ADMIN_ADDRESS,
         )
 
-        # AND Alice has approved Charlie to transfer 100 tokens
-        scenario += token.approve(
+        # WHEN Alice's balances are requested at the levels
+        history = sp.view("getPriorBalanceHistory", token.address, sp.record(address = Addresses.ALICE_ADDRESS, levels = sp.list(levels)), t = sp.TList(sp.TNat)).open_some()
+
+        # THEN the balance at each level is returned without reading any other checkpoint.
+        scenario.verify_equal(history, sp.list([index + 1 for index in indices]))
+
+    ################################################################
+    # compactCheckpoints
+    ################################################################
+
+    @sp.add_test(name="compactCheckpoints - removes checkpoints before the level and keeps later lookups")
+    def test():
+        # GIVEN a history where Alice's balance changed every other block, from 1 token at level 2 to 17 tokens
+        # at level 34.
+        scenario = sp.test_scenario()
+
+        numCheckpoints = 17
+
+        # AND a Token contract holding the history, which retains 10 levels of history
+        token = seededHistoryToken(numCheckpoints, checkpointRetention = sp.nat(10))
+        scenario += token
+
+        # AND a viewer contract.
+        viewer = Viewer(
+            t = sp.TRecord(result = sp.TNat, address = sp.TAddress, level = sp.TNat)
+        )
+        scenario += viewer
+
+        # WHEN anyone compacts Alice's checkpoints before level 11
+        scenario += token.compactCheckpoints(
+            sp.record(
+                address = Addresses.ALICE_ADDRESS,
+                beforeLevel = sp.nat(11)
+            )
+        ).run(
+            level = sp.nat(40),
+            sender = Addresses.BOB_ADDRESS
+        )
+
+        # THEN the checkpoint from level 10 is the first checkpoint kept
+        scenario.verify(token.data.checkpointBases[Addresses.ALICE_ADDRESS] == sp.nat(4))
+        scenario.verify(~token.data.checkpoints.contains((Addresses.ALICE_ADDRESS, 3)))
+        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 4)].balance == sp.nat(5))
+
+        # AND balances from level 10 onwards are unchanged.
+        history = sp.view("getPriorBalanceHistory", token.address, sp.record(address = Addresses.ALICE_ADDRESS, levels = sp.list([10, 11, 12, 34, 35])), t = sp.TList(sp.TNat)).open_some()
+        scenario.verify_equal(history, sp.list([5, 5, 6, 17, 17]))
+
+        # AND the average balance over levels 10 - 33 is unchanged.
+        average = sp.view("getAverageBalance", token.address, sp.record(address = Addresses.ALICE_ADDRESS, startLevel = sp.nat(10), endLevel = sp.nat(34)), t = sp.TNat).open_some()
+        scenario.verify(average == sp.nat(10))
+
+        # AND balances before level 10 can not be read.
+        scenario += token.getPriorBalance(
+            (
+                sp.record(
+                    address = Addresses.ALICE_ADDRESS,
+                    level = sp.nat(9)
+                ),
+                viewer.typed
+            )
+        ).run(
+            level = sp.nat(40),
+            valid = False
+        )
+
+    @sp.add_test(name="compactCheckpoints - fails within the retention horizon")
+    def test():
+        # GIVEN a Token contract which retains 10 levels of history and where the DAO takes snapshots
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+            snapshotter = sp.some(Addresses.DAO_ADDRESS),
+            checkpointRetention = sp.nat(10)
+        )
+        scenario += token
+
+        # AND alice has 100 tokens
+        scenario += token.mint(
+            sp.record(
+                value = 100,
+                address = Addresses.ALICE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(1),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+
+        # WHEN Alice's checkpoints are compacted before a level within the last 10 levels
+        # THEN the call fails.
+        scenario += token.compactCheckpoints(
+            sp.record(
+                address = Addresses.ALICE_ADDRESS,
+                beforeLevel = sp.nat(31)
+            )
+        ).run(
+            level = sp.nat(40),
+            sender = Addresses.BOB_ADDRESS,
+            valid = False
+        )
+
+        # WHEN the administrator is revoked
+        scenario += token.setAdministrator(sp.none).run(
+            sender = Addresses.TOKEN_ADMIN_ADDRESS
+        )
+
+        # THEN no one else can change the retention horizon
+        scenario += token.setCheckpointRetention(sp.nat(5)).run(
+            sender = Addresses.BOB_ADDRESS,
+            valid = False
+        )
+
+        # WHEN the DAO shortens the retention horizon
+        scenario += token.setCheckpointRetention(sp.nat(5)).run(
+            sender = Addresses.DAO_ADDRESS
+        )
+
+        # THEN the checkpoints can be compacted
+        scenario += token.compactCheckpoints(
+            sp.record(
+                address = Addresses.ALICE_ADDRESS,
+                beforeLevel = sp.nat(31)
+            )
+        ).run(
+            level = sp.nat(40),
+            sender = Addresses.BOB_ADDRESS
+        )
+
+        # AND nothing is removed, since Alice's only checkpoint is current.
+        scenario.verify(~token.data.checkpointBases.contains(Addresses.ALICE_ADDRESS))
+
+    ################################################################
+    # transfer
+    #
+    # Core transfer functionality tests are deferred to the token contract
+    # tests by SmartPy. 
+    #
+    # These tests specifically test the checkpoint functionality, and are largely
+    # based off of Compound's tests:
+    # https://github.com/compound-finance/compound-protocol/blob/master/tests/Governance/CompTest.js
+    ################################################################
+
+    @sp.add_test(name="transfer - counts checkpoints correctly on transfers from owners")
+    def test():
+        # GIVEN a Token contract
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+
+        # AND an alice has 100 tokens
+        scenario += token.mint(
+            sp.record(
+                value = 100,
+                address = Addresses.ALICE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(0),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+
+        # WHEN a series of transfers are made
+        # THEN token checkpoints are incremented properly
+
+        # Alice transfers the initial tokens to Bob.
+        scenario += token.transfer(
+            from_ = Addresses.ALICE_ADDRESS, 
+            to_ = Addresses.BOB_ADDRESS, 
+            value = 10
+        ).run(
+            level = sp.nat(1),
+            sender = Addresses.ALICE_ADDRESS
+        )
+        scenario.verify(token.data.latestCheckpoint[Addresses.ALICE_ADDRESS].index == sp.nat(1))
+        scenario.verify(token.data.latestCheckpoint[Addresses.BOB_ADDRESS].index == sp.nat(0))
+        scenario.verify(~token.data.latestCheckpoint.contains(Addresses.CHARLIE_ADDRESS))
+
+        # Alice transfers tokens to Charlie
+        scenario += token.transfer(
+            from_ = Addresses.ALICE_ADDRESS, 
+            to_ = Addresses.CHARLIE_ADDRESS, 
+            value = 10
+        ).run(
+            level = sp.nat(2),
+            sender = Addresses.ALICE_ADDRESS
+        )
+        scenario.verify(token.data.latestCheckpoint[Addresses.ALICE_ADDRESS].index == sp.nat(2))
+        scenario.verify(token.data.latestCheckpoint[Addresses.BOB_ADDRESS].index == sp.nat(0))
+        scenario.verify(token.data.latestCheckpoint[Addresses.CHARLIE_ADDRESS].index == sp.nat(0))
+
+        # Bob transfers tokens to Charlie
+        scenario += token.transfer(
+            from_ = Addresses.BOB_ADDRESS, 
+            to_ = Addresses.CHARLIE_ADDRESS, 
+            value = 5
+        ).run(
+            level = sp.nat(3),
+            sender = Addresses.BOB_ADDRESS
+        )
+        scenario.verify(token.data.latestCheckpoint[Addresses.ALICE_ADDRESS].index == sp.nat(2))
+        scenario.verify(token.data.latestCheckpoint[Addresses.BOB_ADDRESS].index == sp.nat(1))
+        scenario.verify(token.data.latestCheckpoint[Addresses.CHARLIE_ADDRESS].index == sp.nat(1))
+
+        # AND history is recorded correctly for Alice.
+        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 0)].fromBlock == 0)
+        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 0)].balance == 100)
+
+        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 1)].fromBlock == 1)
+        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 1)].balance == 90)
+
+        scenario.verify(token.data.latestCheckpoint[Addresses.ALICE_ADDRESS].fromBlock == 2)
+        scenario.verify(token.data.latestCheckpoint[Addresses.ALICE_ADDRESS].balance == 80)
+
+        # AND history is recorded correctly for Bob.
+        scenario.verify(token.data.checkpoints[(Addresses.BOB_ADDRESS, 0)].fromBlock == 1)
+        scenario.verify(token.data.checkpoints[(Addresses.BOB_ADDRESS, 0)].balance == 10)
+
+        scenario.verify(token.data.latestCheckpoint[Addresses.BOB_ADDRESS].fromBlock == 3)
+        scenario.verify(token.data.latestCheckpoint[Addresses.BOB_ADDRESS].balance == 5)
+
+        # AND history is recorded correctly for Charlie.
+        scenario.verify(token.data.checkpoints[(Addresses.CHARLIE_ADDRESS, 0)].fromBlock == 2)
+        scenario.verify(token.data.checkpoints[(Addresses.CHARLIE_ADDRESS, 0)].balance == 10)
+
+        scenario.verify(token.data.latestCheckpoint[Addresses.CHARLIE_ADDRESS].fromBlock == 3)
+        scenario.verify(token.data.latestCheckpoint[Addresses.CHARLIE_ADDRESS].balance == 15)
+
+    @sp.add_test(name="transfer - counts checkpoints correctly on transfers via approvals")
+    def test():
+        # GIVEN a Token contract
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+
+        # AND an alice has 100 tokens
+        scenario += token.mint(
+            sp.record(
+                value = 100,
+                address = Addresses.ALICE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(0),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+
+        # AND Alice has approved Charlie to transfer 100 tokens
+        scenario += token.approve(
             spender = Addresses.CHARLIE_ADDRESS,
             value = 100
         ).run(
@@ -1211,9 +2230,9 @@ if __name__ == "__main__":
             level = sp.nat(1),
             sender = Addresses.ALICE_ADDRESS
         )
-        scenario.verify(token.data.numCheckpoints.get(Addresses.ALICE_ADDRESS, sp.nat(0)) == sp.nat(2))
-        scenario.verify(token.data.numCheckpoints.get(Addresses.BOB_ADDRESS, sp.nat(0)) == sp.nat(1))
-        scenario.verify(token.data.numCheckpoints.get(Addresses.CHARLIE_ADDRESS, sp.nat(0)) == sp.nat(0))
+        scenario.verify(token.data.latestCheckpoint[Addresses.ALICE_ADDRESS].index == sp.nat(1))
+        scenario.verify(token.data.latestCheckpoint[Addresses.BOB_ADDRESS].index == sp.nat(0))
+        scenario.verify(~token.data.latestCheckpoint.contains(Addresses.CHARLIE_ADDRESS))
 
         # Charlie transfers tokens from Alice to Charlie.
         scenario += token.transfer(
@@ -1224,9 +2243,9 @@ if __name__ == "__main__":
             level = sp.nat(2),
             sender = Addresses.ALICE_ADDRESS
         )
-        scenario.verify(token.data.numCheckpoints.get(Addresses.ALICE_ADDRESS, sp.nat(0)) == sp.nat(3))
-        scenario.verify(token.data.numCheckpoints.get(Addresses.BOB_ADDRESS, sp.nat(0)) == sp.nat(1))
-        scenario.verify(token.data.numCheckpoints.get(Addresses.CHARLIE_ADDRESS, sp.nat(0)) == sp.nat(1))
+        scenario.verify(token.data.latestCheckpoint[Addresses.ALICE_ADDRESS].index == sp.nat(2))
+        scenario.verify(token.data.latestCheckpoint[Addresses.BOB_ADDRESS].index == sp.nat(0))
+        scenario.verify(token.data.latestCheckpoint[Addresses.CHARLIE_ADDRESS].index == sp.nat(0))
 
         # Charlie transfers tokens from Bob to Charlie.
         scenario += token.transfer(
@@ -1237,9 +2256,9 @@ if __name__ == "__main__":
             level = sp.nat(3),
             sender = Addresses.BOB_ADDRESS
         )
-        scenario.verify(token.data.numCheckpoints.get(Addresses.ALICE_ADDRESS, sp.nat(0)) == sp.nat(3))
-        scenario.verify(token.data.numCheckpoints.get(Addresses.BOB_ADDRESS, sp.nat(0)) == sp.nat(2))
-        scenario.verify(token.data.numCheckpoints.get(Addresses.CHARLIE_ADDRESS, sp.nat(0)) == sp.nat(2))
+        scenario.verify(token.data.latestCheckpoint[Addresses.ALICE_ADDRESS].index == sp.nat(2))
+        scenario.verify(token.data.latestCheckpoint[Addresses.BOB_ADDRESS].index == sp.nat(1))
+        scenario.verify(token.data.latestCheckpoint[Addresses.CHARLIE_ADDRESS].index == sp.nat(1))
 
         # AND history is recorded correctly for Alice.
         scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 0)].fromBlock == 0)
@@ -1248,22 +2267,22 @@ if __name__ == "__main__":
         scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 1)].fromBlock == 1)
         scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 1)].balance == 90)
 
-        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 2)].fromBlock == 2)
-        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 2)].balance == 80)
+        scenario.verify(token.data.latestCheckpoint[Addresses.ALICE_ADDRESS].fromBlock == 2)
+        scenario.verify(token.data.latestCheckpoint[Addresses.ALICE_ADDRESS].balance == 80)
 
         # AND history is recorded correctly for Bob.
         scenario.verify(token.data.checkpoints[(Addresses.BOB_ADDRESS, 0)].fromBlock == 1)
         scenario.verify(token.data.checkpoints[(Addresses.BOB_ADDRESS, 0)].balance == 10)
 
-        scenario.verify(token.data.checkpoints[(Addresses.BOB_ADDRESS, 1)].fromBlock == 3)
-        scenario.verify(token.data.checkpoints[(Addresses.BOB_ADDRESS, 1)].balance == 5)
+        scenario.verify(token.data.latestCheckpoint[Addresses.BOB_ADDRESS].fromBlock == 3)
+        scenario.verify(token.data.latestCheckpoint[Addresses.BOB_ADDRESS].balance == 5)
 
         # AND history is recorded correctly for Charlie.
         scenario.verify(token.data.checkpoints[(Addresses.CHARLIE_ADDRESS, 0)].fromBlock == 2)
         scenario.verify(token.data.checkpoints[(Addresses.CHARLIE_ADDRESS, 0)].balance == 10)
 
-        scenario.verify(token.data.checkpoints[(Addresses.CHARLIE_ADDRESS, 1)].fromBlock == 3)
-        scenario.verify(token.data.checkpoints[(Addresses.CHARLIE_ADDRESS, 1)].balance == 15)
+        scenario.verify(token.data.latestCheckpoint[Addresses.CHARLIE_ADDRESS].fromBlock == 3)
+        scenario.verify(token.data.latestCheckpoint[Addresses.CHARLIE_ADDRESS].balance == 15)
 
     @sp.add_test(name="transfer - does not write two checkpoints for one block")
     def test():
@@ -1308,20 +2327,1231 @@ if __name__ == "__main__":
             sender = Addresses.ALICE_ADDRESS
         )
 
-        # THEN Alice only records the transfer for the block once.
-        scenario.verify(token.data.numCheckpoints.get(Addresses.ALICE_ADDRESS, sp.nat(0)) == sp.nat(2))
-        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 0)].fromBlock == 0)
-        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 0)].balance == totalTokens)
+        # THEN Alice only records the transfer for the block once.
+        scenario.verify(token.data.latestCheckpoint[Addresses.ALICE_ADDRESS].index == sp.nat(1))
+        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 0)].fromBlock == 0)
+        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 0)].balance == totalTokens)
+
+        scenario.verify(token.data.latestCheckpoint[Addresses.ALICE_ADDRESS].fromBlock == level)
+        scenario.verify(token.data.latestCheckpoint[Addresses.ALICE_ADDRESS].balance == sp.as_nat(totalTokens - (transferValue * 2)))
+
+        # AND Bob only records one checkpoint        
+        scenario.verify(token.data.latestCheckpoint[Addresses.BOB_ADDRESS].index == sp.nat(0))
+        scenario.verify(token.data.latestCheckpoint[Addresses.BOB_ADDRESS].fromBlock == level)
+        scenario.verify(token.data.latestCheckpoint[Addresses.BOB_ADDRESS].balance == (transferValue * 2))
+
+        # AND the history is only appended to once the block changes.
+        scenario.verify(~token.data.checkpoints.contains((Addresses.ALICE_ADDRESS, 1)))
+        scenario.verify(~token.data.checkpoints.contains((Addresses.BOB_ADDRESS, 0)))
+
+    @sp.add_test(name="transfer - does not write a checkpoint when the sender and receiver are the same")
+    def test():
+        # GIVEN a Token contract
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+
+        # AND an alice has 100 tokens
+        totalTokens = 100
+        scenario += token.mint(
+            sp.record(
+                value = totalTokens,
+                address = Addresses.ALICE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(0),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+
+        # WHEN alice transfers tokens to herself.        
+        transferValue = sp.nat(10)
+        level = sp.nat(1)
+        scenario += token.transfer(
+            from_ = Addresses.ALICE_ADDRESS, 
+            to_ = Addresses.ALICE_ADDRESS, 
+            value = transferValue
+        ).run(
+            level = level,
+            sender = Addresses.ALICE_ADDRESS
+        )
+
+        # THEN Alice still has the same amount of tokens
+        scenario.verify(token.data.balances[Addresses.ALICE_ADDRESS] == totalTokens)
+
+        # AND Alice has one checkpoint
+        scenario.verify(token.data.latestCheckpoint[Addresses.ALICE_ADDRESS].index == sp.nat(0))
+
+        # THEN Alice's checkpoint is the initial mint.
+        scenario.verify(token.data.latestCheckpoint[Addresses.ALICE_ADDRESS].fromBlock == 0)
+        scenario.verify(token.data.latestCheckpoint[Addresses.ALICE_ADDRESS].balance == totalTokens)
+
+    @sp.add_test(name="transfer - accumulates the balance held over each block")
+    def test():
+        # GIVEN a Token contract
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+
+        # AND an alice has 100 tokens from level 1
+        scenario += token.mint(
+            sp.record(
+                value = sp.nat(100),
+                address = Addresses.ALICE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(1),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+
+        # WHEN alice transfers 40 and then 10 tokens to bob at level 5
+        scenario += token.transfer(
+            from_ = Addresses.ALICE_ADDRESS,
+            to_ = Addresses.BOB_ADDRESS,
+            value = sp.nat(40)
+        ).run(
+            level = sp.nat(5),
+            sender = Addresses.ALICE_ADDRESS
+        )
+        scenario += token.transfer(
+            from_ = Addresses.ALICE_ADDRESS,
+            to_ = Addresses.BOB_ADDRESS,
+            value = sp.nat(10)
+        ).run(
+            level = sp.nat(5),
+            sender = Addresses.ALICE_ADDRESS
+        )
+
+        # AND alice transfers her remaining 50 tokens to bob at level 9
+        scenario += token.transfer(
+            from_ = Addresses.ALICE_ADDRESS,
+            to_ = Addresses.BOB_ADDRESS,
+            value = sp.nat(50)
+        ).run(
+            level = sp.nat(9),
+            sender = Addresses.ALICE_ADDRESS
+        )
+
+        # THEN each of alice's checkpoints holds the sum of her balance over every earlier block.
+        # Levels 1 - 4 held 100 tokens and levels 5 - 8 held 50 tokens.
+        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 0)].cumulative == sp.nat(0))
+        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 1)].cumulative == sp.nat(400))
+        scenario.verify(token.data.latestCheckpoint[Addresses.ALICE_ADDRESS].cumulative == sp.nat(600))
+
+        # AND bob's accumulator counts the 50 tokens he held over levels 5 - 8.
+        scenario.verify(token.data.checkpoints[(Addresses.BOB_ADDRESS, 0)].cumulative == sp.nat(0))
+        scenario.verify(token.data.latestCheckpoint[Addresses.BOB_ADDRESS].cumulative == sp.nat(200))
+
+    ################################################################
+    # getAverageBalance / getAverageVotes
+    ################################################################
+
+    # Returns the average of a view over [startLevel, endLevel) for an address.
+    def average(token, view, address, startLevel, endLevel):
+        return sp.view(view, token.address, sp.record(address = address, startLevel = sp.nat(startLevel), endLevel = sp.nat(endLevel)), t = sp.TNat).open_some()
+
+    @sp.add_test(name="getAverageBalance - averages the balance over ranges which cross checkpoints")
+    def test():
+        # GIVEN a Token contract
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+
+        # AND alice has 100 tokens from level 1
+        scenario += token.mint(
+            sp.record(
+                value = sp.nat(100),
+                address = Addresses.ALICE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(1),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+
+        # AND alice transfers 40 tokens to bob at level 5 and her remaining 60 tokens at level 9
+        scenario += token.transfer(
+            from_ = Addresses.ALICE_ADDRESS,
+            to_ = Addresses.BOB_ADDRESS,
+            value = sp.nat(40)
+        ).run(
+            level = sp.nat(5),
+            sender = Addresses.ALICE_ADDRESS
+        )
+        scenario += token.transfer(
+            from_ = Addresses.ALICE_ADDRESS,
+            to_ = Addresses.BOB_ADDRESS,
+            value = sp.nat(60)
+        ).run(
+            level = sp.nat(9),
+            sender = Addresses.ALICE_ADDRESS
+        )
+
+        # AND the chain has moved past the history.
+        scenario += token.mint(
+            sp.record(
+                value = sp.nat(1),
+                address = Addresses.CHARLIE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(20),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+
+        # WHEN averages are requested over ranges within and across alice's checkpoints
+        # THEN each is the mean of her balance at the end of each block in the range.
+        # Alice held 100 tokens over levels 1 - 4, 60 tokens over levels 5 - 8 and none from level 9.
+        scenario.verify(average(token, "getAverageBalance", Addresses.ALICE_ADDRESS, 1, 5) == 100)
+        scenario.verify(average(token, "getAverageBalance", Addresses.ALICE_ADDRESS, 4, 5) == 100)
+        scenario.verify(average(token, "getAverageBalance", Addresses.ALICE_ADDRESS, 3, 7) == 80)
+        scenario.verify(average(token, "getAverageBalance", Addresses.ALICE_ADDRESS, 2, 11) == 60)
+        scenario.verify(average(token, "getAverageBalance", Addresses.ALICE_ADDRESS, 9, 15) == 0)
+
+        # AND blocks before alice's first checkpoint count as a zero balance.
+        scenario.verify(average(token, "getAverageBalance", Addresses.ALICE_ADDRESS, 0, 1) == 0)
+        scenario.verify(average(token, "getAverageBalance", Addresses.ALICE_ADDRESS, 0, 3) == 66)
+
+        # AND bob's average counts the 40 tokens he held over levels 5 - 8 and the 100 tokens he held from level 9.
+        scenario.verify(average(token, "getAverageBalance", Addresses.BOB_ADDRESS, 3, 11) == 45)
+
+    @sp.add_test(name="getAverageVotes - averages voting power over ranges which cross delegations")
+    def test():
+        # GIVEN a Token contract
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+
+        # AND alice has 100 tokens and bob has 10 tokens from level 1
+        scenario += token.mint(
+            sp.record(
+                value = sp.nat(100),
+                address = Addresses.ALICE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(1),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token.mint(
+            sp.record(
+                value = sp.nat(10),
+                address = Addresses.BOB_ADDRESS
+            )
+        ).run(
+            level = sp.nat(1),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+
+        # AND alice delegates to bob at level 4 and removes the delegation at level 8
+        scenario += token.delegate(Addresses.BOB_ADDRESS).run(
+            level = sp.nat(4),
+            sender = Addresses.ALICE_ADDRESS
+        )
+        scenario += token.delegate(Addresses.ALICE_ADDRESS).run(
+            level = sp.nat(8),
+            sender = Addresses.ALICE_ADDRESS
+        )
+
+        # AND the chain has moved past the history.
+        scenario += token.mint(
+            sp.record(
+                value = sp.nat(1),
+                address = Addresses.CHARLIE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(20),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+
+        # WHEN average voting power is requested over a range which crosses both delegations
+        # THEN bob's average counts alice's balance over levels 4 - 7 only
+        # AND alice's average excludes those levels.
+        scenario.verify(average(token, "getAverageVotes", Addresses.BOB_ADDRESS, 2, 10) == 60)
+        scenario.verify(average(token, "getAverageVotes", Addresses.ALICE_ADDRESS, 2, 10) == 50)
+
+        # AND ranges within a single checkpoint return the voting power of that checkpoint.
+        scenario.verify(average(token, "getAverageVotes", Addresses.BOB_ADDRESS, 4, 8) == 110)
+        scenario.verify(average(token, "getAverageVotes", Addresses.ALICE_ADDRESS, 4, 8) == 0)
+
+        # AND blocks before alice's first checkpoint count as no voting power.
+        scenario.verify(average(token, "getAverageVotes", Addresses.ALICE_ADDRESS, 0, 2) == 50)
+
+        # AND an address which never had voting power averages none.
+        scenario.verify(average(token, "getAverageVotes", Addresses.CHARLIE_ADDRESS, 2, 10) == 0)
+
+    @sp.add_test(name="getAverageBalance / getAverageVotes - fail on an empty range")
+    def test():
+        # GIVEN a Token contract
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+
+        # AND alice has 100 tokens from level 1
+        scenario += token.mint(
+            sp.record(
+                value = sp.nat(100),
+                address = Addresses.ALICE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(1),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+
+        # AND a contract which reads averages from the token
+        reader = AverageReader(token.address)
+        scenario += reader
+
+        # WHEN the reader requests averages over a range which ends where it starts, or before it starts
+        # THEN the calls fail.
+        for (startLevel, endLevel) in [(5, 5), (6, 5)]:
+            window = sp.record(address = Addresses.ALICE_ADDRESS, startLevel = sp.nat(startLevel), endLevel = sp.nat(endLevel))
+            scenario += reader.readAverageBalance(window).run(
+                level = sp.nat(10),
+                valid = False,
+                exception = Errors.ERROR_BAD_WINDOW
+            )
+            scenario += reader.readAverageVotes(window).run(
+                level = sp.nat(10),
+                valid = False,
+                exception = Errors.ERROR_BAD_WINDOW
+            )
+
+        # WHEN the reader requests an average over a range of a single block
+        scenario += reader.readAverageBalance(sp.record(address = Addresses.ALICE_ADDRESS, startLevel = sp.nat(5), endLevel = sp.nat(6))).run(
+            level = sp.nat(10)
+        )
+
+        # THEN it is the balance at that block.
+        scenario.verify(reader.data.last.open_some() == 100)
+
+    ################################################################
+    # transferBatch
+    ################################################################
+
+    @sp.add_test(name="transferBatch - moves balances and writes one checkpoint per address")
+    def test():
+        # GIVEN a Token contract
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+
+        # AND an alice has 100 tokens
+        scenario += token.mint(
+            sp.record(
+                value = 100,
+                address = Addresses.ALICE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(0),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+
+        # WHEN Alice sends tokens to Bob twice and to Charlie once in a batch
+        scenario += token.transferBatch([
+            sp.record(from_ = Addresses.ALICE_ADDRESS, to_ = Addresses.BOB_ADDRESS, value = 10),
+            sp.record(from_ = Addresses.ALICE_ADDRESS, to_ = Addresses.CHARLIE_ADDRESS, value = 20),
+            sp.record(from_ = Addresses.ALICE_ADDRESS, to_ = Addresses.BOB_ADDRESS, value = 5),
+        ]).run(
+            level = sp.nat(1),
+            sender = Addresses.ALICE_ADDRESS
+        )
+
+        # THEN balances are updated.
+        scenario.verify(token.data.balances[Addresses.ALICE_ADDRESS] == 65)
+        scenario.verify(token.data.balances[Addresses.BOB_ADDRESS] == 15)
+        scenario.verify(token.data.balances[Addresses.CHARLIE_ADDRESS] == 20)
+
+        # AND each address has one checkpoint for the batch.
+        scenario.verify(token.data.latestCheckpoint[Addresses.ALICE_ADDRESS].index == sp.nat(1))
+        scenario.verify(token.data.latestCheckpoint[Addresses.ALICE_ADDRESS].balance == 65)
+        scenario.verify(token.data.latestCheckpoint[Addresses.BOB_ADDRESS].index == sp.nat(0))
+        scenario.verify(token.data.latestCheckpoint[Addresses.BOB_ADDRESS].balance == 15)
+        scenario.verify(token.data.latestCheckpoint[Addresses.CHARLIE_ADDRESS].index == sp.nat(0))
+        scenario.verify(token.data.latestCheckpoint[Addresses.CHARLIE_ADDRESS].balance == 20)
+
+        # AND each address' voting power has one checkpoint for the batch.
+        scenario.verify(token.data.latestVoteCheckpoint[Addresses.ALICE_ADDRESS].index == sp.nat(1))
+        scenario.verify(token.data.latestVoteCheckpoint[Addresses.ALICE_ADDRESS].balance == 65)
+        scenario.verify(token.data.latestVoteCheckpoint[Addresses.BOB_ADDRESS].index == sp.nat(0))
+        scenario.verify(token.data.latestVoteCheckpoint[Addresses.BOB_ADDRESS].balance == 15)
+        scenario.verify(token.data.latestVoteCheckpoint[Addresses.CHARLIE_ADDRESS].index == sp.nat(0))
+        scenario.verify(token.data.latestVoteCheckpoint[Addresses.CHARLIE_ADDRESS].balance == 20)
+
+    @sp.add_test(name="transferBatch - spends approvals")
+    def test():
+        # GIVEN a Token contract
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+
+        # AND an alice has 100 tokens
+        scenario += token.mint(
+            sp.record(
+                value = 100,
+                address = Addresses.ALICE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(0),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+
+        # AND Alice has approved Bob to spend 20 tokens
+        scenario += token.approve(
+            spender = Addresses.BOB_ADDRESS,
+            value = 20
+        ).run(
+            sender = Addresses.ALICE_ADDRESS
+        )
+
+        # WHEN Bob spends the approval in a batch
+        scenario += token.transferBatch([
+            sp.record(from_ = Addresses.ALICE_ADDRESS, to_ = Addresses.BOB_ADDRESS, value = 10),
+            sp.record(from_ = Addresses.ALICE_ADDRESS, to_ = Addresses.CHARLIE_ADDRESS, value = 10),
+        ]).run(
+            level = sp.nat(1),
+            sender = Addresses.BOB_ADDRESS
+        )
+
+        # THEN balances are updated
+        scenario.verify(token.data.balances[Addresses.ALICE_ADDRESS] == 80)
+        scenario.verify(token.data.balances[Addresses.BOB_ADDRESS] == 10)
+        scenario.verify(token.data.balances[Addresses.CHARLIE_ADDRESS] == 10)
+
+        # AND the approval is spent.
+        scenario.verify(~token.data.approvals.contains((Addresses.ALICE_ADDRESS, Addresses.BOB_ADDRESS)))
+
+        # AND Bob cannot spend more than the approval.
+        scenario += token.transferBatch([
+            sp.record(from_ = Addresses.ALICE_ADDRESS, to_ = Addresses.BOB_ADDRESS, value = 1),
+        ]).run(
+            level = sp.nat(2),
+            sender = Addresses.BOB_ADDRESS,
+            valid = False
+        )
+
+    @sp.add_test(name="transferBatch - fails if any transfer is not allowed")
+    def test():
+        # GIVEN a Token contract
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+
+        # AND Alice and Bob have 100 tokens
+        scenario += token.mint(
+            sp.record(
+                value = 100,
+                address = Addresses.ALICE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(0),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token.mint(
+            sp.record(
+                value = 100,
+                address = Addresses.BOB_ADDRESS
+            )
+        ).run(
+            level = sp.nat(0),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+
+        # WHEN Alice includes a transfer from Bob in a batch
+        # THEN the call fails.
+        scenario += token.transferBatch([
+            sp.record(from_ = Addresses.ALICE_ADDRESS, to_ = Addresses.CHARLIE_ADDRESS, value = 10),
+            sp.record(from_ = Addresses.BOB_ADDRESS, to_ = Addresses.CHARLIE_ADDRESS, value = 10),
+        ]).run(
+            level = sp.nat(1),
+            sender = Addresses.ALICE_ADDRESS,
+            valid = False
+        )
+
+        # AND no balances changed.
+        scenario.verify(token.data.balances[Addresses.ALICE_ADDRESS] == 100)
+        scenario.verify(token.data.balances[Addresses.BOB_ADDRESS] == 100)
+
+    @sp.add_test(name="transferBatch - fails if the sender's balance runs out part way through")
+    def test():
+        # GIVEN a Token contract
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+
+        # AND an alice has 100 tokens
+        scenario += token.mint(
+            sp.record(
+                value = 100,
+                address = Addresses.ALICE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(0),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+
+        # WHEN Alice sends more than her balance across a batch
+        # THEN the call fails.
+        scenario += token.transferBatch([
+            sp.record(from_ = Addresses.ALICE_ADDRESS, to_ = Addresses.BOB_ADDRESS, value = 60),
+            sp.record(from_ = Addresses.ALICE_ADDRESS, to_ = Addresses.CHARLIE_ADDRESS, value = 60),
+        ]).run(
+            level = sp.nat(1),
+            sender = Addresses.ALICE_ADDRESS,
+            valid = False
+        )
+
+    ################################################################
+    # transferAndCall
+    ################################################################
+
+    # Returns a Token contract where Alice has 100 tokens, along with a receiver of transfers.
+    def transferAndCallFixture(scenario):
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+
+        receiver = TransferReceiver()
+        scenario += receiver
+
+        scenario += token.mint(
+            sp.record(
+                value = 100,
+                address = Addresses.ALICE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(0),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+
+        return token, receiver
+
+    @sp.add_test(name="transferAndCall - moves the balance and notifies the receiver")
+    def test():
+        # GIVEN a Token contract where Alice has 100 tokens, and a receiver
+        scenario = sp.test_scenario()
+        token, receiver = transferAndCallFixture(scenario)
+
+        # WHEN Alice sends 30 tokens to the receiver along with some data
+        scenario += token.transferAndCall(
+            from_ = Addresses.ALICE_ADDRESS,
+            to_ = receiver.address,
+            value = 30,
+            data = sp.bytes("0x1234")
+        ).run(
+            level = sp.nat(1),
+            sender = Addresses.ALICE_ADDRESS
+        )
+
+        # THEN the balances are moved.
+        scenario.verify(token.data.balances[Addresses.ALICE_ADDRESS] == 70)
+        scenario.verify(token.data.balances[receiver.address] == 30)
+
+        # AND the balances are checkpointed.
+        scenario.verify(token.data.latestCheckpoint[Addresses.ALICE_ADDRESS].balance == 70)
+        scenario.verify(token.data.latestCheckpoint[receiver.address].balance == 30)
+
+        # AND the receiver is notified with the sender, the amount and the data.
+        scenario.verify(receiver.data.last.open_some().from_ == Addresses.ALICE_ADDRESS)
+        scenario.verify(receiver.data.last.open_some().value == 30)
+        scenario.verify(receiver.data.last.open_some().data == sp.bytes("0x1234"))
+
+    @sp.add_test(name="transferAndCall - fails if the receiver has no onTokenTransfer entrypoint")
+    def test():
+        # GIVEN a Token contract where Alice has 100 tokens
+        scenario = sp.test_scenario()
+        token, receiver = transferAndCallFixture(scenario)
+
+        # AND a contract with no onTokenTransfer entrypoint
+        viewer = Viewer(sp.TNat)
+        scenario += viewer
+
+        # WHEN Alice sends tokens to the contract
+        # THEN the call fails.
+        scenario += token.transferAndCall(
+            from_ = Addresses.ALICE_ADDRESS,
+            to_ = viewer.address,
+            value = 30,
+            data = sp.bytes("0x")
+        ).run(
+            level = sp.nat(1),
+            sender = Addresses.ALICE_ADDRESS,
+            valid = False
+        )
+
+        # WHEN Alice sends tokens to an implicit account
+        # THEN the call fails.
+        scenario += token.transferAndCall(
+            from_ = Addresses.ALICE_ADDRESS,
+            to_ = Addresses.BOB_ADDRESS,
+            value = 30,
+            data = sp.bytes("0x")
+        ).run(
+            level = sp.nat(1),
+            sender = Addresses.ALICE_ADDRESS,
+            valid = False
+        )
+
+    @sp.add_test(name="transferAndCall - fails when paused")
+    def test():
+        # GIVEN a Token contract where Alice has 100 tokens, and a receiver
+        scenario = sp.test_scenario()
+        token, receiver = transferAndCallFixture(scenario)
+
+        # AND the token is paused
+        scenario += token.setPause(True).run(
+            sender = Addresses.TOKEN_ADMIN_ADDRESS
+        )
+
+        # WHEN Alice sends tokens to the receiver
+        # THEN the call fails.
+        scenario += token.transferAndCall(
+            from_ = Addresses.ALICE_ADDRESS,
+            to_ = receiver.address,
+            value = 30,
+            data = sp.bytes("0x")
+        ).run(
+            level = sp.nat(1),
+            sender = Addresses.ALICE_ADDRESS,
+            valid = False
+        )
+
+        # WHEN the administrator sends Alice's tokens to the receiver
+        # THEN the call fails.
+        scenario += token.transferAndCall(
+            from_ = Addresses.ALICE_ADDRESS,
+            to_ = receiver.address,
+            value = 30,
+            data = sp.bytes("0x")
+        ).run(
+            level = sp.nat(1),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+            valid = False
+        )
+
+    @sp.add_test(name="transferAndCall - spends the approval of a sender other than the owner")
+    def test():
+        # GIVEN a Token contract where Alice has 100 tokens, and a receiver
+        scenario = sp.test_scenario()
+        token, receiver = transferAndCallFixture(scenario)
+
+        # AND Alice has approved Bob for 40 tokens
+        scenario += token.approve(
+            spender = Addresses.BOB_ADDRESS,
+            value = 40
+        ).run(
+            sender = Addresses.ALICE_ADDRESS
+        )
+
+        # WHEN Bob sends 30 of Alice's tokens to the receiver
+        scenario += token.transferAndCall(
+            from_ = Addresses.ALICE_ADDRESS,
+            to_ = receiver.address,
+            value = 30,
+            data = sp.bytes("0x1234")
+        ).run(
+            level = sp.nat(1),
+            sender = Addresses.BOB_ADDRESS
+        )
+
+        # THEN Alice's balance is moved.
+        scenario.verify(token.data.balances[Addresses.ALICE_ADDRESS] == 70)
+        scenario.verify(token.data.balances[receiver.address] == 30)
+
+        # AND Bob's approval is spent.
+        scenario.verify(token.data.approvals[(Addresses.ALICE_ADDRESS, Addresses.BOB_ADDRESS)] == 10)
+
+        # AND the receiver is notified that the tokens came from Alice.
+        scenario.verify(receiver.data.last.open_some().from_ == Addresses.ALICE_ADDRESS)
+        scenario.verify(receiver.data.last.open_some().value == 30)
+
+        # WHEN Bob sends more of Alice's tokens than he is approved for
+        # THEN the call fails.
+        scenario += token.transferAndCall(
+            from_ = Addresses.ALICE_ADDRESS,
+            to_ = receiver.address,
+            value = 11,
+            data = sp.bytes("0x")
+        ).run(
+            level = sp.nat(2),
+            sender = Addresses.BOB_ADDRESS,
+            valid = False
+        )
+
+        # WHEN Charlie, who is not approved, sends Alice's tokens
+        # THEN the call fails.
+        scenario += token.transferAndCall(
+            from_ = Addresses.ALICE_ADDRESS,
+            to_ = receiver.address,
+            value = 1,
+            data = sp.bytes("0x")
+        ).run(
+            level = sp.nat(2),
+            sender = Addresses.CHARLIE_ADDRESS,
+            valid = False
+        )
+
+    ################################################################
+    # delegate
+    ################################################################
+
+    @sp.add_test(name="delegate - moves voting power to the delegate and back")
+    def test():
+        # GIVEN a Token contract
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+
+        # AND Alice has 100 tokens and Bob has 10 tokens
+        scenario += token.mint(
+            sp.record(
+                value = 100,
+                address = Addresses.ALICE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(0),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token.mint(
+            sp.record(
+                value = 10,
+                address = Addresses.BOB_ADDRESS
+            )
+        ).run(
+            level = sp.nat(0),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+
+        # WHEN Alice delegates to Bob
+        scenario += token.delegate(Addresses.BOB_ADDRESS).run(
+            level = sp.nat(1),
+            sender = Addresses.ALICE_ADDRESS
+        )
+
+        # THEN Bob votes with both balances, and Alice's balance is unchanged.
+        scenario.verify(token.data.delegates[Addresses.ALICE_ADDRESS] == Addresses.BOB_ADDRESS)
+        scenario.verify(token.data.latestVoteCheckpoint[Addresses.BOB_ADDRESS].balance == 110)
+        scenario.verify(token.data.latestVoteCheckpoint[Addresses.ALICE_ADDRESS].balance == 0)
+        scenario.verify(token.data.balances[Addresses.ALICE_ADDRESS] == 100)
+
+        # WHEN Alice receives more tokens
+        scenario += token.mint(
+            sp.record(
+                value = 20,
+                address = Addresses.ALICE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(2),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+
+        # THEN they are added to Bob's voting power.
+        scenario.verify(token.data.latestVoteCheckpoint[Addresses.BOB_ADDRESS].balance == 130)
+        scenario.verify(token.data.latestVoteCheckpoint[Addresses.ALICE_ADDRESS].balance == 0)
+
+        # WHEN Alice delegates to herself
+        scenario += token.delegate(Addresses.ALICE_ADDRESS).run(
+            level = sp.nat(3),
+            sender = Addresses.ALICE_ADDRESS
+        )
+
+        # THEN the delegation is removed and Alice votes with her own balance again.
+        scenario.verify(~token.data.delegates.contains(Addresses.ALICE_ADDRESS))
+        scenario.verify(token.data.latestVoteCheckpoint[Addresses.BOB_ADDRESS].balance == 10)
+        scenario.verify(token.data.latestVoteCheckpoint[Addresses.ALICE_ADDRESS].balance == 120)
+
+        # AND the history of Bob's voting power is checkpointed.
+        scenario.verify(token.data.voteCheckpoints[(Addresses.BOB_ADDRESS, 0)].balance == 10)
+        scenario.verify(token.data.voteCheckpoints[(Addresses.BOB_ADDRESS, 1)].balance == 110)
+        scenario.verify(token.data.voteCheckpoints[(Addresses.BOB_ADDRESS, 2)].balance == 130)
+
+    @sp.add_test(name="delegate - fails when paused")
+    def test():
+        # GIVEN a paused Token contract
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+        scenario += token.setPause(True).run(
+            sender = Addresses.TOKEN_ADMIN_ADDRESS
+        )
+
+        # WHEN Alice delegates to Bob
+        # THEN the call fails.
+        scenario += token.delegate(Addresses.BOB_ADDRESS).run(
+            sender = Addresses.ALICE_ADDRESS,
+            valid = False
+        )
+
+    @sp.add_test(name="getPriorVotes - returns delegated voting power at past levels")
+    def test():
+        # GIVEN a Token contract
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+
+        # AND Alice has 100 tokens and Bob has 10 tokens from level 0
+        scenario += token.mint(
+            sp.record(
+                value = 100,
+                address = Addresses.ALICE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(0),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token.mint(
+            sp.record(
+                value = 10,
+                address = Addresses.BOB_ADDRESS
+            )
+        ).run(
+            level = sp.nat(0),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+
+        # AND Alice delegates to Bob at level 2, receives 20 tokens at level 4 and delegates to herself at level 6
+        scenario += token.delegate(Addresses.BOB_ADDRESS).run(
+            level = sp.nat(2),
+            sender = Addresses.ALICE_ADDRESS
+        )
+        scenario += token.mint(
+            sp.record(
+                value = 20,
+                address = Addresses.ALICE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(4),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token.delegate(Addresses.ALICE_ADDRESS).run(
+            level = sp.nat(6),
+            sender = Addresses.ALICE_ADDRESS
+        )
+
+        # AND the chain has moved past the history.
+        scenario += token.mint(
+            sp.record(
+                value = 5,
+                address = Addresses.CHARLIE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(10),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+
+        # WHEN voting power is requested on, between and after each change
+        # THEN Bob's voting power includes Alice's balance only while she delegated to him
+        # AND Alice has no voting power while she delegated.
+        expected = [
+            (0, 100, 10),
+            (1, 100, 10),
+            (2, 0, 110),
+            (3, 0, 110),
+            (4, 0, 130),
+            (5, 0, 130),
+            (6, 120, 10),
+            (9, 120, 10),
+        ]
+        for (level, aliceVotes, bobVotes) in expected:
+            scenario.verify(sp.view("getPriorVotes", token.address, sp.record(address = Addresses.ALICE_ADDRESS, level = sp.nat(level)), t = sp.TNat).open_some() == aliceVotes)
+            scenario.verify(sp.view("getPriorVotes", token.address, sp.record(address = Addresses.BOB_ADDRESS, level = sp.nat(level)), t = sp.TNat).open_some() == bobVotes)
+
+        # AND an address without voting power has none at any level.
+        scenario.verify(sp.view("getPriorVotes", token.address, sp.record(address = Addresses.DAO_ADDRESS, level = sp.nat(5)), t = sp.TNat).open_some() == 0)
+
+    @sp.add_test(name="transfer - moving voting power between delegates does not depend on the number of delegators")
+    def test():
+        scenario = sp.test_scenario()
+
+        # Voting power is moved from the sender's delegate to the receiver's delegate, so a transfer reads and writes
+        # two delegates' voting power regardless of how many addresses have delegated to them.
+        for numDelegators in [1, 100]:
+            scenario.h2("%d delegators" % numDelegators)
+
+            # GIVEN a Token contract
+            token = FA12(
+                admin = Addresses.TOKEN_ADMIN_ADDRESS,
+            )
+            scenario += token
+
+            # AND Alice delegates to the DAO and Bob delegates to Charlie, along with other delegators
+            senders = [Addresses.ALICE_ADDRESS, Addresses.BOB_ADDRESS]
+            for i in range(numDelegators - 1):
+                senders.append(sp.test_account("delegator%d" % i).address)
+            for i in range(len(senders)):
+                scenario += token.mint(
+                    sp.record(
+                        value = 100,
+                        address = senders[i]
+                    )
+                ).run(
+                    level = sp.nat(0),
+                    sender = Addresses.TOKEN_ADMIN_ADDRESS,
+                )
+                delegate = Addresses.DAO_ADDRESS if i % 2 == 0 else Addresses.CHARLIE_ADDRESS
+                scenario += token.delegate(delegate).run(
+                    level = sp.nat(0),
+                    sender = senders[i]
+                )
+            daoVotes = 100 * ((len(senders) + 1) // 2)
+            charlieVotes = 100 * (len(senders) // 2)
+            scenario.verify(token.data.latestVoteCheckpoint[Addresses.DAO_ADDRESS].balance == daoVotes)
+            scenario.verify(token.data.latestVoteCheckpoint[Addresses.CHARLIE_ADDRESS].balance == charlieVotes)
+
+            # WHEN Alice transfers tokens to Bob
+            scenario += token.transfer(
+                from_ = Addresses.ALICE_ADDRESS,
+                to_ = Addresses.BOB_ADDRESS,
+                value = 10
+            ).run(
+                level = sp.nat(1),
+                sender = Addresses.ALICE_ADDRESS
+            )
+
+            # THEN voting power moves from Alice's delegate to Bob's delegate
+            scenario.verify(token.data.latestVoteCheckpoint[Addresses.DAO_ADDRESS].balance == daoVotes - 10)
+            scenario.verify(token.data.latestVoteCheckpoint[Addresses.CHARLIE_ADDRESS].balance == charlieVotes + 10)
+
+            # AND the voting power of the delegators is untouched.
+            scenario.verify(token.data.latestVoteCheckpoint[Addresses.ALICE_ADDRESS].balance == 0)
+            scenario.verify(token.data.latestVoteCheckpoint[Addresses.BOB_ADDRESS].balance == 0)
+
+    ################################################################
+    # approve
+    ################################################################
+
+    @sp.add_test(name="approve - setting an approval to zero removes it")
+    def test():
+        # GIVEN a Token contract
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+
+        # AND Alice, who has no balance, has approved Bob to spend 20 tokens
+        scenario += token.approve(
+            spender = Addresses.BOB_ADDRESS,
+            value = 20
+        ).run(
+            sender = Addresses.ALICE_ADDRESS
+        )
+        scenario.verify(token.data.approvals[(Addresses.ALICE_ADDRESS, Addresses.BOB_ADDRESS)] == 20)
+
+        # WHEN Alice sets the approval to zero
+        scenario += token.approve(
+            spender = Addresses.BOB_ADDRESS,
+            value = 0
+        ).run(
+            sender = Addresses.ALICE_ADDRESS
+        )
+
+        # THEN the approval is removed.
+        scenario.verify(~token.data.approvals.contains((Addresses.ALICE_ADDRESS, Addresses.BOB_ADDRESS)))
+
+        # AND no balance was written for Alice.
+        scenario.verify(~token.data.balances.contains(Addresses.ALICE_ADDRESS))
+
+    @sp.add_test(name="transfer - spending an approval does not depend on the number of approvals of the owner")
+    def test():
+        scenario = sp.test_scenario()
+
+        # Approvals are keyed by (owner, spender), so a transfer via an approval reads and writes a single
+        # approval regardless of how many spenders the owner has approved.
+        for numSpenders in [1, 100]:
+            scenario.h2("%d spenders" % numSpenders)
+
+            # GIVEN a Token contract
+            token = FA12(
+                admin = Addresses.TOKEN_ADMIN_ADDRESS,
+            )
+            scenario += token
+
+            # AND Alice has 100 tokens
+            scenario += token.mint(
+                sp.record(
+                    value = 100,
+                    address = Addresses.ALICE_ADDRESS
+                )
+            ).run(
+                level = sp.nat(0),
+                sender = Addresses.TOKEN_ADMIN_ADDRESS,
+            )
+
+            # AND Alice has approved Bob and other spenders
+            scenario += token.approve(
+                spender = Addresses.BOB_ADDRESS,
+                value = 20
+            ).run(
+                sender = Addresses.ALICE_ADDRESS
+            )
+            otherSpenders = []
+            for i in range(numSpenders - 1):
+                otherSpender = sp.test_account("spender%d" % i).address
+                otherSpenders.append(otherSpender)
+                scenario += token.approve(
+                    spender = otherSpender,
+                    value = 5
+                ).run(
+                    sender = Addresses.ALICE_ADDRESS
+                )
+
+            # WHEN Bob transfers tokens from Alice using part of his approval
+            scenario += token.transfer(
+                from_ = Addresses.ALICE_ADDRESS,
+                to_ = Addresses.CHARLIE_ADDRESS,
+                value = 10
+            ).run(
+                level = sp.nat(1),
+                sender = Addresses.BOB_ADDRESS
+            )
+
+            # THEN only Bob's approval is decreased
+            scenario.verify(token.data.approvals[(Addresses.ALICE_ADDRESS, Addresses.BOB_ADDRESS)] == 10)
+            for otherSpender in otherSpenders:
+                scenario.verify(token.data.approvals[(Addresses.ALICE_ADDRESS, otherSpender)] == 5)
+
+            # AND no approval is stored for the recipient.
+            scenario.verify(~token.data.approvals.contains((Addresses.CHARLIE_ADDRESS, Addresses.BOB_ADDRESS)))
+
+            # WHEN Bob spends the rest of his approval
+            scenario += token.transfer(
+                from_ = Addresses.ALICE_ADDRESS,
+                to_ = Addresses.CHARLIE_ADDRESS,
+                value = 10
+            ).run(
+                level = sp.nat(2),
+                sender = Addresses.BOB_ADDRESS
+            )
+
+            # THEN the approval is removed.
+            scenario.verify(~token.data.approvals.contains((Addresses.ALICE_ADDRESS, Addresses.BOB_ADDRESS)))
+            scenario.verify(token.data.balances[Addresses.CHARLIE_ADDRESS] == 20)
+
+    ################################################################
+    # submitPermits
+    ################################################################
+
+    TRANSFER_TYPE = sp.TRecord(from_ = sp.TAddress, to_ = sp.TAddress, value = sp.TNat).layout(("from_ as from", ("to_ as to", "value")))
+
+    def signPermit(scenario, token, account, counter, spender, params, chainId):
+        paramHash = scenario.compute(sp.blake2b(sp.pack((spender, sp.set_type_expr(params, TRANSFER_TYPE)))))
+        payload = scenario.compute(sp.pack(((chainId, token.address), (sp.nat(counter), paramHash))))
+        return sp.record(
+            publicKey = account.public_key,
+            signature = sp.make_signature(account.secret_key, payload, message_format = 'Raw'),
+            paramHash = paramHash
+        )
+
+    @sp.add_test(name="submitPermits - a permit allows a single transfer in place of an approval")
+    def test():
+        scenario = sp.test_scenario()
+
+        # GIVEN a Token contract
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+
+        # AND Alice has tokens
+        alice = sp.test_account("Alice")
+        scenario += token.mint(
+            sp.record(
+                address = alice.address,
+                value = sp.nat(100)
+            )
+        ).run(
+            sender = Addresses.TOKEN_ADMIN_ADDRESS
+        )
+
+        # AND Alice has signed a permit for Bob to transfer 10 tokens to himself
+        chainId = sp.chain_id_cst("0x9caecab9")
+        transferParams = sp.record(from_ = alice.address, to_ = Addresses.BOB_ADDRESS, value = sp.nat(10))
+        permit = signPermit(scenario, token, alice, 0, Addresses.BOB_ADDRESS, transferParams, chainId)
+
+        # WHEN a relayer submits the permit
+        scenario += token.submitPermits([permit]).run(
+            sender = Addresses.NULL_ADDRESS,
+            now = sp.timestamp(0),
+            chain_id = chainId
+        )
+
+        # AND Charlie tries to make the transfer with Bob's permit
+        # THEN the transfer fails.
+        scenario += token.transfer(transferParams).run(
+            sender = Addresses.CHARLIE_ADDRESS,
+            now = sp.timestamp(1),
+            valid = False
+        )
+
+        # WHEN Bob makes the transfer without an approval
+        scenario += token.transfer(transferParams).run(
+            sender = Addresses.BOB_ADDRESS,
+            now = sp.timestamp(1)
+        )
+
+        # THEN the tokens are moved.
+        scenario.verify(token.data.balances[alice.address] == sp.nat(90))
+        scenario.verify(token.data.balances[Addresses.BOB_ADDRESS] == sp.nat(10))
+
+        # AND the permit is used up.
+        scenario.verify(~token.data.permits.contains((alice.address, permit.paramHash)))
+        scenario += token.transfer(transferParams).run(
+            sender = Addresses.BOB_ADDRESS,
+            now = sp.timestamp(2),
+            valid = False
+        )
+
+        # AND the signature can not be submitted again.
+        scenario += token.submitPermits([permit]).run(
+            sender = Addresses.NULL_ADDRESS,
+            now = sp.timestamp(3),
+            chain_id = chainId,
+            valid = False
+        )
+
+    @sp.add_test(name="submitPermits - expired permits can not be used")
+    def test():
+        scenario = sp.test_scenario()
+
+        # GIVEN a Token contract where permits last 10 seconds
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+            permitExpiry = sp.nat(10)
+        )
+        scenario += token
+
+        # AND Alice has tokens
+        alice = sp.test_account("Alice")
+        scenario += token.mint(
+            sp.record(
+                address = alice.address,
+                value = sp.nat(100)
+            )
+        ).run(
+            sender = Addresses.TOKEN_ADMIN_ADDRESS
+        )
+
+        # AND Alice has submitted a permit for a transfer of 10 tokens to Bob
+        chainId = sp.chain_id_cst("0x9caecab9")
+        expiredParams = sp.record(from_ = alice.address, to_ = Addresses.BOB_ADDRESS, value = sp.nat(10))
+        expiredPermit = signPermit(scenario, token, alice, 0, Addresses.BOB_ADDRESS, expiredParams, chainId)
+        scenario += token.submitPermits([expiredPermit]).run(
+            sender = Addresses.NULL_ADDRESS,
+            now = sp.timestamp(0),
+            chain_id = chainId
+        )
+
+        # WHEN Bob makes the transfer after the permit expired
+        # THEN the transfer fails.
+        scenario += token.transfer(expiredParams).run(
+            sender = Addresses.BOB_ADDRESS,
+            now = sp.timestamp(10),
+            valid = False
+        )
+
+        # WHEN Alice signs the same transfer again
+        renewedPermit = signPermit(scenario, token, alice, 1, Addresses.BOB_ADDRESS, expiredParams, chainId)
+        scenario += token.submitPermits([renewedPermit]).run(
+            sender = Addresses.NULL_ADDRESS,
+            now = sp.timestamp(10),
+            chain_id = chainId
+        )
+
+        # THEN the expired permit is replaced
+        scenario.verify(token.data.permits[(alice.address, renewedPermit.paramHash)] == sp.timestamp(20))
+
+        # AND Bob can make the transfer.
+        scenario += token.transfer(expiredParams).run(
+            sender = Addresses.BOB_ADDRESS,
+            now = sp.timestamp(11)
+        )
+        scenario.verify(token.data.balances[Addresses.BOB_ADDRESS] == sp.nat(10))
+
+    @sp.add_test(name="removeExpiredPermits - removes only expired permits")
+    def test():
+        scenario = sp.test_scenario()
+
+        # GIVEN a Token contract where permits last 10 seconds
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+            permitExpiry = sp.nat(10)
+        )
+        scenario += token
+
+        # AND Alice has submitted a permit at time 0 and another at time 5
+        alice = sp.test_account("Alice")
+        chainId = sp.chain_id_cst("0x9caecab9")
+        expiredParams = sp.record(from_ = alice.address, to_ = Addresses.BOB_ADDRESS, value = sp.nat(10))
+        expiredPermit = signPermit(scenario, token, alice, 0, Addresses.BOB_ADDRESS, expiredParams, chainId)
+        scenario += token.submitPermits([expiredPermit]).run(
+            sender = Addresses.NULL_ADDRESS,
+            now = sp.timestamp(0),
+            chain_id = chainId
+        )
+        liveParams = sp.record(from_ = alice.address, to_ = Addresses.BOB_ADDRESS, value = sp.nat(20))
+        livePermit = signPermit(scenario, token, alice, 1, Addresses.BOB_ADDRESS, liveParams, chainId)
+        scenario += token.submitPermits([livePermit]).run(
+            sender = Addresses.NULL_ADDRESS,
+            now = sp.timestamp(5),
+            chain_id = chainId
+        )
+
+        # WHEN anyone removes both permits, and one which does not exist, after the first expired
+        scenario += token.removeExpiredPermits([
+            (alice.address, expiredPermit.paramHash),
+            (alice.address, livePermit.paramHash),
+            (Addresses.BOB_ADDRESS, expiredPermit.paramHash),
+        ]).run(
+            sender = Addresses.CHARLIE_ADDRESS,
+            now = sp.timestamp(10)
+        )
 
-        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 1)].fromBlock == level)
-        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 1)].balance == sp.as_nat(totalTokens - (transferValue * 2)))
+        # THEN the expired permit is removed
+        scenario.verify(~token.data.permits.contains((alice.address, expiredPermit.paramHash)))
 
-        # AND Bob only records one checkpoint        
-        scenario.verify(token.data.numCheckpoints.get(Addresses.BOB_ADDRESS, sp.nat(0)) == sp.nat(1))
-        scenario.verify(token.data.checkpoints[(Addresses.BOB_ADDRESS, 0)].fromBlock == level)
-        scenario.verify(token.data.checkpoints[(Addresses.BOB_ADDRESS, 0)].balance == (transferValue * 2))
+        # AND the permit which has not expired is kept.
+        scenario.verify(token.data.permits[(alice.address, livePermit.paramHash)] == sp.timestamp(15))
 
-    @sp.add_test(name="transfer - does not write a checkpoint when the sender and receiver are the same")
+    ################################################################
+    # getBalance / getAllowance
+    ################################################################
+
+    @sp.add_test(name="getBalance - returns balances and allowances without writing storage")
     def test():
         # GIVEN a Token contract
         scenario = sp.test_scenario()
@@ -1331,39 +3561,77 @@ if __name__ == "__main__":
         )
         scenario += token
 
-        # AND an alice has 100 tokens
-        totalTokens = 100
+        # AND Alice has 100 tokens and has approved Bob to spend 20 tokens
         scenario += token.mint(
             sp.record(
-                value = totalTokens,
+                value = 100,
                 address = Addresses.ALICE_ADDRESS
             )
         ).run(
             level = sp.nat(0),
             sender = Addresses.TOKEN_ADMIN_ADDRESS,
         )
-
-        # WHEN alice transfers tokens to herself.        
-        transferValue = sp.nat(10)
-        level = sp.nat(1)
-        scenario += token.transfer(
-            from_ = Addresses.ALICE_ADDRESS, 
-            to_ = Addresses.ALICE_ADDRESS, 
-            value = transferValue
+        scenario += token.approve(
+            spender = Addresses.BOB_ADDRESS,
+            value = 20
         ).run(
-            level = level,
             sender = Addresses.ALICE_ADDRESS
         )
 
-        # THEN Alice still has the same amount of tokens
-        scenario.verify(token.data.balances[Addresses.ALICE_ADDRESS] == totalTokens)
+        # AND a viewer contract.
+        viewer = Viewer(sp.TNat)
+        scenario += viewer
 
-        # AND Alice has one checkpoint
-        scenario.verify(token.data.numCheckpoints.get(Addresses.ALICE_ADDRESS, sp.nat(0)) == sp.nat(1))
+        # WHEN balances and allowances are read
+        # THEN stored values are returned by both the callback and on-chain views.
+        scenario += token.getBalance((Addresses.ALICE_ADDRESS, viewer.typed))
+        scenario.verify(viewer.data.last.open_some() == 100)
+        scenario.verify(sp.view("getBalance", token.address, Addresses.ALICE_ADDRESS, t = sp.TNat).open_some() == 100)
 
-        # THEN Alice's checkpoint is the initial mint.
-        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 0)].fromBlock == 0)
-        scenario.verify(token.data.checkpoints[(Addresses.ALICE_ADDRESS, 0)].balance == totalTokens)
+        allowance = sp.record(owner = Addresses.ALICE_ADDRESS, spender = Addresses.BOB_ADDRESS)
+        scenario += token.getAllowance((allowance, viewer.typed))
+        scenario.verify(viewer.data.last.open_some() == 20)
+        scenario.verify(sp.view("getAllowance", token.address, allowance, t = sp.TNat).open_some() == 20)
+
+        scenario.verify(sp.view("getTotalSupply", token.address, sp.unit, t = sp.TNat).open_some() == 100)
+
+        # AND zero is returned for an unknown owner, without writing a balance for them.
+        unknownAllowance = sp.record(owner = Addresses.CHARLIE_ADDRESS, spender = Addresses.BOB_ADDRESS)
+        scenario += token.getAllowance((unknownAllowance, viewer.typed))
+        scenario.verify(viewer.data.last.open_some() == 0)
+        scenario.verify(sp.view("getAllowance", token.address, unknownAllowance, t = sp.TNat).open_some() == 0)
+        scenario.verify(~token.data.balances.contains(Addresses.CHARLIE_ADDRESS))
+
+    @sp.add_test(name="getBalance - probing unknown addresses does not grow storage")
+    def test():
+        # GIVEN a Token contract
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+
+        # AND a viewer contract.
+        viewer = Viewer(sp.TNat)
+        scenario += viewer
+
+        # WHEN 1,000 unknown addresses have their balances probed
+        probedAddresses = []
+        for i in range(1000):
+            probedAddress = sp.test_account("probe%d" % i).address
+            probedAddresses.append(probedAddress)
+
+            scenario += token.getBalance((probedAddress, viewer.typed))
+
+            # THEN each probe returns zero
+            scenario.verify(viewer.data.last.open_some() == 0)
+            scenario.verify(sp.view("getBalance", token.address, probedAddress, t = sp.TNat).open_some() == 0)
+
+        # AND no balance or checkpoint was written for any probed address.
+        for probedAddress in probedAddresses:
+            scenario.verify(~token.data.balances.contains(probedAddress))
+            scenario.verify(~token.data.latestCheckpoint.contains(probedAddress))
 
     ################################################################
     # disableMinting
@@ -1504,9 +3772,9 @@ if __name__ == "__main__":
         scenario.verify(token.data.balances[Addresses.TOKEN_RECIPIENT] == value)
 
         # AND a single checkpoint was written.
-        scenario.verify(token.data.numCheckpoints[Addresses.TOKEN_RECIPIENT] == sp.nat(1))
-        scenario.verify(token.data.checkpoints[(Addresses.TOKEN_RECIPIENT, 0)].fromBlock == level)
-        scenario.verify(token.data.checkpoints[(Addresses.TOKEN_RECIPIENT, 0)].balance == value)
+        scenario.verify(token.data.latestCheckpoint[Addresses.TOKEN_RECIPIENT].index == sp.nat(0))
+        scenario.verify(token.data.latestCheckpoint[Addresses.TOKEN_RECIPIENT].fromBlock == level)
+        scenario.verify(token.data.latestCheckpoint[Addresses.TOKEN_RECIPIENT].balance == value)
 
     @sp.add_test(name="mint - writes checkpoints correctly for multiple mints")
     def test():
@@ -1547,15 +3815,123 @@ if __name__ == "__main__":
         scenario.verify(token.data.balances[Addresses.TOKEN_RECIPIENT] == (value1 + value2))
 
         # AND there are two checkpoints written.
-        scenario.verify(token.data.numCheckpoints[Addresses.TOKEN_RECIPIENT] == sp.nat(2))
+        scenario.verify(token.data.latestCheckpoint[Addresses.TOKEN_RECIPIENT].index == sp.nat(1))
 
         # AND the first checkpoint was written correctly.
         scenario.verify(token.data.checkpoints[(Addresses.TOKEN_RECIPIENT, 0)].fromBlock == level1)
         scenario.verify(token.data.checkpoints[(Addresses.TOKEN_RECIPIENT, 0)].balance == value1)
 
         # AND the second checkpoint was written correctly.
-        scenario.verify(token.data.checkpoints[(Addresses.TOKEN_RECIPIENT, 1)].fromBlock == level2)
-        scenario.verify(token.data.checkpoints[(Addresses.TOKEN_RECIPIENT, 1)].balance == (value1 + value2))
+        scenario.verify(token.data.latestCheckpoint[Addresses.TOKEN_RECIPIENT].fromBlock == level2)
+        scenario.verify(token.data.latestCheckpoint[Addresses.TOKEN_RECIPIENT].balance == (value1 + value2))
+
+    @sp.add_test(name="mint - writes checkpoints of the total supply")
+    def test():
+        # GIVEN a Token contract
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+
+        # WHEN mint is called for two recipients at level 1 and for one recipient at level 2
+        scenario += token.mint(
+            sp.record(
+                value = sp.nat(100),
+                address = Addresses.ALICE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(1),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS
+        )
+        scenario += token.mint(
+            sp.record(
+                value = sp.nat(50),
+                address = Addresses.BOB_ADDRESS
+            )
+        ).run(
+            level = sp.nat(1),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS
+        )
+        scenario += token.mint(
+            sp.record(
+                value = sp.nat(10),
+                address = Addresses.ALICE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(2),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS
+        )
+
+        # THEN one supply checkpoint was written per level, under the token's address.
+        scenario.verify(token.data.supplyCheckpoints[(token.address, 0)].fromBlock == sp.nat(1))
+        scenario.verify(token.data.supplyCheckpoints[(token.address, 0)].balance == sp.nat(150))
+        scenario.verify(token.data.latestSupplyCheckpoint[token.address].index == sp.nat(1))
+        scenario.verify(token.data.latestSupplyCheckpoint[token.address].fromBlock == sp.nat(2))
+        scenario.verify(token.data.latestSupplyCheckpoint[token.address].balance == sp.nat(160))
+
+        # AND transfers do not write supply checkpoints.
+        scenario += token.transfer(
+            sp.record(
+                from_ = Addresses.ALICE_ADDRESS,
+                to_ = Addresses.BOB_ADDRESS,
+                value = sp.nat(10)
+            )
+        ).run(
+            level = sp.nat(3),
+            sender = Addresses.ALICE_ADDRESS
+        )
+        scenario.verify(token.data.latestSupplyCheckpoint[token.address].index == sp.nat(1))
+
+    @sp.add_test(name="getPriorTotalSupply - returns the supply before, between and after mints")
+    def test():
+        # GIVEN a Token contract
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+
+        # AND 100 tokens are minted at level 2, 300 tokens at level 6 and 600 tokens at level 10
+        for (level, value) in [(2, 100), (6, 300), (10, 600)]:
+            scenario += token.mint(
+                sp.record(
+                    value = sp.nat(value),
+                    address = Addresses.ALICE_ADDRESS
+                )
+            ).run(
+                level = sp.nat(level),
+                sender = Addresses.TOKEN_ADMIN_ADDRESS
+            )
+
+        # AND tokens are transferred at level 12, which does not change the supply
+        scenario += token.transfer(
+            sp.record(
+                from_ = Addresses.ALICE_ADDRESS,
+                to_ = Addresses.BOB_ADDRESS,
+                value = sp.nat(10)
+            )
+        ).run(
+            level = sp.nat(12),
+            sender = Addresses.ALICE_ADDRESS
+        )
+
+        # WHEN the supply is requested on, between and after each mint
+        # THEN it is the supply at the end of that level.
+        expected = [
+            (0, 0),
+            (1, 0),
+            (2, 100),
+            (5, 100),
+            (6, 400),
+            (9, 400),
+            (10, 1000),
+            (11, 1000),
+        ]
+        for (level, supply) in expected:
+            scenario.verify(sp.view("getPriorTotalSupply", token.address, sp.nat(level), t = sp.TNat).open_some() == supply)
 
     ################################################################
     # updateContractMetadata
@@ -1668,6 +4044,228 @@ if __name__ == "__main__":
             valid = False
         )            
 
+    ################################################################
+    # setSnapshotter
+    ################################################################
+
+    @sp.add_test(name="setSnapshotter - sets the snapshotter")
+    def test():
+        # GIVEN a Token contract
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+
+        # WHEN the admin sets the snapshotter
+        scenario += token.setSnapshotter(sp.some(Addresses.DAO_ADDRESS)).run(
+            sender = Addresses.TOKEN_ADMIN_ADDRESS
+        )
+
+        # THEN the snapshotter is updated.
+        scenario.verify(token.data.snapshotter == sp.some(Addresses.DAO_ADDRESS))
+
+    @sp.add_test(name="setSnapshotter - fails when not called by admin")
+    def test():
+        # GIVEN a Token contract
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+        scenario += token
+
+        # WHEN the snapshotter is set by someone other than the admin
+        # THEN the call fails.
+        scenario += token.setSnapshotter(sp.some(Addresses.NULL_ADDRESS)).run(
+            sender = Addresses.NULL_ADDRESS,
+            valid = False
+        )
+
+    ################################################################
+    # snapshot
+    ################################################################
+
+    @sp.add_test(name="snapshot - fails when not called by snapshotter")
+    def test():
+        # GIVEN a Token contract with a snapshotter
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+            snapshotter = sp.some(Addresses.DAO_ADDRESS)
+        )
+        scenario += token
+
+        # WHEN a snapshot is taken by someone other than the snapshotter
+        # THEN the call fails.
+        scenario += token.snapshot(sp.record(level = 10, expiry = 20)).run(
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+            level = sp.nat(1),
+            valid = False
+        )
+
+    @sp.add_test(name="snapshot - levels and expiries never decrease")
+    def test():
+        # GIVEN a Token contract with a snapshotter
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+            snapshotter = sp.some(Addresses.DAO_ADDRESS)
+        )
+        scenario += token
+
+        # WHEN a snapshot is taken
+        scenario += token.snapshot(sp.record(level = 10, expiry = 20)).run(
+            sender = Addresses.DAO_ADDRESS,
+            level = sp.nat(1)
+        )
+
+        # THEN it is recorded with the first ID
+        scenario.verify(token.data.snapshots[0].level == 10)
+        scenario.verify(token.data.snapshots[0].expiry == 20)
+        scenario.verify(token.data.nextSnapshotId == 1)
+
+        # WHEN a snapshot is taken of an earlier level
+        # THEN the call fails.
+        scenario += token.snapshot(sp.record(level = 5, expiry = 15)).run(
+            sender = Addresses.DAO_ADDRESS,
+            level = sp.nat(2),
+            valid = False
+        )
+
+        # WHEN a snapshot is taken of the same level with an earlier expiry
+        scenario += token.snapshot(sp.record(level = 10, expiry = 15)).run(
+            sender = Addresses.DAO_ADDRESS,
+            level = sp.nat(2)
+        )
+
+        # THEN the expiry is clamped to the previous snapshot.
+        scenario.verify(token.data.snapshots[1].level == 10)
+        scenario.verify(token.data.snapshots[1].expiry == 20)
+
+        # WHEN a snapshot is taken of a past level
+        # THEN the call fails.
+        scenario += token.snapshot(sp.record(level = 11, expiry = 30)).run(
+            sender = Addresses.DAO_ADDRESS,
+            level = sp.nat(12),
+            valid = False
+        )
+
+        # WHEN a snapshot is taken of the current level
+        scenario += token.snapshot(sp.record(level = 12, expiry = 30)).run(
+            sender = Addresses.DAO_ADDRESS,
+            level = sp.nat(12)
+        )
+
+        # THEN it is recorded.
+        scenario.verify(token.data.snapshots[2].level == 12)
+        scenario.verify(token.data.snapshots[2].expiry == 30)
+        scenario.verify(token.data.nextSnapshotId == 3)
+
+    @sp.add_test(name="snapshot - voting power is written once on the first change after the snapshot level")
+    def test():
+        # GIVEN a Token contract with a snapshotter
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+            snapshotter = sp.some(Addresses.DAO_ADDRESS)
+        )
+        scenario += token
+
+        # AND Alice has 100 tokens
+        scenario += token.mint(
+            sp.record(
+                value = 100,
+                address = Addresses.ALICE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(0),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+
+        # AND a snapshot is taken at level 5
+        scenario += token.snapshot(sp.record(level = 5, expiry = 20)).run(
+            sender = Addresses.DAO_ADDRESS,
+            level = sp.nat(1)
+        )
+
+        # WHEN Alice transfers tokens to Bob before the snapshot level
+        scenario += token.transfer(
+            from_ = Addresses.ALICE_ADDRESS, 
+            to_ = Addresses.BOB_ADDRESS, 
+            value = 10
+        ).run(
+            level = sp.nat(5),
+            sender = Addresses.ALICE_ADDRESS
+        )
+
+        # THEN no snapshot voting power is written.
+        scenario.verify(~token.data.snapshotVotes.contains((Addresses.ALICE_ADDRESS, 0)))
+        scenario.verify(~token.data.snapshotVotes.contains((Addresses.BOB_ADDRESS, 0)))
+
+        # WHEN Alice transfers tokens to Bob after the snapshot level
+        scenario += token.transfer(
+            from_ = Addresses.ALICE_ADDRESS, 
+            to_ = Addresses.BOB_ADDRESS, 
+            value = 10
+        ).run(
+            level = sp.nat(6),
+            sender = Addresses.ALICE_ADDRESS
+        )
+
+        # THEN the voting power at the snapshot level is written.
+        scenario.verify(token.data.snapshotVotes[(Addresses.ALICE_ADDRESS, 0)] == 90)
+        scenario.verify(token.data.snapshotVotes[(Addresses.BOB_ADDRESS, 0)] == 10)
+
+        # WHEN Alice transfers tokens to Bob again
+        scenario += token.transfer(
+            from_ = Addresses.ALICE_ADDRESS, 
+            to_ = Addresses.BOB_ADDRESS, 
+            value = 10
+        ).run(
+            level = sp.nat(7),
+            sender = Addresses.ALICE_ADDRESS
+        )
+
+        # THEN the snapshot voting power is unchanged.
+        scenario.verify(token.data.snapshotVotes[(Addresses.ALICE_ADDRESS, 0)] == 90)
+        scenario.verify(token.data.snapshotVotes[(Addresses.BOB_ADDRESS, 0)] == 10)
+
+    @sp.add_test(name="snapshot - voting power is not written for expired snapshots")
+    def test():
+        # GIVEN a Token contract with a snapshotter
+        scenario = sp.test_scenario()
+
+        token = FA12(
+            admin = Addresses.TOKEN_ADMIN_ADDRESS,
+            snapshotter = sp.some(Addresses.DAO_ADDRESS)
+        )
+        scenario += token
+
+        # AND a snapshot which expires at level 10
+        scenario += token.snapshot(sp.record(level = 5, expiry = 10)).run(
+            sender = Addresses.DAO_ADDRESS,
+            level = sp.nat(1)
+        )
+
+        # WHEN Alice receives tokens after the snapshot expires
+        scenario += token.mint(
+            sp.record(
+                value = 100,
+                address = Addresses.ALICE_ADDRESS
+            )
+        ).run(
+            level = sp.nat(11),
+            sender = Addresses.TOKEN_ADMIN_ADDRESS,
+        )
+
+        # THEN no snapshot voting power is written.
+        scenario.verify(~token.data.snapshotVotes.contains((Addresses.ALICE_ADDRESS, 0)))
+
     ################################################################
     # Tests from the original SmartPy template.
     ################################################################
@@ -238,68 +238,111 @@ class VestingVault(sp.Contract):
       # Verify the requester is the owner.
       sp.verify(sp.sender == self.data.owner, Errors.ERROR_NOT_OWNER)      
 
-      # Send approvals.
-      # This function sends two changes:
-      # (1) An approval to 0, in case approval isn't 0 (you can't change an approval from 10 -> 20, you must go 10 -> 0 -> 20)
-      # (2) An approval to the requested amount
-      approvalHandle = sp.contract(
-        sp.TRecord(spender = sp.TAddress, value = sp.TNat).layout(("spender", "value")),
+      # Send the escrow to the dao along with the proposal. The dao creates the poll when it is notified of
+      # the transfer, so no approval is needed.
+      transferHandle = sp.contract(
+        sp.TRecord(from_ = sp.TAddress, to_ = sp.TAddress, value = sp.TNat, data = sp.TBytes).layout(("from_ as from", ("to_ as to", ("value", "data")))),
         self.data.tokenContractAddress,
-        "approve"
+        "transferAndCall"
       ).open_some()
-
-      zeroApprovalArg = sp.record(
-        spender = self.data.daoContractAddress,
-        value = sp.nat(0)
-      )
-      sp.transfer(zeroApprovalArg, sp.mutez(0), approvalHandle)
-
-      escrowApprovalArg = sp.record(
-        spender = self.data.daoContractAddress, 
+      transferArg = sp.record(
+        from_ = sp.self_address,
+        to_ = self.data.daoContractAddress,
         value = params.escrowAmount,
+        data = sp.pack(params.proposal)
       )
-      sp.transfer(escrowApprovalArg, sp.mutez(0), approvalHandle)
+      sp.transfer(transferArg, sp.mutez(0), transferHandle)
+
+    # Vote for a proposal.
+    # Params:
+    # - pollId (nat): The poll to vote on.
+    # - voteValue (nat): The value of the vote.
+    @sp.entry_point
+    def vote(self, params):
+      sp.set_type(params, sp.TRecord(
+        pollId = sp.TNat,
+        voteValue = sp.TNat
+      ).layout(("pollId", "voteValue")))
+
+      # Verify the requester is the owner.
+      sp.verify(sp.sender == self.data.owner, Errors.ERROR_NOT_OWNER)
 
-      # Send a proposal request
-      proposalHandle = sp.contract(
-        Proposal.PROPOSAL_TYPE,
+      # Send a vote request
+      handle = sp.contract(
+        sp.TRecord(
+          pollId = sp.TNat,
+          voteValue = sp.TNat
+        ).layout(("pollId", "voteValue")),
         self.data.daoContractAddress,
-        "propose"
+        "vote"
       ).open_some()
-      proposalArg = params.proposal
-      sp.transfer(proposalArg, sp.mutez(0), proposalHandle)
+      sp.transfer(params, sp.mutez(0), handle)
 
-    # Vote for a proposal.
+    # Vote for a proposal with an amount for each vote value.
+    # Params:
+    # - pollId (nat): The poll to vote on.
+    # - yayVotes (nat): The number of votes for yay.
+    # - nayVotes (nat): The number of votes for nay.
+    # - abstainVotes (nat): The number of votes to abstain with.
     @sp.entry_point
-    def vote(self, voteValue):
-      sp.set_type(voteValue, sp.TNat)
+    def splitVote(self, params):
+      sp.set_type(params, sp.TRecord(
+        pollId = sp.TNat,
+        yayVotes = sp.TNat,
+        nayVotes = sp.TNat,
+        abstainVotes = sp.TNat
+      ).layout(("pollId", ("yayVotes", ("nayVotes", "abstainVotes")))))
 
       # Verify the requester is the owner.
       sp.verify(sp.sender == self.data.owner, Errors.ERROR_NOT_OWNER)
 
       # Send a vote request
       handle = sp.contract(
-        sp.TNat,
+        sp.TRecord(
+          pollId = sp.TNat,
+          yayVotes = sp.TNat,
+          nayVotes = sp.TNat,
+          abstainVotes = sp.TNat
+        ).layout(("pollId", ("yayVotes", ("nayVotes", "abstainVotes")))),
         self.data.daoContractAddress,
-        "vote"
+        "splitVote"
       ).open_some()
-      sp.transfer(voteValue, sp.mutez(0), handle)
+      sp.transfer(params, sp.mutez(0), handle)
+
+    # An on-chain view of the vault's voting power in a poll.
+    # The vault's voting power includes tokens which are still locked. It is read from the dao, which reads
+    # it from the token, so the whole chain is synchronous.
+    @sp.onchain_view()
+    def getVotingPower(self, pollId):
+      sp.set_type(pollId, sp.TNat)
+
+      sp.result(
+        sp.view(
+          "getVotingPower",
+          self.data.daoContractAddress,
+          sp.record(
+            address = sp.self_address,
+            pollId = pollId
+          ),
+          t = sp.TNat
+        ).open_some(Errors.ERROR_NO_VOTING_POWER_VIEW)
+      )
 
     # Execute a proposal
     @sp.entry_point
-    def executeTimelock(self, unit):
-      sp.set_type(unit, sp.TUnit)
+    def executeTimelock(self, pollId):
+      sp.set_type(pollId, sp.TNat)
 
       # Verify the requester is the owner.
       sp.verify(sp.sender == self.data.owner, Errors.ERROR_NOT_OWNER)            
 
       # Send an execution request
       handle = sp.contract(
-        sp.TUnit,
+        sp.TNat,
         self.data.daoContractAddress,
         "executeTimelock"
       ).open_some()
-      sp.transfer(sp.unit, sp.mutez(0), handle)
+      sp.transfer(pollId, sp.mutez(0), handle)
 
 ################################################################
 ################################################################
@@ -315,6 +358,7 @@ if __name__ == "__main__":
   FA12 = sp.import_script_from_url("file:./test-helpers/fa12.py")
   FA2 = sp.import_script_from_url("file:./test-helpers/fa2.py")
   HistoricalOutcomes = sp.import_script_from_url("file:common/historical-outcomes.py")
+  Poll = sp.import_script_from_url("file:common/poll.py")
   PollOutcomes = sp.import_script_from_url("file:common/poll-outcomes.py")
   Store = sp.import_script_from_url("file:test-helpers/store.py")
   Token = sp.import_script_from_url("file:./token.py")
@@ -739,6 +783,11 @@ if __name__ == "__main__":
     )
     scenario += dao
 
+    # AND the dao takes snapshots of the token.
+    scenario += token.setSnapshotter(sp.some(dao.address)).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+
     # AND a vesting vault contract
     amountPerBlock = 1
     startBlock = 0
@@ -781,7 +830,7 @@ if __name__ == "__main__":
       title = title,
       descriptionLink = descriptionLink,
       descriptionHash = descriptionHash,
-      proposalLambda = updateLambda
+      proposalLambdas = sp.list([updateLambda])
     )
     
     # WHEN propose is called by someone other than the owner
@@ -813,6 +862,11 @@ if __name__ == "__main__":
     )
     scenario += dao
 
+    # AND the dao takes snapshots of the token.
+    scenario += token.setSnapshotter(sp.some(dao.address)).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+
     # AND a vesting vault contract
     amountPerBlock = 1
     startBlock = 0
@@ -855,7 +909,7 @@ if __name__ == "__main__":
       title = title,
       descriptionLink = descriptionLink,
       descriptionHash = descriptionHash,
-      proposalLambda = updateLambda
+      proposalLambdas = sp.list([updateLambda])
     )
     
     # WHEN propose is called
@@ -869,7 +923,14 @@ if __name__ == "__main__":
     )
 
     # THEN a proposal is loaded into the timelock.
-    scenario.verify(dao.data.poll.is_some())
+    scenario.verify(dao.data.polls.contains(sp.nat(0)))
+
+    # AND the vault is the author of the poll.
+    scenario.verify(dao.data.polls[sp.nat(0)].author == vault.address)
+
+    # AND the escrow was moved to the dao without leaving an allowance.
+    scenario.verify(token.data.balances[dao.address] == escrowAmount)
+    scenario.verify(~token.data.approvals.contains((vault.address, dao.address)))
 
   @sp.add_test(name="propose - can propose when there is a dangling allowance")
   def test():
@@ -887,6 +948,11 @@ if __name__ == "__main__":
     )
     scenario += dao
 
+    # AND the dao takes snapshots of the token.
+    scenario += token.setSnapshotter(sp.some(dao.address)).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS
+    )
+
     # AND a vesting vault contract
     amountPerBlock = 1
     startBlock = 0
@@ -929,7 +995,7 @@ if __name__ == "__main__":
       title = title,
       descriptionLink = descriptionLink,
       descriptionHash = descriptionHash,
-      proposalLambda = updateLambda
+      proposalLambdas = sp.list([updateLambda])
     )
 
     # AND there is a dangling proposal amount for the dao to move the vault's tokens.
@@ -953,7 +1019,7 @@ if __name__ == "__main__":
     )
 
     # THEN a proposal is loaded into the timelock.
-    scenario.verify(dao.data.poll.is_some())
+    scenario.verify(dao.data.polls.contains(sp.nat(0)))
 
   ################################################################
   # vote
@@ -973,28 +1039,34 @@ if __name__ == "__main__":
     votingEndBlock = sp.nat(21)
     poll = sp.record(
       id = sp.nat(0),
-      proposal = sp.record(
-        title = 'timelocked prop',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = 'abc123',
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
       votingStartBlock = sp.nat(11),
       votingEndBlock = votingEndBlock,
       yayVotes = sp.nat(0),
       nayVotes = sp.nat(0),
       abstainVotes = sp.nat(0),
       totalVotes = sp.nat(0),
-      voters = {},
       author = Addresses.ALICE_ADDRESS,
       escrowAmount = sp.nat(1),
       quorum = sp.nat(100),
-      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99))
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
     )
 
     # AND a dao contract with the poll underway.
     dao = Dao.DaoContract(
-      poll = sp.some(poll),
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
       tokenContractAddress = token.address,
     )
     scenario += dao
@@ -1027,7 +1099,7 @@ if __name__ == "__main__":
     # THEN the call fails.
     notOwner = Addresses.NULL_ADDRESS
     voteValue = VoteValue.YAY
-    scenario += vault.vote(voteValue).run(
+    scenario += vault.vote(pollId = sp.nat(0), voteValue = voteValue).run(
       sender = notOwner,
       level = sp.as_nat(votingEndBlock - 1),
       valid = False
@@ -1047,28 +1119,34 @@ if __name__ == "__main__":
     votingEndBlock = sp.nat(21)
     poll = sp.record(
       id = sp.nat(0),
-      proposal = sp.record(
-        title = 'timelocked prop',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = 'abc123',
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
       votingStartBlock = sp.nat(11),
       votingEndBlock = votingEndBlock,
       yayVotes = sp.nat(0),
       nayVotes = sp.nat(0),
       abstainVotes = sp.nat(0),
       totalVotes = sp.nat(0),
-      voters = {},
       author = Addresses.ALICE_ADDRESS,
       escrowAmount = sp.nat(1),
       quorum = sp.nat(100),
-      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99))
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
     )
 
     # AND a dao contract with the poll underway.
     dao = Dao.DaoContract(
-      poll = sp.some(poll),
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
       tokenContractAddress = token.address,
     )
     scenario += dao
@@ -1100,17 +1178,197 @@ if __name__ == "__main__":
 
     # WHEN vote is called
     voteValue = VoteValue.YAY
-    scenario += vault.vote(voteValue).run(
+    scenario += vault.vote(pollId = sp.nat(0), voteValue = voteValue).run(
       sender = Addresses.TOKEN_RECIPIENT,
       level = sp.as_nat(votingEndBlock - 1),
     )    
 
     # THEN the poll increments the value.
-    scenario.verify(dao.data.poll.open_some().yayVotes == tokensInVault)
-    scenario.verify(dao.data.poll.open_some().totalVotes == tokensInVault)
+    scenario.verify(dao.data.polls[sp.nat(0)].yayVotes == tokensInVault)
+    scenario.verify(dao.data.polls[sp.nat(0)].totalVotes == tokensInVault)
 
     # AND the vesting contract is listed in voters
-    scenario.verify(dao.data.poll.open_some().voters.contains(vault.address))
+    scenario.verify(dao.data.voters.contains((sp.nat(0), vault.address)))
+
+  @sp.add_test(name="vote - votes with locked tokens in a single operation")
+  def test():
+    scenario = sp.test_scenario()
+
+    # GIVEN a token contract
+    token = Token.FA12(
+      admin = Addresses.TOKEN_ADMIN_ADDRESS,
+    )
+    scenario += token
+
+    # AND a poll
+    votingEndBlock = sp.nat(21)
+    poll = sp.record(
+      id = sp.nat(0),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
+      votingStartBlock = sp.nat(11),
+      votingEndBlock = votingEndBlock,
+      yayVotes = sp.nat(0),
+      nayVotes = sp.nat(0),
+      abstainVotes = sp.nat(0),
+      totalVotes = sp.nat(0),
+      author = Addresses.ALICE_ADDRESS,
+      escrowAmount = sp.nat(1),
+      quorum = sp.nat(100),
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
+    )
+
+    # AND a dao contract with the poll underway.
+    dao = Dao.DaoContract(
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
+      tokenContractAddress = token.address,
+    )
+    scenario += dao
+    
+    # AND a vesting vault contract which does not start vesting until after the poll
+    amountPerBlock = 1
+    startBlock = 100
+    owner = Addresses.TOKEN_RECIPIENT
+    vault = VestingVault(
+      amountPerBlock = amountPerBlock,
+      daoContractAddress = dao.address,
+      startBlock = startBlock,
+      owner = owner,
+      tokenContractAddress = token.address
+    )
+    scenario += vault
+
+    # AND the vault is funded.
+    tokensInVault = sp.nat(100)
+    scenario += token.mint(
+      sp.record(
+        address = vault.address,
+        value = tokensInVault
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS,
+      level = 0
+    )
+
+    # WHEN vote is called
+    voteValue = VoteValue.YAY
+    scenario += vault.vote(pollId = sp.nat(0), voteValue = voteValue).run(
+      sender = Addresses.TOKEN_RECIPIENT,
+      level = sp.as_nat(votingEndBlock - 1),
+    )    
+
+    # THEN the poll is incremented by the locked tokens.
+    scenario.verify(dao.data.polls[sp.nat(0)].yayVotes == tokensInVault)
+    scenario.verify(dao.data.polls[sp.nat(0)].totalVotes == tokensInVault)
+
+    # AND the vote was tallied without a callback from the token contract.
+    scenario.verify(dao.data.state == Dao.STATE_MACHINE_IDLE)
+    scenario.verify(dao.data.votingState.is_none())
+
+  ################################################################
+  # splitVote
+  ################################################################
+
+  @sp.add_test(name="splitVote - successfully splits votes")
+  def test():
+    scenario = sp.test_scenario()
+
+    # GIVEN a token contract
+    token = Token.FA12(
+      admin = Addresses.TOKEN_ADMIN_ADDRESS,
+    )
+    scenario += token
+
+    # AND a poll
+    votingEndBlock = sp.nat(21)
+    poll = sp.record(
+      id = sp.nat(0),
+      proposalHash = sp.bytes("0x00"),
+      title = "Prop 1",
+      descriptionHash = "xyz123",
+      votingStartBlock = sp.nat(11),
+      votingEndBlock = votingEndBlock,
+      yayVotes = sp.nat(0),
+      nayVotes = sp.nat(0),
+      abstainVotes = sp.nat(0),
+      totalVotes = sp.nat(0),
+      author = Addresses.ALICE_ADDRESS,
+      escrowAmount = sp.nat(1),
+      quorum = sp.nat(100),
+      quorumCap = sp.record(lower = sp.nat(1), upper = sp.nat(99)),
+      minYayVotesPercentForEscrowReturn = sp.nat(20),
+      percentageForSuperMajority = sp.nat(80),
+      snapshotId = sp.none
+    )
+
+    # AND a dao contract with the poll underway.
+    dao = Dao.DaoContract(
+      polls = sp.big_map(
+        l = {
+          sp.nat(0): poll
+        },
+        tkey = sp.TNat,
+        tvalue = Poll.POLL_TYPE,
+      ),
+      activePolls = sp.set([sp.nat(0)]),
+      tokenContractAddress = token.address,
+    )
+    scenario += dao
+    
+    # AND a vesting vault contract
+    amountPerBlock = 1
+    startBlock = 0
+    owner = Addresses.TOKEN_RECIPIENT
+    vault = VestingVault(
+      amountPerBlock = amountPerBlock,
+      daoContractAddress = dao.address,
+      startBlock = startBlock,
+      owner = owner,
+      tokenContractAddress = token.address
+    )
+    scenario += vault
+
+    # AND the vault is funded.
+    tokensInVault = sp.nat(100)
+    scenario += token.mint(
+      sp.record(
+        address = vault.address,
+        value = tokensInVault
+      )
+    ).run(
+      sender = Addresses.TOKEN_ADMIN_ADDRESS,
+      level = 0
+    )
+
+    # WHEN splitVote is called
+    scenario += vault.splitVote(
+      pollId = sp.nat(0),
+      yayVotes = sp.nat(60),
+      nayVotes = sp.nat(40),
+      abstainVotes = sp.nat(0)
+    ).run(
+      sender = Addresses.TOKEN_RECIPIENT,
+      level = sp.as_nat(votingEndBlock - 1),
+    )
+
+    # THEN the poll increments each value.
+    scenario.verify(dao.data.polls[sp.nat(0)].yayVotes == 60)
+    scenario.verify(dao.data.polls[sp.nat(0)].nayVotes == 40)
+    scenario.verify(dao.data.polls[sp.nat(0)].totalVotes == tokensInVault)
+
+    # AND the vesting contract is listed in voters
+    scenario.verify(dao.data.voters.contains((sp.nat(0), vault.address)))
 
   ################################################################
   # executeTimelock
@@ -1153,48 +1411,48 @@ if __name__ == "__main__":
     pollId = sp.nat(0)
     endBlock = sp.nat(10)
     cancelBlock = sp.nat(20)
+    proposal = sp.record(
+      title = 'timelocked prop',
+      descriptionLink = 'ipfs://xyz',
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([updateLambda])
+    )
     timelockItem = sp.record(
       id = pollId,
-      proposal = sp.record(
-        title = 'timelocked prop',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = updateLambda
-      ),
+      proposalHash = sp.bytes("0x00"),
       endBlock = endBlock,
       cancelBlock = cancelBlock,
       author = vault.address,
     )
 
-    poll = sp.record(
-      id = pollId,
-      proposal = sp.record(
-        title = "timelocked prop",
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
-      votingStartBlock = sp.nat(1),
-      votingEndBlock = sp.nat(5),
-      yayVotes = sp.nat(100),
-      nayVotes = sp.nat(0),
-      abstainVotes = sp.nat(0),
-      totalVotes = sp.nat(100),
-      voters = {},
-      author = vault.address,
-      escrowAmount = sp.nat(2),
-      quorum = sp.nat(100),
-      quorumCap = sp.record(lower = sp.nat(0), upper = sp.nat(1000))
-    )
-
     # AND a dao contract with the item.
     dao = Dao.DaoContract(
-      timelockItem = sp.some(timelockItem),
+      timelockItems = sp.big_map(
+        l = {
+          pollId: timelockItem
+        },
+        tkey = sp.TNat,
+        tvalue = Dao.TIMELOCK_ITEM_TYPE,
+      ),
+      proposals = sp.big_map(
+        l = {
+          pollId: proposal
+        },
+        tkey = sp.TNat,
+        tvalue = Proposal.PROPOSAL_TYPE,
+      ),
       outcomes = sp.big_map(
         l = {
             pollId: sp.record(
               outcome = PollOutcomes.POLL_OUTCOME_IN_TIMELOCK,
-              poll = poll
+              title = "timelocked prop",
+              descriptionHash = "xyz123",
+              author = vault.address,
+              yayVotes = sp.nat(100),
+              nayVotes = sp.nat(0),
+              abstainVotes = sp.nat(0),
+              totalVotes = sp.nat(100),
+              quorum = sp.nat(100)
             )
         },
         tkey = sp.TNat,
@@ -1225,7 +1483,7 @@ if __name__ == "__main__":
     )
 
     # WHEN executeTimelock is called
-    scenario += vault.executeTimelock(sp.unit).run(
+    scenario += vault.executeTimelock(pollId).run(
       sender = Addresses.TOKEN_RECIPIENT,
       level = endBlock + 1,
     )    
@@ -1237,7 +1495,7 @@ if __name__ == "__main__":
     scenario.verify(dao.data.outcomes[pollId].outcome == PollOutcomes.POLL_OUTCOME_EXECUTED)
 
     # AND the timelock is empty.
-    scenario.verify(~dao.data.timelockItem.is_some())
+    scenario.verify(~dao.data.timelockItems.contains(pollId))
 
 
   @sp.add_test(name="executeTimelock - fails if not called by owner")
@@ -1277,48 +1535,48 @@ if __name__ == "__main__":
     pollId = sp.nat(0)
     endBlock = sp.nat(10)
     cancelBlock = sp.nat(20)
+    proposal = sp.record(
+      title = 'timelocked prop',
+      descriptionLink = 'ipfs://xyz',
+      descriptionHash = "xyz123",
+      proposalLambdas = sp.list([updateLambda])
+    )
     timelockItem = sp.record(
       id = pollId,
-      proposal = sp.record(
-        title = 'timelocked prop',
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = updateLambda
-      ),
+      proposalHash = sp.bytes("0x00"),
       endBlock = endBlock,
       cancelBlock = cancelBlock,
       author = vault.address,
     )
 
-    poll = sp.record(
-      id = pollId,
-      proposal = sp.record(
-        title = "timelocked prop",
-        descriptionLink = 'ipfs://xyz',
-        descriptionHash = "xyz123",
-        proposalLambda = sp.build_lambda(lambda x: sp.list(l = [], t = sp.TOperation))
-      ),
-      votingStartBlock = sp.nat(1),
-      votingEndBlock = sp.nat(5),
-      yayVotes = sp.nat(100),
-      nayVotes = sp.nat(0),
-      abstainVotes = sp.nat(0),
-      totalVotes = sp.nat(100),
-      voters = {},
-      author = vault.address,
-      escrowAmount = sp.nat(2),
-      quorum = sp.nat(100),
-      quorumCap = sp.record(lower = sp.nat(0), upper = sp.nat(1000))
-    )
-
     # AND a dao contract with the item.
     dao = Dao.DaoContract(
-      timelockItem = sp.some(timelockItem),
+      timelockItems = sp.big_map(
+        l = {
+          pollId: timelockItem
+        },
+        tkey = sp.TNat,
+        tvalue = Dao.TIMELOCK_ITEM_TYPE,
+      ),
+      proposals = sp.big_map(
+        l = {
+          pollId: proposal
+        },
+        tkey = sp.TNat,
+        tvalue = Proposal.PROPOSAL_TYPE,
+      ),
       outcomes = sp.big_map(
         l = {
             pollId: sp.record(
               outcome = PollOutcomes.POLL_OUTCOME_IN_TIMELOCK,
-              poll = poll
+              title = "timelocked prop",
+              descriptionHash = "xyz123",
+              author = vault.address,
+              yayVotes = sp.nat(100),
+              nayVotes = sp.nat(0),
+              abstainVotes = sp.nat(0),
+              totalVotes = sp.nat(100),
+              quorum = sp.nat(100)
             )
         },
         tkey = sp.TNat,
@@ -1350,7 +1608,7 @@ if __name__ == "__main__":
 
     # WHEN executeTimelock is called by someone other than the owner
     # THEN the call fails.
-    scenario += vault.executeTimelock(sp.unit).run(
+    scenario += vault.executeTimelock(pollId).run(
       sender = Addresses.NULL_ADDRESS,
       level = endBlock + 1,
       valid = False